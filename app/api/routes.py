@@ -1,16 +1,68 @@
+import json
+import time
+import asyncio
 import bittensor as bt
 from typing import Optional
-from fastapi import APIRouter, Depends
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.constants import ROUND_TABLE_HOTKEY, NETWORK
 from app.services.stake import stake_service
+from app.services.portfolio import DEFAULT_POINTS, PortfolioStore
+from app.services.tx_tracker import TERMINAL_STATUSES
 from app.services.auth import get_current_username
 from app.services.wallets import wallets
 from app.core.config import settings
+from app.core.metrics import (
+    CHAIN_HEAD_LAG,
+    RPC_ENDPOINT_AVAILABLE,
+    RPC_ENDPOINT_HEAD_LAG,
+    RPC_ENDPOINT_RTT,
+    WORKER_THREADS_IN_USE,
+    WORKER_THREADS_TOTAL,
+    metrics_registry,
+)
+from utils.logger import trade_context, logger
+from utils.price_ring import PriceRings
+from utils.storage import StorageReader
+from utils.swap_planner import ROUTES
 
 
 router = APIRouter()
 
-@router.get("/min_stake_tolerance")
+
+def require_ready():
+    if not stake_service.ready.is_set():
+        raise HTTPException(status_code=503, detail="Service is starting", headers={"Retry-After": "5"})
+
+
+@router.get("/metrics")
+async def metrics():
+    limiter = to_thread.current_default_thread_limiter()
+    WORKER_THREADS_IN_USE.set(limiter.borrowed_tokens)
+    WORKER_THREADS_TOTAL.set(limiter.total_tokens)
+    if stake_service.ready.is_set():
+        try:
+            reader = await to_thread.run_sync(StorageReader, stake_service.subtensor.substrate)
+            block_time = await to_thread.run_sync(reader.timestamp)
+            CHAIN_HEAD_LAG.set(time.time() - block_time)
+        except Exception as e:
+            logger.error(f"Error reading chain head for metrics: {e}")
+        for endpoint in stake_service.rpc_pool.status():
+            if endpoint["rtt"] is not None:
+                RPC_ENDPOINT_RTT.labels(endpoint["url"]).set(endpoint["rtt"])
+            if endpoint["head_lag"] is not None:
+                RPC_ENDPOINT_HEAD_LAG.labels(endpoint["url"]).set(endpoint["head_lag"])
+            RPC_ENDPOINT_AVAILABLE.labels(endpoint["url"]).set(1 if endpoint["available"] else 0)
+    return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
+
+@router.get("/rpc_endpoints", dependencies=[Depends(require_ready)])
+def rpc_endpoints(username: str = Depends(get_current_username)):
+    return stake_service.rpc_pool.status()
+
+
+@router.get("/min_stake_tolerance", dependencies=[Depends(require_ready)])
 def min_stake_tolerance(
     tao_amount: float,
     netuid: int,
@@ -19,7 +71,7 @@ def min_stake_tolerance(
     return {"min_tolerance": min_tol}
 
 
-@router.get("/min_unstake_tolerance")
+@router.get("/min_unstake_tolerance", dependencies=[Depends(require_ready)])
 def min_unstake_tolerance(
     tao_amount: float,
     netuid: int,
@@ -28,7 +80,7 @@ def min_unstake_tolerance(
     return {"min_tolerance": min_tol}
     
 
-@router.get("/stake")
+@router.get("/stake", dependencies=[Depends(require_ready)])
 def stake(
     tao_amount: float,
     netuid: int,
@@ -37,6 +89,7 @@ def stake(
     rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
     min_tolerance_staking: bool = settings.DEFAULT_MIN_TOLERANCE,
     retries: int = settings.DEFAULT_RETRIES,
+    wait_for_inclusion: bool = True,
     username: str = Depends(get_current_username)
 ):
     # Validate retries parameter
@@ -50,18 +103,20 @@ def stake(
             "error": f"Wallet '{wallet_name}' not found"
         }
 
-    return stake_service.stake(
-        tao_amount=tao_amount,
-        netuid=netuid,
-        wallet_name=wallet_name,
-        dest_hotkey=dest_hotkey,
-        rate_tolerance=rate_tolerance,
-        min_tolerance_staking=min_tolerance_staking,
-        retries=retries
-    )
+    with trade_context():
+        return stake_service.stake(
+            tao_amount=tao_amount,
+            netuid=netuid,
+            wallet_name=wallet_name,
+            dest_hotkey=dest_hotkey,
+            rate_tolerance=rate_tolerance,
+            min_tolerance_staking=min_tolerance_staking,
+            retries=retries,
+            wait_for_inclusion=wait_for_inclusion,
+        )
 
 
-@router.get("/unstake")
+@router.get("/unstake", dependencies=[Depends(require_ready)])
 def unstake(
     netuid: int,
     wallet_name: str,
@@ -70,6 +125,7 @@ def unstake(
     rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
     min_tolerance_unstaking: bool = settings.DEFAULT_MIN_TOLERANCE,
     retries: int = settings.DEFAULT_RETRIES,
+    wait_for_inclusion: bool = True,
     username: str = Depends(get_current_username)
 ):
     # Validate retries parameter
@@ -83,12 +139,208 @@ def unstake(
             "error": f"Wallet '{wallet_name}' not found"
         }
 
-    return stake_service.unstake(
-        netuid=netuid,
-        wallet_name=wallet_name,
-        amount=amount,
-        dest_hotkey=dest_hotkey,
-        rate_tolerance=rate_tolerance,
-        min_tolerance_unstaking=min_tolerance_unstaking,
-        retries=retries
+    with trade_context():
+        return stake_service.unstake(
+            netuid=netuid,
+            wallet_name=wallet_name,
+            amount=amount,
+            dest_hotkey=dest_hotkey,
+            rate_tolerance=rate_tolerance,
+            min_tolerance_unstaking=min_tolerance_unstaking,
+            retries=retries,
+            wait_for_inclusion=wait_for_inclusion,
+        )
+
+
+@router.get("/swap_plan", dependencies=[Depends(require_ready)])
+def swap_plan(
+    origin_netuid: int,
+    dest_netuid: int,
+    wallet_name: str,
+    amount: Optional[float] = None,
+    dest_hotkey: str = settings.DEFAULT_DEST_HOTKEY,
+    rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
+    username: str = Depends(get_current_username)
+):
+    if wallet_name not in stake_service.wallets:
+        return {
+            "success": False,
+            "error": f"Wallet '{wallet_name}' not found"
+        }
+    try:
+        return stake_service.plan_swap(
+            origin_netuid=origin_netuid,
+            dest_netuid=dest_netuid,
+            wallet_name=wallet_name,
+            amount=amount,
+            dest_hotkey=dest_hotkey,
+            rate_tolerance=rate_tolerance,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/swap", dependencies=[Depends(require_ready)])
+def swap(
+    origin_netuid: int,
+    dest_netuid: int,
+    wallet_name: str,
+    amount: Optional[float] = None,
+    dest_hotkey: str = settings.DEFAULT_DEST_HOTKEY,
+    rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
+    min_tolerance_swapping: bool = settings.DEFAULT_MIN_TOLERANCE,
+    route: Optional[str] = None,
+    retries: int = settings.DEFAULT_RETRIES,
+    wait_for_inclusion: bool = True,
+    username: str = Depends(get_current_username)
+):
+    # Validate retries parameter
+    if retries < 1:
+        retries = 1
+
+    if route is not None and route not in ROUTES:
+        raise HTTPException(status_code=400, detail=f"route must be one of {', '.join(ROUTES)}")
+    if origin_netuid == dest_netuid:
+        raise HTTPException(status_code=400, detail="Origin and destination subnet are the same")
+
+    # Get wallet and delegator
+    if wallet_name not in stake_service.wallets:
+        return {
+            "success": False,
+            "error": f"Wallet '{wallet_name}' not found"
+        }
+
+    with trade_context():
+        return stake_service.swap(
+            origin_netuid=origin_netuid,
+            dest_netuid=dest_netuid,
+            wallet_name=wallet_name,
+            amount=amount,
+            dest_hotkey=dest_hotkey,
+            rate_tolerance=rate_tolerance,
+            min_tolerance_swapping=min_tolerance_swapping,
+            route=route,
+            retries=retries,
+            wait_for_inclusion=wait_for_inclusion,
+        )
+
+
+portfolio_store = PortfolioStore(settings.PORTFOLIO_DIR)
+
+
+@router.get("/portfolio/history", dependencies=[Depends(require_ready)])
+def portfolio_history(
+    wallet_name: str,
+    start_block: Optional[int] = None,
+    end_block: Optional[int] = None,
+    points: int = DEFAULT_POINTS,
+    username: str = Depends(get_current_username)
+):
+    if wallet_name not in stake_service.wallets:
+        raise HTTPException(status_code=404, detail=f"Wallet '{wallet_name}' not found")
+    if points < 2:
+        raise HTTPException(status_code=400, detail="points must be at least 2")
+    _, delegator = stake_service.wallets[wallet_name]
+    return {
+        "coldkey": delegator,
+        **portfolio_store.history(delegator, start_block=start_block, end_block=end_block, points=points),
+    }
+
+
+price_rings = PriceRings(settings.PRICE_RING_DIR)
+
+
+@router.get("/prices/{netuid}/ohlc")
+def price_ohlc(
+    netuid: int,
+    interval: int = 300,
+    start_block: Optional[int] = None,
+    end_block: Optional[int] = None,
+    username: str = Depends(get_current_username)
+):
+    if interval < 1:
+        raise HTTPException(status_code=400, detail="interval must be at least 1 block")
+    try:
+        return {"netuid": netuid, "interval": interval, **price_rings.ohlc(netuid, interval, start_block, end_block)}
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"No prices recorded for netuid {netuid}")
+
+
+# How often the status stream re-reads the transaction table, and for how long
+TX_STREAM_INTERVAL = 0.5
+TX_STREAM_TIMEOUT = 600.0
+
+
+@router.get("/tx/{tx_hash}", dependencies=[Depends(require_ready)])
+def tx_status(
+    tx_hash: str,
+    username: str = Depends(get_current_username)
+):
+    tx = stake_service.tracker.store.get(tx_hash)
+    if tx is None:
+        raise HTTPException(status_code=404, detail=f"Transaction {tx_hash} not found")
+    return tx
+
+
+@router.get("/tx/{tx_hash}/events", dependencies=[Depends(require_ready)])
+async def tx_events(
+    tx_hash: str,
+    username: str = Depends(get_current_username)
+):
+    """Server-sent events with the transaction's record on every status change, until it settles."""
+    store = stake_service.tracker.store
+    if await to_thread.run_sync(store.get, tx_hash) is None:
+        raise HTTPException(status_code=404, detail=f"Transaction {tx_hash} not found")
+
+    async def events():
+        last_status = None
+        deadline = time.monotonic() + TX_STREAM_TIMEOUT
+        while time.monotonic() < deadline:
+            tx = await to_thread.run_sync(store.get, tx_hash)
+            if tx["status"] != last_status:
+                last_status = tx["status"]
+                yield f"data: {json.dumps(tx)}\n\n"
+                if last_status in TERMINAL_STATUSES:
+                    return
+            await asyncio.sleep(TX_STREAM_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def trade_filters(
+    wallet_name: Optional[str] = None,
+    operation: Optional[str] = None,
+    netuid: Optional[int] = None,
+    success: Optional[bool] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+):
+    """Filters of /trades and /trades/export; since and until are unix times."""
+    if wallet_name is not None and wallet_name not in stake_service.wallets:
+        raise HTTPException(status_code=404, detail=f"Wallet '{wallet_name}' not found")
+    return {"wallet_name": wallet_name, "operation": operation, "netuid": netuid,
+            "success": success, "since": since, "until": until}
+
+
+@router.get("/trades", dependencies=[Depends(require_ready)])
+def trades(
+    filters: dict = Depends(trade_filters),
+    limit: int = 100,
+    offset: int = 0,
+    username: str = Depends(get_current_username)
+):
+    if not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    return {"trades": stake_service.journal.query(limit=limit, offset=offset, **filters)}
+
+
+@router.get("/trades/export", dependencies=[Depends(require_ready)])
+def trades_export(
+    filters: dict = Depends(trade_filters),
+    username: str = Depends(get_current_username)
+):
+    return StreamingResponse(
+        stake_service.journal.export_csv(**filters),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=trades.csv"},
     )
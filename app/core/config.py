@@ -1,8 +1,10 @@
 import os
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 from app.constants import ROUND_TABLE_HOTKEY
+from utils.file_slots import TRADE_LOCK_DIR
+from utils.rpc_pool import resolve_endpoints
 
 # Load environment variables from .env file
 load_dotenv(".env")
@@ -10,7 +12,11 @@ load_dotenv(".env")
 
 class Settings(BaseModel):
     VERSION: str = "0.1.0"
-    NETWORK: str = "wss://entrypoint-finney.opentensor.ai:443"
+    # Node that trades are submitted to, e.g. ws://127.0.0.1:9944 for a stand-in node
+    NETWORK: str = os.getenv("NETWORK_URL", "wss://entrypoint-finney.opentensor.ai:443")
+    # Nodes that chain reads are spread over (comma-separated URLs), NETWORK is still
+    # used to submit trades
+    RPC_ENDPOINTS: List[str] = [url for url in os.getenv("RPC_ENDPOINTS", "").split(",") if url] or resolve_endpoints("finney")
     # WALLET_NAMES: List[str] = []
     # DELEGATORS: List[str] = []
     DEFAULT_RATE_TOLERANCE: float = 0.005
@@ -23,6 +29,40 @@ class Settings(BaseModel):
     WALLET_NAMES: List[str] = ["black", "green", "webgenie"]
     DELEGATORS: List[str] = ["5DZhYqgHhRPYUHqjaU2gS2LNL7VS8Fb5utxZ7QEkVGqTnmh5","5FWhdv8o7fGo6yn54qXCn1xTxXsMaNLaotKYzUSG2iZp4tVZ", "5GhDziWFX56mTrG8Qgytr5bcPNDKVxnVeWCZt3PC4n59pCCP"]
     
+    # UNIX socket of the signing daemon (python -m app.services.signer). When set,
+    # workers get their wallets from the daemon instead of unlocking them.
+    SIGNER_SOCKET: Optional[str] = os.getenv("SIGNER_SOCKET") or None
+
+    # Pre-submission checks for trades: "off", "local" (limit price simulation and
+    # fee/balance check) or "dry_run" (local checks plus a dry run of the extrinsic)
+    TRADE_VALIDATION: str = os.getenv("TRADE_VALIDATION", "off")
+
+    # SQLite file with the status of extrinsics submitted with wait_for_inclusion=false,
+    # shared by all workers
+    TX_DB_PATH: str = os.getenv("TX_DB_PATH", "transactions.db")
+
+    # Directory of the file locks that keep a delegator's trades one at a time across workers,
+    # and of the slots enforcing the admission limits below for all workers together
+    TRADE_LOCK_DIR: str = os.getenv("TRADE_LOCK_DIR", TRADE_LOCK_DIR)
+
+    # Admission control for /stake, /unstake and /swap, across all workers: trades executing
+    # at once (a delegator's own trades always run one at a time), and orders waiting or
+    # running overall and per delegator before further ones are refused with 429
+    MAX_RUNNING_TRADES: int = int(os.getenv("MAX_RUNNING_TRADES", "8"))
+    MAX_QUEUED_TRADES: int = int(os.getenv("MAX_QUEUED_TRADES", "32"))
+    MAX_QUEUED_TRADES_PER_DELEGATOR: int = int(os.getenv("MAX_QUEUED_TRADES_PER_DELEGATOR", "8"))
+
+    # SQLite file journaling every trade attempt, read by /trades, shared by all workers
+    TRADE_JOURNAL_PATH: str = os.getenv("TRADE_JOURNAL_PATH", "trades.db")
+
+    # Column files written by the portfolio recorder (python -m app.services.portfolio)
+    # and read by /portfolio/history, and the blocks between its snapshots
+    PORTFOLIO_DIR: str = os.getenv("PORTFOLIO_DIR", "portfolio")
+    PORTFOLIO_EVERY: int = int(os.getenv("PORTFOLIO_EVERY", "1"))
+
+    # Per-subnet price ring buffers written by the watchers or `python -m utils.price_ring record`
+    PRICE_RING_DIR: str = os.getenv("PRICE_RING_DIR", "prices")
+
     ADMIN_HASH: str = "$2b$12$rFj2f8j0jphOUMy3ZMjfdO9wQedLq7zSHmsjYDOU9zZkULYkdfMj2"
 
 settings = Settings()
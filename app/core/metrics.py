@@ -0,0 +1,141 @@
+import os
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+
+
+# Phases of a /stake or /unstake request, from auth to the post-trade balance check
+TRADE_PHASES = (
+    "auth",
+    "queue_wait",
+    "subnet_lookup",
+    "init_runtime",
+    "compose_call",
+    "sign",
+    "validate",
+    "submit",
+    "inclusion_wait",
+    "receipt",
+    "get_balance",
+)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 7.5, 10.0, 12.0, 15.0, 20.0, 30.0, 60.0,
+)
+
+TRADE_PHASE_SECONDS = Histogram(
+    "trade_phase_seconds",
+    "Time spent in each phase of a trade",
+    ["phase"],
+    buckets=LATENCY_BUCKETS,
+)
+TRADE_SECONDS = Histogram(
+    "trade_seconds",
+    "End-to-end time of a stake/unstake request including retries",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+TRADE_RETRIES = Counter(
+    "trade_retries_total",
+    "Trade attempts after the first one",
+    ["operation"],
+)
+TRADE_ERRORS = Counter(
+    "trade_errors_total",
+    "Failed trade attempts by error class",
+    ["operation", "error_class"],
+)
+TRADE_QUEUE_DEPTH = Gauge(
+    "trade_queue_depth",
+    "Trade orders admitted and not yet answered, queued or running",
+    multiprocess_mode="livesum",
+)
+TRADES_RUNNING = Gauge(
+    "trades_running",
+    "Trades currently executing",
+    multiprocess_mode="livesum",
+)
+TRADE_REJECTED = Counter(
+    "trade_rejected_total",
+    "Trade orders refused with 429 because a queue was full",
+    ["scope"],
+)
+CHAIN_HEAD_LAG = Gauge(
+    "chain_head_lag_seconds",
+    "Seconds between now and the timestamp of the best block",
+    multiprocess_mode="mostrecent",
+)
+RPC_REQUESTS_IN_FLIGHT = Gauge(
+    "rpc_requests_in_flight",
+    "Chain operations currently using each connection",
+    ["connection"],
+    multiprocess_mode="livesum",
+)
+WORKER_THREADS_IN_USE = Gauge(
+    "worker_threads_in_use",
+    "Threads of the request thread pool currently busy",
+    multiprocess_mode="livesum",
+)
+WORKER_THREADS_TOTAL = Gauge(
+    "worker_threads_total",
+    "Size of the request thread pool",
+    multiprocess_mode="livesum",
+)
+RPC_ENDPOINT_RTT = Gauge(
+    "rpc_endpoint_rtt_seconds",
+    "Smoothed round trip time of each read endpoint",
+    ["endpoint"],
+    multiprocess_mode="mostrecent",
+)
+RPC_ENDPOINT_HEAD_LAG = Gauge(
+    "rpc_endpoint_head_lag_blocks",
+    "Blocks each read endpoint trails the best head seen across endpoints",
+    ["endpoint"],
+    multiprocess_mode="mostrecent",
+)
+RPC_ENDPOINT_AVAILABLE = Gauge(
+    "rpc_endpoint_available",
+    "1 if the endpoint's circuit is closed, 0 while it is skipped after failures",
+    ["endpoint"],
+    multiprocess_mode="mostrecent",
+)
+STARTUP_SECONDS = Gauge(
+    "startup_seconds",
+    "Duration of each startup step, and of the whole startup as step=total",
+    ["step"],
+    multiprocess_mode="max",
+)
+
+
+def phase(name: str):
+    """Context manager that records the duration of one trade phase."""
+    return TRADE_PHASE_SECONDS.labels(name).time()
+
+
+def classify_error(message) -> str:
+    """
+    Map a trade error message to a coarse error class for the error counter.
+    """
+    text = str(message).lower()
+    if "custom error: 8" in text or "slippage" in text or "price" in text:
+        return "price_limit"
+    if "balance" in text or "inability to pay" in text:
+        return "insufficient_balance"
+    if "priority is too low" in text or "outdated" in text or "nonce" in text:
+        return "nonce"
+    if "connection" in text or "websocket" in text or "timed out" in text or "broken pipe" in text:
+        return "connection"
+    if "does not exist" in text:
+        return "invalid_request"
+    return "other"
+
+
+def metrics_registry():
+    """
+    The registry to expose. With several uvicorn workers PROMETHEUS_MULTIPROC_DIR
+    is set and the values of all workers are collected from there.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
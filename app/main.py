@@ -1,34 +1,119 @@
+import time
+import asyncio
 import fastapi
 import bittensor as bt
 import subprocess
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import Depends
+from fastapi.responses import JSONResponse
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
-from app.api.routes import router
+from app.api.routes import require_ready, router
 from app.core.config import settings
+from app.core.metrics import STARTUP_SECONDS
 from app.constants import NETWORK
-from app.services.wallets import wallets
+from app.services.wallets import unlock_wallets, wallets
+from app.services.signer import SignerClient, SignerError
+from app.services.order_queue import QueueFull
 from app.services.stake import stake_service
 from app.services.auth import get_current_username
+from utils.logger import logger
 from utils.stake_list import get_stake_list
 
 
-app = fastapi.FastAPI()
+CONNECT_RETRY_DELAY = 5.0
+
+
+async def timed_step(step: str, func):
+    started = time.perf_counter()
+    await to_thread.run_sync(func)
+    STARTUP_SECONDS.labels(step).set(time.perf_counter() - started)
+    logger.info(f"Startup step {step} took {time.perf_counter() - started:.2f}s")
+
+
+async def connect_with_retry():
+    while True:
+        try:
+            await timed_step("connect", stake_service.connect)
+            return
+        except Exception as e:
+            logger.error(f"Error connecting to {settings.NETWORK}, retrying in {CONNECT_RETRY_DELAY:.0f}s: {e}")
+            await asyncio.sleep(CONNECT_RETRY_DELAY)
+
+
+def load_signer_wallets():
+    """Wait for the signing daemon and take the wallets it serves."""
+    client = SignerClient(settings.SIGNER_SOCKET)
+    while True:
+        try:
+            wallets.update(client.load_wallets())
+            return
+        except (OSError, SignerError) as e:
+            logger.error(f"Signing daemon at {settings.SIGNER_SOCKET} not available, retrying in {CONNECT_RETRY_DELAY:.0f}s: {e}")
+            time.sleep(CONNECT_RETRY_DELAY)
+
+
+async def start_services():
+    """
+    Unlock the wallets and open the chain connection side by side. Unlocking
+    stays sequential itself because it prompts for passwords. With a signing
+    daemon configured the worker holds no keys and only asks it for the wallets.
+    """
+    started = time.perf_counter()
+    if settings.SIGNER_SOCKET:
+        load = timed_step("load_wallets", load_signer_wallets)
+    else:
+        load = timed_step("unlock_wallets", unlock_wallets)
+    await asyncio.gather(load, connect_with_retry())
+    STARTUP_SECONDS.labels("total").set(time.perf_counter() - started)
+    stake_service.ready.set()
+    logger.info(f"Service ready in {time.perf_counter() - started:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: fastapi.FastAPI):
+    # Serve /ready and /metrics right away and finish startup in the background
+    startup = asyncio.create_task(start_services())
+    yield
+    startup.cancel()
+    if stake_service.journal is not None:
+        # Write the attempts still queued
+        stake_service.journal.stop()
+
+
+app = fastapi.FastAPI(lifespan=lifespan)
 app.include_router(router)
 
 
+@app.exception_handler(QueueFull)
+async def queue_full(request: fastapi.Request, exc: QueueFull):
+    return JSONResponse(
+        {"success": False, "error": str(exc), "error_class": "queue_full"},
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 templates = Jinja2Templates(directory="app/templates")
 
 
-@app.get("/")
+@app.get("/ready")
+def ready():
+    if not stake_service.ready.is_set():
+        return JSONResponse({"ready": False}, status_code=503)
+    return {"ready": True}
+
+
+@app.get("/", dependencies=[Depends(require_ready)])
 def read_root(request: fastapi.Request, username: str = Depends(get_current_username)):
-    subtensor = stake_service.subtensor
+    pin = stake_service.rpc_pool.pin()
     def get_balance_html():
         balance_html = ""
         for wallet_name in settings.WALLET_NAMES:
             _, delegator = wallets[wallet_name]
-            balance = subtensor.get_balance(delegator)
+            balance = pin.read(lambda subtensor: subtensor.get_balance(delegator, block=pin.block))
             balance_html += f"""
                 <div class="balance-container">
                     <div class="balance-title"><a target="_blank" href="/stake_list?wallet_name={delegator}" style="text-decoration: none; color: inherit; cursor: pointer; text-decoration: underline;">{wallet_name}</a></div>
@@ -65,10 +150,10 @@ def stake_list(wallet_name: str):
     return HTMLResponse(content=html_content)
 
 
-@app.get("/stake_list_v2")
+@app.get("/stake_list_v2", dependencies=[Depends(require_ready)])
 def stake_list_v2(wallet_name: str):
-    subtensor = stake_service.subtensor
-    stake_list = get_stake_list(subtensor, wallet_name)
+    pin = stake_service.rpc_pool.pin()
+    stake_list = pin.read(lambda subtensor: get_stake_list(subtensor, wallet_name, block=pin.block))
     html_content = f"""
     <!DOCTYPE html>
     <html>
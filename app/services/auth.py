@@ -3,6 +3,7 @@ from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
 from bcrypt import checkpw
 from app.core.config import settings
+from app.core.metrics import phase
 
 
 security = HTTPBasic()
@@ -21,7 +22,9 @@ def get_current_username(credentials: HTTPBasicCredentials = Depends(security)):
         )
     
     stored_hash = USERS[credentials.username]
-    if not checkpw(credentials.password.encode(), stored_hash):
+    with phase("auth"):
+        password_ok = checkpw(credentials.password.encode(), stored_hash)
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -0,0 +1,361 @@
+import math
+import time
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.metrics import TRADE_PHASE_SECONDS, TRADE_QUEUE_DEPTH, TRADE_REJECTED, TRADES_RUNNING
+from app.services.retry import BLOCK_TIME
+from utils.file_slots import FileSlots
+from utils.logger import logger, trade_context, trade_id
+
+
+# How long a delegator's worker waits for more orders to coalesce with the first one
+COALESCE_WINDOW = 0.05
+# Bounds of the Retry-After given with a refused order
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+# Weight of the newest trade in the running average of trade durations
+DURATION_SMOOTHING = 0.2
+
+
+class QueueFull(Exception):
+    """An order was refused because its delegator's queue, or all queues together, are full."""
+
+    def __init__(self, scope: str, depth: int, retry_after: int):
+        """
+        Args:
+            scope: "delegator" or "global", the limit that was hit
+            depth: Orders ahead in the full queue
+            retry_after: Seconds after which the queue has likely drained enough
+        """
+        super().__init__(f"Too many pending trades ({scope} queue holds {depth}), retry in {retry_after}s")
+        self.scope = scope
+        self.depth = depth
+        self.retry_after = retry_after
+
+
+class Order:
+    """One /stake, /unstake or /swap request waiting in its delegator's queue."""
+
+    def __init__(
+        self,
+        operation: str,
+        wallet_name: str,
+        delegator: str,
+        netuid: int,
+        hotkey: str,
+        amount: Optional[float],
+        rate_tolerance: float,
+        min_tolerance: bool,
+        retries: int,
+        wait_for_inclusion: bool = True,
+        dest_netuid: Optional[int] = None,
+        route: Optional[str] = None,
+    ):
+        """
+        Initialize the Order.
+
+        Args:
+            operation: "stake", "unstake" or "swap"
+            wallet_name: Name of the proxy wallet
+            delegator: Delegator the wallet trades for
+            netuid: Network/subnet ID
+            hotkey: Destination hotkey address
+            amount: TAO to stake, or alpha to unstake or swap (None moves everything)
+            rate_tolerance: Tolerance for rate calculations
+            min_tolerance: Whether to use the minimum tolerance for the amount
+            retries: Number of retry attempts
+            wait_for_inclusion: Whether to wait for the block or return once broadcast
+            dest_netuid: Subnet a swap moves the stake to
+            route: Swap route to use, the planner's choice if None
+        """
+        self.operation = operation
+        self.wallet_name = wallet_name
+        self.delegator = delegator
+        self.netuid = netuid
+        self.hotkey = hotkey
+        self.amount = amount
+        self.rate_tolerance = rate_tolerance
+        self.min_tolerance = min_tolerance
+        self.retries = retries
+        self.wait_for_inclusion = wait_for_inclusion
+        self.dest_netuid = dest_netuid
+        self.route = route
+        self.trade_id = trade_id.get()
+        self.queued_at = time.perf_counter()
+        self.future: Future = Future()
+        # Admission slots the order holds until it is answered
+        self.admission: List[int] = []
+
+    def coalesce_key(self):
+        """Orders with equal keys can be executed as one extrinsic."""
+        return (self.operation, self.wallet_name, self.netuid, self.hotkey, self.min_tolerance, self.wait_for_inclusion,
+                self.dest_netuid, self.route)
+
+
+def merge_orders(orders: List[Order]) -> Order:
+    """
+    Combine compatible orders into one. Amounts add up (an unstake-all absorbs
+    the others), and the tightest rate tolerance is kept, so the merged order's
+    limit price satisfies every requester. The larger amount moves the price
+    further than any one order would, so DelegatorQueues asks its `check_merge`
+    whether the tightest tolerance still covers it before merging.
+    """
+    first = orders[0]
+    if first.operation != "stake" and any(order.amount is None for order in orders):
+        amount = None
+    else:
+        amount = sum(order.amount for order in orders)
+    merged = Order(
+        operation=first.operation,
+        wallet_name=first.wallet_name,
+        delegator=first.delegator,
+        netuid=first.netuid,
+        hotkey=first.hotkey,
+        amount=amount,
+        rate_tolerance=min(order.rate_tolerance for order in orders),
+        min_tolerance=first.min_tolerance,
+        retries=max(order.retries for order in orders),
+        wait_for_inclusion=first.wait_for_inclusion,
+        dest_netuid=first.dest_netuid,
+        route=first.route,
+    )
+    merged.trade_id = ",".join(order.trade_id for order in orders if order.trade_id) or None
+    return merged
+
+
+class DelegatorQueues:
+    """
+    One work queue per delegator, drained by its own worker task.
+
+    A delegator's orders run strictly one after another, so two trades never
+    race on the proxy nonce or on the before/after balance check. A file lock
+    per delegator in `lock_dir` extends that to every API worker sharing the
+    directory: a trade waits until no other process trades for its delegator.
+    Different delegators run in parallel, at most `max_running` at once.
+    Consecutive orders that arrive within `COALESCE_WINDOW` for the same
+    wallet, netuid, hotkey and direction are merged into a single trade and
+    all of them get its result, unless `check_merge` finds the merged trade
+    would exceed the tightest tolerance; then the orders run one by one.
+
+    Admission is bounded: an order beyond `max_queued` pending orders overall,
+    or `max_queued_per_delegator` for its delegator, is refused at once with
+    QueueFull instead of holding a request thread until its turn. These limits
+    and `max_running` are file slots in `lock_dir` too, so they hold for all
+    workers together rather than for each one.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[Order], Awaitable[dict]],
+        coalesce_window: float = COALESCE_WINDOW,
+        max_running: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        max_queued_per_delegator: Optional[int] = None,
+        lock_dir: Optional[str] = None,
+        check_merge: Optional[Callable[[Order], bool]] = None,
+    ):
+        """
+        Initialize the DelegatorQueues.
+
+        Args:
+            execute: Coroutine function running one (possibly merged) order
+            coalesce_window: Seconds to wait for orders to coalesce with
+            max_running: Trades executing at once across delegators, unbounded if None
+            max_queued: Orders pending (queued or running) across delegators, unbounded if None
+            max_queued_per_delegator: Orders pending for one delegator, unbounded if None
+            lock_dir: Directory of the per-delegator locks and the limits' slots shared
+                with other processes, a private one if None
+            check_merge: Whether a merged order can still go through at its tolerance,
+                called on a worker thread; orders always merge if None
+        """
+        self.execute = execute
+        self.coalesce_window = coalesce_window
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_queued_per_delegator = max_queued_per_delegator
+        self.lock_dir = lock_dir or tempfile.mkdtemp(prefix="delegator-queues-")
+        self.check_merge = check_merge
+        self._delegator_locks: Dict[str, FileSlots] = {}
+        self._delegator_queued: Dict[str, FileSlots] = {}
+        self._queued = FileSlots(self.lock_dir, "queued", max_queued) if max_queued else None
+        self._running = FileSlots(self.lock_dir, "running", max_running) if max_running else None
+        # This worker's pending orders per delegator and in total, guarded by _lock as
+        # submit runs on request threads
+        self._lock = threading.Lock()
+        self._pending: Dict[str, int] = {}
+        self._pending_total = 0
+        # Running average of a trade's duration, for Retry-After; a block until measured
+        self._trade_seconds = BLOCK_TIME
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Run the queues' event loop on a background daemon thread."""
+        if self._thread is not None:
+            return
+        ready = threading.Event()
+
+        def _run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.call_soon(ready.set)
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, name="delegator-queues", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def submit(self, order: Order) -> Future:
+        """
+        Queue an order from any thread; the returned future resolves to the trade result.
+
+        Raises:
+            QueueFull: The delegator's queue or all queues together are at their limit
+        """
+        self.start()
+        self._admit(order)
+        self._loop.call_soon_threadsafe(self._put, order)
+        return order.future
+
+    def pending(self, delegator: Optional[str] = None) -> int:
+        """Orders this worker admitted and has not yet answered, for one delegator or all of them."""
+        with self._lock:
+            return self._pending_total if delegator is None else self._pending.get(delegator, 0)
+
+    def _admit(self, order: Order) -> None:
+        with self._lock:
+            if self.max_queued_per_delegator and order.delegator not in self._delegator_queued:
+                self._delegator_queued[order.delegator] = FileSlots(
+                    self.lock_dir, f"queued-{order.delegator}", self.max_queued_per_delegator
+                )
+            delegator_slots = self._delegator_queued.get(order.delegator)
+        if delegator_slots is not None:
+            held = delegator_slots.try_acquire()
+            if held is None:
+                # A delegator's trades run one at a time
+                raise self._refuse("delegator", self.max_queued_per_delegator, 1)
+            order.admission.append(held)
+        if self._queued is not None:
+            held = self._queued.try_acquire()
+            if held is None:
+                self._release_slots(order)
+                raise self._refuse("global", self.max_queued, self.max_running or 1)
+            order.admission.append(held)
+        with self._lock:
+            self._pending[order.delegator] = self._pending.get(order.delegator, 0) + 1
+            self._pending_total += 1
+        TRADE_QUEUE_DEPTH.inc()
+
+    def _refuse(self, scope: str, depth: int, parallel: int) -> QueueFull:
+        TRADE_REJECTED.labels(scope).inc()
+        retry_after = math.ceil(self._trade_seconds * depth / max(parallel, 1))
+        return QueueFull(scope, depth, min(max(retry_after, MIN_RETRY_AFTER), MAX_RETRY_AFTER))
+
+    @staticmethod
+    def _release_slots(order: Order) -> None:
+        for held in order.admission:
+            FileSlots.release(held)
+        order.admission = []
+
+    def _release(self, batch: List[Order]) -> None:
+        for order in batch:
+            self._release_slots(order)
+        with self._lock:
+            for order in batch:
+                self._pending[order.delegator] -= 1
+                if not self._pending[order.delegator]:
+                    del self._pending[order.delegator]
+            self._pending_total -= len(batch)
+        TRADE_QUEUE_DEPTH.dec(len(batch))
+
+    def _put(self, order: Order) -> None:
+        queue = self._queues.get(order.delegator)
+        if queue is None:
+            queue = self._queues[order.delegator] = asyncio.Queue()
+            self._workers[order.delegator] = self._loop.create_task(self._work(queue))
+        queue.put_nowait(order)
+
+    async def _collect(self, queue: asyncio.Queue) -> List[Order]:
+        orders = [await queue.get()]
+        deadline = self._loop.time() + self.coalesce_window
+        while True:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                orders.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return orders
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        pending: List[Order] = []
+        while True:
+            if not pending:
+                pending = await self._collect(queue)
+            # Merge the run of orders compatible with the oldest one; stopping at the
+            # first different order keeps the delegator's trades in arrival order
+            key = pending[0].coalesce_key()
+            size = 1
+            while size < len(pending) and pending[size].coalesce_key() == key:
+                size += 1
+            batch, pending = pending[:size], pending[size:]
+            if len(batch) > 1 and not await self._mergeable(batch):
+                # Run the oldest on its own and try the rest together again
+                batch, pending = batch[:1], batch[1:] + pending
+            await self._run_batch(batch)
+
+    async def _mergeable(self, batch: List[Order]) -> bool:
+        if self.check_merge is None:
+            return True
+        try:
+            return await asyncio.to_thread(self.check_merge, merge_orders(batch))
+        except Exception as e:
+            logger.warning(f"Could not check whether {len(batch)} orders can be merged, running them one by one: {e}")
+            return False
+
+    async def _run_batch(self, batch: List[Order]) -> None:
+        delegator = batch[0].delegator
+        if delegator not in self._delegator_locks:
+            self._delegator_locks[delegator] = FileSlots(self.lock_dir, f"delegator-{delegator}")
+        # Taken before a max_running slot, so a slot is never held waiting for another process
+        held = await self._delegator_locks[delegator].acquire()
+        try:
+            result = await self._execute_batch(batch)
+        finally:
+            FileSlots.release(held)
+        self._release(batch)
+        if len(batch) > 1:
+            result = {**result, "coalesced": len(batch)}
+        for queued in batch:
+            if not queued.future.done():
+                queued.future.set_result(result)
+
+    async def _execute_batch(self, batch: List[Order]) -> dict:
+        running = await self._running.acquire() if self._running is not None else None
+        try:
+            started = time.perf_counter()
+            # Queue wait includes waiting for the delegator's lock and one of the max_running slots
+            for order in batch:
+                TRADE_PHASE_SECONDS.labels("queue_wait").observe(started - order.queued_at)
+            order = merge_orders(batch) if len(batch) > 1 else batch[0]
+            TRADES_RUNNING.inc()
+            with trade_context(order.trade_id):
+                if len(batch) > 1:
+                    logger.info(f"Coalesced {len(batch)} {order.operation} orders for {order.delegator} on netuid {order.netuid}")
+                try:
+                    result = await self.execute(order)
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+            TRADES_RUNNING.dec()
+            self._trade_seconds += DURATION_SMOOTHING * (time.perf_counter() - started - self._trade_seconds)
+        finally:
+            if running is not None:
+                FileSlots.release(running)
+        return result
@@ -0,0 +1,259 @@
+import os
+import re
+import argparse
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.logger import logger
+from utils.rpc_pool import EndpointPool, Pin
+from utils.stake_list import get_stake_values
+
+
+PORTFOLIO_DIR = "portfolio"
+BLOCK_TIME = 12.0
+# Missed snapshot blocks older than this are skipped rather than read back;
+# lite nodes only keep the state of the last 256 blocks
+MAX_BACKFILL = 200
+DEFAULT_POINTS = 500
+
+BLOCK_DTYPE = np.dtype("<u4")
+VALUE_DTYPE = np.dtype("<f8")
+_VALUE_COLUMN = re.compile(r"value\.(\d+)$")
+
+
+class PortfolioStore:
+    """
+    Portfolio snapshots as fixed-width column files, one directory per coldkey:
+
+        <root>/<coldkey>/block     uint32, the block of each snapshot
+        <root>/<coldkey>/free      float64, free balance in TAO
+        <root>/<coldkey>/total     float64, free balance plus the value of all positions
+        <root>/<coldkey>/value.<netuid>  float64, TAO the netuid's stake would fetch
+
+    Row i of every column belongs to the same snapshot, so reads memory map
+    the columns and only touch the pages of the rows they return. A position
+    opened mid-history gets its column padded with zeros (sparse on disk) for
+    the earlier rows. `block` is written last, so it holds the committed row
+    count; anything the columns hold beyond it, `block` included, is a torn
+    write and gets cut off before the next append. Reads take rows a column
+    does not hold yet, while a new one is being padded, as zeros.
+    """
+
+    def __init__(self, root: str = PORTFOLIO_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _dir(self, coldkey: str) -> str:
+        return os.path.join(self.root, coldkey)
+
+    def _path(self, coldkey: str, column: str) -> str:
+        return os.path.join(self._dir(coldkey), column)
+
+    def coldkeys(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isfile(self._path(name, "block")))
+
+    def netuids(self, coldkey: str) -> List[int]:
+        netuids = []
+        for name in os.listdir(self._dir(coldkey)):
+            match = _VALUE_COLUMN.match(name)
+            if match:
+                netuids.append(int(match.group(1)))
+        return sorted(netuids)
+
+    def rows(self, coldkey: str) -> int:
+        path = self._path(coldkey, "block")
+        return os.path.getsize(path) // BLOCK_DTYPE.itemsize if os.path.exists(path) else 0
+
+    def last_block(self, coldkey: str) -> Optional[int]:
+        rows = self.rows(coldkey)
+        if rows == 0:
+            return None
+        with open(self._path(coldkey, "block"), "rb") as f:
+            f.seek((rows - 1) * BLOCK_DTYPE.itemsize)
+            return int(np.frombuffer(f.read(BLOCK_DTYPE.itemsize), dtype=BLOCK_DTYPE)[0])
+
+    def _append(self, path: str, rows: int, value, dtype: np.dtype = VALUE_DTYPE) -> None:
+        with open(path, "ab") as f:
+            # Pad a new column, or cut a torn write, to the committed rows
+            f.truncate(rows * dtype.itemsize)
+            f.write(np.array([value], dtype=dtype).tobytes())
+
+    def append(self, coldkey: str, block: int, free: float, values: Dict[int, float]) -> None:
+        """
+        Add a snapshot. Blocks must increase; a block already recorded is ignored.
+
+        Args:
+            coldkey: Coldkey SS58 address
+            block: Block the snapshot was read at
+            free: Free balance in TAO
+            values: TAO value of the coldkey's stake by netuid
+        """
+        with self._lock:
+            os.makedirs(self._dir(coldkey), exist_ok=True)
+            last = self.last_block(coldkey)
+            if last is not None and block <= last:
+                return
+            rows = self.rows(coldkey)
+            netuids = set(self.netuids(coldkey)) | set(values)
+            for netuid in netuids:
+                self._append(self._path(coldkey, f"value.{netuid}"), rows, values.get(netuid, 0.0))
+            self._append(self._path(coldkey, "free"), rows, free)
+            self._append(self._path(coldkey, "total"), rows, free + sum(values.values()))
+            self._append(self._path(coldkey, "block"), rows, block, BLOCK_DTYPE)
+
+    def _column(self, coldkey: str, column: str, rows: int) -> np.ndarray:
+        dtype = BLOCK_DTYPE if column == "block" else VALUE_DTYPE
+        path = self._path(coldkey, column)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        available = min(rows, size // dtype.itemsize)
+        if available == rows:
+            return np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+        values = np.zeros(rows, dtype=dtype)
+        if available:
+            values[:available] = np.memmap(path, dtype=dtype, mode="r", shape=(available,))
+        return values
+
+    def history(
+        self,
+        coldkey: str,
+        start_block: Optional[int] = None,
+        end_block: Optional[int] = None,
+        points: int = DEFAULT_POINTS,
+    ) -> dict:
+        """
+        A downsampled series of the coldkey's snapshots.
+
+        Args:
+            coldkey: Coldkey SS58 address
+            start_block: First block to include, from the oldest snapshot if not given
+            end_block: Last block to include, up to the newest snapshot if not given
+            points: Most snapshots to return; longer ranges return evenly spaced
+                snapshots, always including the range's first and last
+
+        Returns:
+            dict: {"block": [...], "free": [...], "total": [...],
+            "positions": {netuid: [...]}}, the lists aligned by index
+        """
+        empty = {"block": [], "free": [], "total": [], "positions": {}}
+        rows = self.rows(coldkey)
+        if rows == 0:
+            return empty
+        blocks = self._column(coldkey, "block", rows)
+        lo = 0 if start_block is None else int(np.searchsorted(blocks, start_block, side="left"))
+        hi = rows if end_block is None else int(np.searchsorted(blocks, end_block, side="right"))
+        if hi <= lo:
+            return empty
+        if hi - lo <= points:
+            index = np.arange(lo, hi)
+        else:
+            index = np.unique(np.linspace(lo, hi - 1, max(points, 2)).round().astype(np.int64))
+        return {
+            "block": blocks[index].tolist(),
+            "free": self._column(coldkey, "free", rows)[index].tolist(),
+            "total": self._column(coldkey, "total", rows)[index].tolist(),
+            "positions": {
+                netuid: self._column(coldkey, f"value.{netuid}", rows)[index].tolist()
+                for netuid in self.netuids(coldkey)
+            },
+        }
+
+
+class PortfolioRecorder:
+    """
+    Snapshots the free balance and position values of a set of coldkeys every
+    `every` blocks, all reads of one snapshot pinned to its block. Positions
+    are valued like the stake list, at the TAO unstaking would fetch. Blocks
+    missed while the node was unreachable are read back afterwards, up to
+    `MAX_BACKFILL` blocks old.
+    """
+
+    def __init__(
+        self,
+        pool: EndpointPool,
+        store: PortfolioStore,
+        coldkeys: List[str],
+        every: int = 1,
+        poll_interval: float = BLOCK_TIME / 2,
+    ):
+        """
+        Initialize the PortfolioRecorder.
+
+        Args:
+            pool: Endpoints to read from
+            store: Where the snapshots go
+            coldkeys: Coldkey SS58 addresses to record
+            every: Blocks between snapshots
+            poll_interval: Seconds between checks for a new block
+        """
+        self.pool = pool
+        self.store = store
+        self.coldkeys = coldkeys
+        self.every = max(every, 1)
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def due(self, head: int) -> List[int]:
+        """Blocks up to `head` that need a snapshot, oldest first."""
+        last = [self.store.last_block(coldkey) for coldkey in self.coldkeys]
+        newest = head - head % self.every
+        if any(block is None for block in last):
+            return [newest]
+        first = min(last) + self.every
+        first = max(first - first % self.every, newest - MAX_BACKFILL // self.every * self.every)
+        return list(range(first, newest + 1, self.every))
+
+    def snapshot(self, pin: Pin) -> None:
+        """Record every coldkey at the pinned block."""
+        subnet_infos = pin.read(lambda subtensor: subtensor.all_subnets(block=pin.block))
+        for coldkey in self.coldkeys:
+            stake_infos = pin.read(lambda subtensor: subtensor.get_stake_for_coldkey(coldkey_ss58=coldkey, block=pin.block))
+            balance = pin.read(lambda subtensor: subtensor.get_balance(coldkey, block=pin.block))
+            values: Dict[int, float] = defaultdict(float)
+            # A coldkey can hold the same netuid through several hotkeys
+            for info, _, value in get_stake_values(stake_infos, subnet_infos):
+                values[info.netuid] += value
+            self.store.append(coldkey, pin.block, balance.tao, dict(values))
+
+    def poll(self) -> None:
+        head = self.pool.pin()
+        for block in self.due(head.block):
+            pin = head if block == head.block else Pin(self.pool, block, None)
+            self.snapshot(pin)
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error recording portfolio snapshot: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, name="portfolio-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Record portfolio snapshots of coldkeys on every N blocks")
+    parser.add_argument("--coldkey", action="append", help="Coldkey to record, repeatable; the configured delegators if not given")
+    parser.add_argument("--every", type=int, default=settings.PORTFOLIO_EVERY, help="Blocks between snapshots")
+    args = parser.parse_args()
+
+    pool = EndpointPool(settings.RPC_ENDPOINTS)
+    pool.start()
+    recorder = PortfolioRecorder(pool, PortfolioStore(settings.PORTFOLIO_DIR), args.coldkey or settings.DELEGATORS, every=args.every)
+    logger.info(f"Recording {len(recorder.coldkeys)} coldkeys every {recorder.every} blocks to {settings.PORTFOLIO_DIR}")
+    recorder.run()
@@ -1,32 +1,78 @@
+import time
+import threading
 import bittensor as bt
 from substrateinterface import SubstrateInterface
 from substrateinterface.exceptions import SubstrateRequestException
 from typing import Optional, cast
 from bittensor.utils.balance import Balance, FixedPoint, fixed_to_float
+from substrateinterface.base import ExtrinsicReceipt
+
+from app.core.metrics import RPC_REQUESTS_IN_FLIGHT, TRADE_PHASE_SECONDS, phase
+from app.services.retry import DispatchErrorDecoder
+from app.services.tx_tracker import TxTracker
+from app.services.validation import TradeValidator
+from utils.pool_math import stake_limit_price, unstake_limit_price
+from utils.swap_planner import SWAP, Pool, plan_swap
+from utils.logger import logger
 
 
 class Proxy:
-    def __init__(self, network: str):
+    def __init__(
+        self,
+        network: str,
+        subtensor: Optional[bt.subtensor] = None,
+        validator: Optional[TradeValidator] = None,
+        tracker: Optional[TxTracker] = None,
+    ):
         """
         Initialize the RonProxy object.
         
         Args:
-            proxy_wallet: Proxy wallet address
             network: Network name
-            delegator: Delegator address
+            subtensor: Existing connection to share, a new one is opened if not given
+            validator: Pre-submission checks to run on every trade, none if not given
+            tracker: Follows extrinsics submitted without waiting for inclusion
         """
         self.network = network
-        self.subtensor = bt.subtensor(network=network)
-        
+        self.validator = validator
+        self.tracker = tracker
+        self.subtensor = subtensor or bt.subtensor(network=network)
+        # SubstrateInterface is not thread safe, so each worker thread keeps its own
+        self._local = threading.local()
+        self.error_decoder = DispatchErrorDecoder()
+
+    @property
+    def substrate(self) -> SubstrateInterface:
+        return self._local.substrate
 
     def init_runtime(self):
-        self.substrate = SubstrateInterface(
-            url=self.network,
-            ss58_format=42,
-            type_registry_preset='substrate-node-template',
-            auto_reconnect=True,
-        )
+        """Open this thread's SubstrateInterface on first use and reuse it afterwards."""
+        if getattr(self._local, "substrate", None) is not None:
+            return
+        with phase("init_runtime"):
+            self._local.substrate = SubstrateInterface(
+                url=self.network,
+                ss58_format=42,
+                type_registry_preset='substrate-node-template',
+                auto_reconnect=True,
+            )
+
+    def take_attempt(self) -> dict:
+        """
+        What this thread's last trade did, for the trade journal: any of
+        limit_price, route, executed_amount, tx_hash, block_hash and block_number.
+        Cleared once taken, so a failure before the next trade reports nothing stale.
+        """
+        attempt = getattr(self._local, "attempt", {})
+        self._local.attempt = {}
+        return attempt
+
+    def _note(self, **fields) -> None:
+        if not hasattr(self._local, "attempt"):
+            self._local.attempt = {}
+        self._local.attempt.update(fields)
 
+    @RPC_REQUESTS_IN_FLIGHT.labels("proxy").track_inprogress()
     def add_stake(
         self, 
         proxy_wallet: bt.wallet,
@@ -35,6 +81,8 @@ class Proxy:
         hotkey: str, 
         amount: Balance, 
         tolerance: float = 0.005,
+        subnet_info=None,
+        wait_for_inclusion: bool = True,
     ) -> tuple[bool, str]:
         """
         Add stake to a subnet.
@@ -45,12 +93,18 @@ class Proxy:
             hotkey: Hotkey address
             amount: Amount to stake
             tolerance: Tolerance for stake amount
+            subnet_info: Subnet snapshot to quote from, fetched if not given
+            wait_for_inclusion: Wait for the block, otherwise return the extrinsic hash once broadcast
         """
-        free_balance = self.subtensor.get_balance(
-            address=delegator,
-        )
-        print(f"free_balance: {free_balance}")
-        subnet_info = self.subtensor.subnet(netuid)
+        self._local.attempt = {}
+        with phase("get_balance"):
+            free_balance = self.subtensor.get_balance(
+                address=delegator,
+            )
+        logger.info(f"free_balance: {free_balance}")
+        if subnet_info is None:
+            with phase("subnet_lookup"):
+                subnet_info = self.subtensor.subnet(netuid)
         if not subnet_info:
             return False, f"Subnet with netuid {netuid} does not exist"
         
@@ -60,37 +114,47 @@ class Proxy:
                 1 + tolerance
             )  # Rate only for display
             rate_with_tolerance = f"{_rate_with_tolerance:.4f}"
-            price_with_tolerance = subnet_info.price.rao * (
-                1 + tolerance
-            )
+            price_with_tolerance = stake_limit_price(subnet_info.price.rao, tolerance)
+            self._note(limit_price=Balance.from_rao(price_with_tolerance).tao)
         else:
             rate_with_tolerance = "1"
             price_with_tolerance = Balance.from_rao(1)
 
-        print(f"price_with_tolerance: {price_with_tolerance}")
+        logger.info(f"price_with_tolerance: {price_with_tolerance}")
+        if self.validator is not None and subnet_info.is_dynamic:
+            with phase("validate"):
+                error = self.validator.check_limit_price("stake", subnet_info, amount, price_with_tolerance)
+            if error is not None:
+                return False, str(error)
         self.init_runtime()
-        call = self.substrate.compose_call(
-            call_module='SubtensorModule',
-            call_function='add_stake_limit',
-            call_params={
-                "hotkey": hotkey,
-                "netuid": netuid,
-                "amount_staked": amount.rao,
-                "limit_price": price_with_tolerance,
-                "allow_partial": False,
-            }
-        )
-        print(f"call: {call}")
+        with phase("compose_call"):
+            call = self.substrate.compose_call(
+                call_module='SubtensorModule',
+                call_function='add_stake_limit',
+                call_params={
+                    "hotkey": hotkey,
+                    "netuid": netuid,
+                    "amount_staked": amount.rao,
+                    "limit_price": price_with_tolerance,
+                    "allow_partial": False,
+                }
+            )
+        logger.debug("call: %s", call)
+        if not wait_for_inclusion:
+            return self._do_proxy_call(proxy_wallet, delegator, call, wait_for_inclusion=False)
         is_success, error_message = self._do_proxy_call(proxy_wallet, delegator, call)
-        new_free_balance = self.subtensor.get_balance(
-            address=delegator,
-        )
+        with phase("get_balance"):
+            new_free_balance = self.subtensor.get_balance(
+                address=delegator,
+            )
         if new_free_balance.rao < free_balance.rao:
+            self._note(executed_amount=(free_balance - new_free_balance).tao)
             return True, f"Stake added successfully"
         else:
             return False, f"Error: {error_message}"
 
 
+    @RPC_REQUESTS_IN_FLIGHT.labels("proxy").track_inprogress()
     def remove_stake(
         self, 
         proxy_wallet: bt.wallet,
@@ -99,6 +163,8 @@ class Proxy:
         hotkey: str,
         amount: Balance,
         tolerance: float = 0.005,
+        subnet_info=None,
+        wait_for_inclusion: bool = True,
     ) -> tuple[bool, str]:
         """
         Remove stake from a subnet.
@@ -109,8 +175,13 @@ class Proxy:
             hotkey: Hotkey address
             amount: Amount to unstake (if not using --all)
             all: Whether to unstake all available balance
+            subnet_info: Subnet snapshot to quote from, fetched if not given
+            wait_for_inclusion: Wait for the block, otherwise return the extrinsic hash once broadcast
         """
-        subnet_info = self.subtensor.subnet(netuid)
+        self._local.attempt = {}
+        if subnet_info is None:
+            with phase("subnet_lookup"):
+                subnet_info = self.subtensor.subnet(netuid)
         if not subnet_info:
             return False, f"Subnet with netuid {netuid} does not exist"
         
@@ -119,72 +190,275 @@ class Proxy:
             rate_with_tolerance = rate * (
                 1 - tolerance
             )  # Rate only for display
-            price_with_tolerance = subnet_info.price.rao * (
-                1 - tolerance
+            price_with_tolerance = unstake_limit_price(
+                subnet_info.price.rao, tolerance
             )  # Actual price to pass to extrinsic
+            self._note(limit_price=Balance.from_rao(price_with_tolerance).tao)
         else:
             rate_with_tolerance = 1
             price_with_tolerance = 1
-        print(f"amount: {amount.rao}")
+        logger.info(f"amount: {amount.rao}")
+        if self.validator is not None and subnet_info.is_dynamic:
+            with phase("validate"):
+                error = self.validator.check_limit_price("unstake", subnet_info, amount, price_with_tolerance)
+            if error is not None:
+                return False, str(error)
         self.init_runtime()
-        call = self.substrate.compose_call(
-            call_module='SubtensorModule',
-            call_function='remove_stake_limit',
-            call_params={
-                "hotkey": hotkey,
-                "netuid": netuid,
-                "amount_unstaked": amount.rao - 1,
-                "limit_price": price_with_tolerance,
-                "allow_partial": False,
-            }
-        )
-        free_balance = self.subtensor.get_balance(
-            address=delegator,
-        )
+        with phase("compose_call"):
+            call = self.substrate.compose_call(
+                call_module='SubtensorModule',
+                call_function='remove_stake_limit',
+                call_params={
+                    "hotkey": hotkey,
+                    "netuid": netuid,
+                    "amount_unstaked": amount.rao - 1,
+                    "limit_price": price_with_tolerance,
+                    "allow_partial": False,
+                }
+            )
+        if not wait_for_inclusion:
+            return self._do_proxy_call(proxy_wallet, delegator, call, wait_for_inclusion=False)
+        with phase("get_balance"):
+            free_balance = self.subtensor.get_balance(
+                address=delegator,
+            )
         
         is_success, error_message = self._do_proxy_call(proxy_wallet, delegator, call)
-        new_free_balance = self.subtensor.get_balance(
-            address=delegator,
-        )
+        with phase("get_balance"):
+            new_free_balance = self.subtensor.get_balance(
+                address=delegator,
+            )
         if new_free_balance.rao > free_balance.rao:
+            self._note(executed_amount=(new_free_balance - free_balance).tao)
             return True, f"Stake removed successfully"
         else:
             return False, f"Error: {error_message}"
 
+    @RPC_REQUESTS_IN_FLIGHT.labels("proxy").track_inprogress()
+    def swap_stake(
+        self,
+        proxy_wallet: bt.wallet,
+        delegator: str,
+        hotkey: str,
+        origin_netuid: int,
+        dest_netuid: int,
+        amount: Balance,
+        tolerance: float = 0.005,
+        origin_info=None,
+        dest_info=None,
+        route: Optional[str] = None,
+        wait_for_inclusion: bool = True,
+    ) -> tuple[bool, str]:
+        """
+        Move stake to another subnet, price protected. The planner simulates a
+        direct swap_stake_limit and a batched remove_stake_limit plus
+        add_stake_limit against both pools, and the better one is submitted.
+
+        Args:
+            proxy_wallet: Proxy wallet
+            hotkey: Hotkey address
+            origin_netuid: Source subnet ID
+            dest_netuid: Destination subnet ID
+            amount: Alpha to move
+            tolerance: Tolerance for the limit prices
+            origin_info: Source subnet snapshot to quote from, fetched if not given
+            dest_info: Destination subnet snapshot to quote from, fetched if not given
+            route: swap_stake_limit or unstake_stake, the planner's choice if not given
+            wait_for_inclusion: Wait for the block, otherwise return the extrinsic hash once broadcast
+        """
+        self._local.attempt = {}
+        with phase("subnet_lookup"):
+            if origin_info is None:
+                origin_info = self.subtensor.subnet(origin_netuid)
+            if dest_info is None:
+                dest_info = self.subtensor.subnet(dest_netuid)
+        if not origin_info or not dest_info:
+            return False, f"Subnet with netuid {origin_netuid if not origin_info else dest_netuid} does not exist"
+
+        routes = plan_swap(Pool.from_subnet(origin_info), Pool.from_subnet(dest_info), amount.tao, tolerance)
+        chosen = next((candidate for candidate in routes if candidate.name == route), None) if route else routes[0]
+        if chosen is None:
+            return False, f"Unknown swap route {route}"
+        logger.info(f"swap route: {chosen.name}, expected alpha out: {chosen.alpha_out}")
+        # The batch route's binding limit is the price paid into the destination pool
+        limit_price = chosen.limit_prices[SWAP if chosen.name == SWAP else "add_stake_limit"]
+        self._note(route=chosen.name, limit_price=Balance.from_rao(int(limit_price)).tao)
+        if not chosen.feasible(tolerance):
+            return False, f"Price exceeded tolerance limit, {chosen.name} needs {chosen.min_tolerance:.4f}"
+
+        self.init_runtime()
+        with phase("compose_call"):
+            if chosen.name == SWAP:
+                call = self.substrate.compose_call(
+                    call_module='SubtensorModule',
+                    call_function='swap_stake_limit',
+                    call_params={
+                        "hotkey": hotkey,
+                        "origin_netuid": origin_netuid,
+                        "destination_netuid": dest_netuid,
+                        "alpha_amount": amount.rao,
+                        "limit_price": int(chosen.limit_prices[SWAP]),
+                        "allow_partial": False,
+                    }
+                )
+            else:
+                call = [
+                    self.substrate.compose_call(
+                        call_module='SubtensorModule',
+                        call_function='remove_stake_limit',
+                        call_params={
+                            "hotkey": hotkey,
+                            "netuid": origin_netuid,
+                            "amount_unstaked": amount.rao,
+                            "limit_price": int(chosen.limit_prices["remove_stake_limit"]),
+                            "allow_partial": False,
+                        }
+                    ),
+                    self.substrate.compose_call(
+                        call_module='SubtensorModule',
+                        call_function='add_stake_limit',
+                        call_params={
+                            "hotkey": hotkey,
+                            "netuid": dest_netuid,
+                            "amount_staked": Balance.from_tao(chosen.stake_tao).rao,
+                            "limit_price": int(chosen.limit_prices["add_stake_limit"]),
+                            "allow_partial": False,
+                        }
+                    ),
+                ]
+        is_success, error_message = self._do_proxy_call(proxy_wallet, delegator, call, wait_for_inclusion)
+        if is_success and wait_for_inclusion:
+            return True, f"Stake swapped successfully via {chosen.name}"
+        return is_success, error_message
+
     def _do_proxy_call(
         self,
         proxy_wallet: bt.wallet,
         delegator: str,
         call,
+        wait_for_inclusion: bool = True,
     ) -> tuple[bool, str]:
-        proxy_call = self.substrate.compose_call(
-            call_module='Proxy',
-            call_function='proxy',
-            call_params={
-                'real': delegator,
-                'force_proxy_type': 'Staking',
-                'call': call,
-            }
-        )
-        extrinsic = self.substrate.create_signed_extrinsic(
-            call=proxy_call,
-            keypair=proxy_wallet.coldkey,
-        )
-        print(f"extrinsic: {extrinsic}")
-        try:
-            receipt = self.substrate.submit_extrinsic(
-                extrinsic,
-                wait_for_inclusion=True,
-                wait_for_finalization=False,
+        """Submit `call` on the delegator's behalf; a list of calls goes in one Utility.batch_all."""
+        calls = call if isinstance(call, list) else [call]
+        with phase("compose_call"):
+            proxy_calls = [
+                self.substrate.compose_call(
+                    call_module='Proxy',
+                    call_function='proxy',
+                    call_params={
+                        'real': delegator,
+                        'force_proxy_type': 'Staking',
+                        'call': inner,
+                    }
+                )
+                for inner in calls
+            ]
+            proxy_call = proxy_calls[0] if len(proxy_calls) == 1 else self.substrate.compose_call(
+                call_module='Utility',
+                call_function='batch_all',
+                call_params={'calls': proxy_calls},
             )
+        with phase("sign"):
+            extrinsic = self.substrate.create_signed_extrinsic(
+                call=proxy_call,
+                keypair=proxy_wallet.coldkey,
+            )
+        logger.debug("extrinsic: %s", extrinsic)
+        if self.validator is not None:
+            shape = tuple((inner.value['call_module'], inner.value['call_function']) for inner in calls)
+            shape = shape[0] if len(shape) == 1 else shape
+            with phase("validate"):
+                error = self.validator.validate(self.substrate, extrinsic, shape, proxy_wallet.coldkey.ss58_address)
+            if error is not None:
+                return False, str(error)
+        if not wait_for_inclusion:
+            return self._submit(extrinsic, proxy_wallet.name, calls[0])
+        try:
+            receipt = self._submit_and_wait_for_inclusion(extrinsic)
         except Exception as e:
             error_message = str(e)
             return False, error_message
         
-        is_success = receipt.is_success
-        error_message = receipt.error_message
+        with phase("receipt"):
+            is_success = receipt.is_success
+            error_message = receipt.error_message
+            self._note(tx_hash=receipt.extrinsic_hash, block_hash=receipt.block_hash)
+            try:
+                self._note(block_number=self.substrate.get_block_number(receipt.block_hash))
+            except Exception as e:
+                logger.warning(f"Could not read the block number of {receipt.block_hash}: {e}")
+            if is_success:
+                error_message = self.error_decoder.proxied_call_error(self.substrate, receipt)
+                is_success = error_message is None
         return is_success, str(error_message)
 
+    def _submit(self, extrinsic, wallet_name: str, call) -> tuple[bool, str]:
+        """
+        Broadcast without waiting and hand the extrinsic to the tracker.
+
+        Returns:
+            tuple: (True, extrinsic hash) once the node accepted it, (False, error) otherwise
+        """
+        tx_hash = '0x{}'.format(extrinsic.extrinsic_hash.hex())
+        self._note(tx_hash=tx_hash)
+        if self.tracker is not None:
+            call_args = call.value['call_args']
+            netuid = call_args['netuid'] if 'netuid' in call_args else call_args['origin_netuid']
+            self.tracker.track(tx_hash, call.value['call_function'], wallet_name, netuid)
+        started = time.perf_counter()
+        try:
+            self.substrate.rpc_request("author_submitExtrinsic", [str(extrinsic.data)])
+        except Exception as e:
+            if self.tracker is not None:
+                self.tracker.submit_failed(tx_hash, str(e))
+            return False, str(e)
+        finally:
+            TRADE_PHASE_SECONDS.labels("submit").observe(time.perf_counter() - started)
+        return True, tx_hash
+
+    def _submit_and_wait_for_inclusion(self, extrinsic) -> ExtrinsicReceipt:
+        """
+        Same as `submit_extrinsic(wait_for_inclusion=True)`, but timing the
+        submission (until the node first reports the extrinsic's status) and
+        the inclusion wait separately.
+        """
+        started = time.perf_counter()
+        timings = {}
+
+        def result_handler(message, update_nr, subscription_id):
+            if 'params' not in message:
+                return None
+            if "submitted" not in timings:
+                timings["submitted"] = time.perf_counter()
+            result = message['params']['result']
+            if type(result) is dict:
+                message_result = {k.lower(): v for k, v in result.items()}
+                if 'inblock' in message_result:
+                    self.substrate.rpc_request('author_unwatchExtrinsic', [subscription_id])
+                    return {
+                        'block_hash': message_result['inblock'],
+                        'extrinsic_hash': '0x{}'.format(extrinsic.extrinsic_hash.hex()),
+                        'finalized': False,
+                    }
+
+        try:
+            response = self.substrate.rpc_request(
+                "author_submitAndWatchExtrinsic",
+                [str(extrinsic.data)],
+                result_handler=result_handler,
+            )
+        finally:
+            submitted = timings.get("submitted", time.perf_counter())
+            TRADE_PHASE_SECONDS.labels("submit").observe(submitted - started)
+            TRADE_PHASE_SECONDS.labels("inclusion_wait").observe(time.perf_counter() - submitted)
+
+        return ExtrinsicReceipt(
+            substrate=self.substrate,
+            extrinsic_hash=response['extrinsic_hash'],
+            block_hash=response['block_hash'],
+            finalized=response['finalized'],
+        )
+
 
 if __name__ == "__main__":
     proxy_wallet = bt.wallet(name="black")
@@ -194,4 +468,4 @@ if __name__ == "__main__":
     proxy_wallet.unlock_coldkey()
     proxy = Proxy("finney")
     is_success, error_message = proxy.add_stake(proxy_wallet, delegator, int(netuid), "5F5WLLEzDBXQDdTzDYgbQ3d3JKbM15HhPdFuLMmuzcUW5xG2", Balance.from_tao(int(amount)))
-    print(is_success, error_message)
\ No newline at end of file
+    logger.info(f"{is_success} {error_message}")
\ No newline at end of file
@@ -0,0 +1,171 @@
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+from app.core.metrics import classify_error as classify_error_text
+from utils.logger import logger
+from utils.storage import StorageReader
+
+
+BLOCK_TIME = 12.0
+# Submit a little after the expected block so the new state is there to quote from
+BLOCK_MARGIN = 0.5
+MAX_DELAY = 2 * BLOCK_TIME
+
+# Subtensor's CustomTransactionError, reported by the transaction pool as
+# "Custom error: <code>" when a transaction fails validation
+CUSTOM_TRANSACTION_ERRORS = {
+    0: "ColdkeyInSwapSchedule",
+    1: "StakeAmountTooLow",
+    2: "BalanceTooLow",
+    3: "SubnetDoesntExist",
+    4: "HotkeyAccountDoesntExist",
+    5: "NotEnoughStakeToWithdraw",
+    6: "RateLimitExceeded",
+    7: "InsufficientLiquidity",
+    8: "SlippageTooHigh",
+    9: "TransferDisallowed",
+    10: "HotKeyNotRegisteredInNetwork",
+    11: "InvalidIpAddress",
+    12: "ServingRateLimitExceeded",
+    13: "InvalidPort",
+    255: "BadRequest",
+}
+
+# Dispatch and custom error names by error class
+ERROR_CLASSES = {
+    "SlippageTooHigh": "price_limit",
+    "InsufficientLiquidity": "price_limit",
+    "BalanceTooLow": "insufficient_balance",
+    "NotEnoughBalanceToStake": "insufficient_balance",
+    "NotEnoughStakeToWithdraw": "insufficient_balance",
+    "InsufficientBalance": "insufficient_balance",
+    "RateLimitExceeded": "rate_limit",
+    "StakingRateLimitExceeded": "rate_limit",
+    "TxRateLimitExceeded": "rate_limit",
+    "StakeAmountTooLow": "invalid_request",
+    "AmountTooLow": "invalid_request",
+    "SubnetDoesntExist": "invalid_request",
+    "SubnetNotExists": "invalid_request",
+    "HotkeyAccountDoesntExist": "invalid_request",
+    "HotKeyAccountNotExists": "invalid_request",
+    "HotKeyNotRegisteredInNetwork": "invalid_request",
+    "ColdkeyInSwapSchedule": "invalid_request",
+    "NotProxy": "invalid_request",
+    "Unproxyable": "invalid_request",
+    "BadOrigin": "invalid_request",
+}
+
+# Classes that can succeed on a later block: the price moved back, the nonce
+# or rate limit cleared, or the connection came back
+RETRYABLE = {"price_limit", "nonce", "rate_limit", "connection"}
+
+_CUSTOM_ERROR = re.compile(r"Custom error: (\d+)")
+
+
+def classify_error(message) -> str:
+    """
+    Map a trade error (a decoded dispatch error, a transaction pool rejection
+    or an exception message) to its error class.
+    """
+    text = str(message)
+    match = _CUSTOM_ERROR.search(text)
+    if match:
+        name = CUSTOM_TRANSACTION_ERRORS.get(int(match.group(1)))
+        if name in ERROR_CLASSES:
+            return ERROR_CLASSES[name]
+    for name, error_class in ERROR_CLASSES.items():
+        if re.search(rf"\b{name}\b", text):
+            return error_class
+    return classify_error_text(text)
+
+
+class DispatchErrorDecoder:
+    """Decodes module dispatch errors to their names, cached per runtime version."""
+
+    def __init__(self):
+        self._cache: Dict[Tuple[int, int, int], dict] = {}
+
+    def module_error(self, substrate, module_index: int, error_index) -> dict:
+        if type(error_index) is str:
+            # Actual error index is first u8 in new [u8; 4] format
+            error_index = int(error_index[2:4], 16)
+        key = (substrate.runtime_version, module_index, error_index)
+        if key not in self._cache:
+            module_error = substrate.metadata.get_module_error(module_index=module_index, error_index=error_index)
+            self._cache[key] = {'type': 'Module', 'name': module_error.name, 'docs': module_error.docs}
+        return self._cache[key]
+
+    def decode(self, substrate, dispatch_error) -> dict:
+        if isinstance(dispatch_error, dict) and 'Module' in dispatch_error:
+            module = dispatch_error['Module']
+            if type(module) is tuple:
+                return self.module_error(substrate, module[0], module[1])
+            return self.module_error(substrate, module['index'], module['error'])
+        name = next(iter(dispatch_error)) if isinstance(dispatch_error, dict) else str(dispatch_error)
+        return {'type': 'System', 'name': name, 'docs': None}
+
+    def proxied_call_error(self, substrate, receipt) -> Optional[dict]:
+        """
+        The error of the call wrapped in Proxy::proxy. The proxy extrinsic itself
+        succeeds even when the inner call fails; only the ProxyExecuted event
+        carries the inner result.
+        """
+        for event in receipt.triggered_events:
+            value = event.value
+            if value['module_id'] == 'Proxy' and value['event_id'] == 'ProxyExecuted':
+                result = value['attributes']['result']
+                if isinstance(result, dict) and 'Err' in result:
+                    return self.decode(substrate, result['Err'])
+        return None
+
+
+class RetryPolicy:
+    """
+    Bounded, block-aligned backoff. Price, nonce and rate limit errors can only
+    clear with a new block, so the next attempt waits for the next block
+    boundary; connection errors back off exponentially from half a second.
+    """
+
+    def __init__(self, block_time: float = BLOCK_TIME, max_delay: float = MAX_DELAY):
+        """
+        Initialize the RetryPolicy.
+
+        Args:
+            block_time: Expected seconds between blocks
+            max_delay: Upper bound of any single wait
+        """
+        self.block_time = block_time
+        self.max_delay = max_delay
+
+    def should_retry(self, error_class: str) -> bool:
+        return error_class in RETRYABLE
+
+    def delay(self, error_class: str, attempt: int, last_block_time: Optional[float] = None) -> float:
+        """
+        Args:
+            error_class: Class of the failed attempt's error
+            attempt: Zero-based number of the failed attempt
+            last_block_time: Timestamp of the best block, if known
+
+        Returns:
+            float: Seconds to wait before the next attempt
+        """
+        if error_class == "connection":
+            return min(0.5 * 2 ** attempt, self.max_delay)
+        if last_block_time is None:
+            return min(self.block_time, self.max_delay)
+        until_next_block = last_block_time + self.block_time - time.time()
+        # A late block is already due, so only the margin is waited for
+        return min(max(until_next_block, 0.0) + BLOCK_MARGIN, self.max_delay)
+
+    def wait(self, substrate, error_class: str, attempt: int) -> None:
+        last_block_time = None
+        if error_class != "connection":
+            try:
+                last_block_time = StorageReader(substrate).timestamp()
+            except Exception as e:
+                logger.error(f"Error reading block time for retry backoff: {e}")
+        delay = self.delay(error_class, attempt, last_block_time)
+        logger.info(f"Retrying after {error_class} error in {delay:.2f}s")
+        time.sleep(delay)
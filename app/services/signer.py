@@ -0,0 +1,231 @@
+"""
+Local signing daemon.
+
+The daemon is the only process that unlocks coldkeys. API workers reach it
+over a UNIX socket and get signatures back, so they hold no key material and
+any number of them can run side by side.
+
+Wire format, all integers big endian:
+    request:  op (B) | name length (B) | payload length (I) | name | payload
+    response: status (B) | body length (I) | body
+
+OP_LIST takes no name or payload and answers with one entry per wallet:
+    name length (B) | name | public key (32s) | crypto type (B) | delegator length (B) | delegator
+OP_SIGN signs `payload` with the coldkey of wallet `name` and answers with the
+raw signature. A non-zero status carries a UTF-8 error message as body.
+
+Usage: python -m app.services.signer
+"""
+import os
+import socket
+import struct
+import asyncio
+import threading
+from typing import Dict, Tuple
+
+from scalecodec.base import ScaleBytes
+from substrateinterface import Keypair
+
+from utils.logger import logger
+
+
+REQUEST_HEADER = struct.Struct("!BBI")
+RESPONSE_HEADER = struct.Struct("!BI")
+PUBLIC_KEY = struct.Struct("!32sB")
+
+OP_LIST = 1
+OP_SIGN = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+MAX_PAYLOAD = 1 << 20
+DEFAULT_SOCKET = "/tmp/bt-proxy-signer.sock"
+
+
+class SignerError(Exception):
+    pass
+
+
+def encode_wallet_list(wallets) -> bytes:
+    body = bytearray()
+    for name, (wallet, delegator) in wallets.items():
+        keypair = wallet.coldkey
+        name_bytes, delegator_bytes = name.encode(), delegator.encode()
+        body += bytes([len(name_bytes)]) + name_bytes
+        body += PUBLIC_KEY.pack(bytes(keypair.public_key), keypair.crypto_type)
+        body += bytes([len(delegator_bytes)]) + delegator_bytes
+    return bytes(body)
+
+
+def decode_wallet_list(body: bytes) -> Dict[str, Tuple[bytes, int, str]]:
+    wallets = {}
+    offset = 0
+    while offset < len(body):
+        name_length = body[offset]
+        name = body[offset + 1:offset + 1 + name_length].decode()
+        offset += 1 + name_length
+        public_key, crypto_type = PUBLIC_KEY.unpack_from(body, offset)
+        offset += PUBLIC_KEY.size
+        delegator_length = body[offset]
+        delegator = body[offset + 1:offset + 1 + delegator_length].decode()
+        offset += 1 + delegator_length
+        wallets[name] = (public_key, crypto_type, delegator)
+    return wallets
+
+
+class SigningDaemon:
+    """Serves signatures for unlocked wallets over a UNIX socket."""
+
+    def __init__(self, socket_path: str, wallets):
+        """
+        Initialize the SigningDaemon.
+
+        Args:
+            socket_path: Path of the UNIX socket to listen on
+            wallets: Dictionary mapping wallet names to (unlocked wallet, delegator) tuples
+        """
+        self.socket_path = socket_path
+        self.wallets = wallets
+
+    def handle(self, op: int, name: str, payload: bytes) -> Tuple[int, bytes]:
+        if op == OP_LIST:
+            return STATUS_OK, encode_wallet_list(self.wallets)
+        if op == OP_SIGN:
+            if name not in self.wallets:
+                return STATUS_ERROR, f"Wallet '{name}' not found".encode()
+            wallet, _ = self.wallets[name]
+            return STATUS_OK, bytes(wallet.coldkey.sign(payload))
+        return STATUS_ERROR, f"Unknown op {op}".encode()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                header = await reader.readexactly(REQUEST_HEADER.size)
+                op, name_length, payload_length = REQUEST_HEADER.unpack(header)
+                if payload_length > MAX_PAYLOAD:
+                    break
+                name = (await reader.readexactly(name_length)).decode()
+                payload = await reader.readexactly(payload_length)
+                try:
+                    status, body = self.handle(op, name, payload)
+                except Exception as e:
+                    status, body = STATUS_ERROR, str(e).encode()
+                if status != STATUS_OK:
+                    logger.error(f"Signing request for {name} failed: {body.decode()}")
+                writer.write(RESPONSE_HEADER.pack(status, len(body)) + body)
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._serve_connection, path=self.socket_path)
+        finally:
+            os.umask(old_umask)
+        logger.info(f"Signing daemon listening on {self.socket_path} for {list(self.wallets)}")
+        async with server:
+            await server.serve_forever()
+
+
+class SignerClient:
+    """Blocking client for the signing daemon, one connection per thread."""
+
+    def __init__(self, socket_path: str, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _recv_exactly(self, sock: socket.socket, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Signing daemon closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def request(self, op: int, name: str = "", payload: bytes = b"") -> bytes:
+        name_bytes = name.encode()
+        frame = REQUEST_HEADER.pack(op, len(name_bytes), len(payload)) + name_bytes + payload
+        for attempt in range(2):
+            sock = None
+            try:
+                sock = self._connection()
+                sock.sendall(frame)
+                status, length = RESPONSE_HEADER.unpack(self._recv_exactly(sock, RESPONSE_HEADER.size))
+                body = self._recv_exactly(sock, length)
+                break
+            except (ConnectionError, OSError):
+                # Reconnect once, e.g. after the daemon was restarted
+                if sock is not None:
+                    sock.close()
+                self._local.sock = None
+                if attempt == 1:
+                    raise
+        if status != STATUS_OK:
+            raise SignerError(body.decode())
+        return body
+
+    def sign(self, name: str, payload: bytes) -> bytes:
+        return self.request(OP_SIGN, name, payload)
+
+    def load_wallets(self):
+        """
+        Returns:
+            dict: Wallet names mapped to (RemoteWallet, delegator) tuples, the
+            same shape as `app.services.wallets.wallets`
+        """
+        return {
+            name: (RemoteWallet(name, RemoteKeypair(self, name, public_key, crypto_type)), delegator)
+            for name, (public_key, crypto_type, delegator) in decode_wallet_list(self.request(OP_LIST)).items()
+        }
+
+
+class RemoteKeypair(Keypair):
+    """Public half of a coldkey whose signatures are made by the signing daemon."""
+
+    def __init__(self, client: SignerClient, name: str, public_key: bytes, crypto_type: int):
+        super().__init__(public_key=public_key, crypto_type=crypto_type, ss58_format=42)
+        self.client = client
+        self.name = name
+
+    def sign(self, data) -> bytes:
+        if type(data) is ScaleBytes:
+            data = bytes(data.data)
+        elif data[0:2] == '0x':
+            data = bytes.fromhex(data[2:])
+        elif type(data) is str:
+            data = data.encode()
+        return self.client.sign(self.name, data)
+
+
+class RemoteWallet:
+    """Stands in for `bt.wallet` where only the coldkey is used for signing."""
+
+    def __init__(self, name: str, coldkey: RemoteKeypair):
+        self.name = name
+        self.coldkey = coldkey
+        self.coldkeypub = coldkey
+
+
+if __name__ == "__main__":
+    from app.core.config import settings
+    from app.services.wallets import unlock_wallets, wallets
+
+    unlock_wallets()
+    asyncio.run(SigningDaemon(settings.SIGNER_SOCKET or DEFAULT_SOCKET, wallets).serve())
@@ -1,9 +1,22 @@
+import time
+import asyncio
+import threading
 import bittensor as bt
 from typing import Dict, Tuple, Optional, Any
 
 from app.core.config import settings
+from app.core.metrics import TRADE_ERRORS, TRADE_RETRIES, TRADE_SECONDS, phase
+from app.services.order_queue import DelegatorQueues, Order
 from app.services.proxy import Proxy
+from app.services.retry import RetryPolicy, classify_error
+from app.services.trade_journal import TradeJournal
+from app.services.tx_tracker import TxStore, TxTracker
+from app.services.validation import TradeValidator
 from app.services.wallets import wallets
+from utils.logger import trade_id
+from utils.rpc_pool import EndpointPool
+from utils.pool_math import stake_limit_price, stake_min_tolerance, unstake_limit_price, unstake_min_tolerance
+from utils.swap_planner import Pool, plan_min_tolerance, plan_swap
 
 
 class StakeService:
@@ -22,9 +35,54 @@ class StakeService:
             proxy: Proxy instance for handling stake operations
         """
         self.wallets = wallets
-        self.proxy = Proxy(settings.NETWORK)
+        self.subtensor: Optional[bt.subtensor] = None
+        self.proxy: Optional[Proxy] = None
+        self.tracker: Optional[TxTracker] = None
+        self.journal: Optional[TradeJournal] = None
+        self.rpc_pool: Optional[EndpointPool] = None
+        # Set once wallets are unlocked and the chain connection is open
+        self.ready = threading.Event()
+        self.queues = DelegatorQueues(
+            self._execute,
+            max_running=settings.MAX_RUNNING_TRADES,
+            max_queued=settings.MAX_QUEUED_TRADES,
+            max_queued_per_delegator=settings.MAX_QUEUED_TRADES_PER_DELEGATOR,
+            lock_dir=settings.TRADE_LOCK_DIR,
+            check_merge=self.can_merge,
+        )
+        self.retry_policy = RetryPolicy()
+
+    def connect(self) -> None:
+        """
+        Open the chain connection, shared by the service and its Proxy, and
+        start probing the read endpoints.
+        """
+        self.rpc_pool = EndpointPool(settings.RPC_ENDPOINTS)
+        self.rpc_pool.start()
         self.subtensor = bt.subtensor(network=settings.NETWORK)
+        validator = None
+        if settings.TRADE_VALIDATION != "off":
+            validator = TradeValidator(dry_run=settings.TRADE_VALIDATION == "dry_run")
+        self.tracker = TxTracker(
+            settings.NETWORK, store=TxStore(settings.TX_DB_PATH), lock_dir=settings.TRADE_LOCK_DIR
+        )
+        self.tracker.resume()
+        self.journal = TradeJournal(settings.TRADE_JOURNAL_PATH)
+        self.journal.start()
+        self.proxy = Proxy(settings.NETWORK, subtensor=self.subtensor, validator=validator, tracker=self.tracker)
     
+    def _read_at_head(self, func):
+        """
+        Read from an endpoint at the best head seen. Quotes turn into limit prices,
+        so they must not come from a node that lags by the `MAX_HEAD_LAG` reads allow;
+        with none at the head this raises LaggingEndpoints, a retryable connection error.
+        """
+        return self.rpc_pool.read(func, min_head=self.rpc_pool.best_head, strict=True)
+
+    def get_subnet(self, netuid: int):
+        """The subnet's current state from the healthiest endpoint at the best head."""
+        return self._read_at_head(lambda subtensor: subtensor.subnet(netuid=netuid))
+
     def get_stake_min_tolerance(self, tao_amount: float, netuid: int) -> float:
         """
         Calculate the minimum tolerance for staking operations.
@@ -36,10 +94,10 @@ class StakeService:
         Returns:
             float: Minimum tolerance value
         """
-        subnet = self.subtensor.subnet(netuid=netuid)
+        subnet = self.get_subnet(netuid)
         if subnet is None:
             raise ValueError(f"Subnet with netuid {netuid} does not exist")
-        min_tolerance = tao_amount / subnet.tao_in.tao
+        min_tolerance = stake_min_tolerance(tao_amount, subnet.tao_in.tao)
         return min_tolerance
 
 
@@ -47,13 +105,13 @@ class StakeService:
         """
         Calculate the minimum tolerance for unstaking operations.
         """
-        subnet = self.subtensor.subnet(netuid=netuid)
+        subnet = self.get_subnet(netuid)
         if subnet is None:
             raise ValueError(f"Subnet with netuid {netuid} does not exist")
-        min_tolerance = tao_amount / (tao_amount + subnet.alpha_in.tao)
+        min_tolerance = unstake_min_tolerance(tao_amount, subnet.alpha_in.tao)
         return min_tolerance
 
-    
+
     def stake(
         self,
         tao_amount: float,
@@ -62,7 +120,222 @@ class StakeService:
         dest_hotkey: str = settings.DEFAULT_DEST_HOTKEY,
         rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
         min_tolerance_staking: bool = settings.DEFAULT_MIN_TOLERANCE,
-        retries: int = settings.DEFAULT_RETRIES
+        retries: int = settings.DEFAULT_RETRIES,
+        wait_for_inclusion: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Queue a staking order behind the delegator's other orders and wait for its result.
+        Raises QueueFull if the queues are at their limit.
+        Takes the same arguments as `execute_stake`.
+        """
+        _, delegator = self.wallets[wallet_name]
+        order = Order("stake", wallet_name, delegator, netuid, dest_hotkey, tao_amount,
+                      rate_tolerance, min_tolerance_staking, retries, wait_for_inclusion)
+        return self.queues.submit(order).result()
+
+    def unstake(
+        self,
+        netuid: int,
+        wallet_name: str,
+        amount: Optional[float] = None,
+        dest_hotkey: str = settings.DEFAULT_DEST_HOTKEY,
+        rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
+        min_tolerance_unstaking: bool = settings.DEFAULT_MIN_TOLERANCE,
+        retries: int = settings.DEFAULT_RETRIES,
+        wait_for_inclusion: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Queue an unstaking order behind the delegator's other orders and wait for its result.
+        Raises QueueFull if the queues are at their limit.
+        Takes the same arguments as `execute_unstake`.
+        """
+        _, delegator = self.wallets[wallet_name]
+        order = Order("unstake", wallet_name, delegator, netuid, dest_hotkey, amount,
+                      rate_tolerance, min_tolerance_unstaking, retries, wait_for_inclusion)
+        return self.queues.submit(order).result()
+
+    def plan_swap(
+        self,
+        origin_netuid: int,
+        dest_netuid: int,
+        wallet_name: str,
+        amount: Optional[float] = None,
+        dest_hotkey: str = settings.DEFAULT_DEST_HOTKEY,
+        rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
+    ) -> Dict[str, Any]:
+        """
+        Simulate both swap routes against the two pools' current reserves.
+
+        Args:
+            origin_netuid: Source subnet ID
+            dest_netuid: Destination subnet ID
+            wallet_name: Name of the wallet to use
+            amount: Alpha to move (if None, the whole stake)
+            dest_hotkey: Hotkey the stake is on
+            rate_tolerance: Tolerance for the limit prices
+
+        Returns:
+            Dict with the amount and the routes, best first
+        """
+        _, delegator = self.wallets[wallet_name]
+        origin, destination = self._swap_subnets(origin_netuid, dest_netuid)
+        if amount is None:
+            amount = self._stake_balance(delegator, dest_hotkey, origin_netuid).tao
+        routes = plan_swap(Pool.from_subnet(origin), Pool.from_subnet(destination), amount, rate_tolerance)
+        return {
+            "amount": amount,
+            "tolerance": rate_tolerance,
+            "best": routes[0].name,
+            "routes": [route.to_dict(rate_tolerance) for route in routes],
+        }
+
+    def swap(
+        self,
+        origin_netuid: int,
+        dest_netuid: int,
+        wallet_name: str,
+        amount: Optional[float] = None,
+        dest_hotkey: str = settings.DEFAULT_DEST_HOTKEY,
+        rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
+        min_tolerance_swapping: bool = settings.DEFAULT_MIN_TOLERANCE,
+        route: Optional[str] = None,
+        retries: int = settings.DEFAULT_RETRIES,
+        wait_for_inclusion: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Queue a swap order behind the delegator's other orders and wait for its result.
+        Raises QueueFull if the queues are at their limit.
+        Takes the same arguments as `execute_swap`.
+        """
+        _, delegator = self.wallets[wallet_name]
+        order = Order("swap", wallet_name, delegator, origin_netuid, dest_hotkey, amount,
+                      rate_tolerance, min_tolerance_swapping, retries, wait_for_inclusion,
+                      dest_netuid=dest_netuid, route=route)
+        return self.queues.submit(order).result()
+
+    def can_merge(self, merged: Order) -> bool:
+        """
+        Whether a coalesced order still goes through at the tightest tolerance
+        of the orders in it: the merged amount's price impact, quoted from the
+        current pool, has to stay within the limit price.
+
+        Args:
+            merged: The orders' merge_orders result
+        """
+        if merged.min_tolerance:
+            # The tolerance is derived from the merged amount itself
+            return True
+        tolerance = merged.rate_tolerance
+        if merged.operation == "swap":
+            origin, destination = self._swap_subnets(merged.netuid, merged.dest_netuid)
+            amount = merged.amount
+            if amount is None:
+                amount = self._stake_balance(merged.delegator, merged.hotkey, merged.netuid).tao
+            routes = plan_swap(Pool.from_subnet(origin), Pool.from_subnet(destination), amount, tolerance)
+            route = next((candidate for candidate in routes if candidate.name == merged.route), routes[0])
+            return route.feasible(tolerance)
+        subnet = self.get_subnet(merged.netuid)
+        if subnet is None:
+            return False
+        pool = Pool.from_subnet(subnet)
+        if not pool.dynamic:
+            return True
+        if merged.operation == "stake":
+            return pool.price_after_stake(merged.amount) <= stake_limit_price(pool.price, tolerance)
+        amount = merged.amount
+        if amount is None:
+            amount = self._stake_balance(merged.delegator, merged.hotkey, merged.netuid).tao
+        return pool.price_after_unstake(amount) >= unstake_limit_price(pool.price, tolerance)
+
+    async def _execute(self, order: Order) -> Dict[str, Any]:
+        if order.operation == "swap":
+            return await asyncio.to_thread(
+                self.execute_swap,
+                origin_netuid=order.netuid,
+                dest_netuid=order.dest_netuid,
+                wallet_name=order.wallet_name,
+                amount=order.amount,
+                dest_hotkey=order.hotkey,
+                rate_tolerance=order.rate_tolerance,
+                min_tolerance_swapping=order.min_tolerance,
+                route=order.route,
+                retries=order.retries,
+                wait_for_inclusion=order.wait_for_inclusion,
+            )
+        if order.operation == "stake":
+            return await asyncio.to_thread(
+                self.execute_stake,
+                tao_amount=order.amount,
+                netuid=order.netuid,
+                wallet_name=order.wallet_name,
+                dest_hotkey=order.hotkey,
+                rate_tolerance=order.rate_tolerance,
+                min_tolerance_staking=order.min_tolerance,
+                retries=order.retries,
+                wait_for_inclusion=order.wait_for_inclusion,
+            )
+        return await asyncio.to_thread(
+            self.execute_unstake,
+            netuid=order.netuid,
+            wallet_name=order.wallet_name,
+            amount=order.amount,
+            dest_hotkey=order.hotkey,
+            rate_tolerance=order.rate_tolerance,
+            min_tolerance_unstaking=order.min_tolerance,
+            retries=order.retries,
+            wait_for_inclusion=order.wait_for_inclusion,
+        )
+
+    def _result(self, success: bool, msg: Optional[str], error_class: Optional[str], wait_for_inclusion: bool) -> Dict[str, Any]:
+        if success and not wait_for_inclusion:
+            # msg is the extrinsic hash; follow it through /tx/{tx_hash}
+            return {"success": True, "error": None, "error_class": None, "tx_hash": msg, "status": "submitted"}
+        return {
+            "success": success,
+            "error": msg,
+            "error_class": None if success else error_class,
+        }
+
+    def _journal(self, trade: Dict[str, Any], attempt: int, started_at: float, tolerance: float,
+                 success: bool, msg: Optional[str]) -> None:
+        """
+        Queue one attempt of `trade` on the trade journal, with what the Proxy
+        reported about it.
+
+        Args:
+            trade: The fields every attempt of the trade shares
+            attempt: Zero-based attempt number
+            started_at: Unix time the attempt started
+            tolerance: Tolerance the attempt was quoted with
+            success: Whether the attempt succeeded
+            msg: The attempt's error, or its extrinsic hash when not waiting for inclusion
+        """
+        details = self.proxy.take_attempt() if self.proxy is not None else {}
+        if self.journal is None:
+            return
+        entry = dict(trade, **details)
+        if not success:
+            entry.update(error=msg, error_class=classify_error(msg))
+        self.journal.record(
+            **entry,
+            trade_id=trade_id.get(),
+            attempt=attempt + 1,
+            tolerance=tolerance,
+            success=success,
+            latency=time.time() - started_at,
+            started_at=started_at,
+        )
+
+    def execute_stake(
+        self,
+        tao_amount: float,
+        netuid: int,
+        wallet_name: str,
+        dest_hotkey: str = settings.DEFAULT_DEST_HOTKEY,
+        rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
+        min_tolerance_staking: bool = settings.DEFAULT_MIN_TOLERANCE,
+        retries: int = settings.DEFAULT_RETRIES,
+        wait_for_inclusion: bool = True,
     ) -> Dict[str, Any]:
         """
         Execute staking operation with retry mechanism and error handling.
@@ -75,38 +348,44 @@ class StakeService:
             rate_tolerance: Tolerance for rate calculations
             min_tolerance_staking: Whether to use minimum tolerance
             retries: Number of retry attempts
+            wait_for_inclusion: Wait for the block, otherwise return the extrinsic hash once broadcast
             
         Returns:
             Dict containing success status, result, and min_tolerance
         """ 
+        started = time.perf_counter()
         wallet, delegator = self.wallets[wallet_name]
-        
-        # Adjust rate tolerance if using minimum tolerance staking
-        if min_tolerance_staking:
-            # Calculate minimum tolerance
-            subnet = self.subtensor.subnet(netuid=netuid)
-            if subnet is None:
-                return {
-                    "success": False,
-                    "error": f"Subnet with netuid {netuid} does not exist"
-                }
-            min_tolerance = tao_amount / subnet.tao_in.tao
-    
-            rate_tolerance = min_tolerance + 0.001
+        trade = dict(operation="stake", wallet_name=wallet_name, delegator=delegator, netuid=netuid,
+                     hotkey=dest_hotkey, requested_amount=tao_amount, wait_for_inclusion=wait_for_inclusion)
         
         # Execute staking with retry mechanism
         success = False
         msg = None
+        error_class = None
 
-        for _ in range(retries):
+        for attempt in range(retries):
+            if attempt > 0:
+                TRADE_RETRIES.labels("stake").inc()
+            attempt_started = time.time()
+            tolerance = rate_tolerance
             try:
+                # Re-quote from the newest snapshot on every attempt
+                with phase("subnet_lookup"):
+                    subnet = self.get_subnet(netuid)
+                if subnet is None:
+                    msg = f"Subnet with netuid {netuid} does not exist"
+                    break
+                if min_tolerance_staking:
+                    tolerance = stake_min_tolerance(tao_amount, subnet.tao_in.tao) + 0.001
                 result, msg = self.proxy.add_stake(
                     amount=bt.Balance.from_tao(tao_amount),
                     proxy_wallet=wallet,
                     delegator=delegator,
                     netuid=netuid,
                     hotkey=dest_hotkey,
-                    tolerance=rate_tolerance,
+                    tolerance=tolerance,
+                    subnet_info=subnet,
+                    wait_for_inclusion=wait_for_inclusion,
                 )
                 
                 if result:
@@ -114,15 +393,18 @@ class StakeService:
                     break
             except Exception as e:
                 msg = str(e)
-                continue
+            finally:
+                self._journal(trade, attempt, attempt_started, tolerance, success, msg)
+            error_class = classify_error(msg)
+            TRADE_ERRORS.labels("stake", error_class).inc()
+            if not self.retry_policy.should_retry(error_class) or attempt == retries - 1:
+                break
+            self.retry_policy.wait(self.subtensor.substrate, error_class, attempt)
         
-        # This should never be reached, but required for type checking
-        return {
-            "success": success,
-            "error": msg
-        }
+        TRADE_SECONDS.labels("stake", "success" if success else "failure").observe(time.perf_counter() - started)
+        return self._result(success, msg, error_class, wait_for_inclusion)
     
-    def unstake(
+    def execute_unstake(
         self,
         netuid: int,
         wallet_name: str,
@@ -130,7 +412,8 @@ class StakeService:
         dest_hotkey: str = settings.DEFAULT_DEST_HOTKEY,
         rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
         min_tolerance_unstaking: bool = settings.DEFAULT_MIN_TOLERANCE,
-        retries: int = settings.DEFAULT_RETRIES
+        retries: int = settings.DEFAULT_RETRIES,
+        wait_for_inclusion: bool = True,
     ) -> Dict[str, Any]:
         """
         Execute unstaking operation with retry mechanism and error handling.
@@ -143,20 +426,23 @@ class StakeService:
             rate_tolerance: Tolerance for rate calculations
             min_tolerance_unstaking: Whether to use minimum tolerance
             retries: Number of retry attempts
+            wait_for_inclusion: Wait for the block, otherwise return the extrinsic hash once broadcast
             
         Returns:
             Dict containing success status, result, and min_tolerance
         """ 
+        started = time.perf_counter()
         wallet, delegator = self.wallets[wallet_name]
         
         # Determine amount to unstake
         if amount is None:
             # Unstake all available balance
-            amount_balance = self.subtensor.get_stake(
-                coldkey_ss58=delegator,
-                hotkey_ss58=dest_hotkey,
-                netuid=netuid
-            )
+            with phase("get_balance"):
+                amount_balance = self._read_at_head(lambda subtensor: subtensor.get_stake(
+                    coldkey_ss58=delegator,
+                    hotkey_ss58=dest_hotkey,
+                    netuid=netuid
+                ))
         else:
             # Convert TAO amount to Balance object
             amount_balance = bt.Balance.from_tao(amount, netuid)
@@ -167,44 +453,165 @@ class StakeService:
                 "error": "No balance to unstake"
             }
         
-        # Adjust rate tolerance if using minimum tolerance unstaking
-        if min_tolerance_unstaking:
-            subnet = self.subtensor.subnet(netuid=netuid)
-            if subnet is None:
-                return {
-                    "success": False,
-                    "error": f"Subnet with netuid {netuid} does not exist"
-                }
-            # Calculate minimum tolerance for unstaking
-            min_tolerance = amount_balance.tao / (amount_balance.tao + subnet.alpha_in.tao)
-            rate_tolerance = min_tolerance + 0.001
-        
+        trade = dict(operation="unstake", wallet_name=wallet_name, delegator=delegator, netuid=netuid,
+                     hotkey=dest_hotkey, requested_amount=amount_balance.tao, wait_for_inclusion=wait_for_inclusion)
+
         # Execute unstaking with retry mechanism
         success = False
         msg = None
+        error_class = None
 
-        for _ in range(retries):
+        for attempt in range(retries):
+            if attempt > 0:
+                TRADE_RETRIES.labels("unstake").inc()
+            attempt_started = time.time()
+            tolerance = rate_tolerance
             try:
+                # Re-quote from the newest snapshot on every attempt
+                with phase("subnet_lookup"):
+                    subnet = self.get_subnet(netuid)
+                if subnet is None:
+                    msg = f"Subnet with netuid {netuid} does not exist"
+                    break
+                if min_tolerance_unstaking:
+                    tolerance = unstake_min_tolerance(amount_balance.tao, subnet.alpha_in.tao) + 0.001
                 result, msg = self.proxy.remove_stake(
                     netuid=netuid,
                     proxy_wallet=wallet,
                     delegator=delegator,
                     amount=amount_balance,
                     hotkey=dest_hotkey,
-                    tolerance=rate_tolerance,
+                    tolerance=tolerance,
+                    subnet_info=subnet,
+                    wait_for_inclusion=wait_for_inclusion,
                 )
                 if result:
                     success = True
                     break     
             except Exception as e:
                 msg = str(e)                
-                continue
+            finally:
+                self._journal(trade, attempt, attempt_started, tolerance, success, msg)
+            error_class = classify_error(msg)
+            TRADE_ERRORS.labels("unstake", error_class).inc()
+            if not self.retry_policy.should_retry(error_class) or attempt == retries - 1:
+                break
+            self.retry_policy.wait(self.subtensor.substrate, error_class, attempt)
         
-        # This should never be reached, but required for type checking
-        return {
-            "success": success,
-            "error": msg
-        }
+        TRADE_SECONDS.labels("unstake", "success" if success else "failure").observe(time.perf_counter() - started)
+        return self._result(success, msg, error_class, wait_for_inclusion)
+
+    def _stake_balance(self, delegator: str, hotkey: str, netuid: int) -> bt.Balance:
+        with phase("get_balance"):
+            return self._read_at_head(lambda subtensor: subtensor.get_stake(
+                coldkey_ss58=delegator,
+                hotkey_ss58=hotkey,
+                netuid=netuid
+            ))
+
+    def _swap_subnets(self, origin_netuid: int, dest_netuid: int):
+        with phase("subnet_lookup"):
+            origin = self.get_subnet(origin_netuid)
+            destination = self.get_subnet(dest_netuid)
+        for netuid, subnet in ((origin_netuid, origin), (dest_netuid, destination)):
+            if subnet is None:
+                raise ValueError(f"Subnet with netuid {netuid} does not exist")
+        return origin, destination
+
+    def execute_swap(
+        self,
+        origin_netuid: int,
+        dest_netuid: int,
+        wallet_name: str,
+        amount: Optional[float] = None,
+        dest_hotkey: str = settings.DEFAULT_DEST_HOTKEY,
+        rate_tolerance: float = settings.DEFAULT_RATE_TOLERANCE,
+        min_tolerance_swapping: bool = settings.DEFAULT_MIN_TOLERANCE,
+        route: Optional[str] = None,
+        retries: int = settings.DEFAULT_RETRIES,
+        wait_for_inclusion: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Execute a swap between subnets with retry mechanism and error handling.
+
+        Args:
+            origin_netuid: Source subnet ID
+            dest_netuid: Destination subnet ID
+            wallet_name: Name of the wallet to use
+            amount: Alpha to move (if None, swaps all available)
+            dest_hotkey: Hotkey the stake is on
+            rate_tolerance: Tolerance for the limit prices
+            min_tolerance_swapping: Whether to use the chosen route's minimum tolerance
+            route: swap_stake_limit or unstake_stake, the planner's choice if None
+            retries: Number of retry attempts
+            wait_for_inclusion: Wait for the block, otherwise return the extrinsic hash once broadcast
+
+        Returns:
+            Dict containing success status and error
+        """
+        started = time.perf_counter()
+        wallet, delegator = self.wallets[wallet_name]
+
+        if amount is None:
+            amount_balance = self._stake_balance(delegator, dest_hotkey, origin_netuid)
+        else:
+            amount_balance = bt.Balance.from_tao(amount, origin_netuid)
+
+        if amount_balance.rao <= 0:
+            return {
+                "success": False,
+                "error": "No balance to swap"
+            }
+
+        trade = dict(operation="swap", wallet_name=wallet_name, delegator=delegator, netuid=origin_netuid,
+                     dest_netuid=dest_netuid, hotkey=dest_hotkey, requested_amount=amount_balance.tao,
+                     route=route, wait_for_inclusion=wait_for_inclusion)
+
+        success = False
+        msg = None
+        error_class = None
+
+        for attempt in range(retries):
+            if attempt > 0:
+                TRADE_RETRIES.labels("swap").inc()
+            attempt_started = time.time()
+            tolerance = rate_tolerance
+            try:
+                # Re-plan from the newest snapshots on every attempt
+                origin, destination = self._swap_subnets(origin_netuid, dest_netuid)
+                planned_route = route
+                if min_tolerance_swapping:
+                    planned, tolerance = plan_min_tolerance(Pool.from_subnet(origin), Pool.from_subnet(destination),
+                                                            amount_balance.tao, rate_tolerance, route)
+                    # Pin the route, at its own minimum tolerance the other one may rank first
+                    planned_route = planned.name
+                result, msg = self.proxy.swap_stake(
+                    proxy_wallet=wallet,
+                    delegator=delegator,
+                    hotkey=dest_hotkey,
+                    origin_netuid=origin_netuid,
+                    dest_netuid=dest_netuid,
+                    amount=amount_balance,
+                    tolerance=tolerance,
+                    origin_info=origin,
+                    dest_info=destination,
+                    route=planned_route,
+                    wait_for_inclusion=wait_for_inclusion,
+                )
+                if result:
+                    success = True
+                    break
+            except Exception as e:
+                msg = str(e)
+            finally:
+                self._journal(trade, attempt, attempt_started, tolerance, success, msg)
+            error_class = classify_error(msg)
+            TRADE_ERRORS.labels("swap", error_class).inc()
+            if not self.retry_policy.should_retry(error_class) or attempt == retries - 1:
+                break
+            self.retry_policy.wait(self.subtensor.substrate, error_class, attempt)
 
+        TRADE_SECONDS.labels("swap", "success" if success else "failure").observe(time.perf_counter() - started)
+        return self._result(success, msg, error_class, wait_for_inclusion)
 
 stake_service = StakeService(wallets)
\ No newline at end of file
@@ -0,0 +1,235 @@
+import io
+import csv
+import time
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.logger import logger
+
+
+TRADE_JOURNAL_PATH = "trades.db"
+# Most attempts one writer transaction takes from the queue
+WRITE_BATCH = 500
+
+COLUMNS = (
+    "trade_id",
+    "operation",
+    "wallet_name",
+    "delegator",
+    "netuid",
+    "dest_netuid",
+    "hotkey",
+    "attempt",
+    "requested_amount",
+    "executed_amount",
+    "tolerance",
+    "limit_price",
+    "route",
+    "wait_for_inclusion",
+    "success",
+    "error",
+    "error_class",
+    "tx_hash",
+    "block_hash",
+    "block_number",
+    "latency",
+    "started_at",
+)
+
+FILTERS = {
+    "wallet_name": "wallet_name = ?",
+    "operation": "operation = ?",
+    "netuid": "netuid = ?",
+    "success": "success = ?",
+    "trade_id": "trade_id = ?",
+    "since": "started_at >= ?",
+    "until": "started_at < ?",
+}
+
+
+class TradeJournal:
+    """
+    SQLite (WAL) journal of every trade attempt: requested and executed
+    amounts, tolerance and limit price, the block it landed in, the error
+    and how long it took.
+
+    `record` only puts the attempt on a queue; a background thread writes
+    queued attempts in batches, one transaction each, so the trade path never
+    waits for the disk. Every API worker appends to the same file.
+    """
+
+    def __init__(self, path: str = TRADE_JOURNAL_PATH):
+        """
+        Initialize the TradeJournal.
+
+        Args:
+            path: SQLite file holding the journal
+        """
+        self.path = path
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Workers share the file, so wait for another worker's write instead of failing
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                trade_id TEXT,
+                operation TEXT NOT NULL,
+                wallet_name TEXT,
+                delegator TEXT,
+                netuid INTEGER,
+                dest_netuid INTEGER,
+                hotkey TEXT,
+                attempt INTEGER NOT NULL,
+                requested_amount REAL,
+                executed_amount REAL,
+                tolerance REAL,
+                limit_price REAL,
+                route TEXT,
+                wait_for_inclusion INTEGER,
+                success INTEGER NOT NULL,
+                error TEXT,
+                error_class TEXT,
+                tx_hash TEXT,
+                block_hash TEXT,
+                block_number INTEGER,
+                latency REAL,
+                started_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS trades_started_at ON trades (started_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS trades_wallet ON trades (wallet_name, started_at)")
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._write_loop, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the writer."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def record(self, **fields: Any) -> None:
+        """
+        Queue one trade attempt; fields are the journal's COLUMNS, missing ones are stored as NULL.
+        """
+        unknown = set(fields) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown trade journal fields: {', '.join(sorted(unknown))}")
+        fields.setdefault("started_at", time.time())
+        self._queue.put(fields)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written. Returns False on timeout."""
+        written = threading.Event()
+        self._queue.put({"_flushed": written})
+        if self._thread is None:
+            self._drain()
+        return written.wait(timeout)
+
+    def _write_loop(self) -> None:
+        while True:
+            if not self._drain(block=True):
+                return
+
+    def _drain(self, block: bool = False) -> bool:
+        """Write one batch from the queue. Returns False once stopped."""
+        try:
+            first = self._queue.get(block=block)
+        except queue.Empty:
+            return True
+        batch = [first]
+        while len(batch) < WRITE_BATCH:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        rows = [entry for entry in batch if entry is not None and "_flushed" not in entry]
+        if rows:
+            try:
+                self._write(rows)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing {len(rows)} trades to the journal: {e}")
+        for entry in batch:
+            if entry is not None and "_flushed" in entry:
+                entry["_flushed"].set()
+        return None not in batch
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        values = [tuple(row.get(column) for column in COLUMNS) for row in rows]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(f"INSERT INTO trades ({', '.join(COLUMNS)}) VALUES ({placeholders})", values)
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _select(self, filters: Dict[str, Any], limit: Optional[int], offset: int):
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in FILTERS:
+                raise ValueError(f"Unknown trade filter: {name}")
+            clauses.append(FILTERS[name])
+            params.append(int(value) if isinstance(value, bool) else value)
+        sql = f"SELECT id, {', '.join(COLUMNS)} FROM trades"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        # A separate connection, so a long export does not hold up the writer
+        db = sqlite3.connect(self.path)
+        try:
+            cursor = db.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            for row in cursor:
+                yield dict(zip(names, row))
+        finally:
+            db.close()
+
+    def query(self, limit: int = 100, offset: int = 0, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Trade attempts, newest first.
+
+        Args:
+            limit: Most attempts to return
+            offset: Attempts to skip
+            filters: Any of wallet_name, operation, netuid, success, trade_id,
+                since and until (unix times of the attempt's start)
+        """
+        trades = list(self._select(filters, limit, offset))
+        for trade in trades:
+            trade["success"] = bool(trade["success"])
+            if trade["wait_for_inclusion"] is not None:
+                trade["wait_for_inclusion"] = bool(trade["wait_for_inclusion"])
+        return trades
+
+    def export_csv(self, **filters: Any) -> Iterator[str]:
+        """All matching attempts as CSV, newest first, a line at a time."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(("id",) + COLUMNS)
+        for trade in self._select(filters, None, 0):
+            writer.writerow(trade.values())
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
@@ -0,0 +1,255 @@
+import time
+import json
+import queue
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+from substrateinterface import SubstrateInterface
+from substrateinterface.base import ExtrinsicReceipt
+
+from app.services.retry import DispatchErrorDecoder
+from utils.file_slots import FileSlots
+from utils.logger import logger
+
+
+TX_DB_PATH = "transactions.db"
+# Extrinsics are immortal, but one not seen after this many blocks is not coming
+DROP_AFTER_BLOCKS = 50
+RECONNECT_DELAY = 5.0
+# How often a standby tracker checks whether the leading one is gone
+STANDBY_INTERVAL = 5.0
+
+SUBMITTED = "submitted"
+IN_BLOCK = "in_block"
+FINALIZED = "finalized"
+FAILED = "failed"
+DROPPED = "dropped"
+TERMINAL_STATUSES = {FINALIZED, FAILED, DROPPED}
+
+
+def extrinsic_hash(extrinsic_hex: str) -> str:
+    """Hash of an extrinsic as returned by chain_getBlock (SCALE encoded, length prefixed)."""
+    return "0x" + hashlib.blake2b(bytes.fromhex(extrinsic_hex[2:]), digest_size=32).hexdigest()
+
+
+class TxStore:
+    """
+    SQLite table of broadcast extrinsics and their status. Every API worker
+    opens the same file, so /tx/{hash} answers no matter which worker submitted.
+    """
+
+    def __init__(self, path: str = TX_DB_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS transactions (
+                tx_hash TEXT PRIMARY KEY,
+                operation TEXT,
+                wallet_name TEXT,
+                netuid INTEGER,
+                status TEXT NOT NULL,
+                block_hash TEXT,
+                block_number INTEGER,
+                submitted_block INTEGER,
+                error TEXT,
+                submitted_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS transactions_status ON transactions (status)")
+
+    def add(self, tx_hash: str, operation: str, wallet_name: str, netuid: int, submitted_block: Optional[int]) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO transactions (tx_hash, operation, wallet_name, netuid, status, "
+                "submitted_block, submitted_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (tx_hash, operation, wallet_name, netuid, SUBMITTED, submitted_block, now, now),
+            )
+
+    def update(self, tx_hash: str, status: str, **fields) -> None:
+        fields["status"] = status
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE transactions SET {columns} WHERE tx_hash = ?", (*fields.values(), tx_hash))
+
+    def get(self, tx_hash: str) -> Optional[dict]:
+        with self._lock:
+            cursor = self._db.execute("SELECT * FROM transactions WHERE tx_hash = ?", (tx_hash,))
+            row = cursor.fetchone()
+            names = [column[0] for column in cursor.description]
+        return dict(zip(names, row)) if row else None
+
+    def with_status(self, *statuses: str) -> list:
+        with self._lock:
+            cursor = self._db.execute(
+                f"SELECT * FROM transactions WHERE status IN ({', '.join('?' * len(statuses))})", statuses
+            )
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+class TxTracker:
+    """
+    Follows broadcast extrinsics to inclusion and finality.
+
+    One thread holds the only `chain_subscribeNewHeads` subscription and hands
+    headers to a second thread, which uses its own connection to match the new
+    block's extrinsic hashes against pending ones, decode the outcome from the
+    block's events, and promote included extrinsics once the finalized head
+    has passed their block. A block that is no longer canonical sends its
+    extrinsics back to `submitted`.
+
+    The status table is shared by all API workers, and so is the work: with
+    a `lock_dir`, only the tracker holding its file lock subscribes and
+    updates the table. The others stand by and take over if that process
+    goes away.
+    """
+
+    def __init__(self, network: str, store: Optional[TxStore] = None, lock_dir: Optional[str] = None):
+        """
+        Initialize the TxTracker.
+
+        Args:
+            network: Network name or websocket URL
+            store: Status table, the default TX_DB_PATH file if not given
+            lock_dir: Directory of the lock electing one tracker among processes, always tracks if None
+        """
+        self.network = network
+        self.store = store or TxStore()
+        self.lock_dir = lock_dir
+        self.error_decoder = DispatchErrorDecoder()
+        self.head_number: Optional[int] = None
+        self._headers: "queue.Queue[dict]" = queue.Queue()
+        self._substrate: Optional[SubstrateInterface] = None
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def _connect(self) -> SubstrateInterface:
+        return SubstrateInterface(
+            url=self.network,
+            ss58_format=42,
+            type_registry_preset='substrate-node-template',
+            auto_reconnect=True,
+        )
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._lead, name="tx-tracker-heads", daemon=True).start()
+
+    def _lead(self) -> None:
+        if self.lock_dir is not None:
+            leader = FileSlots(self.lock_dir, "tx-tracker")
+            # Held for the life of the process, the kernel frees it on exit
+            while leader.try_acquire() is None:
+                time.sleep(STANDBY_INTERVAL)
+            logger.info("Tracking transactions for all workers")
+        threading.Thread(target=self._process, name="tx-tracker", daemon=True).start()
+        self._subscribe()
+
+    def resume(self) -> None:
+        """Start following right away if an earlier run left extrinsics unsettled."""
+        if self.store.with_status(SUBMITTED, IN_BLOCK):
+            self.start()
+
+    def track(self, tx_hash: str, operation: str, wallet_name: str, netuid: int) -> None:
+        """Record an extrinsic that is about to be broadcast."""
+        self.start()
+        self.store.add(tx_hash, operation, wallet_name, netuid, self.head_number)
+
+    def submit_failed(self, tx_hash: str, error: str) -> None:
+        """The node rejected a tracked extrinsic, so it will never be included."""
+        self.store.update(tx_hash, FAILED, error=error)
+
+    def _subscribe(self) -> None:
+        def handler(message, update_nr, subscription_id):
+            self._headers.put(message['params']['result'])
+
+        while True:
+            try:
+                self._connect().rpc_request("chain_subscribeNewHeads", [], result_handler=handler)
+            except Exception as e:
+                logger.error(f"Head subscription lost, resubscribing in {RECONNECT_DELAY:.0f}s: {e}")
+                time.sleep(RECONNECT_DELAY)
+
+    def _process(self) -> None:
+        while True:
+            header = self._headers.get()
+            # Only the newest header matters when several queued up
+            while not self._headers.empty():
+                header = self._headers.get_nowait()
+            try:
+                if self._substrate is None:
+                    self._substrate = self._connect()
+                self.on_head(int(header['number'], 16))
+            except Exception as e:
+                logger.error(f"Error tracking transactions: {e}")
+                self._substrate = None
+
+    def on_head(self, head_number: int) -> None:
+        substrate = self._substrate
+        pending = {tx['tx_hash']: tx for tx in self.store.with_status(SUBMITTED)}
+        if self.head_number is None:
+            # First head after a start, restart or takeover: extrinsics may have
+            # landed while nobody tracked them, so look back to the oldest one
+            submitted = [tx['submitted_block'] for tx in pending.values() if tx['submitted_block'] is not None]
+            first_new = min(submitted + [head_number])
+        else:
+            first_new = self.head_number + 1
+
+        if pending:
+            for block_number in range(max(first_new, head_number - DROP_AFTER_BLOCKS), head_number + 1):
+                self._match_block(substrate, block_number, pending)
+        # Only now that every new block was scanned; after an error the next head scans them again
+        self.head_number = head_number
+        for tx_hash, tx in pending.items():
+            if tx['submitted_block'] is None:
+                # Tracked before the first header arrived
+                self.store.update(tx_hash, SUBMITTED, submitted_block=head_number)
+            elif head_number - tx['submitted_block'] > DROP_AFTER_BLOCKS:
+                self.store.update(tx_hash, DROPPED)
+
+        included = self.store.with_status(IN_BLOCK)
+        if included:
+            finalized_hash = substrate.rpc_request("chain_getFinalizedHead", [])['result']
+            finalized_header = substrate.rpc_request("chain_getHeader", [finalized_hash])['result']
+            finalized_number = int(finalized_header['number'], 16)
+            for tx in included:
+                if tx['block_number'] > finalized_number:
+                    continue
+                canonical = substrate.rpc_request("chain_getBlockHash", [tx['block_number']])['result']
+                if canonical == tx['block_hash']:
+                    self.store.update(tx['tx_hash'], FINALIZED if tx['error'] is None else FAILED)
+                else:
+                    # Its block lost a fork; it may still land in another one
+                    self.store.update(tx['tx_hash'], SUBMITTED, block_hash=None, block_number=None, error=None)
+
+    def _match_block(self, substrate, block_number: int, pending: dict) -> None:
+        block_hash = substrate.rpc_request("chain_getBlockHash", [block_number])['result']
+        block = substrate.rpc_request("chain_getBlock", [block_hash])['result']
+        for extrinsic_hex in block['block']['extrinsics']:
+            tx_hash = extrinsic_hash(extrinsic_hex)
+            if tx_hash not in pending:
+                continue
+            error = self._outcome(substrate, tx_hash, block_hash)
+            self.store.update(
+                tx_hash, IN_BLOCK, block_hash=block_hash, block_number=block_number,
+                error=json.dumps(error, default=str) if error is not None else None,
+            )
+            logger.info(f"Extrinsic {tx_hash} included in block {block_number}" + (f" with error {error}" if error else ""))
+            del pending[tx_hash]
+
+    def _outcome(self, substrate, tx_hash: str, block_hash: str) -> Optional[dict]:
+        receipt = ExtrinsicReceipt(substrate=substrate, extrinsic_hash=tx_hash, block_hash=block_hash)
+        if not receipt.is_success:
+            return receipt.error_message
+        return self.error_decoder.proxied_call_error(substrate, receipt)
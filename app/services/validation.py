@@ -0,0 +1,172 @@
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+from substrateinterface.exceptions import SubstrateRequestException
+
+from app.services.retry import DispatchErrorDecoder
+from utils.logger import logger
+from utils.pool_math import price_after_stake, price_after_unstake
+from utils.storage import StorageReader
+
+
+FEE_CACHE_TTL = 600.0
+
+# sp_runtime::DispatchError variants without a payload, by index
+DISPATCH_ERRORS = {
+    0: "Other", 1: "CannotLookup", 2: "BadOrigin", 4: "ConsumerRemaining", 5: "NoProviders",
+    6: "TooManyConsumers", 7: "Token", 8: "Arithmetic", 9: "Transactional", 10: "Exhausted",
+    11: "Corruption", 12: "Unavailable", 13: "RootNotAllowed",
+}
+INVALID_TRANSACTION = {
+    0: "Call", 1: "Payment", 2: "Future", 3: "Stale", 4: "BadProof", 5: "AncientBirthBlock",
+    6: "ExhaustsResources", 7: "Custom", 8: "BadMandatory", 9: "MandatoryValidation", 10: "BadSigner",
+}
+UNKNOWN_TRANSACTION = {0: "CannotLookup", 1: "NoUnsignedValidator", 2: "Custom"}
+
+
+def decode_apply_extrinsic_result(data: bytes) -> Optional[dict]:
+    """
+    Decode a SCALE encoded ApplyExtrinsicResult, i.e.
+    Result<Result<(), DispatchError>, TransactionValidityError>, by hand since
+    the type is not part of the metadata's type registry.
+
+    Returns:
+        dict: None if the extrinsic would apply cleanly, otherwise
+        {'type': 'Module', 'module_index', 'error_index'} for a module error or
+        {'type': ..., 'name': ..., 'docs': ...} for anything else
+    """
+    if data[0] == 0:
+        if data[1] == 0:
+            return None
+        variant = data[2]
+        if variant == 3:
+            return {'type': 'Module', 'module_index': data[3], 'error_index': data[4]}
+        return {'type': 'System', 'name': DISPATCH_ERRORS.get(variant, f"DispatchError({variant})"), 'docs': None}
+
+    validity, variant = data[1], data[2]
+    names = INVALID_TRANSACTION if validity == 0 else UNKNOWN_TRANSACTION
+    name = names.get(variant, str(variant))
+    if name == "Custom":
+        # Same wording as the transaction pool, so classify_error reads it the same way
+        return {'type': 'Invalid', 'name': name, 'docs': f"Custom error: {data[3]}"}
+    return {'type': 'Invalid' if validity == 0 else 'Unknown', 'name': name, 'docs': None}
+
+
+class TradeValidator:
+    """
+    Pre-submission checks for proxied trades, each rejecting a doomed order in
+    milliseconds instead of after a fee and a full inclusion wait:
+
+    - a local simulation of the limit price against the pool snapshot, using
+      the constant-product math of the chain's own limit check
+    - the signer's free balance against the fee estimate, which is cached per
+      call shape
+    - optionally a dry run of the signed extrinsic against the best block, via
+      `system_dryRun` or, where that unsafe RPC is disabled, the
+      `BlockBuilder_apply_extrinsic` runtime API
+    """
+
+    def __init__(self, dry_run: bool = False, fee_cache_ttl: float = FEE_CACHE_TTL):
+        """
+        Initialize the TradeValidator.
+
+        Args:
+            dry_run: Whether to dry run every extrinsic before submitting it
+            fee_cache_ttl: Seconds a fee estimate is reused for the same call shape
+        """
+        self.dry_run_enabled = dry_run
+        self.fee_cache_ttl = fee_cache_ttl
+        self.error_decoder = DispatchErrorDecoder()
+        self._fees: Dict[Tuple, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def check_limit_price(self, operation: str, subnet_info, amount, limit_price_rao: float) -> Optional[dict]:
+        """
+        Args:
+            operation: "stake" (amount in TAO) or "unstake" (amount in alpha)
+            subnet_info: Pool snapshot the limit price was quoted from
+            amount: Balance to trade
+            limit_price_rao: Limit price passed to the extrinsic
+
+        Returns:
+            dict: A SlippageTooHigh error if the trade would move the price past the limit
+        """
+        if not subnet_info.is_dynamic or subnet_info.alpha_in.rao == 0:
+            return None
+        tao_in, alpha_in = subnet_info.tao_in.tao, subnet_info.alpha_in.tao
+        if operation == "stake":
+            price = price_after_stake(amount.tao, tao_in, alpha_in)
+            doomed = price * 1e9 > limit_price_rao
+        else:
+            price = price_after_unstake(amount.tao, tao_in, alpha_in)
+            doomed = price * 1e9 < limit_price_rao
+        if not doomed:
+            return None
+        return {
+            'type': 'Local',
+            'name': 'SlippageTooHigh',
+            'docs': f"Price after the {operation} would be {price:.9f} TAO, past the limit {limit_price_rao / 1e9:.9f} TAO",
+        }
+
+    def fee(self, substrate, extrinsic, shape: Tuple) -> int:
+        """Estimated fee in rao of an extrinsic, reused for extrinsics of the same shape."""
+        now = time.time()
+        with self._lock:
+            cached = self._fees.get(shape)
+        if cached is not None and now - cached[1] < self.fee_cache_ttl:
+            return cached[0]
+        extrinsic_len = substrate.runtime_config.create_scale_object('u32')
+        extrinsic_len.encode(len(extrinsic.data))
+        info = substrate.runtime_call("TransactionPaymentApi", "query_info", [extrinsic, extrinsic_len]).value
+        fee = int(info['partial_fee'])
+        with self._lock:
+            self._fees[shape] = (fee, now)
+        return fee
+
+    def check_fee(self, substrate, extrinsic, shape: Tuple, payer: str) -> Optional[dict]:
+        reader = StorageReader(substrate)
+        fee = self.fee(substrate, extrinsic, shape)
+        balance = reader.free_balance(payer)
+        if balance.rao >= fee:
+            return None
+        return {
+            'type': 'Local',
+            'name': 'BalanceTooLow',
+            'docs': f"Signer {payer} has {balance} but the fee is about {fee / 1e9:.9f} TAO",
+        }
+
+    def dry_run(self, substrate, extrinsic) -> Optional[dict]:
+        """
+        Apply the extrinsic to the best block's state without submitting it.
+        Note that for Proxy::proxy this only covers the outer extrinsic: the
+        proxied call's own failure is reported as success.
+        """
+        block_hash = substrate.get_chain_head()
+        try:
+            if substrate.supports_rpc_method("system_dryRun"):
+                response = substrate.rpc_request("system_dryRun", [str(extrinsic.data), block_hash])
+            else:
+                response = substrate.rpc_request(
+                    "state_call", ["BlockBuilder_apply_extrinsic", str(extrinsic.data), block_hash]
+                )
+        except SubstrateRequestException as e:
+            logger.error(f"Dry run unavailable, disabling it: {e}")
+            self.dry_run_enabled = False
+            return None
+        error = decode_apply_extrinsic_result(bytes.fromhex(response['result'][2:]))
+        if error is not None and error['type'] == 'Module':
+            error = self.error_decoder.module_error(substrate, error['module_index'], error['error_index'])
+        return error
+
+    def validate(self, substrate, extrinsic, shape: Tuple, payer: str) -> Optional[dict]:
+        """
+        Run the extrinsic level checks.
+
+        Returns:
+            dict: The decoded error of the first failing check, None if all pass
+        """
+        error = self.check_fee(substrate, extrinsic, shape, payer)
+        if error is None and self.dry_run_enabled:
+            error = self.dry_run(substrate, extrinsic)
+        return error
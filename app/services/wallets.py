@@ -1,23 +1,26 @@
 import bittensor as bt
 from typing import Dict, Tuple
 from app.core.config import settings
+from utils.logger import logger
 
 wallets: Dict[str, Tuple[bt.wallet, str]] = {}
 
 
 def unlock_wallets():
-    print(settings.WALLET_NAMES)
+    """
+    Unlock every configured coldkey into `wallets`. Runs one wallet at a time
+    since each unlock may prompt for a password on the terminal.
+    """
+    logger.info(f"Wallets: {settings.WALLET_NAMES}")
     for wallet_name in settings.WALLET_NAMES:
         wallet = bt.wallet(name=wallet_name)
-        print(f"Unlocking wallet {wallet_name}")
+        logger.info(f"Unlocking wallet {wallet_name}")
         retries = 3
         for _ in range(retries):
             try:
                 wallet.unlock_coldkey()
                 break
             except Exception as e:
-                print(f"Error unlocking wallet {wallet_name}: {e}")
+                logger.error(f"Error unlocking wallet {wallet_name}: {e}")
                 continue
         wallets[wallet_name] = (wallet, settings.DELEGATORS[settings.WALLET_NAMES.index(wallet_name)])
-
-unlock_wallets()
\ No newline at end of file
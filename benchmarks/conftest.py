@@ -0,0 +1,87 @@
+import sys
+import os
+import json
+
+import pytest
+from substrateinterface import SubstrateInterface
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def tuplify(value):
+    """JSON turns the tuples of decoded chain data into lists; turn them back."""
+    if isinstance(value, list):
+        return tuple(tuplify(v) for v in value)
+    if isinstance(value, dict):
+        return {k: tuplify(v) for k, v in value.items()}
+    return value
+
+
+def load_fixture(name):
+    path = os.path.join(FIXTURES_DIR, name)
+    if not os.path.exists(path):
+        pytest.skip(f"Fixture {name} not recorded, run benchmarks/record_fixtures.py")
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def events_fixture():
+    # Each event keeps the dict layout of get_events(); only attributes were tuples
+    return [
+        {**event, "event": {**event["event"], "attributes": tuplify(event["event"]["attributes"])}}
+        for event in load_fixture("events.json")
+    ]
+
+
+@pytest.fixture(scope="session")
+def stake_list_fixture():
+    return load_fixture("stake_list.json")
+
+
+@pytest.fixture(scope="session")
+def runtime_fixture():
+    return load_fixture("runtime.json")
+
+
+class RecordedSubstrate(SubstrateInterface):
+    """
+    SubstrateInterface answering the RPCs that composing and signing need from
+    the recorded runtime fixture, so the real compose_call and
+    create_signed_extrinsic run offline.
+    """
+
+    def __init__(self, runtime):
+        self.recorded = runtime
+        # An http URL opens no connection; every request is answered below
+        super().__init__(url="http://recorded", ss58_format=42, type_registry_preset="substrate-node-template")
+
+    def rpc_request(self, method, params, result_handler=None):
+        runtime = self.recorded
+        if method == "chain_getHead":
+            result = runtime["block_hash"]
+        elif method == "chain_getHeader":
+            result = runtime["header"]
+        elif method == "chain_getBlockHash" and params == [0]:
+            result = runtime["genesis_hash"]
+        elif method == "state_getRuntimeVersion":
+            result = runtime["runtime_version"]
+        elif method == "state_getMetadata":
+            result = runtime["metadata"]
+        elif method == "rpc_methods":
+            result = runtime["rpc_methods"]
+        else:
+            raise NotImplementedError(f"{method} is not recorded")
+        return {"jsonrpc": "2.0", "result": result, "id": 0}
+
+
+@pytest.fixture(scope="session")
+def substrate(runtime_fixture):
+    substrate = RecordedSubstrate(runtime_fixture)
+    substrate.init_runtime()
+    return substrate
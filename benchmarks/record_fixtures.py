@@ -0,0 +1,92 @@
+"""
+Record the benchmark fixtures from a live network.
+
+Usage: python benchmarks/record_fixtures.py [--network finney] [--coldkey <ss58>] [--blocks 50]
+"""
+import sys
+import os
+import json
+import argparse
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import bittensor as bt
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def write_fixture(name, data):
+    path = os.path.join(FIXTURES_DIR, name)
+    with open(path, "w") as f:
+        json.dump(data, f, default=str)
+    print(f"Wrote {path}")
+
+
+def record_events(subtensor, blocks):
+    """Events of the last `blocks` blocks, in the layout returned by get_events()."""
+    head = subtensor.get_current_block()
+    events = []
+    for block_number in range(head - blocks + 1, head + 1):
+        block_hash = subtensor.substrate.get_block_hash(block_id=block_number)
+        events.extend(subtensor.substrate.get_events(block_hash=block_hash))
+    return events
+
+
+def record_stake_list(subtensor, coldkey_ss58):
+    stake_infos = subtensor.get_stake_for_coldkey(coldkey_ss58=coldkey_ss58)
+    subnet_infos = subtensor.all_subnets()
+    return {
+        "coldkey_ss58": coldkey_ss58,
+        "free_balance": subtensor.get_balance(coldkey_ss58).rao,
+        "subnets": [
+            {
+                "netuid": info.netuid,
+                "subnet_name": info.subnet_name,
+                "tao_in": info.tao_in.rao,
+                "alpha_in": info.alpha_in.rao,
+                "price": info.price.tao,
+            }
+            for info in subnet_infos
+        ],
+        "stake_infos": [
+            {"netuid": info.netuid, "hotkey_ss58": info.hotkey_ss58, "stake": info.stake.rao}
+            for info in stake_infos
+        ],
+    }
+
+
+def record_runtime(subtensor):
+    """Metadata and chain constants needed to compose and sign extrinsics offline."""
+    substrate = subtensor.substrate
+    block_hash = substrate.get_chain_head()
+    header = substrate.rpc_request("chain_getHeader", [block_hash])["result"]
+    # Runtime of the parent block, the one SubstrateInterface.init_runtime decodes with
+    runtime_hash = header["parentHash"]
+    runtime_version = substrate.rpc_request("state_getRuntimeVersion", [runtime_hash])["result"]
+    return {
+        "block_hash": block_hash,
+        "header": header,
+        "genesis_hash": substrate.get_block_hash(0),
+        "runtime_version": runtime_version,
+        "spec_version": runtime_version["specVersion"],
+        "transaction_version": runtime_version["transactionVersion"],
+        "metadata": substrate.rpc_request("state_getMetadata", [runtime_hash])["result"],
+        "rpc_methods": substrate.rpc_request("rpc_methods", [])["result"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record benchmark fixtures")
+    parser.add_argument('--network', type=str, default="finney", help='Network to record from')
+    parser.add_argument('--coldkey', type=str, default="5F5WLLEzDBXQDdTzDYgbQ3d3JKbM15HhPdFuLMmuzcUW5xG2", help='Coldkey for the stake list fixture')
+    parser.add_argument('--blocks', type=int, default=50, help='Number of recent blocks to record events from')
+    args = parser.parse_args()
+
+    subtensor = bt.subtensor(network=args.network)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    write_fixture("events.json", record_events(subtensor, args.blocks))
+    write_fixture("stake_list.json", record_stake_list(subtensor, args.coldkey))
+    write_fixture("runtime.json", record_runtime(subtensor))
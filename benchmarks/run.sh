@@ -0,0 +1,8 @@
+#!/bin/bash
+# Run the benchmarks, save the results and compare against the previous run
+cd "$(dirname "$0")/.."
+python3 -m pytest benchmarks \
+    --benchmark-storage=benchmarks/results \
+    --benchmark-autosave \
+    --benchmark-compare \
+    "$@"
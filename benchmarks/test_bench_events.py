@@ -0,0 +1,6 @@
+from utils.events import extract_stake_events_from_data
+
+
+def test_extract_stake_events(benchmark, events_fixture):
+    stake_events = benchmark(extract_stake_events_from_data, events_fixture)
+    assert stake_events
@@ -0,0 +1,64 @@
+import pytest
+from substrateinterface import Keypair
+
+HOTKEY = "5F5WLLEzDBXQDdTzDYgbQ3d3JKbM15HhPdFuLMmuzcUW5xG2"
+DELEGATOR = "5GrwvaEF5zXb26Fz9rcQpDWS57CtERHpNehXCPcNoHGKutQY"
+NETUID = 19
+
+
+@pytest.fixture(scope="module")
+def keypair():
+    return Keypair.create_from_uri("//Alice")
+
+
+def compose_stake_call(substrate):
+    return substrate.compose_call(
+        call_module="SubtensorModule",
+        call_function="add_stake_limit",
+        call_params={
+            "hotkey": HOTKEY,
+            "netuid": NETUID,
+            "amount_staked": 10 ** 9,
+            "limit_price": 25_000_000,
+            "allow_partial": False,
+        },
+    )
+
+
+def compose_proxy_call(substrate, call):
+    # The same wrapping as Proxy._do_proxy_call
+    return substrate.compose_call(
+        call_module="Proxy",
+        call_function="proxy",
+        call_params={
+            "real": DELEGATOR,
+            "force_proxy_type": "Staking",
+            "call": call,
+        },
+    )
+
+
+def test_compose_stake_call(benchmark, substrate):
+    call = benchmark(compose_stake_call, substrate)
+    assert call.data.length > 0
+
+
+def test_compose_proxy_call(benchmark, substrate):
+    call = compose_stake_call(substrate)
+    proxy_call = benchmark(compose_proxy_call, substrate, call)
+    assert proxy_call.data.length > call.data.length
+
+
+def test_sign_proxy_call(benchmark, substrate, keypair):
+    proxy_call = compose_proxy_call(substrate, compose_stake_call(substrate))
+    # Nonce given, as the chain is not there to ask
+    extrinsic = benchmark(substrate.create_signed_extrinsic, call=proxy_call, keypair=keypair, nonce=0)
+    assert extrinsic.value["address"] == f"0x{keypair.public_key.hex()}"
+    assert extrinsic.value["call"]["call_function"] == "proxy"
+
+
+def test_sign_raw_payload(benchmark, keypair):
+    # Needs no recorded runtime: sr25519 cost for a payload the size of a proxied stake call
+    payload = bytes(160)
+    signature = benchmark(keypair.sign, payload)
+    assert keypair.verify(payload, signature)
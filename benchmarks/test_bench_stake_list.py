@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pytest
+from bittensor.utils.balance import Balance
+
+from utils.stake_list import get_stake_values, render_stake_list
+
+
+@pytest.fixture(scope="module")
+def stake_list_data(stake_list_fixture):
+    subnet_infos = [
+        SimpleNamespace(
+            netuid=subnet["netuid"],
+            subnet_name=subnet["subnet_name"],
+            tao_in=Balance.from_rao(subnet["tao_in"]),
+            alpha_in=Balance.from_rao(subnet["alpha_in"], subnet["netuid"]),
+            price=Balance.from_tao(subnet["price"]),
+        )
+        for subnet in stake_list_fixture["subnets"]
+    ]
+    stake_infos = [
+        SimpleNamespace(
+            netuid=info["netuid"],
+            hotkey_ss58=info["hotkey_ss58"],
+            stake=Balance.from_rao(info["stake"], info["netuid"]),
+        )
+        for info in stake_list_fixture["stake_infos"]
+    ]
+    return stake_infos, subnet_infos
+
+
+def test_stake_list_valuation(benchmark, stake_list_data):
+    stake_infos, subnet_infos = stake_list_data
+    positions = benchmark(get_stake_values, stake_infos, subnet_infos)
+    assert len(positions) == len(stake_infos)
+
+
+def test_stake_list_rendering(benchmark, stake_list_data, stake_list_fixture):
+    positions = get_stake_values(*stake_list_data)
+    balance = Balance.from_rao(stake_list_fixture["free_balance"])
+    table = benchmark(render_stake_list, positions, stake_list_fixture["coldkey_ss58"], balance)
+    assert "Total TAO Value" in table
@@ -0,0 +1,30 @@
+import pytest
+
+from utils.pool_math import stake_limit_price, stake_min_tolerance, unstake_limit_price, unstake_min_tolerance
+
+
+@pytest.fixture(scope="module")
+def quotes(stake_list_fixture):
+    # One stake and one unstake quote of 1 TAO/alpha per recorded subnet, as StakeService computes them
+    return [
+        (subnet["tao_in"] / 1e9, subnet["alpha_in"] / 1e9, subnet["price"] * 1e9)
+        for subnet in stake_list_fixture["subnets"]
+        if subnet["tao_in"] and subnet["alpha_in"]
+    ]
+
+
+def quote_all(quotes):
+    limits = []
+    for tao_in, alpha_in, price_rao in quotes:
+        stake_tolerance = stake_min_tolerance(1.0, tao_in) + 0.001
+        unstake_tolerance = unstake_min_tolerance(1.0, alpha_in) + 0.001
+        limits.append((
+            stake_limit_price(price_rao, stake_tolerance),
+            unstake_limit_price(price_rao, unstake_tolerance),
+        ))
+    return limits
+
+
+def test_tolerance_math(benchmark, quotes):
+    limits = benchmark(quote_all, quotes)
+    assert all(stake_limit > unstake_limit for stake_limit, unstake_limit in limits)
@@ -1,39 +1,81 @@
+import threading
 import bittensor as bt
 from substrateinterface import SubstrateInterface
 from substrateinterface.exceptions import SubstrateRequestException
 from typing import Optional, cast
 from bittensor.utils.balance import Balance, FixedPoint, fixed_to_float
 
-RPC_ENDPOINTS = {
-    'test': 'wss://test.finney.opentensor.ai:443',
-    'finney': 'wss://entrypoint-finney.opentensor.ai:443',
-}
+from utils.rpc_pool import RPC_ENDPOINTS, EndpointPool
+from utils.swap_planner import SWAP, Pool, plan_swap
+
+
+class Connections:
+    """
+    Chain connections to one network, opened per thread on first use. Several
+    RonProxy objects can share one, so a run over many delegators opens one
+    connection per worker thread rather than one per delegator.
+    """
+
+    def __init__(self, network: str):
+        if network not in RPC_ENDPOINTS:
+            raise ValueError(f"Invalid network: {network}")
+        # Connect to whichever of the network's nodes is fastest and caught up
+        pool = EndpointPool(RPC_ENDPOINTS[network])
+        pool.probe_all()
+        self.url = pool.best().url
+        self._local = threading.local()
+
+    def subtensor(self) -> bt.subtensor:
+        if getattr(self._local, "subtensor", None) is None:
+            self._local.subtensor = bt.subtensor(network=self.url)
+        return self._local.subtensor
+
+    def substrate(self) -> SubstrateInterface:
+        if getattr(self._local, "substrate", None) is None:
+            self._local.substrate = SubstrateInterface(
+                url=self.url,
+                ss58_format=42,
+                type_registry_preset='substrate-node-template',
+            )
+        return self._local.substrate
+
 
 class RonProxy:
-    def __init__(self, proxy_wallet: str, network: str, delegator: str):
+    def __init__(self, proxy_wallet, network: str, delegator: str, connections: Optional[Connections] = None):
         """
         Initialize the RonProxy object.
         
         Args:
-            proxy_wallet: Proxy wallet address
+            proxy_wallet: Proxy wallet name, or an already unlocked wallet
             network: Network name
             delegator: Delegator address
+            connections: Connections to share with other RonProxy objects, opened if not given
         """
         if network not in RPC_ENDPOINTS:
             raise ValueError(f"Invalid network: {network}")
         
         self.network = network
         self.delegator = delegator
-        self.proxy_wallet = bt.wallet(name=proxy_wallet)
-        self.subtensor = bt.subtensor(network=network)
-        self.substrate = SubstrateInterface(
-            url=RPC_ENDPOINTS[self.network],
-            ss58_format=42,
-            type_registry_preset='substrate-node-template',
-        )
+        self.proxy_wallet = bt.wallet(name=proxy_wallet) if isinstance(proxy_wallet, str) else proxy_wallet
+        self.connections = connections or Connections(network)
+
+    @property
+    def subtensor(self) -> bt.subtensor:
+        return self.connections.subtensor()
+
+    @property
+    def substrate(self) -> SubstrateInterface:
+        return self.connections.substrate()
+
+    def _confirm(self, question: str, confirm: bool) -> bool:
+        """Ask `question` unless the caller already confirmed, e.g. for a batch."""
+        if not confirm:
+            return True
+        return input(question) == "y"
 
 
-    def add_stake(self, netuid: int, hotkey: str, amount: Balance, tolerance: float = 0.01) -> None:
+    def add_stake(self, netuid: int, hotkey: str, amount: Balance, tolerance: float = 0.01,
+                  confirm: bool = True) -> tuple[bool, str]:
         """
         Add stake to a subnet.
         
@@ -47,20 +89,17 @@ class RonProxy:
             address=self.delegator,
         )
         print("--------------------------------")
-        print(f"Adding stake...")
+        print("Adding stake...")
         print(f"Tolerance set to: {tolerance}")
         print(f"Current free balance: {free_balance}")
         
-        confirm = input(f"Do you really want to stake {amount}? (y/n)")
-        if confirm == "y":
-            pass
-        else:
-            return
+        if not self._confirm(f"Do you really want to stake {amount}? (y/n)", confirm):
+            return False, "Cancelled"
         
         subnet_info = self.subtensor.subnet(netuid)
         if not subnet_info:
             print(f"Subnet with netuid {netuid} does not exist")
-            return
+            return False, f"Subnet with netuid {netuid} does not exist"
         
         if subnet_info.is_dynamic:
             rate = 1 / subnet_info.price.tao or 1
@@ -94,15 +133,17 @@ class RonProxy:
             print(f"Free balance: {free_balance}")
             if new_free_balance.rao < free_balance.rao:
                 print(f"Stake added successfully, free balance changed from {free_balance.rao} to {new_free_balance.rao}")
-                return
+                return True, f"Stake added successfully, free balance changed from {free_balance.rao} to {new_free_balance.rao}"
             else:
-                print(f"Stake added failed")
+                print("Failed to add stake")
+                return False, "Failed to add stake"
         else:
             print(f"Error: {error_message}")
+            return False, f"Error: {error_message}"
 
 
     def remove_stake(self, netuid: int, hotkey: str, amount: Balance,
-                    all: bool = False, tolerance: float = 0.05) -> None:
+                    all: bool = False, tolerance: float = 0.05, confirm: bool = True) -> tuple[bool, str]:
         """
         Remove stake from a subnet.
         
@@ -118,31 +159,25 @@ class RonProxy:
             netuid=netuid,
         )
         print("--------------------------------")
-        print(f"Removing stake...")
+        print("Removing stake...")
         print(f"Tolerance set to: {tolerance}")
         print(f"Current alpha balance: {balance}")
 
         if all:
-            confirm = input("Do you really want to unstake all available balance? (y/n)")
-            if confirm == "y":
-                amount = balance
-            else:
-                return
-        else:
-            confirm = input(f"Do you really want to unstake {amount}? (y/n)")
-            if confirm == "y":
-                pass
-            else:
-                return
+            if not self._confirm("Do you really want to unstake all available balance? (y/n)", confirm):
+                return False, "Cancelled"
+            amount = balance
+        elif not self._confirm(f"Do you really want to unstake {amount}? (y/n)", confirm):
+            return False, "Cancelled"
             
         if amount.rao > balance.rao:
-            print(f"Error: Amount to unstake is greater than current balance")
-            return
+            print("Error: Amount to unstake is greater than current balance")
+            return False, "Error: Amount to unstake is greater than current balance"
         
         subnet_info = self.subtensor.subnet(netuid)
         if not subnet_info:
             print(f"Subnet with netuid {netuid} does not exist")
-            return
+            return False, f"Subnet with netuid {netuid} does not exist"
         
         if subnet_info.is_dynamic:
             rate = subnet_info.price.tao or 1
@@ -163,7 +198,7 @@ class RonProxy:
         subnet_info = self.subtensor.subnet(netuid)
         if not subnet_info:
             print(f"Subnet with netuid {netuid} does not exist")
-            return
+            return False, f"Subnet with netuid {netuid} does not exist"
         
         if subnet_info.is_dynamic:
             rate = subnet_info.price.tao or 1
@@ -195,67 +230,121 @@ class RonProxy:
             )
             if free_new_balance.rao > free_balance.rao:
                 print(f"Stake removed successfully, free balance changed from {free_balance.rao} to {free_new_balance.rao}")
-                return
+                return True, f"Stake removed successfully, free balance changed from {free_balance.rao} to {free_new_balance.rao}"
             else:
-                print(f"Stake removal failed")
+                print("Stake removal failed")
+                return False, "Stake removal failed"
         else:
             print(f"Error: {error_message}")
+            return False, f"Error: {error_message}"
 
 
     def swap_stake(self, hotkey: str, origin_netuid: int, dest_netuid: int,
-                amount: Balance, all: bool = False) -> None:
+                amount: Balance, all: bool = False, tolerance: float = 0.05, route: Optional[str] = None,
+                confirm: bool = True) -> tuple[bool, str]:
         """
-        Swap stake between subnets.
-        
+        Swap stake between subnets, price protected.
+
+        Both routes, a direct swap_stake_limit and a batched remove_stake_limit
+        plus add_stake_limit, are simulated against the two pools and the one
+        leaving the most destination alpha is submitted, unless `route` names one.
+
         Args:
             hotkey: Hotkey address
             origin_netuid: Source subnet ID
             dest_netuid: Destination subnet ID
             amount: Amount to swap (if not using --all)
             all: Whether to swap all available balance
+            tolerance: Price tolerance for the route's limit prices
+            route: swap_stake_limit or unstake_stake, chosen by the planner if not given
         """
         balance = self.subtensor.get_stake(
             coldkey_ss58=self.delegator,
             hotkey_ss58=hotkey,
             netuid=origin_netuid,
         )
+        print("--------------------------------")
         print(f"Current alpha balance on netuid {origin_netuid}: {balance}")
-        
+        print(f"Tolerance set to: {tolerance}")
         if all:
-            confirm = input("Do you really want to swap all available balance? (y/n)")
-            if confirm == "y":
-                amount = balance
-            else:
-                return
-        else:
-            confirm = input(f"Do you really want to swap {amount}? (y/n)")
-            if confirm == "y":
-                pass
-            else:
-                return
-            
+            amount = balance
         if amount.rao > balance.rao:
-            print(f"Error: Amount to swap is greater than current balance")
-            return
-        
-        call = self.substrate.compose_call(
-            call_module='SubtensorModule',
-            call_function='swap_stake',
-            call_params={
-                'hotkey': hotkey,
-                'origin_netuid': origin_netuid,
-                'destination_netuid': dest_netuid,
-                'alpha_amount': amount.rao,
-            }
-        )
+            print("Error: Amount to swap is greater than current balance")
+            return False, "Error: Amount to swap is greater than current balance"
+
+        origin = self.subtensor.subnet(origin_netuid)
+        destination = self.subtensor.subnet(dest_netuid)
+        if not origin or not destination:
+            print(f"Subnet {origin_netuid if not origin else dest_netuid} does not exist")
+            return False, f"Subnet {origin_netuid if not origin else dest_netuid} does not exist"
+
+        routes = plan_swap(Pool.from_subnet(origin), Pool.from_subnet(destination), amount.tao, tolerance)
+        for candidate in routes:
+            print(f"{candidate.name}: {candidate.alpha_out:.6f} alpha out, {candidate.leftover_tao:.6f} TAO left free, "
+                  f"fees {candidate.fees:.6f} TAO, needs tolerance {candidate.min_tolerance:.4f}")
+        chosen = next((candidate for candidate in routes if candidate.name == route), None) if route else routes[0]
+        if chosen is None:
+            print(f"Error: Unknown route {route}")
+            return False, f"Error: Unknown route {route}"
+        if not chosen.feasible(tolerance):
+            print(f"Error: {chosen.name} needs a tolerance of at least {chosen.min_tolerance:.4f}")
+            return False, f"Error: {chosen.name} needs a tolerance of at least {chosen.min_tolerance:.4f}"
+        print(f"Route: {chosen.name}")
+
+        if all:
+            if not self._confirm("Do you really want to swap all available balance? (y/n)", confirm):
+                return False, "Cancelled"
+        elif not self._confirm(f"Do you really want to swap {amount}? (y/n)", confirm):
+            return False, "Cancelled"
+
+        if chosen.name == SWAP:
+            call = self.substrate.compose_call(
+                call_module='SubtensorModule',
+                call_function='swap_stake_limit',
+                call_params={
+                    'hotkey': hotkey,
+                    'origin_netuid': origin_netuid,
+                    'destination_netuid': dest_netuid,
+                    'alpha_amount': amount.rao,
+                    'limit_price': int(chosen.limit_prices[SWAP]),
+                    'allow_partial': False,
+                }
+            )
+        else:
+            call = [
+                self.substrate.compose_call(
+                    call_module='SubtensorModule',
+                    call_function='remove_stake_limit',
+                    call_params={
+                        'hotkey': hotkey,
+                        'netuid': origin_netuid,
+                        'amount_unstaked': amount.rao,
+                        'limit_price': int(chosen.limit_prices['remove_stake_limit']),
+                        'allow_partial': False,
+                    }
+                ),
+                self.substrate.compose_call(
+                    call_module='SubtensorModule',
+                    call_function='add_stake_limit',
+                    call_params={
+                        'hotkey': hotkey,
+                        'netuid': dest_netuid,
+                        'amount_staked': Balance.from_tao(chosen.stake_tao).rao,
+                        'limit_price': int(chosen.limit_prices['add_stake_limit']),
+                        'allow_partial': False,
+                    }
+                ),
+            ]
         is_success, error_message = self._do_proxy_call(call, 'Staking')
         if is_success:
-            print(f"Stake swapped successfully")
+            print(f"Stake swapped successfully via {chosen.name}")
+            return True, f"Stake swapped successfully via {chosen.name}"
         else:
             print(f"Error: {error_message}")
+            return False, f"Error: {error_message}"
             
             
-    def burned_register(self, hotkey: str, netuid: int) -> None:
+    def burned_register(self, hotkey: str, netuid: int, confirm: bool = True) -> tuple[bool, str]:
         """
         Do burned register.
         
@@ -268,11 +357,8 @@ class RonProxy:
         )
         print(f"Current balance: {balance}")
         
-        confirm = input(f"Do you really want to register? (y/n)")
-        if confirm == "y":
-            pass
-        else:
-            return
+        if not self._confirm("Do you really want to register? (y/n)", confirm):
+            return False, "Cancelled"
         
         call = self.substrate.compose_call(
             call_module='SubtensorModule',
@@ -284,11 +370,13 @@ class RonProxy:
         )
         is_success, error_message = self._do_proxy_call(call, 'Registration')
         if is_success:
-            print(f"Register successfully")
+            print("Registration succeeded")
+            return True, "Registration succeeded"
         else:
             print(f"Error: {error_message}")
+            return False, f"Error: {error_message}"
 
-    def transfer(self, destination: str, amount: Balance) -> None:
+    def transfer(self, destination: str, amount: Balance, confirm: bool = True) -> tuple[bool, str]:
         """
         Transfer balance between hotkeys.
         
@@ -301,11 +389,8 @@ class RonProxy:
         )
         print(f"Current balance: {balance}")
         
-        confirm = input(f"Do you really want to transfer {amount}? (y/n)")
-        if confirm == "y":
-            pass
-        else:
-            return
+        if not self._confirm(f"Do you really want to transfer {amount}? (y/n)", confirm):
+            return False, "Cancelled"
         
         call = self.substrate.compose_call(
             call_module='Balances',
@@ -318,11 +403,14 @@ class RonProxy:
 
         is_success, error_message = self._do_proxy_call(call, 'Transfer')
         if is_success:
-            print(f"Transfer successfully")
+            print("Transfer succeeded")
+            return True, "Transfer succeeded"
         else:
             print(f"Error: {error_message}")
+            return False, f"Error: {error_message}"
 
-    def transfer_stake(self, netuid: int, hotkey: str, destination: str, amount: Balance, all: bool = False) -> None:
+    def transfer_stake(self, netuid: int, hotkey: str, destination: str, amount: Balance, all: bool = False,
+                       confirm: bool = True) -> tuple[bool, str]:
         """
         Transfer stake between hotkeys.
         
@@ -339,21 +427,15 @@ class RonProxy:
         print(f"Current stake: {balance}")
 
         if all:
-            confirm = input("Do you really want to transfer all available stake? (y/n)")
-            if confirm == "y":
-                amount = balance
-            else:
-                return
-        else:
-            confirm = input(f"Do you really want to transfer {amount}? (y/n)")
-            if confirm == "y":
-                pass
-            else:
-                return
+            if not self._confirm("Do you really want to transfer all available stake? (y/n)", confirm):
+                return False, "Cancelled"
+            amount = balance
+        elif not self._confirm(f"Do you really want to transfer {amount}? (y/n)", confirm):
+            return False, "Cancelled"
 
         if amount.rao > balance.rao:
-            print(f"Error: Amount to transfer is greater than current stake")
-            return
+            print("Error: Amount to transfer is greater than current stake")
+            return False, "Error: Amount to transfer is greater than current stake"
 
         call = self.substrate.compose_call(
             call_module='SubtensorModule',
@@ -368,19 +450,31 @@ class RonProxy:
         )
         is_success, error_message = self._do_proxy_call(call, 'Transfer')
         if is_success:
-            print(f"Stake transferred successfully")
+            print("Stake transferred successfully")
+            return True, "Stake transferred successfully"
         else:
             print(f"Error: {error_message}")
+            return False, f"Error: {error_message}"
 
     def _do_proxy_call(self, call, proxy_type) -> tuple[bool, str]:
-        proxy_call = self.substrate.compose_call(
-            call_module='Proxy',
-            call_function='proxy',
-            call_params={
-                'real': self.delegator,
-                'force_proxy_type': proxy_type,
-                'call': call,
-            }
+        """Submit `call` on the delegator's behalf; a list of calls goes in one Utility.batch_all."""
+        calls = call if isinstance(call, list) else [call]
+        proxy_calls = [
+            self.substrate.compose_call(
+                call_module='Proxy',
+                call_function='proxy',
+                call_params={
+                    'real': self.delegator,
+                    'force_proxy_type': proxy_type,
+                    'call': inner,
+                }
+            )
+            for inner in calls
+        ]
+        proxy_call = proxy_calls[0] if len(proxy_calls) == 1 else self.substrate.compose_call(
+            call_module='Utility',
+            call_function='batch_all',
+            call_params={'calls': proxy_calls},
         )
         extrinsic = self.substrate.create_signed_extrinsic(
             call=proxy_call,
@@ -1,19 +1,113 @@
 #!/usr/bin/env python3
 """
-Multisig script for creating blockchain transfer and proxy proposals.
+Multisig script for creating blockchain transfer and proxy proposals, alone
+or several in one batch, and for approving pending proposals.
 """
 
 import bittensor as bt
-from substrateinterface import SubstrateInterface
+from substrateinterface import Keypair, SubstrateInterface
 from bittensor.utils.balance import Balance
 from dotenv import load_dotenv
 import os
 import sys
 
-RPC_ENDPOINTS = {
-    'test': 'wss://test.finney.opentensor.ai:443',
-    'finney': 'wss://entrypoint-finney.opentensor.ai:443',
+from utils.rpc_pool import RPC_ENDPOINTS, EndpointPool
+
+
+PROXY_TYPES = {
+    'staking': 'Staking',
+    'registration': 'Registration',
+    'transfer': 'Transfer'
 }
+BATCH_ACTIONS = ('transfer', 'add_proxy', 'remove_proxy')
+
+
+def parse_batch_line(line: str) -> tuple:
+    """
+    Parse one operation of a batch proposal.
+
+    Args:
+        line: `transfer <destination> <amount>`, `add_proxy <address> <type>`
+            or `remove_proxy <address> <type>`
+
+    Returns:
+        tuple: (action, address, Balance) or (action, address, proxy type)
+    """
+    parts = line.split()
+    if len(parts) != 3 or parts[0] not in BATCH_ACTIONS:
+        raise ValueError(f"Expected '<{'|'.join(BATCH_ACTIONS)}> <address> <amount or proxy type>', got: {line}")
+    action, address, arg = parts
+    if action == 'transfer':
+        amount = float(arg)
+        if amount <= 0:
+            raise ValueError(f"Amount must be positive: {line}")
+        return action, address, Balance.from_tao(amount)
+    if arg.lower() not in PROXY_TYPES:
+        raise ValueError(f"Invalid proxy type. Must be 'staking' or 'registration' or 'transfer': {line}")
+    return action, address, PROXY_TYPES[arg.lower()]
+
+
+def compose_params(call_value: dict) -> dict:
+    """Turn a decoded call's arguments back into compose_call parameters, nested calls included."""
+    return {arg['name']: _compose_value(arg['value']) for arg in call_value['call_args']}
+
+
+def _compose_value(value):
+    if isinstance(value, dict) and 'call_module' in value and 'call_args' in value:
+        return {
+            'call_module': value['call_module'],
+            'call_function': value['call_function'],
+            'call_args': compose_params(value),
+        }
+    if isinstance(value, list):
+        return [_compose_value(item) for item in value]
+    return value
+
+
+def describe_call(call_value: dict) -> str:
+    """One line per call, e.g. `Balances.transfer_keep_alive(dest=5F..., value=1000000000)`."""
+    if call_value['call_module'] == 'Utility' and call_value['call_function'].startswith('batch'):
+        calls = next(arg['value'] for arg in call_value['call_args'] if arg['name'] == 'calls')
+        inner = "; ".join(describe_call(call) for call in calls)
+        return f"Utility.{call_value['call_function']}[{inner}]"
+    args = ", ".join(f"{arg['name']}={arg['value']}" for arg in call_value['call_args'])
+    return f"{call_value['call_module']}.{call_value['call_function']}({args})"
+
+
+class Signatories:
+    """
+    The multisig's members and threshold. Taken from SIGNATORIES (all members,
+    comma-separated) and THRESHOLD, or else this wallet plus APPROVER, 2 of 2.
+    """
+
+    def __init__(self, substrate: SubstrateInterface, own_address: str, signatories: list, threshold: int):
+        """
+        Args:
+            substrate: Connection, for the runtime's SS58 format
+            own_address: Address of the signing wallet
+            signatories: All members' addresses, own_address included
+            threshold: Approvals needed to execute
+        """
+        self.threshold = threshold
+        substrate.init_runtime()
+        self.account = substrate.generate_multisig_account(signatories, threshold)
+        own_public_key = f"0x{substrate.ss58_decode(own_address)}"
+        # Sorted by public key, as the pallet requires
+        self.others = [signatory for signatory in self.account.signatories if signatory != own_public_key]
+
+    @property
+    def address(self) -> str:
+        return self.account.ss58_address
+
+    @classmethod
+    def from_env(cls, substrate: SubstrateInterface, own_address: str, approver_address: str) -> "Signatories":
+        signatories = [address.strip() for address in os.getenv('SIGNATORIES', '').split(',') if address.strip()]
+        if not signatories:
+            signatories = [own_address, approver_address]
+        elif own_address not in signatories:
+            signatories.append(own_address)
+        return cls(substrate, own_address, signatories, int(os.getenv('THRESHOLD', '2')))
+
 
 class MultisigProposal:
     def __init__(self, network: str, multisig_address: str, proxy_wallet: str, approver_address: str):
@@ -24,6 +118,7 @@ class MultisigProposal:
             network: Network name (test/finney)
             multisig_address: Multisig account address 
             proxy_wallet: Proxy wallet name for signing
+            approver_address: The other signatory, when SIGNATORIES is not set
         """
         if network not in RPC_ENDPOINTS:
             raise ValueError(f"Invalid network: {network}")
@@ -32,12 +127,21 @@ class MultisigProposal:
         self.multisig_address = multisig_address
         self.proxy_wallet = bt.wallet(name=proxy_wallet)
         self.approver_address = approver_address
+        # Connect to whichever of the network's nodes is fastest and caught up
+        pool = EndpointPool(RPC_ENDPOINTS[self.network])
+        pool.probe_all()
+        url = pool.best().url
         self.substrate = SubstrateInterface(
-            url=RPC_ENDPOINTS[self.network],
+            url=url,
             ss58_format=42,
             type_registry_preset='substrate-node-template',
         )
-        self.subtensor = bt.subtensor(network=network)
+        self.subtensor = bt.subtensor(network=url)
+        self.signatories = Signatories.from_env(
+            self.substrate, self.proxy_wallet.coldkeypub.ss58_address, approver_address,
+        )
+        if self.signatories.address != multisig_address:
+            print(f"Warning: signatories and threshold give multisig {self.signatories.address}, not {multisig_address}")
 
     def create_transfer_proposal(self, destination: str, amount: Balance) -> None:
         """
@@ -83,18 +187,11 @@ class MultisigProposal:
             proxy_address: Address to add as proxy
             proxy_type: Type of proxy ('staking' or 'registration' or 'transfer')
         """
-        # Map proxy type string to proper case
-        proxy_type_mapping = {
-            'staking': 'Staking',
-            'registration': 'Registration',
-            'transfer': 'Transfer'
-        }
-        
-        if proxy_type.lower() not in proxy_type_mapping:
+        if proxy_type.lower() not in PROXY_TYPES:
             print(f"Error: Invalid proxy type. Must be 'staking' or 'registration' or 'transfer'")
             return
             
-        formatted_proxy_type = proxy_type_mapping[proxy_type.lower()]
+        formatted_proxy_type = PROXY_TYPES[proxy_type.lower()]
         
         print(f"Creating proxy proposal...")
         print(f"Multisig: {self.multisig_address}")
@@ -124,6 +221,61 @@ class MultisigProposal:
         else:
             print(f"Error creating proxy proposal: {error_message}")
 
+    def create_batch_proposal(self, operations: list) -> None:
+        """
+        Create one multisig proposal running several transfers and proxy
+        changes with Utility.batch_all, so they are approved, and succeed or
+        fail, together.
+
+        Args:
+            operations: Tuples from `parse_batch_line`
+        """
+        print("Creating batch proposal...")
+        print(f"Multisig: {self.multisig_address}")
+        print(f"Current balance: {self.subtensor.get_balance(address=self.multisig_address)}")
+        total = Balance.from_rao(0)
+        calls = []
+        for action, address, arg in operations:
+            if action == 'transfer':
+                print(f"  transfer {arg} to {address}")
+                total += arg
+                calls.append(self.substrate.compose_call(
+                    call_module='Balances',
+                    call_function='transfer_keep_alive',
+                    call_params={
+                        'dest': address,
+                        'value': arg.rao,
+                    }
+                ))
+            else:
+                print(f"  {action} {address} ({arg})")
+                calls.append(self.substrate.compose_call(
+                    call_module='Proxy',
+                    call_function=action,
+                    call_params={
+                        'delegate': address,
+                        'proxy_type': arg,
+                        'delay': 0,
+                    }
+                ))
+        print(f"Total transferred: {total}")
+
+        confirm = input(f"Do you really want to create this batch proposal of {len(calls)} calls? (y/n): ")
+        if confirm.lower() != "y":
+            print("Batch proposal cancelled.")
+            return
+
+        batch_call = self.substrate.compose_call(
+            call_module='Utility',
+            call_function='batch_all',
+            call_params={'calls': calls},
+        )
+        is_success, error_message = self._create_multisig_proposal(batch_call)
+        if is_success:
+            print("Batch proposal created successfully!")
+        else:
+            print(f"Error creating batch proposal: {error_message}")
+
     def _create_multisig_proposal(self, call) -> tuple[bool, str]:
         """
         Create a multisig proposal with the given call.
@@ -135,25 +287,21 @@ class MultisigProposal:
             Tuple of (success, error_message)
         """
         try:
-            # Get multisig info to determine threshold and other signatories
-            # For simplicity, we'll use threshold=2 and assume this wallet is a signatory
-            threshold = 2
-            other_signatories = [self.approver_address]  # This would need to be populated with actual signatories
-            
             print("")
             print(f"Call hash: {call.call_hash.hex()}")
             print(f"Call data: {self._get_call_data(call)}")
             
-            # Create the multisig proposal call
+            # as_multi rather than approve_as_multi, so the full call is in the
+            # proposing extrinsic and approvers can read it back from the chain
             multisig_call = self.substrate.compose_call(
                 call_module='Multisig',
-                call_function='approve_as_multi',
+                call_function='as_multi',
                 call_params={
-                    'threshold': threshold,
-                    'other_signatories': other_signatories,
+                    'threshold': self.signatories.threshold,
+                    'other_signatories': self.signatories.others,
                     'maybe_timepoint': None,
-                    'call_hash': call.call_hash,
-                    'max_weight': {'ref_time': 1000000000, 'proof_size': 10000}
+                    'call': call,
+                    'max_weight': {'ref_time': 0, 'proof_size': 0}
                 }
             )
             
@@ -180,18 +328,231 @@ class MultisigProposal:
         return call.process_encode(value=processed_call)
 
 
+class PendingProposal:
+    """A proposal waiting in Multisig.Multisigs, with its call read back from the proposing extrinsic."""
+
+    def __init__(self, multisig: str, call_hash: str, when: dict, depositor: str, approvals: list):
+        """
+        Args:
+            multisig: Multisig account address
+            call_hash: Hex hash of the proposed call
+            when: Timepoint of the first approval, {'height', 'index'}
+            depositor: Account that proposed and holds the deposit
+            approvals: Accounts that approved so far
+        """
+        self.multisig = multisig
+        self.call_hash = call_hash
+        self.when = when
+        self.depositor = depositor
+        self.approvals = approvals
+        # Set once the call is found on chain and re-encodes to call_hash
+        self.call = None
+        self.call_value = None
+
+    @property
+    def description(self) -> str:
+        if self.call_value is None:
+            return "call not on chain (proposed with approve_as_multi)"
+        return describe_call(self.call_value)
+
+
+class MultisigApprover:
+    def __init__(self, network: str, wallet: str, approver_address: str):
+        """
+        Initialize the MultisigApprover object.
+
+        Args:
+            network: Network name (test/finney)
+            wallet: Name of the signatory's wallet
+            approver_address: The other signatory, when SIGNATORIES is not set
+        """
+        if network not in RPC_ENDPOINTS:
+            raise ValueError(f"Invalid network: {network}")
+
+        self.wallet = bt.wallet(name=wallet)
+        pool = EndpointPool(RPC_ENDPOINTS[network])
+        pool.probe_all()
+        self.substrate = SubstrateInterface(
+            url=pool.best().url,
+            ss58_format=42,
+            type_registry_preset='substrate-node-template',
+        )
+        self.address = self.wallet.coldkeypub.ss58_address
+        self.signatories = Signatories.from_env(self.substrate, self.address, approver_address)
+
+    def pending(self) -> list:
+        """
+        Proposals of our multisig this wallet has not approved yet, oldest first.
+
+        Returns:
+            list: PendingProposal objects
+        """
+        proposals = []
+        for key, details in self.substrate.query_map('Multisig', 'Multisigs', [self.signatories.address]):
+            details = details.value
+            call_hash = key.value if isinstance(key.value, str) else f"0x{bytes(key.value).hex()}"
+            if self.address in details['approvals']:
+                continue
+            proposal = PendingProposal(
+                self.signatories.address, call_hash, details['when'], details['depositor'], details['approvals'],
+            )
+            self._read_call(proposal)
+            proposals.append(proposal)
+        return sorted(proposals, key=lambda proposal: (proposal.when['height'], proposal.when['index']))
+
+    def _read_call(self, proposal: PendingProposal) -> None:
+        """Find the proposal's call in the extrinsic at its timepoint and rebuild it."""
+        extrinsics = self.substrate.get_extrinsics(block_number=proposal.when['height'])
+        if not extrinsics or proposal.when['index'] >= len(extrinsics):
+            return
+        call_value = extrinsics[proposal.when['index']].value['call']
+        if (call_value['call_module'], call_value['call_function']) != ('Multisig', 'as_multi'):
+            return
+        inner = next(arg['value'] for arg in call_value['call_args'] if arg['name'] == 'call')
+        call = self.substrate.compose_call(
+            call_module=inner['call_module'],
+            call_function=inner['call_function'],
+            call_params=compose_params(inner),
+        )
+        # Only trust the rebuilt call if it hashes to what the signatories approved
+        if f"0x{call.call_hash.hex()}" == proposal.call_hash:
+            proposal.call = call
+            proposal.call_value = inner
+
+    def _approval_call(self, proposal: PendingProposal):
+        final = len(proposal.approvals) + 1 >= self.signatories.threshold
+        if final:
+            # The last approval dispatches the call, so max_weight has to cover it
+            # No signature is needed for the estimate, so the public key will do
+            payer = Keypair(ss58_address=self.address)
+            max_weight = self.substrate.get_payment_info(proposal.call, payer)['weight']
+        else:
+            max_weight = {'ref_time': 0, 'proof_size': 0}
+        return self.substrate.compose_call(
+            call_module='Multisig',
+            call_function='as_multi',
+            call_params={
+                'threshold': self.signatories.threshold,
+                'other_signatories': self.signatories.others,
+                'maybe_timepoint': proposal.when,
+                'call': proposal.call,
+                'max_weight': max_weight,
+            }
+        )
+
+    def approve(self, proposals: list) -> tuple[bool, str]:
+        """
+        Approve proposals in one extrinsic. Several go in a Utility.force_batch
+        (Utility.batch where the runtime lacks it), so a proposal that went
+        stale in the meantime does not hold back the others.
+
+        Args:
+            proposals: PendingProposal objects whose call was found
+
+        Returns:
+            Tuple of (success, error_message)
+        """
+        try:
+            calls = [self._approval_call(proposal) for proposal in proposals]
+            if len(calls) == 1:
+                call = calls[0]
+            else:
+                batch = 'force_batch' if self.substrate.get_metadata_call_function('Utility', 'force_batch') else 'batch'
+                call = self.substrate.compose_call(
+                    call_module='Utility',
+                    call_function=batch,
+                    call_params={'calls': calls},
+                )
+            print(f"Signing with wallet: {self.wallet.name}")
+            extrinsic = self.substrate.create_signed_extrinsic(
+                call=call,
+                keypair=self.wallet.coldkey,
+            )
+            receipt = self.substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
+            if not receipt.is_success:
+                return False, receipt.error_message
+            failed = [event.value['event_id'] for event in receipt.triggered_events
+                      if event.value['event_id'] in ('ItemFailed', 'BatchInterrupted')]
+            if failed:
+                return False, f"Some approvals failed: {', '.join(failed)}"
+            return True, None
+        except Exception as e:
+            return False, str(e)
+
+
+def select_proposals(proposals: list) -> list:
+    """Show pending proposals and ask which to approve."""
+    if not proposals:
+        print("No pending proposals to approve.")
+        return []
+    for number, proposal in enumerate(proposals, 1):
+        print(f"[{number}] {proposal.call_hash} at {proposal.when['height']}-{proposal.when['index']}, "
+              f"proposed by {proposal.depositor}, {len(proposal.approvals)} approval(s)")
+        print(f"    {proposal.description}")
+    approvable = [proposal for proposal in proposals if proposal.call is not None]
+    if not approvable:
+        print("None of the pending proposals can be approved from chain data.")
+        return []
+    while True:
+        choice = input("Approve which proposals? (comma-separated numbers, 'all' or empty for none): ").strip().lower()
+        if not choice:
+            return []
+        if choice == 'all':
+            return approvable
+        parts = [part.strip() for part in choice.split(',')]
+        invalid = [part for part in parts if not part.isdigit() or not 1 <= int(part) <= len(proposals)]
+        if not invalid:
+            break
+        print(f"Invalid choice {', '.join(invalid)}: enter numbers from 1 to {len(proposals)}")
+    selected = []
+    for part in parts:
+        proposal = proposals[int(part) - 1]
+        if proposal.call is None:
+            print(f"Skipping [{part}]: its call is not on chain")
+            continue
+        selected.append(proposal)
+    return selected
+
+
+def read_batch_operations() -> list:
+    """Read batch operations from a file, or one per line until an empty line."""
+    print("One operation per line: transfer <destination> <amount>, add_proxy <address> <type>, remove_proxy <address> <type>")
+    path = input("Enter a file with the operations, or leave empty to type them: ").strip()
+    if path:
+        with open(path) as f:
+            lines = [line.strip() for line in f]
+    else:
+        lines = []
+        while True:
+            line = input("> ").strip()
+            if not line:
+                break
+            lines.append(line)
+    operations = [parse_batch_line(line) for line in lines if line and not line.startswith('#')]
+    if not operations:
+        print("Error: No operations given")
+        sys.exit(1)
+    return operations
+
+
 def get_user_input():
     """Get user input for action type and parameters."""
     print("=== Multisig Proposal Creator ===")
     
     # Get action type
     while True:
-        action_type = input("Enter action type (transfer/proxy): ").strip().lower()
-        if action_type in ['transfer', 'proxy']:
+        action_type = input("Enter action type (transfer/proxy/batch/approve): ").strip().lower()
+        if action_type in ['transfer', 'proxy', 'batch', 'approve']:
             break
-        print("Invalid action type. Please enter 'transfer' or 'proxy'.")
+        print("Invalid action type. Please enter 'transfer', 'proxy', 'batch' or 'approve'.")
         print("")
     
+    if action_type == 'approve':
+        return (action_type,)
+
+    if action_type == 'batch':
+        return action_type, read_batch_operations()
+
     if action_type == 'transfer':
         # Get transfer parameters
         destination = input("Enter destination address: ").strip()
@@ -263,6 +624,29 @@ def main():
         sys.exit(1)
     
     try:
+        # Get user input
+        user_input = get_user_input()
+        action_type = user_input[0]
+
+        print("")
+
+        if action_type == 'approve':
+            approver = MultisigApprover(
+                network=network,
+                wallet=proxy_wallet,
+                approver_address=approver_address,
+            )
+            print(f"Scanning pending proposals of {approver.signatories.address}...")
+            selected = select_proposals(approver.pending())
+            if not selected:
+                return
+            is_success, error_message = approver.approve(selected)
+            if is_success:
+                print(f"Approved {len(selected)} proposal(s) successfully!")
+            else:
+                print(f"Error approving proposals: {error_message}")
+            return
+
         # Initialize MultisigProposal
         multisig = MultisigProposal(
             network=network,
@@ -271,13 +655,10 @@ def main():
             approver_address=approver_address,
         )
         
-        # Get user input
-        user_input = get_user_input()
-        action_type = user_input[0]
-        
-        print("")
-        
-        if action_type == 'transfer':
+        if action_type == 'batch':
+            _, operations = user_input
+            multisig.create_batch_proposal(operations)
+        elif action_type == 'transfer':
             _, destination, amount = user_input
             multisig.create_transfer_proposal(destination, amount)
         else:  # proxy
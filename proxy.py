@@ -1,12 +1,45 @@
 #!/usr/bin/env python3
 """
 Proxy script for blockchain staking operations.
+
+`proxy.py daemon` keeps bittensor imported and the wallets and chain
+connections open. Later invocations find its UNIX socket, forward their
+command line and only relay output and y/n and password prompts, so they
+skip the import and connection setup. `proxy.py repl` keeps the same warm
+state in one interactive session instead. Without a daemon running a
+command runs in-process as before.
 """
 
 import argparse
+import builtins
+import contextlib
+import getpass
+import importlib
+import json
+import os
+import shlex
+import socket
+import socketserver
 import sys
-from modules import RonProxy
-from bittensor.utils.balance import Balance
+import threading
+
+from utils.accounts import ACCOUNTS_FILE, AccountRegistry
+
+# bittensor is imported only where a command actually runs, so the thin
+# client that forwards to the daemon starts in milliseconds
+DEFAULT_SOCKET = "/tmp/bt-proxy-cli.sock"
+# Accounts acted on at the same time when --name selects several
+MAX_WORKERS = int(os.getenv("PROXY_MAX_WORKERS", "8"))
+# Seconds without a command after which the daemon forgets the unlocked coldkeys
+IDLE_TIMEOUT = float(os.getenv("PROXY_DAEMON_IDLE_TIMEOUT", "900"))
+# Seconds the daemon waits for a client's request or answer to a prompt
+CLIENT_TIMEOUT = float(os.getenv("PROXY_DAEMON_CLIENT_TIMEOUT", "120"))
+# Commands that move funds away from the delegator; the daemon asks for the password every time
+FUND_MOVING_COMMANDS = ('transfer', 'transferstake')
+
+
+def daemon_socket() -> str:
+    return os.getenv("PROXY_DAEMON_SOCKET", DEFAULT_SOCKET)
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -23,7 +56,7 @@ def create_parser() -> argparse.ArgumentParser:
     add_parser.add_argument('--netuid', type=int, required=True, help='Network/subnet ID')
     add_parser.add_argument('--hotkey', type=str, required=True, help='Hotkey address')
     add_parser.add_argument('--amount', type=float, help='Amount to stake')
-    add_parser.add_argument('--name', type=str, default=".env", help='Specify the environment')
+    add_parser.add_argument('--name', type=str, default=".env", help='Account, group or `all` from accounts.json; comma-separated for several')
     add_parser.add_argument('--tolerance', type=float, default=0.05, help='Tolerance for stake') #tolerence by mrbreo
     
     # Remove stake command
@@ -32,7 +65,7 @@ def create_parser() -> argparse.ArgumentParser:
     remove_parser.add_argument('--hotkey', type=str, required=True, help='Hotkey address')
     remove_parser.add_argument('--amount', type=float, default=0, help='Amount to unstake')
     remove_parser.add_argument('--all', action='store_true', help='Remove all staked balance')
-    remove_parser.add_argument('--name', type=str, default=".env", help='Specify the environment')
+    remove_parser.add_argument('--name', type=str, default=".env", help='Account, group or `all` from accounts.json; comma-separated for several')
     remove_parser.add_argument('--tolerance', type=float, default=0.05, help='Tolerance for stake') #tolerence by mrbreo
     
     # Swap stake command
@@ -42,18 +75,22 @@ def create_parser() -> argparse.ArgumentParser:
     swap_parser.add_argument('--dest-netuid', type=int, required=True, help='Destination subnet ID')
     swap_parser.add_argument('--amount', type=float, default=0, help='Amount to swap')
     swap_parser.add_argument('--all', action='store_true', help='Swap all available balance')
-    swap_parser.add_argument('--name', type=str, default=".env", help='Specify the environment')
+    swap_parser.add_argument('--tolerance', type=float, default=0.05, help='Price tolerance for the swap')
+    swap_parser.add_argument('--route', choices=['swap_stake_limit', 'unstake_stake'], default=None,
+                             help='Force a route instead of the cheaper simulated one')
+    swap_parser.add_argument('--name', type=str, default=".env", help='Account, group or `all` from accounts.json; comma-separated for several')
     
     # Burned register command
     register_parser = subparsers.add_parser('register', help='Burned register')
     register_parser.add_argument('--netuid', type=int, required=True, help='Subnet ID')
     register_parser.add_argument('--hotkey', type=str, required=True, help='Hotkey address')
+    register_parser.add_argument('--name', type=str, default=".env", help='Account, group or `all` from accounts.json; comma-separated for several')
 
     # Balance transfer command
     transfer_parser = subparsers.add_parser('transfer', help='Transfer balance between hotkeys')
     transfer_parser.add_argument('--destination', type=str, required=True, help='Destination coldkey address')
     transfer_parser.add_argument('--amount', type=float, default=0, help='Amount to transfer')
-    transfer_parser.add_argument('--name', type=str, default=".env", help='Specify the environment')
+    transfer_parser.add_argument('--name', type=str, default=".env", help='Account, group or `all` from accounts.json; comma-separated for several')
 
     # Stake transfer command
     transfer_stake_parser = subparsers.add_parser('transferstake', help='Transfer stake between hotkeys')
@@ -62,7 +99,11 @@ def create_parser() -> argparse.ArgumentParser:
     transfer_stake_parser.add_argument('--destination', type=str, required=True, help='Destination coldkey address')
     transfer_stake_parser.add_argument('--amount', type=float, default=0, help='Amount to transfer')
     transfer_stake_parser.add_argument('--all', action='store_true', help='Swap all available balance')
-    transfer_stake_parser.add_argument('--name', type=str, default=".env", help='Specify the environment')
+    transfer_stake_parser.add_argument('--name', type=str, default=".env", help='Account, group or `all` from accounts.json; comma-separated for several')
+
+    # Warm modes
+    subparsers.add_parser('daemon', help='Keep wallets and connections warm and serve other invocations')
+    subparsers.add_parser('repl', help='Run several commands in one session with warm wallets and connections')
     
     return parser
 
@@ -118,145 +159,493 @@ def validate_args(args: argparse.Namespace) -> bool:
     return True
 
 
-def main():
-    """Main entry point."""
-    # Import environment variables
-    from dotenv import load_dotenv
-    import os
-    # load_dotenv()
-    
-    # network = os.getenv('NETWORK')
-    # delegator = os.getenv('DELEGATOR')
-    # proxy_wallet = os.getenv('PROXY_WALLET')
-    
-    # # Validate environment variables
-    # if not network or not delegator or not proxy_wallet:
-    #     print("Error: Missing environment variables")
-    #     sys.exit(1)
+class Account:
+    """One delegator to act for, as configured in its .env file."""
 
-    # Create parser
-    parser = create_parser()
-    
-    # Parse arguments
-    if len(sys.argv) == 1:
-        parser.print_help()
-        sys.exit(1)
-    
-    args = parser.parse_args()
-    if args.name == ".env":
-        env_file = f".env"
-    elif args.name == "webgenie":
-        env_file = f".env.vlad.webgenie" 
-    elif args.name == "green":
-        env_file = f".env.vlad.newgreen" 
-    elif args.name == "black":
-        env_file = f".env.vlad.newblack" 
-    elif args.name == "breo":
-        env_file = f".env.breo.newbreo" 
-    elif args.name == "kb":
-        env_file = f".env.breo.newkb" 
-    elif args.name == "tck":
-        env_file = f".env.breo.tck" 
-    elif args.name == "lazyterry":
-        env_file = f".env.thunder.lazyterry" 
-    elif args.name == "const":
-        env_file = f".env.druid.const" 
-    elif args.name == "taomind":
-        env_file = f".env.druid.taomind" 
-    elif args.name == "terry":
-        env_file = f".env.druid.terry" 
-    elif args.name == "gang":
-        env_file = f".env.sky.gang" 
-    elif args.name == "izo":
-        env_file = f".env.sky.izo" 
-    elif args.name == "sky":
-        env_file = f".env.sky.sky" 
-
-    print(f"Env file: {env_file}")
-
-    # Load the specified .env file
-    if os.path.exists(env_file):
-        load_dotenv(env_file, override=True)
-    else:
+    def __init__(self, name: str, network: str, delegator: str, proxy_wallet: str):
+        self.name = name
+        self.network = network
+        self.delegator = delegator
+        self.proxy_wallet = proxy_wallet
+
+
+def read_account(registry: AccountRegistry, name: str, cwd: str) -> Account:
+    from dotenv import dotenv_values
+
+    env_file = os.path.join(cwd, registry.env_file(name))
+    if not os.path.exists(env_file):
         raise FileNotFoundError(f"The environment file {env_file} does not exist.")
-    
-    network = os.getenv('NETWORK')
-    delegator = os.getenv('DELEGATOR')
-    proxy_wallet = os.getenv('PROXY_WALLET')
+    # Read without touching os.environ, several accounts are loaded side by side
+    values = dotenv_values(env_file)
+    account = Account(name, values.get('NETWORK'), values.get('DELEGATOR'), values.get('PROXY_WALLET'))
+    if not account.network or not account.delegator or not account.proxy_wallet:
+        raise ValueError(f"Missing NETWORK, DELEGATOR or PROXY_WALLET in {env_file}")
+    return account
 
-    print(f"Network: {network}")
-    print(f"Delegator: {delegator}")
-    print(f"Proxy wallet: {proxy_wallet}")
 
-    if not network or not delegator or not proxy_wallet:
-        print("Error: Missing environment variables")
-        sys.exit(1)
+class UnlockedWallet:
+    """Stands in for `bt.wallet` once the daemon has decrypted the coldkey."""
+
+    def __init__(self, name: str, coldkey):
+        self.name = name
+        self.coldkey = coldkey
+        self.coldkeypub = coldkey
+
+
+class ThreadOutput:
+    """
+    Stdout that keeps what registered worker threads print apart, so
+    concurrent accounts do not interleave their output.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+
+    def capture(self) -> None:
+        self.buffers[threading.get_ident()] = []
+
+    def captured(self) -> str:
+        return "".join(self.buffers.pop(threading.get_ident(), []))
+
+    def write(self, text: str) -> int:
+        buffer = self.buffers.get(threading.get_ident())
+        if buffer is None:
+            return self.stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class ProxyCLI:
+    """
+    Runs proxy.py commands, keeping the chain connections per network, the
+    unlocked wallets and a RonProxy per account, so later commands reuse them.
+    """
+
+    def __init__(self, unlock_with_prompt: bool = False, max_workers: int = MAX_WORKERS):
+        """
+        Initialize the ProxyCLI.
+
+        Args:
+            unlock_with_prompt: Decrypt coldkeys with a password read through `getpass`,
+                which the daemon forwards to the client, instead of the wallet's own
+                terminal prompt
+            max_workers: Accounts acted on at the same time
+        """
+        self.unlock_with_prompt = unlock_with_prompt
+        self.max_workers = max_workers
+        self.connections = {}
+        self.wallets = {}
+        self.proxies = {}
+        self._executor = None
+
+    def executor(self):
+        """
+        Worker threads for acting on several accounts, kept for later commands:
+        connections are opened per thread, so the same threads reuse them.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="proxy-account")
+        return self._executor
+
+    def get_wallet(self, name: str, unlock: bool = False):
+        import bittensor as bt
+
+        wallet = self.wallets.get(name)
+        if wallet is None:
+            wallet = bt.wallet(name=name)
+            if self.unlock_with_prompt:
+                password = getpass.getpass(f"Enter password to unlock coldkey of {name}: ")
+                wallet = UnlockedWallet(name, wallet.coldkey_file.get_keypair(password=password))
+            elif unlock:
+                wallet.unlock_coldkey()
+            self.wallets[name] = wallet
+        return wallet
+
+    def lock(self, names=None) -> None:
+        """Forget the unlocked wallets, all of them or those in `names`, and the RonProxy objects using them."""
+        for name in list(self.wallets):
+            if names is None or name in names:
+                del self.wallets[name]
+        for key in list(self.proxies):
+            if names is None or key[2] in names:
+                del self.proxies[key]
+
+    def get_proxy(self, account: Account, unlock: bool = False):
+        from modules import Connections, RonProxy
+
+        key = (account.network, account.delegator, account.proxy_wallet)
+        if key not in self.proxies:
+            if account.network not in self.connections:
+                self.connections[account.network] = Connections(account.network)
+            self.proxies[key] = RonProxy(
+                proxy_wallet=self.get_wallet(account.proxy_wallet, unlock),
+                network=account.network,
+                delegator=account.delegator,
+                connections=self.connections[account.network],
+            )
+            print(f"Initialized RonProxy object for {account.network} network")
+        return self.proxies[key]
+
+    def dispatch(self, ron_proxy, args: argparse.Namespace, confirm: bool = True) -> tuple:
+        from bittensor.utils.balance import Balance
 
-    
-    # Validate arguments
-    if not args.command:
-        parser.print_help()
-        sys.exit(1)
-    
-    if not validate_args(args):
-        sys.exit(1)
-        
-    # Initialize RonProxy object
-    ron_proxy = RonProxy(
-        proxy_wallet=proxy_wallet,
-        network=network,
-        delegator=delegator,
-    )
-    print(f"Initialized RonProxy object for {network} network")
-    
-    try:
         if args.command == 'addstake':
-            ron_proxy.add_stake(
+            return ron_proxy.add_stake(
                 netuid=args.netuid,
                 hotkey=args.hotkey,
                 amount=Balance.from_tao(args.amount),
                 tolerance=args.tolerance,
+                confirm=confirm,
             )
         elif args.command == 'removestake':
-            ron_proxy.remove_stake(
+            return ron_proxy.remove_stake(
                 netuid=args.netuid,
                 hotkey=args.hotkey,
                 amount=Balance.from_tao(args.amount, netuid=args.netuid),
                 tolerance=args.tolerance,
                 all=args.all,
+                confirm=confirm,
             )
         elif args.command == 'swapstake':
-            ron_proxy.swap_stake(
+            return ron_proxy.swap_stake(
                 hotkey=args.hotkey,
                 origin_netuid=getattr(args, 'origin_netuid'),
                 dest_netuid=getattr(args, 'dest_netuid'),
                 amount=Balance.from_tao(args.amount, netuid=getattr(args, 'origin_netuid')),
                 all=args.all,
+                tolerance=args.tolerance,
+                route=args.route,
+                confirm=confirm,
             )
         elif args.command == 'register':
-            ron_proxy.burned_register(
+            return ron_proxy.burned_register(
                 netuid=args.netuid,
                 hotkey=args.hotkey,
+                confirm=confirm,
             )
         elif args.command == 'transfer':
-            ron_proxy.transfer(
+            return ron_proxy.transfer(
                 destination=args.destination,
                 amount=Balance.from_tao(args.amount),
+                confirm=confirm,
             )
         elif args.command == 'transferstake':
-            ron_proxy.transfer_stake(
+            return ron_proxy.transfer_stake(
                 netuid=args.netuid,
                 hotkey=args.hotkey,
                 destination=args.destination,
                 amount=Balance.from_tao(args.amount),
                 all=args.all,
+                confirm=confirm,
             )
+        return False, f"Unknown command {args.command}"
+
+    def execute(self, argv, cwd: str = ".") -> int:
+        """
+        Run one command line.
+
+        Args:
+            argv: Arguments after the script name
+            cwd: Directory the .env files and accounts.json are looked up in
+
+        Returns:
+            int: Exit code
+        """
+        parser = create_parser()
+        try:
+            args = parser.parse_args(argv)
+        except SystemExit as e:
+            return e.code or 0
+        if not args.command or args.command in ('daemon', 'repl'):
+            parser.print_help()
+            return 1
+
+        if not validate_args(args):
+            return 1
+
+        registry = AccountRegistry.load(os.path.join(cwd, ACCOUNTS_FILE))
+        accounts = [read_account(registry, name, cwd) for name in registry.resolve(args.name)]
+        if self.unlock_with_prompt and args.command in FUND_MOVING_COMMANDS:
+            # Anyone who can reach the daemon's socket could send this, so
+            # holding the coldkey is not enough: ask for the password again
+            self.lock({account.proxy_wallet for account in accounts})
+        if len(accounts) > 1:
+            return self.fan_out(args, accounts)
+
+        account = accounts[0]
+        print(f"Env file: {registry.env_file(account.name)}")
+        print(f"Network: {account.network}")
+        print(f"Delegator: {account.delegator}")
+        print(f"Proxy wallet: {account.proxy_wallet}")
+        ron_proxy = self.get_proxy(account)
+        is_success, _ = self.dispatch(ron_proxy, args)
+        return 0 if is_success else 1
+
+    def holding(self, ron_proxy, args: argparse.Namespace):
+        """What the command draws from: the free balance, or the stake it moves."""
+        if args.command in ('addstake', 'transfer', 'register'):
+            return ron_proxy.subtensor.get_balance(address=ron_proxy.delegator)
+        netuid = args.origin_netuid if args.command == 'swapstake' else args.netuid
+        return ron_proxy.subtensor.get_stake(
+            coldkey_ss58=ron_proxy.delegator,
+            hotkey_ss58=args.hotkey,
+            netuid=netuid,
+        )
+
+    def fan_out(self, args: argparse.Namespace, accounts) -> int:
+        """
+        Run the command for several accounts: show what each one holds, ask
+        once, then run them concurrently and report every result in one table.
+        Accounts that share a proxy wallet sign with the same key, so they run
+        one after another to keep its nonces apart.
+        """
+        from rich.console import Console
+        from rich.table import Table
+
+        # Prompts for passwords have to come one at a time, before the workers start
+        proxies = [self.get_proxy(account, unlock=True) for account in accounts]
+        executor = self.executor()
+
+        holdings = list(executor.map(lambda ron_proxy: self.holding(ron_proxy, args), proxies))
+
+        amount = "all" if getattr(args, 'all', False) else getattr(args, 'amount', None)
+        plan = Table(title=f"{args.command} on {len(accounts)} accounts")
+        for column in ("Account", "Delegator", "Network", "Current", "Amount"):
+            plan.add_column(column)
+        for account, current in zip(accounts, holdings):
+            plan.add_row(account.name, account.delegator, account.network, str(current), str(amount or ""))
+        console = Console(file=sys.stdout)
+        console.print(plan)
+
+        if input(f"Do you really want to run {args.command} on these {len(accounts)} accounts? (y/n)") != "y":
+            return 1
+
+        output = ThreadOutput(sys.stdout)
+
+        def run_one(ron_proxy):
+            output.capture()
+            try:
+                is_success, message = self.dispatch(ron_proxy, args, confirm=False)
+            except Exception as e:
+                is_success, message = False, f"Error: {e}"
+            return is_success, message, output.captured()
+
+        signers = {}
+        for index, account in enumerate(accounts):
+            signers.setdefault((account.network, account.proxy_wallet), []).append(index)
+        results = [None] * len(accounts)
+
+        def run_signer(indexes):
+            for index in indexes:
+                results[index] = run_one(proxies[index])
+
+        with contextlib.redirect_stdout(output):
+            list(executor.map(run_signer, signers.values()))
+
+        table = Table(title="Results")
+        for column in ("Account", "Delegator", "Result", "Message"):
+            table.add_column(column)
+        for account, (is_success, message, _) in zip(accounts, results):
+            table.add_row(account.name, account.delegator, "ok" if is_success else "failed", message.strip())
+        console.print(table)
+        for account, (is_success, _, captured) in zip(accounts, results):
+            if not is_success and captured:
+                print(f"--- {account.name} ---")
+                print(captured, end="")
+        return 0 if all(is_success for is_success, _, _ in results) else 1
+
+    def run(self, argv, cwd: str = ".") -> int:
+        try:
+            return self.execute(argv, cwd)
+        except Exception as e:
+            print(f"Error: {e}")
+            return 1
+
+
+class ClientChannel:
+    """
+    One forwarded invocation, as newline delimited JSON over the daemon socket:
+    the client sends {"argv", "cwd"}, the daemon answers with {"out"} chunks,
+    {"prompt", "secret"} messages the client replies to with {"input"}, and a
+    final {"exit"}.
+    """
+
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+
+    def send(self, **message) -> None:
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+        self.wfile.flush()
+
+    def receive(self) -> dict:
+        try:
+            line = self.rfile.readline()
+        except socket.timeout:
+            raise TimeoutError("Client did not answer in time")
+        if not line:
+            raise EOFError("Client disconnected")
+        return json.loads(line)
+
+    # File-like, so it can replace stdout
+    def write(self, text: str) -> int:
+        if text:
+            self.send(out=text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def prompt(self, text: str = "", secret: bool = False) -> str:
+        self.send(prompt=str(text), secret=secret)
+        return self.receive()["input"]
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    # The daemon serves one client at a time, so one that stops answering must not hold it
+    timeout = CLIENT_TIMEOUT
+
+    def handle(self):
+        channel = ClientChannel(self.rfile, self.wfile)
+        try:
+            request = channel.receive()
+        except (EOFError, ValueError, OSError):
+            return
+        # Commands run one at a time, so swapping the process-wide stdout and
+        # prompts for this client's is safe
+        with contextlib.redirect_stdout(channel), \
+                _patched(builtins, "input", channel.prompt), \
+                _patched(getpass, "getpass", lambda text="Password: ": channel.prompt(text, secret=True)):
+            code = self.server.cli.run(request["argv"], request["cwd"])
+        try:
+            channel.send(exit=code)
+        except OSError:
+            pass
+
+
+@contextlib.contextmanager
+def _patched(module, name, value):
+    original = getattr(module, name)
+    setattr(module, name, value)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Serves commands one at a time, and locks the wallets again once idle for `timeout` seconds."""
+
+    def handle_timeout(self) -> None:
+        if self.cli.wallets:
+            self.cli.lock()
+            print(f"No command for {self.timeout:.0f}s, wallets locked")
+
+
+def serve_daemon(path: str, idle_timeout: float = IDLE_TIMEOUT) -> None:
+    if os.path.exists(path):
+        os.unlink(path)
+    old_umask = os.umask(0o177)
+    try:
+        server = DaemonServer(path, CommandHandler)
+    finally:
+        os.umask(old_umask)
+    server.cli = ProxyCLI(unlock_with_prompt=True)
+    server.timeout = idle_timeout
+    # Preload only: commands import these lazily, so importing them here makes
+    # the daemon pay the slow import at startup instead of on the first command
+    for module in ("bittensor", "modules"):
+        importlib.import_module(module)
+    print(f"Proxy daemon listening on {path}")
+    try:
+        # Unlike serve_forever, handle_request calls handle_timeout when idle
+        while True:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(path)
+
+
+def forward(argv, path: str):
+    """
+    Run a command line on the daemon, relaying its output and prompts.
+
+    Returns:
+        int: The command's exit code, None if no daemon is listening
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    with sock, sock.makefile("rwb") as stream:
+        channel = ClientChannel(stream, stream)
+        channel.send(argv=argv, cwd=os.getcwd())
+        while True:
+            try:
+                message = channel.receive()
+            except EOFError:
+                print("Error: Proxy daemon closed the connection")
+                return 1
+            if "out" in message:
+                sys.stdout.write(message["out"])
+                sys.stdout.flush()
+            elif "prompt" in message:
+                reader = getpass.getpass if message["secret"] else input
+                channel.send(input=reader(message["prompt"]))
+            elif "exit" in message:
+                return message["exit"]
+
+
+def repl() -> None:
+    cli = ProxyCLI()
+    print("Commands as on the command line, e.g. addstake --netuid 1 --hotkey <ss58> --amount 1. Ctrl-D to quit.")
+    while True:
+        try:
+            line = input("proxy> ")
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return
+        if line.strip():
+            cli.run(shlex.split(line), os.getcwd())
+
+
+def main():
+    """Main entry point."""
+    # Create parser
+    parser = create_parser()
+    
+    # Parse arguments
+    if len(sys.argv) == 1:
+        parser.print_help()
+        sys.exit(1)
     
-    except Exception as e:
-        print(f"Error: {e}")
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_help()
         sys.exit(1)
 
+    if args.command == 'daemon':
+        serve_daemon(daemon_socket())
+        return
+    if args.command == 'repl':
+        repl()
+        return
+
+    code = forward(sys.argv[1:], daemon_socket())
+    if code is None:
+        code = ProxyCLI().run(sys.argv[1:], os.getcwd())
+    sys.exit(code)
+
 
 if __name__ == "__main__":
     main()
-
@@ -1,3 +1,10 @@
-PYTHONPATH=.
+export PYTHONPATH=.
 #uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
-uvicorn app.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+
+# Keys live in the signing daemon (./run_signer.sh). Workers share the per-delegator trade
+# locks and admission limits (file locks in TRADE_LOCK_DIR), the trade journal and the
+# transaction table; one worker tracks transactions for all, elected by lock
+export SIGNER_SOCKET=${SIGNER_SOCKET:-/tmp/bt-proxy-signer.sock}
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/bt-proxy-metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers ${WORKERS:-1}
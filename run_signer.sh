@@ -0,0 +1,4 @@
+export PYTHONPATH=.
+# Unlocks the wallets (prompts for their passwords) and serves signatures to the API workers
+export SIGNER_SOCKET=${SIGNER_SOCKET:-/tmp/bt-proxy-signer.sock}
+python3 -m app.services.signer
@@ -1,50 +1,158 @@
-import bittensor as bt
+import sys
 import os
-import requests
-import json
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import bittensor as bt
 import time
-import threading
-import requests
+from collections import defaultdict
+from utils.storage import StorageReader
+from utils.webhook import WebhookDelivery
+from utils.logger import logger
 
 
 WEBHOOK_URL = "https://discord.com/api/webhooks/1396875737952292936/Bggfi9QEHVljmOxaqzJniLwQ70oCjnlj0lb7nIBq4avsVya_dkGNfjOKaGlOt_urwdul"
 WEBHOOK_URL_OWN = "https://canary.discord.com/api/webhooks/1410255303689375856/Rkt1TkqmxV3tV_82xFNz_SRP7O0RVBVPaOuZM4JXveyLYypFKqi05EeSCKc4m1a9gJh0"
+SPOOL_PATH = "discord_spool.db"
 NETWORK = "finney"
 #NETWORK = "ws://34.30.248.57:9944"
 
 class DiscordBot:
     def __init__(self):
         self.webhook_url = WEBHOOK_URL
+        self.delivery = WebhookDelivery(
+            SPOOL_PATH,
+            username="Coldkey Swap Bot",  # Optional: Custom username for the webhook
+            avatar_url="https://vidaio-justin.s3.us-east-2.amazonaws.com/favicon.ico",  # Optional: Custom avatar for the webhook
+        )
+        self.delivery.start()
 
-    def send_message(self, content):
-        data = {
-            "content": content,
-            "username": "Coldkey Swap Bot",  # Optional: Custom username for the webhook
-            "avatar_url": "https://vidaio-justin.s3.us-east-2.amazonaws.com/favicon.ico"  # Optional: Custom avatar for the webhook
-        }
-        response = requests.post(self.webhook_url, data=json.dumps(data), headers={"Content-Type": "application/json"})
-        
-        if response.status_code == 204:
-            print("Message sent successfully!")
-            return True
-        else:
-            print(f"Failed to send message: {response.status_code}, {response.text}")
-        return False
+    def send_message(self, content, delay=0.0):
+        """Queue a message for the public channel, optionally delayed by `delay` seconds."""
+        return self.delivery.enqueue(self.webhook_url, content, delay=delay)
 
     def send_message_to_my_own(self, content):
-        data = {
-            "content": content,
-            "username": "Coldkey Swap Bot",  # Optional: Custom username for the webhook
-            "avatar_url": "https://vidaio-justin.s3.us-east-2.amazonaws.com/favicon.ico"  # Optional: Custom avatar for the webhook
-        }
-        response = requests.post(WEBHOOK_URL_OWN, data=json.dumps(data), headers={"Content-Type": "application/json"})
-        
-        if response.status_code == 204:
-            print("Message sent successfully!")
-            return True
+        return self.delivery.enqueue(WEBHOOK_URL_OWN, content)
+
+
+# SubtensorModule events after which a subnet's owner or identity may differ
+SUBNET_REFRESH_EVENTS = {"NetworkAdded", "SubnetIdentitySet", "SubnetIdentityRemoved"}
+SUBNET_REMOVED_EVENTS = {"NetworkRemoved", "DissolveNetworkScheduled"}
+OWNER_SWAP_EVENTS = {"ColdkeySwapped", "SubnetOwnerChanged"}
+IDENTITY_CALLS = {"set_subnet_identity", "register_network_with_identity"}
+
+
+def _event_netuid(attributes):
+    """Best-effort netuid from a subnet event's attributes (netuid comes first)."""
+    if isinstance(attributes, dict):
+        if "netuid" in attributes:
+            return int(attributes["netuid"])
+        attributes = list(attributes.values())
+    if isinstance(attributes, (tuple, list)):
+        attributes = attributes[0] if attributes else None
+    if isinstance(attributes, int):
+        return attributes
+    return None
+
+
+class SubnetOwnerIndex:
+    """
+    Owner coldkey and subnet name per netuid, loaded once and then kept current
+    from the events and calls of every processed block.
+    """
+
+    def __init__(self, subtensor):
+        self.subtensor = subtensor
+        self.owners = {}
+        self.names = {}
+        self.netuids_by_owner = defaultdict(set)
+
+    def load(self, block=None):
+        for subnet_info in self.subtensor.all_subnets(block=block):
+            self._set(subnet_info.netuid, subnet_info.owner_coldkey, subnet_info.subnet_name)
+        logger.info(f"Loaded owner index for {len(self.owners)} subnets")
+
+    def netuids_owned_by(self, coldkey):
+        return sorted(self.netuids_by_owner.get(coldkey, ()))
+
+    def _set(self, netuid, owner, name):
+        old_owner = self.owners.get(netuid)
+        if old_owner is not None:
+            self.netuids_by_owner[old_owner].discard(netuid)
+        self.owners[netuid] = owner
+        self.names[netuid] = name
+        self.netuids_by_owner[owner].add(netuid)
+
+    def _remove(self, netuid):
+        owner = self.owners.pop(netuid, None)
+        self.names.pop(netuid, None)
+        if owner is not None:
+            self.netuids_by_owner[owner].discard(netuid)
+
+    def _refresh_subnet(self, netuid, block):
+        subnet_info = self.subtensor.subnet(netuid, block=block)
+        if subnet_info is None:
+            self._remove(netuid)
         else:
-            print(f"Failed to send message: {response.status_code}, {response.text}")
-        return False
+            self._set(netuid, subnet_info.owner_coldkey, subnet_info.subnet_name)
+
+    def _refresh_owners(self, block_hash):
+        owners = StorageReader(self.subtensor.substrate, block_hash).subnet_owners(list(self.owners))
+        for netuid, owner in owners.items():
+            if owner is not None and owner != self.owners[netuid]:
+                self._set(netuid, owner, self.names[netuid])
+
+    def apply_block(self, block_number, block_hash, events, extrinsics):
+        """
+        Update the index from one block.
+
+        Returns:
+            dict: netuid -> (old_name, new_name) for subnets whose name changed
+        """
+        refresh = set()
+        removed = set()
+        owners_changed = False
+
+        for event in events:
+            event_info = event.get('event', {})
+            if event_info.get('module_id') != 'SubtensorModule':
+                continue
+            event_id = event_info.get('event_id')
+            netuid = _event_netuid(event_info.get('attributes'))
+            if event_id in SUBNET_REFRESH_EVENTS and netuid is not None:
+                refresh.add(netuid)
+            elif event_id in SUBNET_REMOVED_EVENTS and netuid is not None:
+                removed.add(netuid)
+            elif event_id in OWNER_SWAP_EVENTS:
+                owners_changed = True
+
+        for ex in extrinsics:
+            call = ex.value.get('call', {})
+            if (
+                call.get('call_module') == 'SubtensorModule' and
+                call.get('call_function') in IDENTITY_CALLS
+            ):
+                args = call.get('call_args', [])
+                netuid = next((a['value'] for a in args if a['name'] == 'netuid'), None)
+                if netuid is not None:
+                    refresh.add(int(netuid))
+
+        old_names = dict(self.names)
+        for netuid in removed:
+            self._remove(netuid)
+        for netuid in refresh - removed:
+            self._refresh_subnet(netuid, block_number)
+        if owners_changed:
+            self._refresh_owners(block_hash)
+
+        return {
+            netuid: (old_names[netuid], name)
+            for netuid, name in self.names.items()
+            if netuid in old_names and old_names[netuid] != name
+        }
 
 
 class ColdkeySwapFetcher:
@@ -54,19 +162,18 @@ class ColdkeySwapFetcher:
 
         self.last_checked_block = self.subtensor.get_current_block()
         self.discord_bot = DiscordBot()
-        self.subnet_names = []
+        self.subnet_index = SubnetOwnerIndex(self.subtensor)
+        self.subnet_index.load(block=self.last_checked_block)
   
     def fetch_extrinsic_data(self, block_number):
         """Extract ColdkeySwapScheduled events from the data"""
         coldkey_swaps = []
         identity_changes = []
-        print(f"Fetching events from chain")
+        logger.info(f"Fetching events from chain")
         block_hash = self.subtensor.substrate.get_block_hash(block_id=block_number)
         extrinsics = self.subtensor.substrate.get_extrinsics(block_hash=block_hash)
-        subnet_infos = self.subtensor.all_subnets()
-        owner_coldkeys = [subnet_info.owner_coldkey for subnet_info in subnet_infos]
-        subnet_names = [subnet_info.subnet_name for subnet_info in subnet_infos]
-        print(f"Fetched {len(extrinsics)} events from chain and {len(subnet_infos)} subnets")
+        events = self.subtensor.substrate.get_events(block_hash=block_hash)
+        logger.info(f"Fetched {len(extrinsics)} extrinsics and {len(events)} events from chain")
 
         for ex in extrinsics:
             call = ex.value.get('call', {})
@@ -78,42 +185,37 @@ class ColdkeySwapFetcher:
                 args = call.get('call_args', [])
                 new_coldkey = next((a['value'] for a in args if a['name'] == 'new_coldkey'), None)
                 from_coldkey = ex.value.get('address', None)
-                print(f"Swap scheduled: from {from_coldkey} to {new_coldkey}")
-                
-                try:
-                    subnet_id = owner_coldkeys.index(from_coldkey)
-                    swap_info = {
+                logger.info(f"Swap scheduled: from {from_coldkey} to {new_coldkey}")
+
+                subnet_ids = self.subnet_index.netuids_owned_by(from_coldkey)
+                if not subnet_ids:
+                    logger.info(f"From coldkey {from_coldkey} not found in owner coldkeys")
+                for subnet_id in subnet_ids:
+                    coldkey_swaps.append({
                         'old_coldkey': from_coldkey,
                         'new_coldkey': new_coldkey,
                         'subnet': subnet_id,
-                    }
-                    
-                    coldkey_swaps.append(swap_info)
-                except ValueError:
-                    print(f"From coldkey {from_coldkey} not found in owner coldkeys")
-                
-        subnet_count = len(self.subnet_names)
-        for i in range(subnet_count):
-            if subnet_names[i] != self.subnet_names[i]:
-                identity_change_info = {
-                    'subnet': i,
-                    'old_identity': self.subnet_names[i],
-                    'new_identity': subnet_names[i],
-                }
-                identity_changes.append(identity_change_info)
-
-        self.subnet_names = subnet_names
+                    })
+
+        name_changes = self.subnet_index.apply_block(block_number, block_hash, events, extrinsics)
+        for netuid, (old_name, new_name) in sorted(name_changes.items()):
+            identity_changes.append({
+                'subnet': netuid,
+                'old_identity': old_name,
+                'new_identity': new_name,
+            })
+
         return coldkey_swaps, identity_changes
  
     def run(self):
         while True:
             current_block = self.subtensor.get_current_block()
-            print(f"Current block: {current_block}")
+            logger.info(f"Current block: {current_block}")
             if current_block < self.last_checked_block:
                 time.sleep(2)
                 continue
 
-            print(f"Fetching coldkey swaps for block {self.last_checked_block}")
+            logger.info(f"Fetching coldkey swaps for block {self.last_checked_block}")
             while True:
                 try:
                     coldkey_swaps, identity_changes = self.fetch_extrinsic_data(self.last_checked_block)
@@ -123,29 +225,29 @@ class ColdkeySwapFetcher:
                                 for swap in coldkey_swaps:
                                     f.write(f"{swap}\n")
                         except Exception as e:
-                            print(f"Error writing to file: {e}")
+                            logger.error(f"Error writing to file: {e}")
         
                         try:
                             with open("identity_changes.log", "a") as f:
                                 for change in identity_changes:
                                     f.write(f"{change}\n")
                         except Exception as e:
-                            print(f"Error writing to file: {e}")
+                            logger.error(f"Error writing to file: {e}")
 
                         try:
                             message = self.format_message(coldkey_swaps, identity_changes)
                             self.discord_bot.send_message_to_my_own(message)
-                            threading.Timer(60.0, lambda: self.discord_bot.send_message(message)).start()
+                            self.discord_bot.send_message(message, delay=60.0)
                         except Exception as e:
-                            print(f"Error sending message: {e}")
+                            logger.error(f"Error sending message: {e}")
                     else:
-                        print("No coldkey swaps found")
+                        logger.info("No coldkey swaps found")
                     
                     self.last_checked_block += 1
                     break
 
                 except Exception as e:
-                    print(f"Error fetching coldkey swaps: {e}")
+                    logger.error(f"Error fetching coldkey swaps: {e}")
                     time.sleep(1)
 
 
@@ -1,3 +1,11 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
 import time
 import datetime
 import asyncio
@@ -7,6 +15,7 @@ import bittensor as bt
 
 from bittensor import AsyncSubtensor
 from bittensor.utils.networking import get_external_ip
+from utils.logger import logger
 
 
 async def boot():
@@ -32,13 +41,13 @@ async def boot():
         metagraph = subtensor.metagraph(args.netuid)
 
         if wallet.hotkey.ss58_address not in metagraph.hotkeys:
-            print(f"\nYour miner: {wallet} is not registered. Run 'btcli register'.")
+            logger.error(f"Your miner: {wallet} is not registered. Run 'btcli register'.")
             exit()
         my_subnet_uid = metagraph.hotkeys.index(wallet.hotkey.ss58_address)
-        print(f"coldkey: {args.coldkey}, hotkey: {args.hotkey}, UID: {my_subnet_uid}")
-        print(f"Axon served on {args.external_ip}:{args.port}")
+        logger.info(f"coldkey: {args.coldkey}, hotkey: {args.hotkey}, UID: {my_subnet_uid}")
+        logger.info(f"Axon served on {args.external_ip}:{args.port}")
     except Exception as e:
-        print(f"Error serving axon: {e}")
+        logger.error(f"Error serving axon: {e}")
         traceback.print_exc()
     
 if __name__ == "__main__":
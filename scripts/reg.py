@@ -8,6 +8,7 @@ if parent_dir not in sys.path:
 
 import bittensor as bt
 from app.constants import NETWORK
+from utils.storage import StorageReader
 
 from bittensor_wallet import Wallet
 from bittensor.core.subtensor import Subtensor
@@ -20,6 +21,7 @@ from scalecodec import (
 import json
 from typing import Optional
 import random
+from utils.logger import logger
 def sign_extrinsic(
     subtensor:"Subtensor",
     call: "GenericCall",
@@ -133,13 +135,13 @@ def dtao_register(netuid, subtensor: "Subtensor", wallet: "Wallet", block = 0):
             response = json.loads(ws.recv())
             b = int(response["result"]["number"],0)
             if block != 0 and b < block: 
-                print(f"Waiting for the {block}: current Block {b}")
+                logger.info(f"Waiting for the {block}: current Block {b}")
                 continue
             while True:
                 ws.send(burned_register_ws_data)
                 response = json.loads(ws.recv())
         except Exception as e:
-            print(e)
+            logger.error(e)
             continue
 
 
@@ -154,7 +156,7 @@ if __name__ == '__main__':
     wallet.unlock_coldkey()
     
     subtensor = bt.subtensor(network=NETWORK)
-    prev_adjustment_block = subtensor.query_map_subtensor(name='LastAdjustmentBlock',params=(),block=subtensor.block)[netuid][1].value
+    prev_adjustment_block = StorageReader(subtensor.substrate).last_adjustment_block(netuid)
     block = prev_adjustment_block + 360
     
     if delta_block == -100:
@@ -162,5 +164,5 @@ if __name__ == '__main__':
     else:
         block = block + delta_block
 
-    print(f"Registering to the subnet {netuid} at block {block}")
+    logger.info(f"Registering to the subnet {netuid} at block {block}")
     dtao_register(netuid, subtensor, wallet, block)
\ No newline at end of file
@@ -1,5 +1,5 @@
 import os
-import requests
+import sys
 import json
 import time
 import threading
@@ -7,8 +7,17 @@ import tweepy
 from dotenv import load_dotenv
 from datetime import datetime
 import re
-import json
-import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from utils.journal import Journal
+from utils.webhook import WebhookDelivery
+from utils.logger import logger
 
 
 WEBHOOK_URL = "https://discord.com/api/webhooks/1379627091502305280/1GW3BaWycWYqbPgiDVkUq7QEWghyHk32IhUMP3iN8VE-vlXeQPD4WxcRqfJON8IchABF"
@@ -17,17 +26,79 @@ try:
     with open("handles.txt", "r") as f:
         USERS = f.read().splitlines()
 except FileNotFoundError:
-    print("handles.txt not found")
+    logger.info("handles.txt not found")
     USERS = []
 
 TWEETS_DIR = "tweets"
+MAX_QUERY_LENGTH = 512
+QUERY_SUFFIX = " -is:retweet -is:reply"
+SEARCH_REQUESTS_PER_WINDOW = 450
+SEARCH_RATE_WINDOW = 15 * 60
+JOURNAL_PATH = "tweets.db"
+JOURNAL_CONSUMER = "discord"
+SPOOL_PATH = "tweet_spool.db"
 
 
 # Load environment variables
 load_dotenv()
 
+# Tweet journal and webhook delivery queue, created by run_tweet_delivery
+journal = None
+delivery = None
+
+def build_query(usernames):
+    # Create a more concise query by removing 'from:' prefix and using a shorter format
+    # This reduces the query length significantly
+    usernames_str = " OR ".join(usernames)
+    return f"({usernames_str}){QUERY_SUFFIX}"
+
+
+def shard_handles(usernames, max_query_length=MAX_QUERY_LENGTH):
+    """Split handles, in order, into groups whose search query fits in `max_query_length`."""
+    shards = []
+    shard = []
+    for username in usernames:
+        if shard and len(build_query(shard + [username])) > max_query_length:
+            shards.append(shard)
+            shard = []
+        if len(build_query([username])) > max_query_length:
+            raise ValueError(f"Handle {username} does not fit in a search query")
+        shard.append(username)
+    if shard:
+        shards.append(shard)
+    return shards
+
+
+def shard_key(shard):
+    """Stable key for a shard's since_id: its first handle."""
+    return shard[0].lower()
+
+
+class RateBudget:
+    """Sliding-window limit on the number of API requests per time window."""
+
+    def __init__(self, max_requests=SEARCH_REQUESTS_PER_WINDOW, window=SEARCH_RATE_WINDOW):
+        self.max_requests = max_requests
+        self.window = window
+        self.lock = threading.Lock()
+        self.sent = deque()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.time()
+                while self.sent and now - self.sent[0] >= self.window:
+                    self.sent.popleft()
+                if len(self.sent) < self.max_requests:
+                    self.sent.append(now)
+                    return
+                wait = self.window - (now - self.sent[0])
+            logger.info(f"Search rate budget exhausted, waiting {wait:.0f}s")
+            time.sleep(wait)
+
+
 class TwitterBotX:
-    def __init__(self):
+    def __init__(self, client=None, max_workers=4, rate_budget=None):
         # Twitter API credentials
         self.api_key = os.getenv('TWITTER_API_KEY')
         self.api_secret = os.getenv('TWITTER_API_SECRET')
@@ -36,45 +107,56 @@ class TwitterBotX:
         self.bearer_token = os.getenv('TWITTER_BEARER_TOKEN')
         
         # Initialize the client
-        self.client = tweepy.Client(
+        self.client = client or tweepy.Client(
             bearer_token=self.bearer_token,
             consumer_key=self.api_key,
             consumer_secret=self.api_secret,
             access_token=self.access_token,
             access_token_secret=self.access_token_secret
         )
+        self.max_workers = max_workers
+        self.rate_budget = rate_budget or RateBudget()
         
-        # Load last seen timestamp
+        # Load last seen tweet ID per shard
         self.last_seen_file = 'last_seen_x.json'
-        self.last_seen_id = self.load_last_seen()
+        self.since_ids = self.load_last_seen()
 
     def load_last_seen(self):
-        """Load the last seen tweet ID from file"""
+        """Load the last seen tweet ID per shard from file"""
         try:
             if os.path.exists(self.last_seen_file):
                 with open(self.last_seen_file, 'r') as f:
-                    return f.read().strip()
-            return None
+                    content = f.read().strip()
+                if not content:
+                    return {}
+                try:
+                    since_ids = json.loads(content)
+                except json.JSONDecodeError:
+                    since_ids = None
+                if isinstance(since_ids, dict):
+                    return since_ids
+                # Older files hold a single ID shared by every handle
+                return {"*": content}
+            return {}
         except Exception as e:
-            print(f"Error loading last seen data: {e}")
-            return None
+            logger.error(f"Error loading last seen data: {e}")
+            return {}
 
-    def save_last_seen(self, tweet_id):
-        """Save the last seen tweet ID to file"""
+    def save_last_seen(self):
+        """Save the last seen tweet ID per shard to file"""
         try:
-            with open(self.last_seen_file, 'w') as f:
-                f.write(str(tweet_id))
+            tmp_file = f"{self.last_seen_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self.since_ids, f, indent=4)
+            os.replace(tmp_file, self.last_seen_file)
         except Exception as e:
-            print(f"Error saving last seen data: {e}")
+            logger.error(f"Error saving last seen data: {e}")
 
     def get_tweets_from_multiple_users(self, usernames, max_results=50, since_id=None):
         """Get tweets from multiple users using search_recent_tweets"""
         try:
-            # Create a more concise query by removing 'from:' prefix and using a shorter format
-            # This reduces the query length significantly
-            usernames_str = " OR ".join(usernames)
-            query = f"({usernames_str}) -is:retweet -is:reply"
-            
+            query = build_query(usernames)
+            self.rate_budget.acquire()
             tweets = self.client.search_recent_tweets(
                 query=query,
                 max_results=max_results,
@@ -85,15 +167,15 @@ class TwitterBotX:
             )
             
             if not tweets.data:
-                print(f"No tweets found for users: {usernames}")
+                logger.info(f"No tweets found for users: {usernames}")
                 return None
                 
             # Process the tweets
+            authors = {user.id: user for user in tweets.includes['users']}
             formatted_tweets = []
             for tweet in tweets.data:
                 # Get the author's username from the includes
-                author = next(user for user in tweets.includes['users'] 
-                            if user.id == tweet.author_id)
+                author = authors[tweet.author_id]
                 
                 tweet_data = {
                     'id': tweet.id,
@@ -108,50 +190,55 @@ class TwitterBotX:
             return formatted_tweets
             
         except Exception as e:
-            print(f"Error fetching tweets: {e}")
+            logger.error(f"Error fetching tweets: {e}")
             return None
 
+    def fetch_shards(self, shards, max_results=50):
+        """
+        Search every shard concurrently.
+
+        Returns:
+            tuple: New tweets from all shards (deduplicated, oldest first) and the
+            since_id each shard should advance to once they are handled
+        """
+        def fetch(shard):
+            since_id = self.since_ids.get(shard_key(shard), self.since_ids.get("*"))
+            return shard, self.get_tweets_from_multiple_users(shard, max_results=max_results, since_id=since_id)
+
+        merged = {}
+        since_ids = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for shard, tweets in executor.map(fetch, shards):
+                if not tweets:
+                    continue
+                for tweet in tweets:
+                    merged[int(tweet['id'])] = tweet
+                newest = max(int(tweet['id']) for tweet in tweets)
+                since_ids[shard_key(shard)] = str(newest)
+        return [merged[tweet_id] for tweet_id in sorted(merged)], since_ids
+
     def check_new_tweets(self, usernames, callback, interval=172):
         """Check for new tweets periodically from multiple users"""
+        shards = shard_handles(usernames)
+        logger.info(f"Searching {len(usernames)} handles in {len(shards)} shards")
         while True:
             try:
-                # Get the last seen tweet ID
-                since_id = self.last_seen_id
-                
-                # Fetch new tweets for all users
-                new_tweets = self.get_tweets_from_multiple_users(usernames, max_results=50, since_id=since_id)
-                
-                if new_tweets:
-                    # Update last seen ID with the most recent tweet
-                    self.last_seen_id = new_tweets[0]['id']
-                    self.save_last_seen(self.last_seen_id)
-                    # Process new tweets in reverse order
-                    for tweet in reversed(new_tweets):
-                        callback(tweet)
+                new_tweets, since_ids = self.fetch_shards(shards, max_results=50)
+                # Hand over tweets oldest first before moving since_ids forward
+                for tweet in new_tweets:
+                    callback(tweet)
+                if since_ids:
+                    self.since_ids.update(since_ids)
+                    self.save_last_seen()
                     
             except Exception as e:
-                print(f"Error in check_new_tweets: {e}")
+                logger.error(f"Error in check_new_tweets: {e}")
             time.sleep(interval)
 
-def make_tweet_dir():
-    if not os.path.exists(TWEETS_DIR):
-        os.makedirs(TWEETS_DIR)
-
-
-def send_message(content):
-    data = {
-        "content": content,
-        "username": "Webgenie bot",  # Optional: Custom username for the webhook
-        "avatar_url": "https://vidaio-justin.s3.us-east-2.amazonaws.com/favicon.ico"  # Optional: Custom avatar for the webhook
-    }
-    response = requests.post(WEBHOOK_URL, data=json.dumps(data), headers={"Content-Type": "application/json"})
-    
-    if response.status_code == 204:
-        print("Message sent successfully!")
-        return True
-    else:
-        print(f"Failed to send message: {response.status_code}, {response.text}")
-    return False
+def send_message(content, key=None):
+    """Durably queue a message for the webhook; delivery happens in the background."""
+    delivery.enqueue(WEBHOOK_URL, content, key=key)
+    return True
 
 
 def format_tweet(tweet):
@@ -174,41 +261,54 @@ Hey @everyone!
     return message
 
 
-def periodic_check(interval=5):
-
+def deliver_tweets():
+    """Hand journaled tweets to the webhook queue in order, resuming after the committed offset."""
     while True:
-        tweet_files = sorted(os.listdir(TWEETS_DIR), key=lambda x: int(x.split('.')[0]))
-        for tweet_file_name in tweet_files:
-            with open(f"{TWEETS_DIR}/{tweet_file_name}", 'r') as f:
-                tweet = json.load(f)
-                message = format_tweet(tweet)   
-                result = send_message(message)
-                if result:
-                    os.remove(f"{TWEETS_DIR}/{tweet_file_name}")
-                else:
-                    break
-        time.sleep(interval)
+        journal.wait(JOURNAL_CONSUMER)
+        for seq, tweet in journal.read(JOURNAL_CONSUMER):
+            send_message(format_tweet(tweet), key=f"tweet:{tweet['id']}")
+            journal.commit(JOURNAL_CONSUMER, seq)
+        journal.compact()
 
 
 def callback(tweet):
-    try:
-        filename = f"{TWEETS_DIR}/{tweet['id']}.json"
-        with open(filename, 'w') as f:
-            json.dump(tweet, f, indent=4, default=str)
-        print(f"Saved tweet {tweet['id']} to {filename}")
-    except Exception as e:
-        print(f"Error saving tweet {tweet['id']}: {e}")
+    seq = journal.append(tweet, key=str(tweet['id']))
+    if seq is None:
+        logger.info(f"Tweet {tweet['id']} already journaled")
+    else:
+        logger.info(f"Journaled tweet {tweet['id']} as entry {seq}")
+
+
+def migrate_tweet_dir():
+    """Move tweets left in the old tweets/ directory into the journal."""
+    if not os.path.isdir(TWEETS_DIR):
+        return
+    tweet_files = sorted(os.listdir(TWEETS_DIR), key=lambda x: int(x.split('.')[0]))
+    for tweet_file_name in tweet_files:
+        with open(f"{TWEETS_DIR}/{tweet_file_name}", 'r') as f:
+            callback(json.load(f))
+        os.remove(f"{TWEETS_DIR}/{tweet_file_name}")
+    os.rmdir(TWEETS_DIR)
 
 
-def run_periodic_check():
-    make_tweet_dir()
-    check_thread = threading.Thread(target=periodic_check)
-    check_thread.daemon = True
-    check_thread.start()
+def run_tweet_delivery():
+    global delivery, journal
+    journal = Journal(JOURNAL_PATH)
+    migrate_tweet_dir()
+    journal.compact()
+    delivery = WebhookDelivery(
+        SPOOL_PATH,
+        username="Webgenie bot",  # Optional: Custom username for the webhook
+        avatar_url="https://vidaio-justin.s3.us-east-2.amazonaws.com/favicon.ico",  # Optional: Custom avatar for the webhook
+    )
+    delivery.start()
+    deliver_thread = threading.Thread(target=deliver_tweets)
+    deliver_thread.daemon = True
+    deliver_thread.start()
 
 
 def main():
-    run_periodic_check()
+    run_tweet_delivery()
     bot = TwitterBotX()
     usernames = USERS
     bot.check_new_tweets(usernames, callback)
@@ -1,4 +1,13 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
 import bittensor as bt
+from utils.logger import logger
 
         
 if __name__ == '__main__':
@@ -25,4 +34,4 @@ if __name__ == '__main__':
             amount=None,
             wallet=wallet
         )
-        print(f"Unstaked from {info.hotkey_ss58} on netuid {info.netuid}")
+        logger.info(f"Unstaked from {info.hotkey_ss58} on netuid {info.netuid}")
@@ -39,9 +39,9 @@ if __name__ == '__main__':
         netuid=netuid
     )
 
-    print(f"Wallet: {wallet_name}, Delegator: {delegator}, Dest Hotkey: {dest_hotkey}, Amount: {amount_balance.tao}")
+    logger.info(f"Wallet: {wallet_name}, Delegator: {delegator}, Dest Hotkey: {dest_hotkey}, Amount: {amount_balance.tao}")
 
-    print("Press 'y' to unstake, or Ctrl+C to exit")
+    logger.info("Press 'y' to unstake, or Ctrl+C to exit")
     try:
         if input().lower() == 'y':
             while True:
@@ -60,7 +60,7 @@ if __name__ == '__main__':
                     logger.error(f"Error: {e}")
                     continue
     except KeyboardInterrupt:
-        print("\nExiting...")
+        logger.info("Exiting...")
     except Exception as e:
         logger.error(f"Error: {e}")
         
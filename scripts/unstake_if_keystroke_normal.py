@@ -1,7 +1,16 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
 import time
 import bittensor as bt
 
 from app.constants import ROUND_TABLE_HOTKEY
+from utils.logger import logger
 
 if __name__ == '__main__':
     
@@ -10,14 +19,14 @@ if __name__ == '__main__':
     subtensor = bt.subtensor(network="finney")
     subnet = subtensor.subnet(netuid=netuid)
     alpha_price = subnet.alpha_to_tao(1)
-    print(f"Current alpha token price: {alpha_price} TAO")
+    logger.info(f"Current alpha token price: {alpha_price} TAO")
 
     wallet_name = input("Enter the wallet name: ")            
     wallet = bt.wallet(name=wallet_name)
     wallet.unlock_coldkey()
     dest_hotkey = input("Enter the destination hotkey (default is Round table): ") or ROUND_TABLE_HOTKEY
     
-    print("Press 'y' to unstake, or Ctrl+C to exit")
+    logger.info("Press 'y' to unstake, or Ctrl+C to exit")
     try:
         if input().lower() == 'y':
             while True:
@@ -30,10 +39,10 @@ if __name__ == '__main__':
                     if result:
                         break
                 except Exception as e:
-                    print(f"Error: {e}")
+                    logger.error(f"Error: {e}")
                     continue
     except KeyboardInterrupt:
-        print("\nExiting...")
+        logger.info("Exiting...")
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error(f"Error: {e}")
         
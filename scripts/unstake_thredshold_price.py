@@ -39,8 +39,8 @@ if __name__ == '__main__':
         netuid=netuid
     )
 
-    print("Press Ctrl+C to stop the script")
-    print(f"Wallet: {wallet_name}, Delegator: {delegator}, Dest Hotkey: {dest_hotkey}, Amount: {amount_balance.tao}, Tolerance: {tolerance}")
+    logger.info("Press Ctrl+C to stop the script")
+    logger.info(f"Wallet: {wallet_name}, Delegator: {delegator}, Dest Hotkey: {dest_hotkey}, Amount: {amount_balance.tao}, Tolerance: {tolerance}")
 
     time.sleep(10)
     while True:
@@ -82,7 +82,7 @@ if __name__ == '__main__':
             if success:
                 break
         except KeyboardInterrupt:
-            print("\nExiting...")
+            logger.info("Exiting...")
             break
         except Exception as e:
             logger.error(f"Error: {e}")
@@ -1,22 +1,80 @@
-import bittensor as bt
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import argparse
+
+from utils.flow_detector import DEFAULT_HALFLIFE, DEFAULT_THRESHOLD, AlertSink, FlowDetector
+from utils.price_ring import PRICE_RING_DIR, PriceRings, record_pools
+from utils.rpc_pool import RPC_ENDPOINTS, EndpointPool
+from utils.logger import logger
+
+SPOOL_PATH = "flow_alerts_spool.db"
+# Recorded history older than this many blocks is too stale to warm the detector with
+MAX_WARM_GAP = 10
+
+
+def warm_up(detector: FlowDetector, rings: PriceRings, netuids, head: int, halflife: float) -> int:
+    """
+    Feed the detector the recorded history of the last few half lives, so it
+    can flag from the first block instead of after its warm-up.
+
+    Returns:
+        int: Blocks fed
+    """
+    start = head - int(4 * halflife)
+    depths = {}
+    for netuid in netuids:
+        try:
+            window = rings.ring(netuid).window(start_block=start)
+        except FileNotFoundError:
+            continue
+        for block, tao_in in zip(window["block"].tolist(), window["tao_in"].tolist()):
+            depths.setdefault(block, {})[netuid] = tao_in
+    if not depths or head - max(depths) > MAX_WARM_GAP:
+        return 0
+    for block in sorted(depths):
+        detector.update(block, list(depths[block]), list(depths[block].values()))
+    return len(depths)
+
 
 if __name__ == '__main__':
-    threshold = int(input("Enter the threshold: "))
-    subtensor = bt.subtensor(network="finney")
-    subnet_infos = subtensor.all_subnets()
-    prev_tao_in = [subnet_info.tao_in for subnet_info in subnet_infos]
+    parser = argparse.ArgumentParser(description="Flag subnets whose TAO flow is an outlier for their pool")
+    parser.add_argument("--z", type=float, default=DEFAULT_THRESHOLD, help="z-score from which a flow is flagged")
+    parser.add_argument("--halflife", type=float, default=DEFAULT_HALFLIFE, help="Blocks after which the statistics forget half")
+    parser.add_argument("--min-flow", type=float, default=0.0, help="Smallest absolute flow in TAO worth flagging")
+    parser.add_argument("--alert", action="append", choices=["console", "log", "webhook"],
+                        help="Where alerts go, repeatable (default: log)")
+    parser.add_argument("--webhook-url", default=os.getenv("FLOW_WEBHOOK_URL"), help="Discord webhook for --alert webhook")
+    args = parser.parse_args()
+
+    delivery = None
+    if "webhook" in (args.alert or []):
+        from utils.webhook import WebhookDelivery
+
+        delivery = WebhookDelivery(SPOOL_PATH, username="Flow Alert Bot")
+        delivery.start()
+    sink = AlertSink(args.alert or ["log"], webhook_url=args.webhook_url, delivery=delivery)
+    detector = FlowDetector(halflife=args.halflife, threshold=args.z, min_flow=args.min_flow)
+
+    rpc_pool = EndpointPool(RPC_ENDPOINTS["finney"])
+    rpc_pool.start()
+    netuids = rpc_pool.read(lambda subtensor: subtensor.get_subnets())
+    # Keep every block's reserves, for /prices/{netuid}/ohlc and `python -m utils.price_ring ohlc`
+    rings = PriceRings(os.getenv("PRICE_RING_DIR", PRICE_RING_DIR), writable=True)
+    warmed = warm_up(detector, rings, netuids, rpc_pool.pin().block, args.halflife)
+    logger.info(f"Watching {len(netuids)} subnets, warmed up with {warmed} recorded blocks")
     while True:
         try:
-            now_subnet_infos = subtensor.all_subnets()
-            now_tao_in = [subnet_info.tao_in for subnet_info in now_subnet_infos]
-            tao_flow = [float(now_tao_in[i] - prev_tao_in[i]) for i in range(len(now_tao_in))]
-            for i in range(len(tao_flow)):
-                if abs(tao_flow[i]) >= threshold:
-                    print(f"SN {i:2d} => {round(float(now_subnet_infos[i].price), 5):>8.5f}, {round(tao_flow[i], 2):>8.2f}")
-
-            print("***")
-            prev_tao_in = now_tao_in
-            subtensor.wait_for_block()
+            block, pools = record_pools(rpc_pool, rings, netuids)
+            anomalies = detector.update(block, list(pools), [tao_in.tao for tao_in, _ in pools.values()])
+            sink.send(anomalies)
+            logger.info(f"*** block {block}, {len(anomalies)} anomalies")
+            rpc_pool.read(lambda subtensor: subtensor.wait_for_block())
         except Exception as e:
-            print(f"Error in watching_price: {e}")
+            logger.error(f"Error in watching_pool: {e}")
             continue
@@ -9,27 +9,31 @@ if parent_dir not in sys.path:
 import bittensor as bt
 from app.constants import NETWORK
 from utils.logger import logger
+from utils.price_ring import PRICE_RING_DIR, PriceRings, record_pools
+from utils.rpc_pool import EndpointPool, resolve_endpoints
+from utils.storage import pool_price
 
 if __name__ == '__main__':
     netuid = int(input("Enter the netuid: "))
-    subtensor = bt.subtensor(network=NETWORK)
+    rpc_pool = EndpointPool(resolve_endpoints(NETWORK))
+    rpc_pool.start()
     prev_tao_in = 0
+    # Keep every block's reserves, for /prices/{netuid}/ohlc and `python -m utils.price_ring ohlc`
+    rings = PriceRings(os.getenv("PRICE_RING_DIR", PRICE_RING_DIR), writable=True)
     while True:
         try:
-            subnet = subtensor.subnet(netuid=netuid)
-            if subnet is None:
-                logger.error(f"Subnet is None for netuid: {netuid}")
-                continue
-            
-            price = subnet.alpha_to_tao(1)
-            now_tao_in = subnet.tao_in
-            if now_tao_in is None:
-                logger.error(f"Now tao in is None for netuid: {netuid}")
+            _, pools = record_pools(rpc_pool, rings, [netuid])
+            now_tao_in, alpha_in = pools[netuid]
+            if now_tao_in.rao == 0:
+                logger.error(f"Now tao in is empty for netuid: {netuid}")
+                rpc_pool.read(lambda subtensor: subtensor.wait_for_block())
                 continue
+
+            price = bt.Balance.from_tao(pool_price(netuid, now_tao_in, alpha_in))
             tao_flow = now_tao_in - prev_tao_in
             logger.info(f"Netuid: {netuid} ===> price: {price}, tao_flow: {tao_flow}")
             prev_tao_in = now_tao_in
-            subtensor.wait_for_block()
+            rpc_pool.read(lambda subtensor: subtensor.wait_for_block())
         except Exception as e:
             logger.error(f"Error in watching_price: {e}")
             continue
\ No newline at end of file
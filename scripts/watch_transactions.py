@@ -1,4 +1,13 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
 import bittensor as bt
+from utils.events import extract_stake_events_from_data
 
 subtensor = bt.subtensor("finney")
 import requests
@@ -20,10 +29,11 @@ def load_bots_from_gdoc():
         bots = re.findall(r'5[1-9A-HJ-NP-Za-km-z]{47}', text)
         return bots
     except Exception as e:
-        print(f"Failed to load bots from Google Doc: {e}")
+        logger.error(f"Failed to load bots from Google Doc: {e}")
         # Fallback to empty list or optionally a hardcoded list
         return []
 import threading
+from utils.logger import logger
 
 def refresh_bots_periodically(interval_minutes=20):
     global bots
@@ -55,111 +65,6 @@ def get_color(event_type, coldkey):
         return "\033[0m"
 
 
-def extract_stake_events_from_data(events_data):
-    """
-    Extract stake and unstake events from blockchain event data.
-    
-    Args:
-        events_data: List of event dictionaries from blockchain
-    
-    Returns:
-        List of dictionaries containing stake/unstake event information
-    """
-    stake_events = []
-    
-    for event in events_data:
-        phase = event.get('phase', {})
-        event_info = event.get('event', {})
-        
-        # Check if this is a SubtensorModule event
-        if event_info.get('module_id') == 'SubtensorModule':
-            event_id = event_info.get('event_id')
-            attributes = event_info.get('attributes', {})
-            
-            # Convert coldkey and hotkey to ss58 addresses if possible
-            def to_ss58(addr_bytes, ss58_format = 42):
-                if addr_bytes is None:
-                    return None
-                pubkey_bytes = bytes(addr_bytes).hex()
-                if not pubkey_bytes.startswith("0x"):
-                    pubkey_bytes = "0x" + pubkey_bytes
-                return subtensor.substrate.ss58_encode(pubkey_bytes, ss58_format=ss58_format)
-                
-            if event_id == 'StakeAdded':
-                # The attributes for StakeAdded are a tuple, not a dict.
-                # Example: (
-                #   ((coldkey_bytes,), (hotkey_bytes,), amount, stake, netuid, block_number)
-                # )
-                # So we need to unpack the tuple accordingly.
-                if isinstance(attributes, tuple) and len(attributes) >= 6:
-                    coldkey_tuple = to_ss58(attributes[0][0]) if isinstance(attributes[0], tuple) and len(attributes[0]) > 0 else attributes[0]
-                    hotkey_tuple = to_ss58(attributes[1][0]) if isinstance(attributes[1], tuple) and len(attributes[1]) > 0 else attributes[1]
-                    amount = attributes[2]
-                    # attributes[3] is stake, but we use amount for TAO
-                    netuid = attributes[4]
-                else:
-                    coldkey_tuple = None
-                    hotkey_tuple = None
-                    amount = None
-                    netuid = None
-                stake_events.append({
-                    'type': 'StakeAdded',
-                    'coldkey': coldkey_tuple,
-                    'hotkey': hotkey_tuple,
-                    'netuid': netuid,
-                    'amount': amount,
-                    'amount_tao': amount / 1e9 if amount else 0,
-                })
-                
-            elif event_id == 'StakeRemoved':
-                # Extract unstake information - also a tuple
-                if isinstance(attributes, tuple) and len(attributes) >= 6:
-                    coldkey_tuple = to_ss58(attributes[0][0]) if isinstance(attributes[0], tuple) and len(attributes[0]) > 0 else attributes[0]
-                    hotkey_tuple = to_ss58(attributes[1][0]) if isinstance(attributes[1], tuple) and len(attributes[1]) > 0 else attributes[1]
-                    amount = attributes[2]
-                    netuid = attributes[4]
-                else:
-                    coldkey_tuple = None
-                    hotkey_tuple = None
-                    amount = None
-                    netuid = None
-                    block_number = None
-
-                stake_events.append({
-                    'type': 'StakeRemoved',
-                    'coldkey': coldkey_tuple,
-                    'hotkey': hotkey_tuple,
-                    'netuid': netuid,
-                    'amount': amount,
-                    'amount_tao': amount / 1e9 if amount else 0,
-                })
-                
-            elif event_id == 'StakeMoved':
-                # Extract stake move information - also a tuple
-                if isinstance(attributes, tuple) and len(attributes) >= 6:
-                    coldkey_tuple = to_ss58(attributes[0][0]) if isinstance(attributes[0], tuple) and len(attributes[0]) > 0 else attributes[0]
-                    from_hotkey_tuple = to_ss58(attributes[1][0]) if isinstance(attributes[1], tuple) and len(attributes[1]) > 0 else attributes[1]
-                    to_hotkey_tuple = to_ss58(attributes[3][0]) if isinstance(attributes[3], tuple) and len(attributes[3]) > 0 else attributes[3]
-                    netuid = attributes[4]
-                    amount = attributes[5]
-                else:
-                    coldkey_tuple = None
-                    from_hotkey_tuple = None
-                    to_hotkey_tuple = None
-                    netuid = None
-                    amount = None
-                
-                stake_events.append({
-                    'type': 'StakeMoved',
-                    'coldkey': coldkey_tuple,
-                    'from_hotkey': from_hotkey_tuple,
-                    'to_hotkey': to_hotkey_tuple,
-                    'netuid': netuid,
-                    'amount': amount,
-                    'amount_tao': amount / 1e9 if amount else 0,
-                })
-    
-    return stake_events
 def print_stake_events(stake_events, netuid):
     now_subnet_infos = subtensor.all_subnets()
     prices = [float(subnet_info.price) for subnet_info in now_subnet_infos]
@@ -181,7 +86,7 @@ def print_stake_events(stake_events, netuid):
 
         reset = "\033[0m"
         if (netuid == netuid or netuid == -1) and (abs(tao_amount) > threshold or threshold == -1):
-            print(f"{color}SN {netuid_val:3d} => {prices[netuid_val]:8.5f}  {sign}{tao_amount:5.1f}  {coldkey}{reset}")
+            logger.info(f"{color}SN {netuid_val:3d} => {prices[netuid_val]:8.5f}  {sign}{tao_amount:5.1f}  {coldkey}{reset}")
 
                   
 if __name__ == "__main__":    
@@ -197,7 +102,7 @@ if __name__ == "__main__":
         # Extract stake events from live data
         stake_events = extract_stake_events_from_data(events)
         if stake_events:
-            print(f"*{'*'*40}")
+            logger.info(f"*{'*'*40}")
             print_stake_events(stake_events, netuid)
         
         subtensor.wait_for_block()
\ No newline at end of file
@@ -0,0 +1,85 @@
+import sys
+import os
+import argparse
+import threading
+import time
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pytest
+
+from proxy import Account, ProxyCLI
+from utils.accounts import AccountRegistry, DEFAULT_ACCOUNTS
+
+
+def test_registry_expands_names_groups_and_all():
+    registry = AccountRegistry(DEFAULT_ACCOUNTS)
+    assert registry.resolve("black") == ["black"]
+    assert registry.resolve("vlad,black,kb") == ["webgenie", "green", "black", "kb"]
+    assert registry.resolve("all") == [name for name in DEFAULT_ACCOUNTS if name != ".env"]
+    with pytest.raises(ValueError):
+        registry.resolve("black,nobody")
+
+
+def test_fan_out_confirms_once_and_reports_every_account(monkeypatch, capsys):
+    cli = ProxyCLI(max_workers=3)
+    confirms = []
+
+    def dispatch(ron_proxy, args, confirm=True):
+        confirms.append(confirm)
+        print(f"working on {ron_proxy}")
+        if ron_proxy == "green":
+            return False, "Error: SlippageTooHigh"
+        return True, "Stake removed successfully"
+
+    monkeypatch.setattr(cli, "get_proxy", lambda account, unlock=False: account.name)
+    monkeypatch.setattr(cli, "holding", lambda ron_proxy, args: "1.0")
+    monkeypatch.setattr(cli, "dispatch", dispatch)
+    prompts = []
+    monkeypatch.setattr("builtins.input", lambda text="": prompts.append(text) or "y")
+
+    accounts = [Account(name, "finney", f"5{name}", "proxy") for name in ("webgenie", "green", "black")]
+    args = argparse.Namespace(command="removestake", netuid=5, hotkey="5hot", amount=0, all=True)
+    assert cli.fan_out(args, accounts) == 1
+
+    out = capsys.readouterr().out
+    assert len(prompts) == 1 and confirms == [False, False, False]
+    assert out.count("Stake removed successfully") == 2 and "SlippageTooHigh" in out
+    # Only the failed account's own output is shown, after the table
+    assert "working on green" in out and "working on black" not in out
+
+
+def test_fan_out_runs_accounts_of_one_proxy_wallet_one_at_a_time(monkeypatch):
+    cli = ProxyCLI(max_workers=4)
+    lock = threading.Lock()
+    running, overlaps = {}, []
+
+    def dispatch(ron_proxy, args, confirm=True):
+        wallet = ron_proxy.proxy_wallet
+        with lock:
+            running[wallet] = running.get(wallet, 0) + 1
+            overlaps.append(running[wallet])
+        time.sleep(0.05)
+        with lock:
+            running[wallet] -= 1
+        return True, "ok"
+
+    monkeypatch.setattr(cli, "get_proxy", lambda account, unlock=False: account)
+    monkeypatch.setattr(cli, "holding", lambda ron_proxy, args: "1.0")
+    monkeypatch.setattr(cli, "dispatch", dispatch)
+    monkeypatch.setattr("builtins.input", lambda text="": "y")
+
+    accounts = [Account(f"a{index}", "finney", f"5a{index}", f"proxy{index % 2}") for index in range(4)]
+    args = argparse.Namespace(command="removestake", netuid=5, hotkey="5hot", amount=0, all=True)
+    started = time.perf_counter()
+    assert cli.fan_out(args, accounts) == 0
+    assert max(overlaps) == 1
+    # The two proxy wallets still run side by side
+    assert time.perf_counter() - started < 0.19
+    # Later runs reuse the same worker threads, and with them their connections
+    executor = cli.executor()
+    assert cli.fan_out(args, accounts) == 0
+    assert cli.executor() is executor
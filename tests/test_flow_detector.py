@@ -0,0 +1,50 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import numpy as np
+import pytest
+
+from utils.flow_detector import AlertSink, FlowDetector
+
+
+def test_outliers_are_relative_to_each_pools_own_flow():
+    rng = np.random.default_rng(7)
+    detector = FlowDetector(halflife=50, threshold=5.0, warmup=30)
+    # A deep pool with large noisy flow and a shallow one with small steady flow
+    deep, shallow = 100000.0, 50.0
+    for block in range(200):
+        deep += rng.normal(0, 100.0)
+        shallow += 0.01 + rng.normal(0, 0.001)
+        assert detector.update(block, [1, 9], [deep, shallow]) == []
+
+    # 150 TAO is routine for the deep pool, 2 TAO is far out for the shallow one
+    anomalies = detector.update(200, [1, 9], [deep + 150.0, shallow + 2.0])
+    assert [anomaly.netuid for anomaly in anomalies] == [9]
+    assert anomalies[0].flow == pytest.approx(2.0)
+    assert anomalies[0].z > 5.0
+
+    # The spike entered the statistics clipped, so a repeat is flagged again
+    anomalies = detector.update(201, [1, 9], [deep + 150.0, shallow + 4.0])
+    assert [anomaly.netuid for anomaly in anomalies] == [9]
+
+
+def test_new_subnets_warm_up_and_small_flows_are_ignored():
+    detector = FlowDetector(halflife=10, threshold=3.0, warmup=5, min_flow=1.0)
+    for block in range(5):
+        assert detector.update(block, [3], [100.0 + block * 0.01]) == []
+    # A new subnet is never flagged before its warm-up, whatever the flow
+    assert detector.update(5, [3, 40], [100.06, 10.0]) == []
+    assert detector.update(6, [3, 40], [100.07, 500.0]) == []
+    # An outlier z-score below the absolute floor stays quiet
+    assert detector.update(7, [3, 40], [100.5, 500.0]) == []
+    assert [anomaly.netuid for anomaly in detector.update(8, [3], [102.0])] == [3]
+
+    with pytest.raises(ValueError):
+        AlertSink(["webhook"])
+    with pytest.raises(ValueError):
+        AlertSink(["pager"])
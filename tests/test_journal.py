@@ -0,0 +1,72 @@
+import sys
+import os
+import json
+
+# Add the parent directory and the scripts directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+scripts_dir = os.path.join(parent_dir, 'scripts')
+for path in (parent_dir, scripts_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import tweet_discord_bot
+from utils.journal import Journal
+
+
+def test_consumers_resume_after_their_committed_offset(tmp_path):
+    path = str(tmp_path / "journal.db")
+    journal = Journal(path)
+    first = journal.append({"id": 1}, key="1")
+    assert journal.append({"id": 1}, key="1") is None
+    second = journal.append({"id": 2}, key="2")
+    third = journal.append({"id": 3})
+
+    assert journal.read("a") == [(first, {"id": 1}), (second, {"id": 2}), (third, {"id": 3})]
+    journal.commit("a", second)
+    journal.commit("a", first)  # an older commit never moves the offset back
+    journal.commit("b", first)
+
+    reopened = Journal(path)
+    assert reopened.offset("a") == second
+    assert reopened.read("a") == [(third, {"id": 3})]
+    assert reopened.read("b", limit=1) == [(second, {"id": 2})]
+    assert reopened.wait("b", timeout=0)
+    reopened.commit("b", third)
+    assert not reopened.wait("b", timeout=0.01)
+
+
+def test_compact_deletes_committed_entries_and_remembers_their_keys(tmp_path):
+    path = str(tmp_path / "journal.db")
+    journal = Journal(path)
+    padding = "x" * 4000
+    for seq in range(1, 201):
+        journal.append({"id": seq, "text": padding}, key=str(seq))
+    journal.commit("a", 200)
+    journal.commit("b", 150)
+    size = os.path.getsize(path) + os.path.getsize(path + "-wal")
+
+    assert journal.compact() == 150
+    assert journal._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 50
+    assert journal.read("b", limit=1)[0][0] == 151
+    # Handled records stay deduplicated after their entries are gone
+    assert journal.append({"id": 7}, key="7") is None
+    assert journal.append({"id": 201}, key="201") is not None
+
+    journal._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    assert os.path.getsize(path) < size / 2
+    assert journal.compact() == 0
+
+
+def test_migrate_tweet_dir_journals_old_tweet_files_in_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.mkdir(tweet_discord_bot.TWEETS_DIR)
+    for tweet_id in (10, 9, 100):
+        with open(f"{tweet_discord_bot.TWEETS_DIR}/{tweet_id}.json", "w") as f:
+            json.dump({"id": tweet_id}, f)
+    journal = Journal(str(tmp_path / "tweets.db"))
+    monkeypatch.setattr(tweet_discord_bot, "journal", journal)
+
+    tweet_discord_bot.migrate_tweet_dir()
+    assert [tweet["id"] for _, tweet in journal.read("discord")] == [9, 10, 100]
+    assert not os.path.exists(tweet_discord_bot.TWEETS_DIR)
+    tweet_discord_bot.migrate_tweet_dir()
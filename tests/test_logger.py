@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import gc
+import json
+import logging
+import weakref
+
+from utils.logger import JsonFormatter
+
+
+class Connection:
+    pass
+
+
+def test_json_lines_survive_extras_that_cannot_be_rendered():
+    connection = Connection()
+    proxy = weakref.proxy(connection)
+    del connection
+    gc.collect()
+    record = logging.makeLogRecord({"name": "websockets.server", "levelname": "INFO", "msg": "connection closed",
+                                    "websocket": proxy, "netuid": 5, "tags": ["a"]})
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "connection closed"
+    assert entry["netuid"] == 5
+    assert entry["tags"] == "['a']"
+    assert entry["websocket"].startswith("<unrepresentable")
@@ -0,0 +1,122 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import hashlib
+
+import pytest
+
+from multisig import MultisigApprover, PendingProposal, compose_params, describe_call, parse_batch_line, select_proposals
+
+
+TRANSFER = {
+    'call_module': 'Balances',
+    'call_function': 'transfer_keep_alive',
+    'call_args': [{'name': 'dest', 'type': 'AccountIdLookup', 'value': '5Dest'},
+                  {'name': 'value', 'type': 'Balance', 'value': 1000000000}],
+}
+BATCH = {
+    'call_module': 'Utility',
+    'call_function': 'batch_all',
+    'call_args': [{'name': 'calls', 'type': 'Vec<RuntimeCall>', 'value': [TRANSFER, {
+        'call_module': 'Proxy',
+        'call_function': 'add_proxy',
+        'call_args': [{'name': 'delegate', 'type': 'AccountIdLookup', 'value': '5Proxy'},
+                      {'name': 'proxy_type', 'type': 'ProxyType', 'value': 'Staking'},
+                      {'name': 'delay', 'type': 'BlockNumber', 'value': 0}],
+    }]}],
+}
+
+
+class FakeCall:
+    def __init__(self, module, function, params):
+        self.call_hash = hashlib.blake2b(repr((module, function, params)).encode(), digest_size=32).digest()
+
+
+class FakeExtrinsic:
+    def __init__(self, call):
+        self.value = {'call': call}
+
+
+class FakeValue:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeSubstrate:
+    """Multisigs storage and blocks, with compose_call hashing its arguments."""
+
+    def __init__(self, multisigs, blocks):
+        self.multisigs = multisigs
+        self.blocks = blocks
+
+    def compose_call(self, call_module, call_function, call_params):
+        return FakeCall(call_module, call_function, call_params)
+
+    def query_map(self, module, storage_function, params):
+        return [(FakeValue(call_hash), FakeValue(details)) for call_hash, details in self.multisigs.items()]
+
+    def get_extrinsics(self, block_number):
+        return [FakeExtrinsic(call) for call in self.blocks.get(block_number, [])]
+
+
+class FakeSignatories:
+    address = '5Multisig'
+    threshold = 2
+
+
+def test_batch_lines_parse_into_operations():
+    action, address, amount = parse_batch_line("transfer 5Dest 1.5")
+    assert (action, address, amount.rao) == ("transfer", "5Dest", 1500000000)
+    assert parse_batch_line("remove_proxy 5Proxy staking") == ("remove_proxy", "5Proxy", "Staking")
+    for line in ("transfer 5Dest -1", "add_proxy 5Proxy owner", "stake 5Dest 1"):
+        with pytest.raises(ValueError):
+            parse_batch_line(line)
+
+
+def test_pending_proposals_are_read_back_from_their_proposing_extrinsic():
+    params = compose_params(BATCH)
+    assert params['calls'][1] == {
+        'call_module': 'Proxy', 'call_function': 'add_proxy',
+        'call_args': {'delegate': '5Proxy', 'proxy_type': 'Staking', 'delay': 0},
+    }
+    batch_hash = '0x' + FakeCall('Utility', 'batch_all', params).call_hash.hex()
+    as_multi = {'call_module': 'Multisig', 'call_function': 'as_multi',
+                'call_args': [{'name': 'threshold', 'type': 'u16', 'value': 2},
+                              {'name': 'call', 'type': 'RuntimeCall', 'value': BATCH}]}
+    approve_as_multi = {'call_module': 'Multisig', 'call_function': 'approve_as_multi', 'call_args': []}
+    multisigs = {
+        batch_hash: {'when': {'height': 7, 'index': 1}, 'depositor': '5Me', 'approvals': ['5Other']},
+        '0x' + '11' * 32: {'when': {'height': 5, 'index': 0}, 'depositor': '5Other', 'approvals': ['5Other']},
+        '0x' + '22' * 32: {'when': {'height': 3, 'index': 0}, 'depositor': '5Me', 'approvals': ['5Me']},
+    }
+    approver = MultisigApprover.__new__(MultisigApprover)
+    approver.substrate = FakeSubstrate(multisigs, {5: [approve_as_multi], 7: [approve_as_multi, as_multi]})
+    approver.address = '5Me'
+    approver.signatories = FakeSignatories()
+
+    pending = approver.pending()
+    # Our own proposal is skipped; the hash-only one cannot be rebuilt
+    assert [proposal.when['height'] for proposal in pending] == [5, 7]
+    assert pending[0].call is None
+    assert pending[1].call is not None
+    assert pending[1].description == (
+        "Utility.batch_all[Balances.transfer_keep_alive(dest=5Dest, value=1000000000); "
+        "Proxy.add_proxy(delegate=5Proxy, proxy_type=Staking, delay=0)]"
+    )
+    assert describe_call(TRANSFER) == "Balances.transfer_keep_alive(dest=5Dest, value=1000000000)"
+
+
+def test_selection_out_of_range_or_not_a_number_asks_again(monkeypatch):
+    proposals = []
+    for index in range(3):
+        proposal = PendingProposal("5Multi", f"0x{index}", {'height': 1, 'index': index}, "5Dep", [])
+        proposal.call = proposal.call_value = TRANSFER
+        proposals.append(proposal)
+    answers = iter(["0", "2,x", "4", "3, 1"])
+    monkeypatch.setattr("builtins.input", lambda text="": next(answers))
+    assert select_proposals(proposals) == [proposals[2], proposals[0]]
@@ -0,0 +1,151 @@
+import sys
+import os
+import asyncio
+import time
+
+import pytest
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from app.services.order_queue import MAX_RETRY_AFTER, MIN_RETRY_AFTER, DelegatorQueues, Order, QueueFull
+
+
+def make_order(operation="stake", delegator="alice", netuid=1, amount=1.0, rate_tolerance=0.005):
+    return Order(operation, f"wallet_{delegator}", delegator, netuid, "hotkey", amount, rate_tolerance, False, 1)
+
+
+class RecordingExecutor:
+    """Records executed orders and how many ran at once per delegator."""
+
+    def __init__(self, duration=0.05):
+        self.duration = duration
+        self.executed = []
+        self.running = {}
+        self.max_running = {}
+        self.started = []
+
+    async def __call__(self, order):
+        self.started.append((order.delegator, time.perf_counter()))
+        self.running[order.delegator] = self.running.get(order.delegator, 0) + 1
+        self.max_running[order.delegator] = max(self.max_running.get(order.delegator, 0), self.running[order.delegator])
+        await asyncio.sleep(self.duration)
+        self.running[order.delegator] -= 1
+        self.executed.append(order)
+        return {"success": True, "error": None, "amount": order.amount}
+
+
+def test_same_delegator_runs_serially_and_others_in_parallel():
+    executor = RecordingExecutor()
+    queues = DelegatorQueues(executor, coalesce_window=0.0)
+    futures = [queues.submit(make_order(delegator=d, netuid=n)) for d, n in
+               [("alice", 1), ("alice", 2), ("bob", 1), ("bob", 2)]]
+    started = time.perf_counter()
+    assert all(future.result(timeout=5)["success"] for future in futures)
+    assert executor.max_running == {"alice": 1, "bob": 1}
+    # Two rounds of two parallel trades, not four serial ones
+    assert time.perf_counter() - started < 4 * executor.duration
+
+
+def test_compatible_orders_are_coalesced():
+    executor = RecordingExecutor()
+    queues = DelegatorQueues(executor, coalesce_window=0.05)
+    futures = [
+        queues.submit(make_order(amount=1.0, rate_tolerance=0.01)),
+        queues.submit(make_order(amount=2.5, rate_tolerance=0.005)),
+        queues.submit(make_order(operation="unstake", amount=3.0)),
+    ]
+    results = [future.result(timeout=5) for future in futures]
+    assert [order.operation for order in executor.executed] == ["stake", "unstake"]
+    assert executor.executed[0].amount == 3.5
+    assert executor.executed[0].rate_tolerance == 0.005
+    assert results[0] == results[1] == {"success": True, "error": None, "amount": 3.5, "coalesced": 2}
+    assert "coalesced" not in results[2]
+
+
+def test_unstake_all_absorbs_partial_unstakes():
+    executor = RecordingExecutor()
+    queues = DelegatorQueues(executor, coalesce_window=0.05)
+    futures = [
+        queues.submit(make_order(operation="unstake", amount=1.0)),
+        queues.submit(make_order(operation="unstake", amount=None)),
+    ]
+    for future in futures:
+        future.result(timeout=5)
+    assert len(executor.executed) == 1
+    assert executor.executed[0].amount is None
+
+
+def test_full_queues_refuse_orders_with_a_retry_hint():
+    executor = RecordingExecutor(duration=0.2)
+    queues = DelegatorQueues(executor, coalesce_window=0.0, max_running=1, max_queued=3, max_queued_per_delegator=2)
+    futures = [queues.submit(make_order(delegator="alice", netuid=n)) for n in (1, 2)]
+    with pytest.raises(QueueFull) as refused:
+        queues.submit(make_order(delegator="alice", netuid=3))
+    assert refused.value.scope == "delegator"
+    assert MIN_RETRY_AFTER <= refused.value.retry_after <= MAX_RETRY_AFTER
+
+    futures.append(queues.submit(make_order(delegator="bob")))
+    with pytest.raises(QueueFull) as refused:
+        queues.submit(make_order(delegator="carol"))
+    assert refused.value.scope == "global"
+    assert queues.pending() == 3
+
+    started = time.perf_counter()
+    assert all(future.result(timeout=5)["success"] for future in futures)
+    # One trade at a time across delegators
+    assert time.perf_counter() - started >= 2.5 * executor.duration
+    assert queues.pending() == 0 and queues.pending("alice") == 0
+    assert queues.submit(make_order(delegator="carol")).result(timeout=5)["success"]
+
+
+def test_delegator_lock_is_shared_by_queues_in_other_workers(tmp_path):
+    # Two DelegatorQueues on one lock directory stand in for two API workers
+    executor = RecordingExecutor()
+    workers = [DelegatorQueues(executor, coalesce_window=0.0, lock_dir=str(tmp_path)) for _ in range(2)]
+    futures = [worker.submit(make_order(delegator=delegator, netuid=index))
+               for index, worker in enumerate(workers) for delegator in ("alice", "bob")]
+    assert all(future.result(timeout=5)["success"] for future in futures)
+    assert executor.max_running == {"alice": 1, "bob": 1}
+
+
+def test_orders_whose_merge_would_exceed_the_tolerance_run_one_by_one():
+    executor = RecordingExecutor(duration=0.01)
+    # Stand-in for the pool check: merged amounts above 2.5 TAO move the price too far
+    checked = []
+
+    def check_merge(merged):
+        checked.append(merged.amount)
+        return merged.amount <= 2.5
+
+    queues = DelegatorQueues(executor, coalesce_window=0.1, check_merge=check_merge)
+    futures = [queues.submit(make_order(amount=amount)) for amount in (2.0, 1.0, 0.5)]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert [order.amount for order in executor.executed] == [2.0, 1.5]
+    assert checked == [3.5, 1.5]
+    assert "coalesced" not in results[0] and results[1]["coalesced"] == 2
+
+
+def test_limits_are_shared_by_queues_in_other_workers(tmp_path):
+    executor = RecordingExecutor(duration=0.2)
+    workers = [DelegatorQueues(executor, coalesce_window=0.0, max_running=1, max_queued=3, max_queued_per_delegator=2,
+                               lock_dir=str(tmp_path)) for _ in range(2)]
+    futures = [workers[0].submit(make_order(delegator="alice", netuid=1)),
+               workers[1].submit(make_order(delegator="alice", netuid=2))]
+    with pytest.raises(QueueFull) as refused:
+        workers[0].submit(make_order(delegator="alice", netuid=3))
+    assert refused.value.scope == "delegator"
+
+    futures.append(workers[1].submit(make_order(delegator="bob")))
+    with pytest.raises(QueueFull) as refused:
+        workers[0].submit(make_order(delegator="carol"))
+    assert refused.value.scope == "global"
+
+    started = time.perf_counter()
+    assert all(future.result(timeout=5)["success"] for future in futures)
+    # One trade at a time across both workers
+    assert time.perf_counter() - started >= 2.5 * executor.duration
+    assert workers[0].submit(make_order(delegator="carol")).result(timeout=5)["success"]
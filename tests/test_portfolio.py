@@ -0,0 +1,129 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pytest
+
+from app.services.portfolio import PortfolioRecorder, PortfolioStore
+from utils.pool_math import get_amount
+
+
+class Amount:
+    def __init__(self, tao):
+        self.tao = tao
+
+
+class Subnet:
+    def __init__(self, tao_in, alpha_in):
+        self.tao_in = Amount(tao_in)
+        self.alpha_in = Amount(alpha_in)
+
+
+class Stake:
+    def __init__(self, netuid, stake):
+        self.netuid = netuid
+        self.stake = Amount(stake)
+
+
+class FakeSubtensor:
+    def __init__(self, chain):
+        self.chain = chain
+
+    def all_subnets(self, block):
+        return self.chain["subnets"]
+
+    def get_stake_for_coldkey(self, coldkey_ss58, block):
+        self.chain["reads"].append(block)
+        return self.chain["stakes"][coldkey_ss58]
+
+    def get_balance(self, coldkey, block):
+        return Amount(self.chain["free"][coldkey])
+
+
+class FakePool:
+    """Reads go straight to one fake subtensor; the head is set by the test."""
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.head = 0
+
+    def read(self, func, min_head=None):
+        return func(FakeSubtensor(self.chain))
+
+    def pin(self):
+        from utils.rpc_pool import Pin
+        return Pin(self, self.head, f"0x{self.head:x}")
+
+
+def test_snapshots_append_to_columns_and_read_back_downsampled(tmp_path):
+    store = PortfolioStore(str(tmp_path))
+    for block in range(100, 200):
+        values = {1: float(block)}
+        if block >= 150:
+            values[7] = 2.0
+        store.append("5Cold", block, 10.0, values)
+    store.append("5Cold", 150, 99.0, {})  # already recorded, ignored
+
+    full = store.history("5Cold", start_block=148, end_block=151)
+    assert full["block"] == [148, 149, 150, 151]
+    assert full["free"] == [10.0] * 4
+    # The position opened at block 150 reads as zero before it
+    assert full["positions"] == {1: [148.0, 149.0, 150.0, 151.0], 7: [0.0, 0.0, 2.0, 2.0]}
+    assert full["total"] == [158.0, 159.0, 162.0, 163.0]
+
+    sampled = store.history("5Cold", points=10)
+    assert len(sampled["block"]) == 10
+    assert sampled["block"][0] == 100 and sampled["block"][-1] == 199
+    assert sampled["positions"][1] == [float(block) for block in sampled["block"]]
+    assert store.history("5Cold", start_block=300)["block"] == []
+
+    # A torn write past the committed rows is cut off by the next append
+    with open(os.path.join(str(tmp_path), "5Cold", "free"), "ab") as f:
+        f.write(b"\x00" * 5)
+    store.append("5Cold", 200, 11.0, {1: 1.0})
+    assert store.history("5Cold", start_block=199)["free"] == [10.0, 11.0]
+
+
+def test_recorder_values_positions_and_backfills_missed_blocks(tmp_path):
+    chain = {
+        "subnets": [Subnet(1.0, 1.0), Subnet(100.0, 1000.0)],
+        "stakes": {"5Cold": [Stake(1, 10.0), Stake(1, 5.0)], "5Other": []},
+        "free": {"5Cold": 1.5, "5Other": 3.0},
+        "reads": [],
+    }
+    pool = FakePool(chain)
+    store = PortfolioStore(str(tmp_path))
+    recorder = PortfolioRecorder(pool, store, ["5Cold", "5Other"], every=5)
+
+    pool.head = 1003
+    recorder.poll()
+    pool.head = 1017
+    recorder.poll()
+    assert store.history("5Cold")["block"] == [1000, 1005, 1010, 1015]
+    assert chain["reads"] == [1000, 1000, 1005, 1005, 1010, 1010, 1015, 1015]
+
+    history = store.history("5Cold", start_block=1015)
+    value = get_amount(100.0, 1000.0, 10.0) + get_amount(100.0, 1000.0, 5.0)
+    assert history["positions"] == {1: [pytest.approx(value)]}
+    assert history["total"] == [pytest.approx(1.5 + value)]
+    assert store.history("5Other")["total"] == [3.0] * 4
+
+
+def test_torn_block_writes_are_cut_and_short_columns_read_as_zero(tmp_path):
+    store = PortfolioStore(str(tmp_path))
+    store.append("5Cold", 100, 10.0, {1: 1.0})
+    # A write of the block column cut short by a crash
+    with open(tmp_path / "5Cold" / "block", "ab") as f:
+        f.write(b"\x01\x02")
+    store.append("5Cold", 101, 10.0, {1: 2.0})
+    assert store.rows("5Cold") == 2 and store.last_block("5Cold") == 101
+
+    # A new position's column, created but not yet padded by another writer
+    (tmp_path / "5Cold" / "value.9").touch()
+    history = store.history("5Cold")
+    assert history["block"] == [100, 101]
+    assert history["positions"] == {1: [1.0, 2.0], 9: [0.0, 0.0]}
@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+import threading
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pytest
+
+from utils.price_ring import PriceRing, PriceRings, RingLocked
+
+
+def test_ring_keeps_the_last_blocks_across_reopening(tmp_path):
+    path = str(tmp_path / "5.ring")
+    ring = PriceRing(path, capacity=8, writable=True)
+    for block in range(100, 110):
+        ring.append(block, block / 100, float(block), 10.0)
+    ring.append(105, 0.0, 0.0, 0.0)  # older than the last block, ignored
+
+    reopened = PriceRing(path, capacity=1000)
+    assert reopened.capacity == 8
+    assert reopened.window()["block"].tolist() == list(range(102, 110))
+    assert reopened.window(104, 106)["price"].tolist() == [1.04, 1.05, 1.06]
+    with pytest.raises(FileNotFoundError):
+        PriceRing(str(tmp_path / "6.ring"))
+
+
+def test_ohlc_candles_are_aligned_to_the_interval(tmp_path):
+    rings = PriceRings(str(tmp_path), capacity=100, writable=True)
+    tao_in = [100.0, 110.0, 105.0, 120.0, 90.0, 95.0, 95.0]
+    for block, tao in zip(range(8, 15), tao_in):
+        rings.record(block, {3: (tao, 100.0), 0: (1.0, 1.0)})
+
+    candles = PriceRings(str(tmp_path)).ohlc(3, interval=5)
+    assert candles["block"] == [5, 10]
+    assert candles["open"] == [1.0, 1.05]
+    assert candles["high"] == [1.1, 1.2]
+    assert candles["low"] == [1.0, 0.9]
+    assert candles["close"] == [1.1, 0.95]
+    # The window's first record has nothing to diff against
+    assert candles["volume"] == pytest.approx([10.0, 55.0])
+    assert candles["flow"] == pytest.approx([10.0, -15.0])
+    assert rings.ohlc(0, interval=5)["close"] == [1.0, 1.0]
+    assert rings.ohlc(3, interval=5, start_block=20)["block"] == []
+
+
+def test_one_writer_per_ring_and_readers_skip_records_being_written(tmp_path):
+    path = str(tmp_path / "5.ring")
+    writer = PriceRing(path, capacity=8, writable=True)
+    writer.append(100, 1.0, 10.0, 10.0)
+    with pytest.raises(RingLocked):
+        PriceRing(path, writable=True)
+
+    # A second recorder leaves the ring to the first and only reads it
+    other = PriceRings(str(tmp_path), capacity=8, writable=True)
+    other.record(101, {5: (20.0, 10.0)})
+    assert other.ring(5).window()["block"].tolist() == [100]
+
+    # A reader arriving in the middle of a write waits for it to finish
+    writer._header[3] += 1
+    writer._records[1] = (101, 2.0, 20.0, 10.0)
+    windows = []
+    reading = threading.Thread(target=lambda: windows.append(PriceRing(path).window()))
+    reading.start()
+    time.sleep(0.05)
+    assert not windows
+    writer._header[2] = 2
+    writer._header[3] += 1
+    reading.join(timeout=5)
+    assert windows[0]["block"].tolist() == [100, 101]
@@ -0,0 +1,98 @@
+import sys
+import os
+import json
+import socket
+import getpass
+import threading
+import socketserver
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from proxy import CommandHandler, DaemonServer, ProxyCLI
+
+
+class FakeCLI:
+    def run(self, argv, cwd):
+        print(f"running {' '.join(argv)} in {cwd}")
+        confirm = input("Do you really want to stake 1.0? (y/n)")
+        password = getpass.getpass("Enter password: ")
+        print(f"confirm={confirm} password={password}")
+        return 0 if confirm == "y" else 1
+
+
+def test_daemon_relays_output_and_prompts(tmp_path):
+    path = str(tmp_path / "proxy.sock")
+    server = socketserver.UnixStreamServer(path, CommandHandler)
+    server.cli = FakeCLI()
+    thread = threading.Thread(target=server.handle_request, daemon=True)
+    thread.start()
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    stream = sock.makefile("rwb")
+
+    def send(**message):
+        stream.write(json.dumps(message).encode() + b"\n")
+        stream.flush()
+
+    def receive():
+        return json.loads(stream.readline())
+
+    send(argv=["addstake", "--amount", "1"], cwd="/work")
+    output = ""
+    answers = {"Do you really want to stake 1.0? (y/n)": "y", "Enter password: ": "secret"}
+    prompts = []
+    while True:
+        message = receive()
+        if "out" in message:
+            output += message["out"]
+        elif "prompt" in message:
+            prompts.append((message["prompt"], message["secret"]))
+            send(input=answers[message["prompt"]])
+        else:
+            break
+
+    assert message == {"exit": 0}
+    assert prompts == [("Do you really want to stake 1.0? (y/n)", False), ("Enter password: ", True)]
+    assert output == "running addstake --amount 1 in /work\nconfirm=y password=secret\n"
+    thread.join(timeout=5)
+    server.server_close()
+
+
+def test_silent_client_is_dropped_and_idle_daemon_locks_wallets(tmp_path, monkeypatch):
+    monkeypatch.setattr(CommandHandler, "timeout", 0.05)
+    path = str(tmp_path / "proxy.sock")
+    server = DaemonServer(path, CommandHandler)
+    server.cli = ProxyCLI(unlock_with_prompt=True)
+    server.cli.wallets["proxy"] = "unlocked"
+    server.cli.proxies[("finney", "5Delegator", "proxy")] = "ron proxy"
+    server.timeout = 0.05
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    # The client never sends its request; the daemon gives up on it
+    server.handle_request()
+    assert sock.recv(1) == b""
+    assert server.cli.wallets
+
+    server.handle_request()
+    assert not server.cli.wallets and not server.cli.proxies
+    sock.close()
+    server.server_close()
+
+
+def test_fund_moving_commands_ask_for_the_password_again(tmp_path, monkeypatch):
+    (tmp_path / ".env").write_text("NETWORK=finney\nDELEGATOR=5Delegator\nPROXY_WALLET=proxy\n")
+    cli = ProxyCLI(unlock_with_prompt=True)
+    cli.wallets["proxy"] = "unlocked"
+    held = []
+    monkeypatch.setattr(cli, "get_proxy", lambda account, unlock=False: held.append(dict(cli.wallets)))
+    monkeypatch.setattr(cli, "dispatch", lambda ron_proxy, args, confirm=True: (True, "ok"))
+
+    assert cli.run(["addstake", "--netuid", "1", "--hotkey", "5Hot", "--amount", "1"], str(tmp_path)) == 0
+    assert cli.run(["transfer", "--destination", "5Dest", "--amount", "1"], str(tmp_path)) == 0
+    # Staking reuses the unlocked wallet, the transfer has to unlock it again
+    assert held == [{"proxy": "unlocked"}, {}]
@@ -0,0 +1,66 @@
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from app.services.retry import MAX_DELAY, DispatchErrorDecoder, RetryPolicy, classify_error
+
+
+class StubMetadata:
+    def __init__(self):
+        self.lookups = 0
+
+    def get_module_error(self, module_index, error_index):
+        self.lookups += 1
+        names = {(7, 8): "SlippageTooHigh", (7, 2): "NotEnoughBalanceToStake"}
+        return SimpleNamespace(name=names[(module_index, error_index)], docs=["..."])
+
+
+def test_classify_transaction_pool_and_dispatch_errors():
+    pool_error = "{'code': 1010, 'message': 'Invalid Transaction', 'data': 'Custom error: 8'}"
+    assert classify_error(pool_error) == "price_limit"
+    assert classify_error("{'code': 1010, 'message': 'Invalid Transaction', 'data': 'Custom error: 2'}") == "insufficient_balance"
+    assert classify_error({'type': 'Module', 'name': 'NotEnoughBalanceToStake', 'docs': []}) == "insufficient_balance"
+    assert classify_error("Connection to remote host was lost") == "connection"
+    assert classify_error("Priority is too low: (4 vs 4)") == "nonce"
+
+
+def test_only_retryable_classes_are_retried():
+    policy = RetryPolicy()
+    assert policy.should_retry("price_limit")
+    assert policy.should_retry("connection")
+    assert not policy.should_retry("insufficient_balance")
+    assert not policy.should_retry("invalid_request")
+
+
+def test_backoff_is_block_aligned_and_bounded():
+    policy = RetryPolicy(block_time=12.0)
+    now = time.time()
+    assert 4.0 < policy.delay("price_limit", 0, last_block_time=now - 8.0) < 5.0
+    # The next block is overdue: just the margin
+    assert policy.delay("nonce", 0, last_block_time=now - 30.0) < 1.0
+    assert policy.delay("connection", 0) == 0.5
+    assert policy.delay("connection", 20) == MAX_DELAY
+
+
+def test_proxied_call_error_is_decoded_and_cached():
+    metadata = StubMetadata()
+    substrate = SimpleNamespace(runtime_version=300, metadata=metadata)
+    event = SimpleNamespace(value={
+        'module_id': 'Proxy',
+        'event_id': 'ProxyExecuted',
+        'attributes': {'result': {'Err': {'Module': {'index': 7, 'error': '0x08000000'}}}},
+    })
+    receipt = SimpleNamespace(triggered_events=[event])
+    decoder = DispatchErrorDecoder()
+    assert decoder.proxied_call_error(substrate, receipt)['name'] == "SlippageTooHigh"
+    assert decoder.proxied_call_error(substrate, receipt)['name'] == "SlippageTooHigh"
+    assert metadata.lookups == 1
+
+    ok = SimpleNamespace(value={'module_id': 'Proxy', 'event_id': 'ProxyExecuted', 'attributes': {'result': {'Ok': ()}}})
+    assert decoder.proxied_call_error(substrate, SimpleNamespace(triggered_events=[ok])) is None
@@ -0,0 +1,91 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pytest
+
+from utils.rpc_pool import EndpointPool, LaggingEndpoints, Pin
+
+
+class FakeSubtensor:
+    """Connection to a fake endpoint, equal to its URL."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def __eq__(self, other):
+        return self.url == other
+
+    def determine_block_hash(self, block):
+        return f"{self.url}:{block}"
+
+
+def make_pool(health, **kwargs):
+    """Pool whose endpoints are named by their URL and report the given (rtt, head)."""
+    pool = EndpointPool(list(health), **kwargs)
+    for endpoint in pool.endpoints:
+        endpoint.rtt, endpoint.head = health[endpoint.url]
+        connection = FakeSubtensor(endpoint.url)
+        endpoint.subtensor = lambda connection=connection: connection
+    return pool
+
+
+def test_reads_go_to_the_fastest_endpoint_that_is_caught_up():
+    pool = make_pool({"slow": (0.20, 100), "fast_lagging": (0.01, 90), "fast": (0.05, 99)})
+    assert [endpoint.url for endpoint in pool.ranked()] == ["fast", "slow", "fast_lagging"]
+    assert pool.read(lambda subtensor: subtensor) == "fast"
+    # A pinned block only the slow endpoint has reached
+    assert Pin(pool, 100, "0x64").read(lambda subtensor: subtensor) == "slow"
+
+
+def test_pinned_reads_resolve_the_pinned_block_to_its_hash():
+    pool = make_pool({"a": (0.01, 100)})
+    pin = Pin(pool, 100, "0x64")
+    assert pin.read(lambda subtensor: (subtensor.determine_block_hash(100), subtensor.determine_block_hash(99))) \
+        == ("0x64", "a:99")
+    # The connection resolves numbers on its own again afterwards
+    assert pool.read(lambda subtensor: subtensor.determine_block_hash(100)) == "a:100"
+
+
+def test_failing_endpoint_is_skipped_after_the_threshold():
+    pool = make_pool({"a": (0.01, 100), "b": (0.02, 100)}, failure_threshold=2, cooldown=60)
+    calls = []
+
+    def read(subtensor):
+        calls.append(subtensor)
+        if subtensor == "a":
+            raise ConnectionError("connection refused")
+        return subtensor
+
+    assert pool.read(read) == "b"
+    assert pool.read(read) == "b"
+    assert calls == ["a", "b", "a", "b"]
+    assert pool.read(read) == "b"
+    assert calls[-1:] == ["b"]
+    assert not pool.endpoints[0].available
+
+    with pytest.raises(ValueError):
+        pool.read(lambda subtensor: (_ for _ in ()).throw(ValueError("bad request")))
+    assert pool.endpoints[1].failures == 0
+
+
+def test_strict_reads_refuse_lagging_endpoints():
+    pool = make_pool({"ahead": (0.20, 100), "lagging": (0.01, 99)})
+    assert pool.read(lambda subtensor: subtensor, min_head=pool.best_head, strict=True) == "ahead"
+
+    def read(subtensor):
+        if subtensor == "ahead":
+            raise ConnectionError("connection refused")
+        return subtensor
+
+    # Without strict the lagging endpoint answers; with it the read fails
+    assert pool.read(read, min_head=100) == "lagging"
+    with pytest.raises(ConnectionError):
+        pool.read(read, min_head=100, strict=True)
+    pool.endpoints[0].open_until = float("inf")
+    with pytest.raises(LaggingEndpoints):
+        pool.read(read, min_head=100, strict=True)
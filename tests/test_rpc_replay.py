@@ -0,0 +1,89 @@
+import sys
+import os
+import json
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from websocket import create_connection
+
+from app.services.tx_tracker import TxStore, TxTracker
+from utils.rpc_replay import Recording, StandInNode
+
+RECORDED_HASH = "0x" + "ab" * 32
+STORAGE_KEY = "0x" + "cd" * 40
+
+
+def make_recording():
+    recording = Recording()
+    recording.add_call("chain_getHeader", [], {"result": {
+        "parentHash": "0x" + "00" * 32, "number": "0x64", "stateRoot": "0x" + "00" * 32,
+        "extrinsicsRoot": "0x" + "00" * 32, "digest": {"logs": []},
+    }})
+    recording.add_call("state_getStorage", [STORAGE_KEY, RECORDED_HASH], {"result": "0x01"})
+    recording.add_call("state_getStorage", [STORAGE_KEY, RECORDED_HASH], {"result": "0x02"})
+    return recording
+
+
+class Client:
+    def __init__(self, url):
+        self.ws = create_connection(url)
+        self.next_id = 0
+
+    def send(self, method, params):
+        self.next_id += 1
+        self.ws.send(json.dumps({"jsonrpc": "2.0", "id": self.next_id, "method": method, "params": params}))
+
+    def receive(self):
+        return json.loads(self.ws.recv())
+
+    def request(self, method, params):
+        self.send(method, params)
+        return self.receive()
+
+
+def test_replay_answers_in_recorded_order_and_scripts_submissions(tmp_path):
+    outcomes = {"outcomes": [{"status": "invalid", "error": {"code": 1010, "message": "Invalid Transaction",
+                                                             "data": "Custom error: 8"}}]}
+    node = StandInNode(make_recording(), outcomes=outcomes)
+    url = node.serve_in_thread(port=0)
+    client = Client(url)
+
+    assert client.request("state_getStorage", [STORAGE_KEY, RECORDED_HASH])["result"] == "0x01"
+    assert client.request("state_getStorage", [STORAGE_KEY, RECORDED_HASH])["result"] == "0x02"
+    assert client.request("state_getStorage", [STORAGE_KEY, RECORDED_HASH])["result"] == "0x02"
+    # Same request at a block that was never recorded
+    assert client.request("state_getStorage", [STORAGE_KEY, "0x" + "ef" * 32])["result"] == "0x01"
+
+    assert client.request("author_submitExtrinsic", ["0x1001"])["error"]["data"] == "Custom error: 8"
+
+    client.send("author_submitAndWatchExtrinsic", ["0x1002"])
+    subscription = client.receive()["result"]
+    assert client.receive()["params"] == {"subscription": subscription, "result": "ready"}
+    block_hash = node.produce_block_sync()
+    assert client.receive()["params"]["result"] == {"inBlock": block_hash}
+    node.produce_block_sync()
+    node.produce_block_sync()
+    assert client.receive()["params"]["result"] == {"finalized": block_hash}
+    block = client.request("chain_getBlock", [block_hash])["result"]["block"]
+    assert block["header"]["number"] == "0x65" and block["extrinsics"] == ["0x1002"]
+
+
+def test_tracker_follows_an_extrinsic_on_the_stand_in_node(tmp_path):
+    node = StandInNode(make_recording())
+    url = node.serve_in_thread(port=0)
+    tracker = TxTracker(url, store=TxStore(str(tmp_path / "tx.db")))
+    tracker.start = lambda: None
+    tracker._outcome = lambda substrate, tx_hash, block_hash: None
+    tracker._substrate = Client(url)
+    tracker._substrate.rpc_request = tracker._substrate.request
+    tracker.on_head(100)
+
+    tx_hash = Client(url).request("author_submitExtrinsic", ["0x1003"])["result"]
+    tracker.track(tx_hash, "add_stake_limit", "black", 5)
+    for _ in range(3):
+        node.produce_block_sync()
+        tracker.on_head(node.chain.head_number)
+    assert tracker.store.get(tx_hash)["status"] == "finalized"
@@ -0,0 +1,49 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pytest
+from substrateinterface import Keypair
+
+from app.services.signer import SignerClient, SignerError, SigningDaemon
+
+DELEGATOR = "5F5WLLEzDBXQDdTzDYgbQ3d3JKbM15HhPdFuLMmuzcUW5xG2"
+
+
+@pytest.fixture
+def signer(tmp_path):
+    keypair = Keypair.create_from_uri("//Alice")
+    socket_path = str(tmp_path / "signer.sock")
+    daemon = SigningDaemon(socket_path, {"black": (SimpleNamespace(coldkey=keypair), DELEGATOR)})
+    threading.Thread(target=lambda: asyncio.run(daemon.serve()), daemon=True).start()
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.01)
+    return keypair, SignerClient(socket_path)
+
+
+def test_remote_wallet_signs_with_daemon_key(signer):
+    keypair, client = signer
+    wallets = client.load_wallets()
+    wallet, delegator = wallets["black"]
+    assert delegator == DELEGATOR
+    assert wallet.coldkey.ss58_address == keypair.ss58_address
+    assert wallet.coldkey.private_key is None
+
+    signature = wallet.coldkey.sign("0x" + bytes(range(200)).hex())
+    assert keypair.verify(bytes(range(200)), signature)
+
+
+def test_unknown_wallet_is_an_error(signer):
+    _, client = signer
+    with pytest.raises(SignerError):
+        client.sign("green", b"payload")
@@ -0,0 +1,66 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pytest
+
+from utils.swap_planner import SWAP, STAKING_FEE, UNSTAKE_STAKE, Pool, plan_min_tolerance, plan_swap, simulate_unstake_stake
+
+
+def test_direct_swap_is_simulated_through_both_pools_and_wins_on_fees():
+    origin = Pool(1, tao_in=1000.0, alpha_in=10000.0)
+    destination = Pool(2, tao_in=500.0, alpha_in=2000.0)
+    routes = plan_swap(origin, destination, alpha=100.0, tolerance=0.1, tx_fee=0.0)
+    assert [route.name for route in routes] == [SWAP, UNSTAKE_STAKE]
+
+    swap = routes[0]
+    tao = 1000.0 - 1000.0 * 10000.0 / 10100.0 - STAKING_FEE
+    assert swap.alpha_out == pytest.approx(2000.0 - 500.0 * 2000.0 / (500.0 + tao))
+    # The limit is the origin/destination price ratio in rao, less the tolerance
+    assert swap.limit_prices[SWAP] == pytest.approx(0.1 / 0.25 * 1e9 * 0.9)
+    # Executing at exactly the minimum tolerance lands on the post-trade ratio
+    ratio_after = origin.price_after_unstake(100.0) / destination.price_after_stake(tao)
+    assert (0.1 / 0.25) * (1 - swap.min_tolerance) == pytest.approx(ratio_after)
+
+    batched = routes[1]
+    assert batched.stake_tao == pytest.approx(tao * 0.9)
+    assert batched.leftover_tao == pytest.approx(tao * 0.1)
+    assert batched.fees == pytest.approx(2 * STAKING_FEE)
+    assert batched.value < swap.value
+
+    # The swap's limit covers both pools' moves at once, the batch's each leg alone
+    routes = plan_swap(origin, destination, alpha=100.0, tolerance=0.05, tx_fee=0.0)
+    assert [route.name for route in routes] == [UNSTAKE_STAKE, SWAP]
+    assert not routes[1].feasible(0.05)
+
+
+def test_infeasible_route_ranks_last_and_root_trades_one_to_one():
+    root = Pool(0, tao_in=0.0, alpha_in=0.0, dynamic=False)
+    thin = Pool(3, tao_in=10.0, alpha_in=100.0)
+    routes = plan_swap(root, thin, alpha=1.0, tolerance=0.01, tx_fee=0.0)
+    # Staking 1 TAO into a 10 TAO pool moves its price by about 21%
+    assert not any(route.feasible(0.01) for route in routes)
+    swap = next(route for route in routes if route.name == SWAP)
+    assert swap.alpha_out == pytest.approx(100.0 - 10.0 * 100.0 / (10.0 + 1.0 - STAKING_FEE))
+
+    routes = plan_swap(root, thin, alpha=1.0, tolerance=0.5, tx_fee=0.0)
+    assert routes[0].feasible(0.5)
+    with pytest.raises(ValueError):
+        plan_swap(thin, thin, alpha=1.0, tolerance=0.5)
+
+
+def test_min_tolerance_is_planned_at_the_tolerance_it_is_submitted_with():
+    origin = Pool(1, tao_in=10000.0, alpha_in=100000.0)
+    destination = Pool(2, tao_in=50.0, alpha_in=500.0)
+    # Planned at 0.5 the batch needs about 0.21, but at 0.21 it stakes more and needs 0.34
+    first = simulate_unstake_stake(origin, destination, 100.0, 0.5, tx_fee=0.0)
+    assert not simulate_unstake_stake(origin, destination, 100.0, first.min_tolerance + 0.001, tx_fee=0.0) \
+        .feasible(first.min_tolerance + 0.001)
+
+    route, tolerance = plan_min_tolerance(origin, destination, 100.0, 0.5, route=UNSTAKE_STAKE, tx_fee=0.0)
+    assert route.name == UNSTAKE_STAKE and route.feasible(tolerance)
+    assert route.stake_tao == pytest.approx(simulate_unstake_stake(origin, destination, 100.0, tolerance, 0.0).stake_tao)
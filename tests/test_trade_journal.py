@@ -0,0 +1,60 @@
+import sys
+import os
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import csv
+import io
+import threading
+
+import pytest
+
+from app.services.trade_journal import TradeJournal
+
+
+def test_attempts_from_many_threads_are_written_in_the_background(tmp_path):
+    journal = TradeJournal(str(tmp_path / "trades.db"))
+    journal.start()
+
+    def trade(worker):
+        for attempt in range(1, 26):
+            journal.record(operation="stake", wallet_name=f"w{worker}", netuid=worker, attempt=attempt,
+                           requested_amount=1.5, success=attempt == 25, started_at=1000.0 + attempt)
+
+    threads = [threading.Thread(target=trade, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert journal.flush()
+
+    assert len(journal.query(limit=1000)) == 100
+    successes = journal.query(success=True, wallet_name="w2")
+    assert [(trade["netuid"], trade["attempt"], trade["success"]) for trade in successes] == [(2, 25, True)]
+    assert len(journal.query(since=1020.0, until=1023.0, netuid=1)) == 3
+    with pytest.raises(ValueError):
+        journal.record(operation="stake", attempt=1, success=True, price=1.0)
+    journal.stop()
+
+    # A stopped journal still reads, and writes what was queued on flush
+    journal.record(operation="unstake", attempt=1, success=False, error="Price exceeded", error_class="price")
+    assert journal.flush()
+    assert journal.query(limit=1)[0]["error_class"] == "price"
+
+
+def test_csv_export_has_every_matching_attempt(tmp_path):
+    journal = TradeJournal(str(tmp_path / "trades.db"))
+    for attempt in range(1, 4):
+        journal.record(operation="swap", netuid=3, dest_netuid=9, route="swap_stake_limit", attempt=attempt,
+                       success=False, error="a, \"quoted\" error", started_at=float(attempt))
+    journal.record(operation="stake", netuid=3, attempt=1, success=True, block_number=123, started_at=4.0)
+    journal.flush()
+
+    rows = list(csv.DictReader(io.StringIO("".join(journal.export_csv(operation="swap")))))
+    assert [row["attempt"] for row in rows] == ["3", "2", "1"]
+    assert rows[0]["error"] == "a, \"quoted\" error"
+    assert rows[0]["dest_netuid"] == "9"
+    assert "".join(journal.export_csv(success=True)).count("\n") == 2
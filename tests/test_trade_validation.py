@@ -0,0 +1,63 @@
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from bittensor.utils.balance import Balance
+
+from app.services.retry import classify_error
+from app.services.validation import TradeValidator, decode_apply_extrinsic_result
+from utils.pool_math import stake_limit_price, stake_min_tolerance, unstake_limit_price, unstake_min_tolerance
+
+
+def make_subnet(tao_in=1000.0, alpha_in=4000.0, netuid=5):
+    return SimpleNamespace(
+        is_dynamic=True,
+        tao_in=Balance.from_tao(tao_in),
+        alpha_in=Balance.from_tao(alpha_in, netuid),
+        price=Balance.from_tao(tao_in / alpha_in),
+    )
+
+
+def test_decode_apply_extrinsic_result():
+    assert decode_apply_extrinsic_result(bytes([0, 0])) is None
+    module_error = decode_apply_extrinsic_result(bytes([0, 1, 3, 7, 8, 0, 0, 0]))
+    assert module_error == {'type': 'Module', 'module_index': 7, 'error_index': 8}
+    assert decode_apply_extrinsic_result(bytes([0, 1, 2]))['name'] == "BadOrigin"
+    assert decode_apply_extrinsic_result(bytes([1, 0, 1]))['name'] == "Payment"
+    custom = decode_apply_extrinsic_result(bytes([1, 0, 7, 8]))
+    assert classify_error(custom) == "price_limit"
+
+
+def test_limit_price_simulation():
+    validator = TradeValidator()
+    subnet = make_subnet()
+    limit = stake_limit_price(subnet.price.rao, 0.01)
+    # 1 TAO into a 1000 TAO pool moves the price by about 0.2%
+    assert validator.check_limit_price("stake", subnet, Balance.from_tao(1), limit) is None
+    # 10 TAO moves it by about 2%, past a 1% limit
+    error = validator.check_limit_price("stake", subnet, Balance.from_tao(10), limit)
+    assert error['name'] == "SlippageTooHigh"
+
+    limit = unstake_limit_price(subnet.price.rao, 0.01)
+    assert validator.check_limit_price("unstake", subnet, Balance.from_tao(4, 5), limit) is None
+    assert validator.check_limit_price("unstake", subnet, Balance.from_tao(40, 5), limit) is not None
+
+
+def test_trades_at_their_min_tolerance_pass_the_simulation():
+    validator = TradeValidator()
+    subnet = make_subnet()
+    tolerance = stake_min_tolerance(2.0, subnet.tao_in.tao) + 0.001
+    limit = stake_limit_price(subnet.price.rao, tolerance)
+    assert validator.check_limit_price("stake", subnet, Balance.from_tao(2), limit) is None
+    # Without the margin the same trade would just miss
+    limit = stake_limit_price(subnet.price.rao, stake_min_tolerance(2.0, subnet.tao_in.tao) - 0.001)
+    assert validator.check_limit_price("stake", subnet, Balance.from_tao(2), limit) is not None
+
+    tolerance = unstake_min_tolerance(40.0, subnet.alpha_in.tao) + 0.001
+    limit = unstake_limit_price(subnet.price.rao, tolerance)
+    assert validator.check_limit_price("unstake", subnet, Balance.from_tao(40, 5), limit) is None
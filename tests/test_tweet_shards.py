@@ -0,0 +1,91 @@
+import sys
+import os
+import threading
+from types import SimpleNamespace
+
+# Add the scripts directory to the Python search path (sys.path)
+scripts_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+if scripts_dir not in sys.path:
+    sys.path.insert(0, scripts_dir)
+
+from tweet_discord_bot import MAX_QUERY_LENGTH, RateBudget, TwitterBotX, build_query, shard_handles
+
+
+class StubClient:
+    """Stands in for tweepy.Client.search_recent_tweets with canned tweets per handle."""
+
+    def __init__(self, tweets_by_handle):
+        self.tweets_by_handle = tweets_by_handle
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def search_recent_tweets(self, query, max_results, tweet_fields, user_fields, expansions, since_id):
+        with self.lock:
+            self.calls.append((query, since_id))
+        handles = query.split(")")[0].lstrip("(").split(" OR ")
+        data, users = [], []
+        for handle in handles:
+            user = SimpleNamespace(id=hash(handle), username=handle)
+            for tweet_id in self.tweets_by_handle.get(handle, []):
+                if since_id is not None and tweet_id <= int(since_id):
+                    continue
+                data.append(SimpleNamespace(
+                    id=tweet_id,
+                    text=f"tweet {tweet_id}",
+                    created_at="2025-01-01",
+                    author_id=user.id,
+                    public_metrics={'like_count': 0, 'retweet_count': 0},
+                ))
+                users.append(user)
+        data.sort(key=lambda tweet: -tweet.id)
+        return SimpleNamespace(data=data or None, includes={'users': users})
+
+
+def make_bot(tmp_path, client):
+    bot = TwitterBotX(client=client, rate_budget=RateBudget(max_requests=100, window=60))
+    bot.last_seen_file = str(tmp_path / "last_seen_x.json")
+    bot.since_ids = bot.load_last_seen()
+    return bot
+
+
+def test_shards_respect_query_length():
+    handles = [f"handle_number_{i}" for i in range(200)]
+    shards = shard_handles(handles)
+    assert len(shards) > 1
+    assert [h for shard in shards for h in shard] == handles
+    assert all(len(build_query(shard)) <= MAX_QUERY_LENGTH for shard in shards)
+
+
+def test_fetch_merges_shards_by_tweet_id(tmp_path):
+    client = StubClient({"alice": [5, 1], "bob": [3], "carol": [4, 2]})
+    bot = make_bot(tmp_path, client)
+    shards = shard_handles(["alice", "bob", "carol"], max_query_length=len(build_query(["alice", "bob"])))
+    assert shards == [["alice", "bob"], ["carol"]]
+
+    tweets, since_ids = bot.fetch_shards(shards)
+    assert [tweet['id'] for tweet in tweets] == [1, 2, 3, 4, 5]
+    assert since_ids == {"alice": "5", "carol": "4"}
+    assert len(client.calls) == 2
+
+
+def test_since_ids_are_persisted_per_shard(tmp_path):
+    client = StubClient({"alice": [1], "carol": [2]})
+    bot = make_bot(tmp_path, client)
+    shards = [["alice"], ["carol"]]
+    _, since_ids = bot.fetch_shards(shards)
+    bot.since_ids.update(since_ids)
+    bot.save_last_seen()
+
+    client.tweets_by_handle["carol"].append(7)
+    restarted = make_bot(tmp_path, client)
+    tweets, since_ids = restarted.fetch_shards(shards)
+    assert [tweet['id'] for tweet in tweets] == [7]
+    assert since_ids == {"carol": "7"}
+
+
+def test_legacy_last_seen_file_applies_to_every_shard(tmp_path):
+    (tmp_path / "last_seen_x.json").write_text("3")
+    client = StubClient({"alice": [2, 4], "bob": [1]})
+    bot = make_bot(tmp_path, client)
+    tweets, _ = bot.fetch_shards([["alice"], ["bob"]])
+    assert [tweet['id'] for tweet in tweets] == [4]
@@ -0,0 +1,146 @@
+import sys
+import os
+import time
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from app.services import tx_tracker
+from app.services.tx_tracker import TxStore, TxTracker, extrinsic_hash
+
+
+class FakeChain:
+    """Answers the few RPC calls the tracker makes from an in-memory chain."""
+
+    def __init__(self):
+        self.blocks = {}
+        self.finalized = 0
+
+    def add_block(self, number, extrinsics, block_hash=None):
+        self.blocks[number] = (block_hash or f"0x{number:064x}", extrinsics)
+
+    def rpc_request(self, method, params):
+        if method == "chain_getBlockHash":
+            return {"result": self.blocks[params[0]][0]}
+        if method == "chain_getBlock":
+            number = next(n for n, (h, _) in self.blocks.items() if h == params[0])
+            return {"result": {"block": {"extrinsics": self.blocks[number][1]}}}
+        if method == "chain_getFinalizedHead":
+            return {"result": self.blocks[self.finalized][0]}
+        if method == "chain_getHeader":
+            number = next(n for n, (h, _) in self.blocks.items() if h == params[0])
+            return {"result": {"number": hex(number)}}
+        raise AssertionError(method)
+
+
+def make_tracker(tmp_path, chain):
+    tracker = TxTracker("ws://unused", store=TxStore(str(tmp_path / "tx.db")))
+    tracker.start = lambda: None
+    tracker._outcome = lambda substrate, tx_hash, block_hash: None
+    tracker._substrate = chain
+    return tracker
+
+
+def test_tracker_follows_inclusion_finality_and_reorg(tmp_path):
+    ours, other = "0x280402000b", "0x280402000c"
+    tx_hash = extrinsic_hash(ours)
+    chain = FakeChain()
+    chain.add_block(10, [])
+    chain.finalized = 10
+    tracker = make_tracker(tmp_path, chain)
+    tracker.on_head(10)
+    tracker.track(tx_hash, "add_stake_limit", "black", 5)
+
+    chain.add_block(11, [other, ours], block_hash="0xfork")
+    tracker.on_head(11)
+    tx = tracker.store.get(tx_hash)
+    assert tx["status"] == "in_block" and tx["block_number"] == 11
+
+    # Block 11 is replaced by another one without the extrinsic before finality
+    chain.add_block(11, [other])
+    chain.add_block(12, [])
+    chain.finalized = 11
+    tracker.on_head(12)
+    assert tracker.store.get(tx_hash)["status"] == "submitted"
+
+    chain.add_block(13, [ours])
+    tracker.on_head(13)
+    assert tracker.store.get(tx_hash)["status"] == "in_block"
+    chain.finalized = 13
+    chain.add_block(14, [])
+    tracker.on_head(14)
+    assert tracker.store.get(tx_hash)["status"] == "finalized"
+
+
+def test_tracker_drops_extrinsics_never_included(tmp_path, monkeypatch):
+    monkeypatch.setattr(tx_tracker, "DROP_AFTER_BLOCKS", 2)
+    chain = FakeChain()
+    for number in range(1, 6):
+        chain.add_block(number, [])
+    tracker = make_tracker(tmp_path, chain)
+    tracker.on_head(1)
+    tracker.track("0xabc", "remove_stake_limit", "black", 5)
+    tracker.on_head(2)
+    tracker.on_head(3)
+    assert tracker.store.get("0xabc")["status"] == "submitted"
+    tracker.on_head(4)
+    assert tracker.store.get("0xabc")["status"] == "dropped"
+
+
+def test_tracker_rescans_blocks_after_a_failed_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(tx_tracker, "DROP_AFTER_BLOCKS", 2)
+    ours = "0x280402000b"
+    tx_hash = extrinsic_hash(ours)
+    chain = FakeChain()
+    chain.add_block(1, [])
+    chain.finalized = 1
+    tracker = make_tracker(tmp_path, chain)
+    tracker.on_head(1)
+    tracker.track(tx_hash, "add_stake_limit", "black", 5)
+
+    # Block 2 holds the extrinsic but is not served yet, so the scan of heads 2 and 3 fails
+    chain.add_block(3, [])
+    for head in (2, 3):
+        try:
+            tracker.on_head(head)
+        except KeyError:
+            pass
+    assert tracker.head_number == 1
+
+    chain.add_block(2, [ours])
+    chain.add_block(4, [])
+    tracker.on_head(4)
+    tx = tracker.store.get(tx_hash)
+    assert tx["status"] == "in_block" and tx["block_number"] == 2
+
+
+def test_first_head_scans_back_to_the_oldest_pending_extrinsic(tmp_path):
+    ours = "0x280402000b"
+    tx_hash = extrinsic_hash(ours)
+    chain = FakeChain()
+    for number in range(100, 106):
+        chain.add_block(number, [ours] if number == 101 else [])
+    chain.finalized = 100
+    tracker = make_tracker(tmp_path, chain)
+    tracker.on_head(100)
+    tracker.track(tx_hash, "add_stake_limit", "black", 5)
+
+    # The process exits; the tracker that takes over first sees block 105
+    successor = make_tracker(tmp_path, chain)
+    successor.on_head(105)
+    tx = successor.store.get(tx_hash)
+    assert tx["status"] == "in_block" and tx["block_number"] == 101
+
+
+def test_only_one_tracker_leads(tmp_path, monkeypatch):
+    monkeypatch.setattr(tx_tracker, "STANDBY_INTERVAL", 0.01)
+    leading = []
+    trackers = [TxTracker("ws://unused", store=TxStore(str(tmp_path / "tx.db")), lock_dir=str(tmp_path)) for _ in range(2)]
+    for tracker in trackers:
+        tracker._process = lambda: None
+        tracker._subscribe = lambda tracker=tracker: leading.append(tracker)
+        tracker.start()
+    time.sleep(0.1)
+    assert len(leading) == 1
@@ -0,0 +1,152 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add the parent directory to the Python search path (sys.path)
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import aiohttp
+from aiohttp import web
+
+from utils.webhook import DISCORD_MAX_LENGTH, WebhookDelivery, coalesce
+
+
+class StandInWebhook:
+    """Local stand-in for a Discord webhook that records posts and can answer 429."""
+
+    def __init__(self, rate_limited=0, retry_after=0.2, fail_posts=()):
+        self.posts = []
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.fail_posts = set(fail_posts)
+        self.received = 0
+
+    async def handle(self, request):
+        if self.rate_limited > 0:
+            self.rate_limited -= 1
+            return web.json_response({"retry_after": self.retry_after, "global": False}, status=429)
+        self.received += 1
+        if self.received in self.fail_posts:
+            return web.Response(status=500)
+        self.posts.append(await request.json())
+        return web.Response(status=204)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/webhook", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/webhook"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def run_with_stand_in(tmp_path, scenario, **kwargs):
+    async def _main():
+        stand_in = StandInWebhook(**kwargs)
+        url = await stand_in.start()
+        delivery = WebhookDelivery(str(tmp_path / "spool.db"), username="Test bot")
+        try:
+            async with aiohttp.ClientSession() as session:
+                await scenario(delivery, session, url)
+        finally:
+            await stand_in.stop()
+        return stand_in, delivery
+
+    return asyncio.run(_main())
+
+
+def test_coalesce_respects_discord_limit():
+    messages = [(i, "x" * 900) for i in range(5)]
+    posts = coalesce(messages)
+    assert [ids for ids, _, _ in posts] == [[0, 1], [2, 3], [4]]
+    assert all(len(content) <= DISCORD_MAX_LENGTH for _, content, _ in posts)
+
+
+def test_coalesce_splits_oversized_message():
+    posts = coalesce([(7, "y" * (DISCORD_MAX_LENGTH + 10))])
+    assert [(ids, sent) for ids, _, sent in posts] == [([7], 1), ([7], None)]
+    # A retry resumes after the chunks Discord accepted
+    assert [content for _, content, _ in coalesce([(7, "y" * (DISCORD_MAX_LENGTH + 10))], sent={7: 1})] == ["y" * 10]
+
+
+def test_failed_chunk_backs_off_and_resumes_without_duplicates(tmp_path):
+    lines = [f"line {index:04d} " + "z" * 90 for index in range(40)]
+    content = "\n".join(lines)
+
+    async def scenario(delivery, session, url):
+        delivery.enqueue(url, content)
+        # The second chunk fails: the message waits for its backoff instead of spinning
+        await delivery.flush(session)
+        await delivery.flush(session)
+        assert delivery.pending() == 1
+        with delivery._lock:
+            attempts, not_before = delivery._db.execute("SELECT attempts, not_before FROM messages").fetchone()
+        assert attempts == 1 and not_before > time.time()
+
+        with delivery._lock:
+            delivery._db.execute("UPDATE messages SET not_before = 0")
+        await delivery.flush(session)
+        assert delivery.pending() == 0
+
+    stand_in, _ = run_with_stand_in(tmp_path, scenario, fail_posts={2})
+    assert "\n".join(post["content"] for post in stand_in.posts) == content
+
+
+def test_due_messages_are_coalesced_into_one_post(tmp_path):
+    async def scenario(delivery, session, url):
+        delivery.enqueue(url, "first")
+        delivery.enqueue(url, "second")
+        await delivery.flush(session)
+
+    stand_in, delivery = run_with_stand_in(tmp_path, scenario)
+    assert [post["content"] for post in stand_in.posts] == ["first\nsecond"]
+    assert stand_in.posts[0]["username"] == "Test bot"
+    assert delivery.pending() == 0
+
+
+def test_rate_limit_retry_after_is_honored(tmp_path):
+    async def scenario(delivery, session, url):
+        delivery.enqueue(url, "alert")
+        await delivery.flush(session)
+        assert delivery.pending() == 1
+        assert delivery.blocked_until[url] > time.time()
+
+        await delivery.flush(session)
+        assert delivery.pending() == 1
+
+        await asyncio.sleep(0.25)
+        await delivery.flush(session)
+
+    stand_in, delivery = run_with_stand_in(tmp_path, scenario, rate_limited=1)
+    assert [post["content"] for post in stand_in.posts] == ["alert"]
+    assert delivery.pending() == 0
+
+
+def test_delayed_message_waits_and_survives_restart(tmp_path):
+    async def scenario(delivery, session, url):
+        delivery.enqueue(url, "later", delay=0.2)
+        await delivery.flush(session)
+        assert delivery.pending() == 1
+
+        restarted = WebhookDelivery(str(tmp_path / "spool.db"))
+        await asyncio.sleep(0.25)
+        await restarted.flush(session)
+        assert restarted.pending() == 0
+
+    stand_in, _ = run_with_stand_in(tmp_path, scenario)
+    assert [post["content"] for post in stand_in.posts] == ["later"]
+
+
+def test_idempotency_key_drops_duplicates(tmp_path):
+    delivery = WebhookDelivery(str(tmp_path / "spool.db"))
+    assert delivery.enqueue("http://127.0.0.1/webhook", "tweet", key="tweet:1")
+    assert not delivery.enqueue("http://127.0.0.1/webhook", "tweet", key="tweet:1")
+    assert delivery.pending() == 1
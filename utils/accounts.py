@@ -0,0 +1,91 @@
+import os
+import json
+from typing import Dict, List, Optional
+
+
+ACCOUNTS_FILE = "accounts.json"
+
+# Accounts proxy.py knew before the registry file existed, by --name
+DEFAULT_ACCOUNTS: Dict[str, str] = {
+    ".env": ".env",
+    "webgenie": ".env.vlad.webgenie",
+    "green": ".env.vlad.newgreen",
+    "black": ".env.vlad.newblack",
+    "breo": ".env.breo.newbreo",
+    "kb": ".env.breo.newkb",
+    "tck": ".env.breo.tck",
+    "lazyterry": ".env.thunder.lazyterry",
+    "const": ".env.druid.const",
+    "taomind": ".env.druid.taomind",
+    "terry": ".env.druid.terry",
+    "gang": ".env.sky.gang",
+    "izo": ".env.sky.izo",
+    "sky": ".env.sky.sky",
+}
+
+
+def default_groups(accounts: Dict[str, str]) -> Dict[str, List[str]]:
+    """Group accounts by the owner part of their env file name, `.env.<owner>.<account>`."""
+    groups: Dict[str, List[str]] = {}
+    for name, env_file in accounts.items():
+        parts = os.path.basename(env_file).split(".")
+        if len(parts) == 4:
+            groups.setdefault(parts[2], []).append(name)
+    return groups
+
+
+class AccountRegistry:
+    """
+    Account names mapped to their .env files, plus named groups of accounts.
+
+    accounts.json:
+        {"accounts": {"black": ".env.vlad.newblack", ...},
+         "groups": {"vlad": ["webgenie", "green", "black"], ...}}
+
+    Without the file the built-in accounts are used, grouped by owner.
+    """
+
+    def __init__(self, accounts: Dict[str, str], groups: Optional[Dict[str, List[str]]] = None):
+        self.accounts = accounts
+        self.groups = default_groups(accounts) if groups is None else groups
+
+    @classmethod
+    def load(cls, path: str = ACCOUNTS_FILE) -> "AccountRegistry":
+        if not os.path.exists(path):
+            return cls(DEFAULT_ACCOUNTS)
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["accounts"], data.get("groups"))
+
+    def resolve(self, spec: str) -> List[str]:
+        """
+        Expand a --name value into account names.
+
+        Args:
+            spec: Comma-separated account names, group names or `all`
+                (every account except the plain `.env`)
+
+        Returns:
+            list: Account names in the given order, without duplicates
+        """
+        names: List[str] = []
+        for token in (token.strip() for token in spec.split(",")):
+            if not token:
+                continue
+            if token == "all":
+                expanded = [name for name in self.accounts if name != ".env"]
+            elif token in self.accounts:
+                expanded = [token]
+            elif token in self.groups:
+                expanded = self.groups[token]
+            else:
+                raise ValueError(f"Unknown account or group: {token}")
+            for name in expanded:
+                if name not in self.accounts:
+                    raise ValueError(f"Group member {name} is not a known account")
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def env_file(self, name: str) -> str:
+        return self.accounts[name]
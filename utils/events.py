@@ -0,0 +1,104 @@
+from scalecodec import ss58_encode
+
+
+def _to_ss58(addr_bytes, ss58_format=42):
+    """Convert an AccountId decoded as a tuple of ints to its ss58 address."""
+    if addr_bytes is None:
+        return None
+    return ss58_encode(bytes(addr_bytes), ss58_format=ss58_format)
+
+
+def extract_stake_events_from_data(events_data):
+    """
+    Extract stake and unstake events from blockchain event data.
+    
+    Args:
+        events_data: List of event dictionaries from blockchain
+    
+    Returns:
+        List of dictionaries containing stake/unstake event information
+    """
+    stake_events = []
+    
+    for event in events_data:
+        event_info = event.get('event', {})
+        
+        # Check if this is a SubtensorModule event
+        if event_info.get('module_id') == 'SubtensorModule':
+            event_id = event_info.get('event_id')
+            attributes = event_info.get('attributes', {})
+            
+            if event_id == 'StakeAdded':
+                # The attributes for StakeAdded are a tuple, not a dict.
+                # Example: (
+                #   ((coldkey_bytes,), (hotkey_bytes,), amount, stake, netuid, block_number)
+                # )
+                # So we need to unpack the tuple accordingly.
+                if isinstance(attributes, tuple) and len(attributes) >= 6:
+                    coldkey_tuple = _to_ss58(attributes[0][0]) if isinstance(attributes[0], tuple) and len(attributes[0]) > 0 else attributes[0]
+                    hotkey_tuple = _to_ss58(attributes[1][0]) if isinstance(attributes[1], tuple) and len(attributes[1]) > 0 else attributes[1]
+                    amount = attributes[2]
+                    # attributes[3] is stake, but we use amount for TAO
+                    netuid = attributes[4]
+                else:
+                    coldkey_tuple = None
+                    hotkey_tuple = None
+                    amount = None
+                    netuid = None
+                stake_events.append({
+                    'type': 'StakeAdded',
+                    'coldkey': coldkey_tuple,
+                    'hotkey': hotkey_tuple,
+                    'netuid': netuid,
+                    'amount': amount,
+                    'amount_tao': amount / 1e9 if amount else 0,
+                })
+                
+            elif event_id == 'StakeRemoved':
+                # Extract unstake information - also a tuple
+                if isinstance(attributes, tuple) and len(attributes) >= 6:
+                    coldkey_tuple = _to_ss58(attributes[0][0]) if isinstance(attributes[0], tuple) and len(attributes[0]) > 0 else attributes[0]
+                    hotkey_tuple = _to_ss58(attributes[1][0]) if isinstance(attributes[1], tuple) and len(attributes[1]) > 0 else attributes[1]
+                    amount = attributes[2]
+                    netuid = attributes[4]
+                else:
+                    coldkey_tuple = None
+                    hotkey_tuple = None
+                    amount = None
+                    netuid = None
+
+                stake_events.append({
+                    'type': 'StakeRemoved',
+                    'coldkey': coldkey_tuple,
+                    'hotkey': hotkey_tuple,
+                    'netuid': netuid,
+                    'amount': amount,
+                    'amount_tao': amount / 1e9 if amount else 0,
+                })
+                
+            elif event_id == 'StakeMoved':
+                # Extract stake move information - also a tuple
+                if isinstance(attributes, tuple) and len(attributes) >= 6:
+                    coldkey_tuple = _to_ss58(attributes[0][0]) if isinstance(attributes[0], tuple) and len(attributes[0]) > 0 else attributes[0]
+                    from_hotkey_tuple = _to_ss58(attributes[1][0]) if isinstance(attributes[1], tuple) and len(attributes[1]) > 0 else attributes[1]
+                    to_hotkey_tuple = _to_ss58(attributes[3][0]) if isinstance(attributes[3], tuple) and len(attributes[3]) > 0 else attributes[3]
+                    netuid = attributes[4]
+                    amount = attributes[5]
+                else:
+                    coldkey_tuple = None
+                    from_hotkey_tuple = None
+                    to_hotkey_tuple = None
+                    netuid = None
+                    amount = None
+                
+                stake_events.append({
+                    'type': 'StakeMoved',
+                    'coldkey': coldkey_tuple,
+                    'from_hotkey': from_hotkey_tuple,
+                    'to_hotkey': to_hotkey_tuple,
+                    'netuid': netuid,
+                    'amount': amount,
+                    'amount_tao': amount / 1e9 if amount else 0,
+                })
+    
+    return stake_events
@@ -0,0 +1,62 @@
+import os
+import fcntl
+import asyncio
+import tempfile
+from typing import Optional
+
+
+TRADE_LOCK_DIR = os.path.join(tempfile.gettempdir(), "bt-proxy-locks")
+# How often a waiting acquire tries the slots again
+POLL_INTERVAL = 0.02
+
+
+class FileSlots:
+    """
+    `size` interchangeable slots shared by every process that opens the same
+    directory and name. Each slot is a file held with an exclusive flock, so
+    the kernel frees the slots of a process that dies, and nothing has to be
+    cleaned up after a crash. A single slot is a cross-process mutex.
+    """
+
+    def __init__(self, directory: str, name: str, size: int = 1):
+        """
+        Initialize the FileSlots.
+
+        Args:
+            directory: Directory holding the slot files, created if missing
+            name: Name the slot files start with; processes using the same name share the slots
+            size: Number of slots
+        """
+        if size < 1:
+            raise ValueError("FileSlots needs at least one slot")
+        os.makedirs(directory, exist_ok=True)
+        self.paths = [os.path.join(directory, f"{name}.{index}.lock") for index in range(size)]
+
+    def try_acquire(self) -> Optional[int]:
+        """
+        Take a free slot without waiting.
+
+        Returns:
+            int: File descriptor holding the slot, to pass to `release`, or None if all are taken
+        """
+        for path in self.paths:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    async def acquire(self, poll_interval: float = POLL_INTERVAL) -> int:
+        """Wait for a free slot without blocking the event loop."""
+        while True:
+            fd = self.try_acquire()
+            if fd is not None:
+                return fd
+            await asyncio.sleep(poll_interval)
+
+    @staticmethod
+    def release(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
@@ -0,0 +1,163 @@
+import math
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from utils.logger import logger
+
+
+DEFAULT_HALFLIFE = 100
+DEFAULT_THRESHOLD = 4.0
+# Blocks of statistics a subnet needs before it can be flagged
+DEFAULT_WARMUP = 30
+# Keeps a subnet whose flow never varied from dividing by zero
+MIN_VARIANCE = 1e-18
+
+
+class FlowAnomaly:
+    """A subnet whose flow in one block is a z-score outlier."""
+
+    def __init__(self, block: int, netuid: int, flow: float, relative: float, z: float, tao_in: float):
+        """
+        Args:
+            block: Block the flow was seen in
+            netuid: Subnet ID
+            flow: Change of tao_in since the previous block, in TAO
+            relative: flow as a fraction of the previous tao_in
+            z: Standard deviations of relative flow away from the subnet's mean
+            tao_in: Pool depth after the flow, in TAO
+        """
+        self.block = block
+        self.netuid = netuid
+        self.flow = flow
+        self.relative = relative
+        self.z = z
+        self.tao_in = tao_in
+
+    def __str__(self) -> str:
+        return (f"SN {self.netuid:3d} block {self.block}: flow {self.flow:+.2f} TAO "
+                f"({self.relative:+.3%} of {self.tao_in - self.flow:.0f}), z {self.z:+.1f}")
+
+
+class FlowDetector:
+    """
+    Per-subnet flow outliers, all subnets in one NumPy pass per block.
+
+    Flow is each pool's tao_in change relative to its depth, so one threshold
+    fits deep and shallow subnets alike. Every subnet keeps an exponentially
+    weighted mean and variance of its relative flow, which absorbs the steady
+    emission injections; a block whose flow is more than `threshold` standard
+    deviations away is flagged. Outliers enter the statistics clipped to the
+    threshold, so one spike does not mask the next for the rest of the half
+    life.
+    """
+
+    def __init__(
+        self,
+        halflife: float = DEFAULT_HALFLIFE,
+        threshold: float = DEFAULT_THRESHOLD,
+        warmup: int = DEFAULT_WARMUP,
+        min_flow: float = 0.0,
+    ):
+        """
+        Initialize the FlowDetector.
+
+        Args:
+            halflife: Blocks after which an observation's weight has halved
+            threshold: |z| from which a flow is flagged
+            warmup: Blocks of statistics before a subnet can be flagged
+            min_flow: Smallest absolute flow in TAO worth flagging
+        """
+        self.alpha = 1 - math.exp(math.log(0.5) / halflife)
+        self.threshold = threshold
+        self.warmup = warmup
+        self.min_flow = min_flow
+        # Indexed by netuid, grown as subnets appear
+        self.prev = np.full(0, np.nan)
+        self.mean = np.zeros(0)
+        self.var = np.zeros(0)
+        self.count = np.zeros(0, dtype=np.int64)
+
+    def _grow(self, size: int) -> None:
+        extra = size - len(self.prev)
+        if extra <= 0:
+            return
+        self.prev = np.r_[self.prev, np.full(extra, np.nan)]
+        self.mean = np.r_[self.mean, np.zeros(extra)]
+        self.var = np.r_[self.var, np.zeros(extra)]
+        self.count = np.r_[self.count, np.zeros(extra, dtype=np.int64)]
+
+    def update(self, block: int, netuids: Sequence[int], tao_in: Sequence[float]) -> List[FlowAnomaly]:
+        """
+        Feed one block of pool depths and return the subnets flagged in it.
+
+        Args:
+            block: Block the depths were read at
+            netuids: Subnet IDs
+            tao_in: tao_in of each subnet in TAO, aligned with netuids
+        """
+        index = np.asarray(netuids, dtype=np.int64)
+        depth = np.asarray(tao_in, dtype=np.float64)
+        if len(index) == 0:
+            return []
+        self._grow(int(index.max()) + 1)
+
+        prev = self.prev[index]
+        valid = np.isfinite(prev) & (prev > 0)
+        flow = depth - prev
+        relative = np.where(valid, flow / np.where(valid, prev, 1.0), 0.0)
+
+        mean, var, count = self.mean[index], self.var[index], self.count[index]
+        std = np.sqrt(np.maximum(var, MIN_VARIANCE))
+        z = (relative - mean) / std
+        warm = valid & (count >= self.warmup)
+        flagged = warm & (np.abs(z) >= self.threshold) & (np.abs(flow) >= self.min_flow)
+
+        # West's incremental EW mean and variance, the deviation clipped once warm
+        diff = relative - mean
+        diff = np.where(warm, np.clip(diff, -self.threshold * std, self.threshold * std), diff)
+        increment = self.alpha * diff
+        self.mean[index] = np.where(valid, mean + increment, mean)
+        self.var[index] = np.where(valid, (1 - self.alpha) * (var + diff * increment), var)
+        self.count[index] = count + valid
+        self.prev[index] = depth
+
+        return [
+            FlowAnomaly(block, int(index[i]), float(flow[i]), float(relative[i]), float(z[i]), float(depth[i]))
+            for i in np.flatnonzero(flagged)
+        ]
+
+
+class AlertSink:
+    """
+    Sends anomalies to any of: the console, the log, a Discord webhook.
+
+    Webhook alerts go through the durable WebhookDelivery queue, keyed by
+    block and netuid, so a restart does not post the same alert twice.
+    """
+
+    def __init__(self, targets: Sequence[str], webhook_url: Optional[str] = None, delivery=None):
+        """
+        Args:
+            targets: Any of "console", "log", "webhook"
+            webhook_url: Discord webhook URL, required for "webhook"
+            delivery: WebhookDelivery to queue webhook alerts on
+        """
+        unknown = set(targets) - {"console", "log", "webhook"}
+        if unknown:
+            raise ValueError(f"Unknown alert target: {', '.join(sorted(unknown))}")
+        if "webhook" in targets and (not webhook_url or delivery is None):
+            raise ValueError("Webhook alerts need a webhook URL and a delivery queue")
+        self.targets = set(targets)
+        self.webhook_url = webhook_url
+        self.delivery = delivery
+
+    def send(self, anomalies: List[FlowAnomaly]) -> None:
+        for anomaly in anomalies:
+            if "console" in self.targets:
+                print(anomaly)
+            if "log" in self.targets:
+                logger.warning(f"Flow anomaly: {anomaly}")
+            if "webhook" in self.targets:
+                self.delivery.enqueue(self.webhook_url, f"Flow anomaly: {anomaly}",
+                                      key=f"flow:{anomaly.block}:{anomaly.netuid}")
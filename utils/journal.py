@@ -0,0 +1,153 @@
+import json
+import sqlite3
+import threading
+from typing import Any, List, Optional, Tuple
+
+
+# PRAGMA auto_vacuum mode in which freed pages are released by `PRAGMA incremental_vacuum`
+INCREMENTAL_VACUUM = 2
+
+class Journal:
+    """
+    Append-only SQLite journal with committed consumer offsets.
+
+    Producers append records in order; each consumer reads the records after
+    its committed offset and commits the sequence number once a record has
+    been handled. After a restart a consumer resumes right after its last
+    commit, so every record is handed over again at most once per crash and
+    never skipped. Combined with an idempotent sink (see `key`), handling is
+    exactly-once.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the Journal.
+
+        Args:
+            path: SQLite file holding the journal
+        """
+        self._lock = threading.Lock()
+        self._appended = threading.Condition(self._lock)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if self._db.execute("PRAGMA auto_vacuum").fetchone()[0] != INCREMENTAL_VACUUM:
+            # Lets compact hand freed pages back to the file system; an existing file is rebuilt once
+            self._db.execute(f"PRAGMA auto_vacuum={INCREMENTAL_VACUUM}")
+            self._db.execute("VACUUM")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT UNIQUE,
+                record TEXT NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS compacted_keys (
+                key TEXT PRIMARY KEY
+            )
+            """
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS offsets (
+                consumer TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL
+            )
+            """
+        )
+
+    def append(self, record: Any, key: Optional[str] = None) -> Optional[int]:
+        """
+        Append a record and wake waiting consumers.
+
+        Args:
+            record: JSON-serializable record
+            key: Optional unique key; a record whose key is already journaled is ignored
+
+        Returns:
+            int: Sequence number of the new entry, or None if `key` was a duplicate
+        """
+        with self._appended:
+            if key is not None and self._db.execute(
+                "SELECT 1 FROM compacted_keys WHERE key = ?", (key,)
+            ).fetchone() is not None:
+                return None
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO entries (key, record) VALUES (?, ?)",
+                (key, json.dumps(record, default=str)),
+            )
+            if cursor.rowcount != 1:
+                return None
+            self._appended.notify_all()
+            return cursor.lastrowid
+
+    def offset(self, consumer: str) -> int:
+        with self._lock:
+            return self._offset(consumer)
+
+    def _offset(self, consumer: str) -> int:
+        row = self._db.execute("SELECT seq FROM offsets WHERE consumer = ?", (consumer,)).fetchone()
+        return row[0] if row else 0
+
+    def read(self, consumer: str, limit: int = 100) -> List[Tuple[int, Any]]:
+        """Records after the consumer's committed offset, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, record FROM entries WHERE seq > ? ORDER BY seq LIMIT ?",
+                (self._offset(consumer), limit),
+            ).fetchall()
+        return [(seq, json.loads(record)) for seq, record in rows]
+
+    def commit(self, consumer: str, seq: int) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO offsets (consumer, seq) VALUES (?, ?) "
+                "ON CONFLICT(consumer) DO UPDATE SET seq = MAX(seq, excluded.seq)",
+                (consumer, seq),
+            )
+
+    def wait(self, consumer: str, timeout: Optional[float] = None) -> bool:
+        """
+        Block until there are records after the consumer's offset.
+
+        Returns:
+            bool: True if records are available, False on timeout
+        """
+        with self._appended:
+            return self._appended.wait_for(
+                lambda: self._db.execute(
+                    "SELECT 1 FROM entries WHERE seq > ? LIMIT 1", (self._offset(consumer),)
+                ).fetchone() is not None,
+                timeout=timeout,
+            )
+
+    def compact(self) -> int:
+        """
+        Delete entries every consumer has committed and release their pages. Keys
+        of deleted entries are kept, so re-appending an already handled record is
+        still ignored.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        with self._lock:
+            row = self._db.execute("SELECT MIN(seq) FROM offsets").fetchone()
+            if row[0] is None:
+                return 0
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO compacted_keys (key) "
+                    "SELECT key FROM entries WHERE seq <= ? AND key IS NOT NULL",
+                    (row[0],),
+                )
+                deleted = self._db.execute("DELETE FROM entries WHERE seq <= ?", (row[0],)).rowcount
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("PRAGMA incremental_vacuum")
+            return deleted
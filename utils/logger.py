@@ -1,23 +1,122 @@
 import os
+import sys
+import json
+import uuid
+import queue
+import atexit
 import logging
-from datetime import datetime
-
-
-# Create logs directory if it doesn't exist
-os.makedirs('logs', exist_ok=True)
-
-# Create a log filename with timestamp
-log_filename = f"logs/app_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-
-# Setup logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        # File handler - writes to file
-        logging.FileHandler(log_filename),
-        # Stream handler - writes to console
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+LOG_FILE = os.getenv("LOG_FILE", os.path.join(LOG_DIR, "app.log"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+
+# Correlation id of the trade the current thread/task is working on
+trade_id = contextvars.ContextVar("trade_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "trade_id", "trade_tag"}
+
+
+@contextmanager
+def trade_context(correlation_id: str = None):
+    """
+    Tag every log line emitted inside the block with a trade correlation id.
+
+    Args:
+        correlation_id: Id to use, a new random one if not given
+    """
+    token = trade_id.set(correlation_id or uuid.uuid4().hex[:12])
+    try:
+        yield trade_id.get()
+    finally:
+        trade_id.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the correlation id onto the record while still on the calling thread."""
+
+    def filter(self, record):
+        record.trade_id = trade_id.get()
+        record.trade_tag = f"[{record.trade_id}] " if record.trade_id else ""
+        return True
+
+
+def _json_safe(value):
+    """
+    An extra attribute as a JSON primitive. Anything else is logged as its
+    repr, and objects that cannot even be rendered (a websocket behind a dead
+    weakref) as their type, so the record is never lost.
+    """
+    try:
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return repr(value)
+    except Exception:
+        return f"<unrepresentable {type(value).__name__}>"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "trade_id", None):
+            entry["trade_id"] = record.trade_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = _json_safe(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+_listener = None
+
+
+def setup_logging():
+    """
+    Route the root logger through a queue so callers never block on console or
+    disk I/O; a single listener thread writes JSON lines to a size-rotated file
+    and human readable lines to the console.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+    file_handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+    file_handler.setFormatter(JsonFormatter())
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(trade_tag)s%(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(name)
+
+
+logger = get_logger(__name__)
@@ -0,0 +1,44 @@
+def get_amount(tao_in, alpha_in, alpha_unstake_amount):
+    """TAO received for unstaking `alpha_unstake_amount` from a constant-product pool."""
+    p = tao_in * alpha_in
+    alpha_in_after = alpha_in + alpha_unstake_amount
+    tao_in_after = p / alpha_in_after
+    return tao_in - tao_in_after
+
+
+def stake_min_tolerance(tao_amount: float, tao_in: float) -> float:
+    """
+    Smallest price tolerance that lets staking `tao_amount` TAO go through in one
+    piece: the constant-product price move `price_after_stake` simulates.
+    """
+    return ((tao_in + tao_amount) / tao_in) ** 2 - 1
+
+
+def unstake_min_tolerance(alpha_amount: float, alpha_in: float) -> float:
+    """
+    Smallest price tolerance that lets unstaking `alpha_amount` alpha go through in
+    one piece: the constant-product price move `price_after_unstake` simulates.
+    """
+    return 1 - (alpha_in / (alpha_in + alpha_amount)) ** 2
+
+
+def stake_limit_price(price_rao: float, tolerance: float) -> float:
+    """Highest alpha price, in rao, accepted when staking."""
+    return price_rao * (1 + tolerance)
+
+
+def unstake_limit_price(price_rao: float, tolerance: float) -> float:
+    """Lowest alpha price, in rao, accepted when unstaking."""
+    return price_rao * (1 - tolerance)
+
+
+def price_after_stake(tao_amount: float, tao_in: float, alpha_in: float) -> float:
+    """Alpha price in TAO after staking `tao_amount` into a constant-product pool (fees ignored)."""
+    tao_in_after = tao_in + tao_amount
+    return tao_in_after * tao_in_after / (tao_in * alpha_in)
+
+
+def price_after_unstake(alpha_amount: float, tao_in: float, alpha_in: float) -> float:
+    """Alpha price in TAO after unstaking `alpha_amount` from a constant-product pool (fees ignored)."""
+    alpha_in_after = alpha_in + alpha_amount
+    return tao_in * alpha_in / (alpha_in_after * alpha_in_after)
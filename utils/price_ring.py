@@ -0,0 +1,279 @@
+"""
+Per-subnet ring buffers of pool price and reserves, one record per block.
+
+Each netuid gets a file `<dir>/<netuid>.ring`: a small header followed by a
+fixed number of (block, price, tao_in, alpha_in) records, memory mapped and
+overwritten oldest first once full. The watchers write it as they go, so the
+last N blocks survive restarts and can be aggregated into OHLC candles. Only
+one process writes a ring at a time; others that would record the same
+subnet leave it to that one.
+
+Usage:
+    python -m utils.price_ring record [--netuid 5 ...]
+    python -m utils.price_ring ohlc --netuid 5 --interval 300 [--start-block B] [--end-block B]
+"""
+import os
+import time
+import fcntl
+import argparse
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+PRICE_RING_DIR = "prices"
+# A week of 12 second blocks, 1.4 MB per subnet
+DEFAULT_CAPACITY = 7 * 7200
+
+RECORD_DTYPE = np.dtype([("block", "<u4"), ("price", "<f8"), ("tao_in", "<f8"), ("alpha_in", "<f8")])
+# magic, capacity, records written so far, write sequence
+HEADER_DTYPE = np.dtype("<u8")
+HEADER_FIELDS = 4
+HEADER_SIZE = 64
+MAGIC = 0x31474E4952434950  # "PICRING1"
+# How long a reader waits for a write in progress before giving up
+READ_ATTEMPTS = 1000
+READ_RETRY_DELAY = 0.001
+
+
+class RingLocked(Exception):
+    """Another process has the ring open for writing."""
+
+
+class PriceRing:
+    """
+    One subnet's ring buffer. A single process writes it, holding an
+    exclusive flock on the file; any number read.
+
+    The header's write sequence is a seqlock: the writer makes it odd before
+    touching a record and even again once the record and the write counter
+    are in place. A reader copies what it needs and starts over if the
+    sequence was odd or changed meanwhile, so it never returns a record the
+    writer was halfway through.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY, writable: bool = False):
+        """
+        Open or create the ring at `path`.
+
+        Args:
+            path: Ring file
+            capacity: Records kept, for a new file; an existing file keeps its own
+            writable: Open for appending, creating the file if needed
+        """
+        self.path = path
+        self.writable = writable
+        if writable:
+            # Held until the process exits
+            self._fd = self._lock(path, capacity)
+        elif not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+            # Missing, or its writer is still creating it
+            raise FileNotFoundError(path)
+        mode = "r+" if writable else "r"
+        self._header = np.memmap(path, dtype=HEADER_DTYPE, mode=mode, shape=(HEADER_FIELDS,))
+        if int(self._header[0]) != MAGIC:
+            raise ValueError(f"{path} is not a price ring")
+        self.capacity = int(self._header[1])
+        self._records = np.memmap(path, dtype=RECORD_DTYPE, mode=mode, offset=HEADER_SIZE, shape=(self.capacity,))
+        if writable and self._header[3] % 2:
+            # The previous writer died mid-record, which was not counted yet
+            self._header[3] += 1
+
+    @staticmethod
+    def _lock(path: str, capacity: int) -> int:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise RingLocked(f"{path} is being written by another process")
+        if os.fstat(fd).st_size < HEADER_SIZE:
+            # Header first and then the full size, so readers only open a complete file
+            os.pwrite(fd, np.array([MAGIC, capacity, 0, 0], dtype=HEADER_DTYPE).tobytes(), 0)
+            os.ftruncate(fd, HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+        return fd
+
+    @property
+    def count(self) -> int:
+        """Records written since the ring was created."""
+        return int(self._header[2])
+
+    def last_block(self) -> Optional[int]:
+        count = self.count
+        return None if count == 0 else int(self._records[(count - 1) % self.capacity]["block"])
+
+    def append(self, block: int, price: float, tao_in: float, alpha_in: float) -> None:
+        """Add a block's record; a block not newer than the last one is ignored."""
+        last = self.last_block()
+        if last is not None and block <= last:
+            return
+        count = self.count
+        self._header[3] += 1
+        self._records[count % self.capacity] = (block, price, tao_in, alpha_in)
+        self._header[2] = count + 1
+        self._header[3] += 1
+
+    def window(self, start_block: Optional[int] = None, end_block: Optional[int] = None) -> np.ndarray:
+        """
+        Records between two blocks (inclusive), oldest first.
+
+        Returns:
+            np.ndarray: A copy with fields block, price, tao_in and alpha_in
+        """
+        for _ in range(READ_ATTEMPTS):
+            sequence = int(self._header[3])
+            if sequence % 2:
+                time.sleep(READ_RETRY_DELAY)
+                continue
+            count = self.count
+            first = max(count - self.capacity, 0)
+            order = np.arange(first, count) % self.capacity
+            # The slots are in block order once rotated, so the range is a slice
+            blocks = self._records["block"][order]
+            lo = 0 if start_block is None else int(np.searchsorted(blocks, start_block, side="left"))
+            hi = len(order) if end_block is None else int(np.searchsorted(blocks, end_block, side="right"))
+            records = np.array(self._records[order[lo:hi]])
+            if int(self._header[3]) == sequence:
+                return records
+        raise TimeoutError(f"{self.path} stayed mid-write for {READ_ATTEMPTS * READ_RETRY_DELAY:.0f}s")
+
+
+def ohlc(records: np.ndarray, interval: int) -> Dict[str, list]:
+    """
+    Aggregate consecutive records into candles of `interval` blocks.
+
+    Candles are aligned to multiples of `interval`. Volume is the sum of
+    absolute tao_in changes between records and flow their sum, so pool
+    injections count as flow too. The first record of the window has no
+    predecessor and adds nothing.
+
+    Returns:
+        dict: Lists block (candle start), open, high, low, close, volume and flow
+    """
+    if len(records) == 0:
+        return {"block": [], "open": [], "high": [], "low": [], "close": [], "volume": [], "flow": []}
+    price = records["price"]
+    buckets = records["block"].astype(np.int64) // interval * interval
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(records)] - 1
+    flow = np.r_[0.0, np.diff(records["tao_in"])]
+    return {
+        "block": buckets[starts].tolist(),
+        "open": price[starts].tolist(),
+        "high": np.maximum.reduceat(price, starts).tolist(),
+        "low": np.minimum.reduceat(price, starts).tolist(),
+        "close": price[ends].tolist(),
+        "volume": np.add.reduceat(np.abs(flow), starts).tolist(),
+        "flow": np.add.reduceat(flow, starts).tolist(),
+    }
+
+
+class PriceRings:
+    """The rings of all subnets under one directory."""
+
+    def __init__(self, root: str = PRICE_RING_DIR, capacity: int = DEFAULT_CAPACITY, writable: bool = False):
+        self.root = root
+        self.capacity = capacity
+        self.writable = writable
+        self._rings: Dict[int, PriceRing] = {}
+        self._lock = threading.Lock()
+        if writable:
+            os.makedirs(root, exist_ok=True)
+
+    def ring(self, netuid: int) -> PriceRing:
+        with self._lock:
+            ring = self._rings.get(netuid)
+            if ring is None or (self.writable and not ring.writable):
+                path = os.path.join(self.root, f"{netuid}.ring")
+                try:
+                    ring = PriceRing(path, self.capacity, self.writable)
+                except RingLocked:
+                    # Another process records this subnet; read what it writes,
+                    # and try again to take over on the next record
+                    ring = ring or PriceRing(path, self.capacity)
+                self._rings[netuid] = ring
+            return ring
+
+    def record(self, block: int, pools: Dict[int, Tuple[float, float]]) -> None:
+        """
+        Append one block for several subnets, except those another process records.
+
+        Args:
+            block: Block the reserves were read at
+            pools: (tao_in, alpha_in) in TAO by netuid
+        """
+        for netuid, (tao_in, alpha_in) in pools.items():
+            price = 1.0 if netuid == 0 or alpha_in == 0 else tao_in / alpha_in
+            ring = self.ring(netuid)
+            if ring.writable:
+                ring.append(block, price, tao_in, alpha_in)
+
+    def ohlc(self, netuid: int, interval: int, start_block: Optional[int] = None,
+             end_block: Optional[int] = None) -> Dict[str, list]:
+        return ohlc(self.ring(netuid).window(start_block, end_block), interval)
+
+
+def record_pools(rpc_pool, rings: PriceRings, netuids: Sequence[int]):
+    """
+    Read the subnets' reserves at the pool's best block and append them.
+
+    Returns:
+        tuple: (block, {netuid: (tao_in, alpha_in)} as Balance)
+    """
+    from utils.storage import StorageReader
+
+    pin = rpc_pool.pin()
+    pools = pin.read(lambda subtensor: StorageReader(subtensor.substrate, pin.block_hash).pools(netuids))
+    rings.record(pin.block, {netuid: (tao_in.tao, alpha_in.tao) for netuid, (tao_in, alpha_in) in pools.items()})
+    return pin.block, pools
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record subnet prices into ring buffers, or aggregate them into candles")
+    parser.add_argument("--dir", default=os.getenv("PRICE_RING_DIR", PRICE_RING_DIR))
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Append every new block's reserves")
+    record.add_argument("--netuid", type=int, action="append", help="Subnet to record, repeatable; all if not given")
+    record.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="Blocks kept per subnet")
+    candles = commands.add_parser("ohlc", help="Print candles of one subnet")
+    candles.add_argument("--netuid", type=int, required=True)
+    candles.add_argument("--interval", type=int, default=300, help="Blocks per candle")
+    candles.add_argument("--start-block", type=int)
+    candles.add_argument("--end-block", type=int)
+    args = parser.parse_args()
+
+    if args.command == "ohlc":
+        from rich.console import Console
+        from rich.table import Table
+
+        result = PriceRings(args.dir).ohlc(args.netuid, args.interval, args.start_block, args.end_block)
+        table = Table(title=f"SN {args.netuid}, {args.interval} blocks per candle")
+        for column in ("Block", "Open", "High", "Low", "Close", "Volume", "Flow"):
+            table.add_column(column, justify="right")
+        for row in zip(*result.values()):
+            table.add_row(str(row[0]), *(f"{value:.6f}" for value in row[1:5]), *(f"{value:.2f}" for value in row[5:]))
+        Console().print(table)
+        return
+
+    from app.constants import NETWORK
+    from utils.logger import logger
+    from utils.rpc_pool import EndpointPool, resolve_endpoints
+
+    rpc_pool = EndpointPool(resolve_endpoints(NETWORK))
+    rpc_pool.start()
+    netuids = args.netuid or rpc_pool.read(lambda subtensor: subtensor.get_subnets())
+    rings = PriceRings(args.dir, args.capacity, writable=True)
+    while True:
+        try:
+            block, _ = record_pools(rpc_pool, rings, netuids)
+            logger.info(f"Recorded {len(netuids)} subnets at block {block}")
+            rpc_pool.read(lambda subtensor: subtensor.wait_for_block())
+        except KeyboardInterrupt:
+            break
+        except Exception as e:
+            logger.error(f"Error recording prices: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import time
+import threading
+from typing import Callable, Dict, List, Optional, TypeVar
+
+import bittensor as bt
+from async_substrate_interface.errors import SubstrateRequestException
+from substrateinterface import SubstrateInterface
+from substrateinterface.exceptions import SubstrateRequestException as LegacySubstrateRequestException
+from websocket import WebSocketException as LegacyWebSocketException
+from websockets.exceptions import WebSocketException
+
+from utils.logger import logger
+
+
+RPC_ENDPOINTS: Dict[str, List[str]] = {
+    'test': ['wss://test.finney.opentensor.ai:443'],
+    'finney': [
+        'wss://entrypoint-finney.opentensor.ai:443',
+        'wss://lite.chain.opentensor.ai:443',
+        'wss://archive.chain.opentensor.ai:443',
+    ],
+}
+
+PROBE_INTERVAL = 6.0
+# Weight of the newest sample in the round trip time average
+RTT_SMOOTHING = 0.3
+# Blocks an endpoint may trail the best head before reads avoid it
+MAX_HEAD_LAG = 2
+FAILURE_THRESHOLD = 3
+COOLDOWN = 30.0
+
+# Errors that say something about the endpoint rather than the request, from both
+# bittensor's substrate client and py-substrate-interface
+ENDPOINT_ERRORS = (
+    OSError,
+    WebSocketException,
+    SubstrateRequestException,
+    LegacyWebSocketException,
+    LegacySubstrateRequestException,
+)
+
+T = TypeVar("T")
+
+
+class LaggingEndpoints(ConnectionError):
+    """No available endpoint has reached the block a read requires."""
+
+
+def resolve_endpoints(network: str) -> List[str]:
+    """Endpoints of a network name, or the URL itself if given one."""
+    return RPC_ENDPOINTS.get(network, [network])
+
+
+class Endpoint:
+    """Health of one RPC node, and the connections open to it."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.rtt: Optional[float] = None
+        self.head: Optional[int] = None
+        self.failures = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._probe_substrate: Optional[SubstrateInterface] = None
+
+    @property
+    def available(self) -> bool:
+        """
+        False while the circuit is open. Once the cooldown is over the endpoint
+        is tried again, and a single further failure opens it for another cooldown.
+        """
+        return time.monotonic() >= self.open_until
+
+    def subtensor(self) -> bt.subtensor:
+        """This thread's connection to the endpoint, opened on first use."""
+        subtensor = getattr(self._local, "subtensor", None)
+        if subtensor is None:
+            subtensor = self._local.subtensor = bt.subtensor(network=self.url)
+        return subtensor
+
+    def record_success(self, rtt: Optional[float] = None, head: Optional[int] = None) -> None:
+        with self._lock:
+            self.failures = 0
+            self.open_until = 0.0
+            if rtt is not None:
+                self.rtt = rtt if self.rtt is None else (1 - RTT_SMOOTHING) * self.rtt + RTT_SMOOTHING * rtt
+            if head is not None:
+                self.head = head
+
+    def record_failure(self, error: Exception, cooldown: float = COOLDOWN, threshold: int = FAILURE_THRESHOLD) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= threshold:
+                if self.available:
+                    logger.error(f"RPC endpoint {self.url} failed {self.failures} times, avoiding it for {cooldown:.0f}s: {error}")
+                self.open_until = time.monotonic() + cooldown
+        # Drop the broken connection so the next use opens a new one
+        self._local.subtensor = None
+
+    def probe(self) -> None:
+        """Time a header request and note the endpoint's best block."""
+        if self._probe_substrate is None:
+            self._probe_substrate = SubstrateInterface(url=self.url, ss58_format=42)
+        started = time.perf_counter()
+        header = self._probe_substrate.rpc_request("chain_getHeader", [])['result']
+        self.record_success(rtt=time.perf_counter() - started, head=int(header['number'], 16))
+
+    def status(self) -> dict:
+        return {
+            "url": self.url,
+            "rtt": self.rtt,
+            "head": self.head,
+            "failures": self.failures,
+            "available": self.available,
+        }
+
+
+class EndpointPool:
+    """
+    Routes reads to the healthiest of several RPC nodes.
+
+    A background thread probes every endpoint's round trip time and best block.
+    Reads go to the fastest endpoint that is no more than `max_head_lag` blocks
+    behind the best head seen, and fail over to the next one on a connection or
+    RPC error. An endpoint that fails `failure_threshold` times in a row is
+    skipped for `cooldown` seconds.
+
+    Reads that have to agree with each other take a `Pin`, which fixes the
+    block they are made at.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        probe_interval: float = PROBE_INTERVAL,
+        max_head_lag: int = MAX_HEAD_LAG,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        cooldown: float = COOLDOWN,
+    ):
+        """
+        Initialize the EndpointPool.
+
+        Args:
+            urls: Websocket URLs of the nodes
+            probe_interval: Seconds between health probes
+            max_head_lag: Blocks an endpoint may trail the best head and still serve reads
+            failure_threshold: Consecutive failures that open an endpoint's circuit
+            cooldown: Seconds an open circuit stays open
+        """
+        if not urls:
+            raise ValueError("At least one RPC endpoint is required")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.probe_interval = probe_interval
+        self.max_head_lag = max_head_lag
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Probe all endpoints once, then keep probing on a background daemon thread."""
+        if self._thread is not None:
+            return
+        self.probe_all()
+        self._thread = threading.Thread(target=self._probe_loop, name="rpc-pool-probe", daemon=True)
+        self._thread.start()
+
+    def _probe_loop(self) -> None:
+        while True:
+            time.sleep(self.probe_interval)
+            self.probe_all()
+
+    def probe_all(self) -> None:
+        threads = [threading.Thread(target=self._probe, args=(endpoint,)) for endpoint in self.endpoints]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _probe(self, endpoint: Endpoint) -> None:
+        if not endpoint.available:
+            return
+        try:
+            endpoint.probe()
+        except Exception as e:
+            endpoint._probe_substrate = None
+            endpoint.record_failure(e, self.cooldown, self.failure_threshold)
+
+    @property
+    def best_head(self) -> Optional[int]:
+        heads = [endpoint.head for endpoint in self.endpoints if endpoint.available and endpoint.head is not None]
+        return max(heads) if heads else None
+
+    def ranked(self, min_head: Optional[int] = None) -> List[Endpoint]:
+        """
+        Endpoints in the order reads should try them: healthy ones by round trip
+        time, then lagging ones, then those whose circuit is open.
+
+        Args:
+            min_head: Block an endpoint must have reached to be considered healthy
+        """
+        best_head = self.best_head
+        if min_head is None and best_head is not None:
+            min_head = best_head - self.max_head_lag
+
+        def rank(endpoint: Endpoint):
+            caught_up = min_head is None or (endpoint.head is not None and endpoint.head >= min_head)
+            rtt = endpoint.rtt if endpoint.rtt is not None else float("inf")
+            return (not endpoint.available, not caught_up, rtt)
+
+        return sorted(self.endpoints, key=rank)
+
+    def best(self) -> Endpoint:
+        return self.ranked()[0]
+
+    def read(self, func: Callable[[bt.subtensor], T], min_head: Optional[int] = None, strict: bool = False) -> T:
+        """
+        Run `func` with a connection to the healthiest endpoint, failing over to
+        the next one on endpoint errors. Other exceptions propagate unchanged.
+
+        Args:
+            func: Read to make with an endpoint's connection
+            min_head: Block an endpoint must have reached to be preferred
+            strict: Only use endpoints that reached `min_head`, and raise
+                LaggingEndpoints rather than fall back to the others
+        """
+        endpoints = self.ranked(min_head)
+        if strict and min_head is not None:
+            endpoints = [endpoint for endpoint in endpoints
+                         if endpoint.available and endpoint.head is not None and endpoint.head >= min_head]
+        error: Optional[Exception] = LaggingEndpoints(f"No RPC connection has reached block {min_head}")
+        for endpoint in endpoints:
+            try:
+                result = func(endpoint.subtensor())
+            except ENDPOINT_ERRORS as e:
+                logger.error(f"Read from {endpoint.url} failed: {e}")
+                endpoint.record_failure(e, self.cooldown, self.failure_threshold)
+                error = e
+                continue
+            endpoint.record_success()
+            return result
+        raise error
+
+    def pin(self) -> "Pin":
+        """Fix the block for a group of reads at the healthiest endpoint's best block."""
+        def head(subtensor):
+            block_hash = subtensor.substrate.get_chain_head()
+            return subtensor.substrate.get_block_number(block_hash), block_hash
+
+        block, block_hash = self.read(head)
+        return Pin(self, block, block_hash)
+
+    def status(self) -> List[dict]:
+        best_head = self.best_head
+        return [
+            {**endpoint.status(), "head_lag": None if endpoint.head is None or best_head is None else best_head - endpoint.head}
+            for endpoint in self.endpoints
+        ]
+
+
+class Pin:
+    """
+    A block that a group of reads is made at, so that their results are
+    consistent even when they fail over to another endpoint in between.
+
+    Reads pass `block=pin.block` as usual. Each endpoint would resolve that
+    number on its own, which on two sides of a fork gives different blocks,
+    so while a read runs its connection resolves the pinned number to the
+    pinned hash instead.
+    """
+
+    def __init__(self, pool: EndpointPool, block: int, block_hash: str):
+        self.pool = pool
+        self.block = block
+        self.block_hash = block_hash
+
+    def read(self, func: Callable[[bt.subtensor], T]) -> T:
+        """Like `EndpointPool.read`, but at the pinned block hash, and only endpoints that have it are healthy."""
+        if self.block_hash is None:
+            return self.pool.read(func, min_head=self.block)
+
+        def pinned(subtensor: bt.subtensor) -> T:
+            resolve = subtensor.determine_block_hash
+            subtensor.determine_block_hash = lambda block: self.block_hash if block == self.block else resolve(block)
+            try:
+                return func(subtensor)
+            finally:
+                # Connections are reused by later reads, which must resolve numbers normally again
+                del subtensor.determine_block_hash
+
+        return self.pool.read(pinned, min_head=self.block)
@@ -0,0 +1,419 @@
+"""
+Record and replay a substrate node's websocket JSON-RPC traffic.
+
+`record` runs a local websocket proxy in front of a live node and writes
+every request, its response and any subscription notifications to a JSON
+recording. Point a script or the API at the proxy, run what should be
+captured (metadata, storage, runtime calls, blocks, events), then stop it
+with Ctrl-C.
+
+`replay` serves a recording as a stand-in node. Requests are answered from
+the recording deterministically: the n-th identical request gets the n-th
+recorded answer, and the last one once those run out. A request for a block
+hash that was not recorded is answered as if it were made at the recorded
+block. With `--block-time` the stand-in produces new heads on its own and
+answers header/block queries for them. Submitted extrinsics are included in
+the next block, or rejected, as scripted in the `--outcomes` file.
+
+Usage:
+    python -m utils.rpc_replay record --upstream wss://entrypoint-finney.opentensor.ai:443 --out finney.json
+    python -m utils.rpc_replay replay --recording finney.json --block-time 1 [--outcomes outcomes.json]
+
+Outcomes file, consumed in submission order ("default" applies afterwards):
+    {"outcomes": [{"status": "invalid", "error": {"code": 1010, "message": "Invalid Transaction",
+                   "data": "Custom error: 8"}}],
+     "default": {"status": "in_block", "events": "0x..."}}
+`status` is "in_block" (optionally with the SCALE encoded System.Events of
+the block), "invalid" (the submission fails with `error`) or "dropped"
+(accepted, never included).
+"""
+import re
+import json
+import asyncio
+import hashlib
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from utils.logger import logger
+
+
+DEFAULT_PORT = 9944
+# Storage key of System.Events, answered with the scripted events of simulated blocks
+SYSTEM_EVENTS_KEY = "0x26aa394eea5630e07c48ae0c9558cef780d41e5e16056765bc8461851072c9d7"
+FINALITY_DEPTH = 2
+
+SUBSCRIBE_METHODS = {
+    "chain_subscribeNewHeads": "chain_newHead",
+    "chain_subscribeNewHead": "chain_newHead",
+    "chain_subscribeFinalizedHeads": "chain_finalizedHead",
+    "chain_subscribeFinalisedHeads": "chain_finalizedHead",
+    "state_subscribeRuntimeVersion": "state_runtimeVersion",
+    "author_submitAndWatchExtrinsic": "author_extrinsicUpdate",
+}
+
+_HASH = re.compile(r"^0x[0-9a-fA-F]{64}$")
+
+
+def request_key(method: str, params) -> str:
+    return json.dumps([method, params], sort_keys=True)
+
+
+def generic_key(method: str, params) -> str:
+    """Request key with every 32-byte hash parameter blanked out."""
+    def blank(value):
+        if isinstance(value, str) and _HASH.match(value):
+            return "<hash>"
+        if isinstance(value, list):
+            return [blank(item) for item in value]
+        return value
+    return request_key(method, blank(params))
+
+
+def blake2_256(data: bytes) -> str:
+    return "0x" + hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+class Recording:
+    """Answers and notifications captured from a node, by request key."""
+
+    def __init__(self, calls: Optional[Dict[str, list]] = None, notifications: Optional[Dict[str, list]] = None):
+        self.calls: Dict[str, list] = calls or {}
+        self.notifications: Dict[str, list] = notifications or {}
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["calls"], data["notifications"])
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"calls": self.calls, "notifications": self.notifications}, f)
+
+    def add_call(self, method: str, params, answer: dict) -> None:
+        self.calls.setdefault(request_key(method, params), []).append(answer)
+        self.calls.setdefault(generic_key(method, params), []).append(answer)
+
+    def add_notification(self, method: str, params, result) -> None:
+        self.notifications.setdefault(request_key(method, params), []).append(result)
+
+
+class Recorder:
+    """Websocket proxy that forwards to a live node and records the traffic."""
+
+    def __init__(self, upstream: str, path: str):
+        self.upstream = upstream
+        self.path = path
+        self.recording = Recording()
+
+    async def _relay(self, client) -> None:
+        pending: Dict[int, tuple] = {}
+        subscriptions: Dict[str, tuple] = {}
+        async with connect(self.upstream, max_size=None) as node:
+            async def upstream_to_client():
+                async for raw in node:
+                    message = json.loads(raw)
+                    if "id" in message and message["id"] in pending:
+                        method, params = pending.pop(message["id"])
+                        answer = {key: message[key] for key in ("result", "error") if key in message}
+                        self.recording.add_call(method, params, answer)
+                        if method in SUBSCRIBE_METHODS and "result" in message:
+                            subscriptions[str(message["result"])] = (method, params)
+                    elif "params" in message:
+                        subscription = subscriptions.get(str(message["params"].get("subscription")))
+                        if subscription is not None:
+                            self.recording.add_notification(*subscription, message["params"]["result"])
+                    await client.send(raw)
+
+            relay = asyncio.create_task(upstream_to_client())
+            try:
+                async for raw in client:
+                    message = json.loads(raw)
+                    pending[message["id"]] = (message["method"], message.get("params", []))
+                    await node.send(raw)
+            finally:
+                relay.cancel()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+        async with serve(self._relay, host, port, max_size=None):
+            logger.info(f"Recording {self.upstream} through ws://{host}:{port} into {self.path}")
+            try:
+                await asyncio.Future()
+            finally:
+                self.recording.save(self.path)
+                logger.info(f"Saved {len(self.recording.calls)} request keys to {self.path}")
+
+
+class SimulatedChain:
+    """New heads on top of the recorded chain, with the extrinsics submitted to the stand-in."""
+
+    def __init__(self, head: dict):
+        self.headers: List[dict] = [head]
+        self.hashes: List[str] = [blake2_256(json.dumps(head, sort_keys=True).encode())]
+        self.extrinsics: Dict[str, List[str]] = {self.hashes[0]: []}
+        self.events: Dict[str, str] = {}
+        self.pool: List[tuple] = []
+
+    @property
+    def head_number(self) -> int:
+        return int(self.headers[-1]["number"], 16)
+
+    @property
+    def finalized_index(self) -> int:
+        return max(len(self.headers) - 1 - FINALITY_DEPTH, 0)
+
+    def produce_block(self) -> tuple:
+        """Add a block with the pooled extrinsics; returns (header, block hash, included extrinsics)."""
+        header = {
+            **self.headers[-1],
+            "parentHash": self.hashes[-1],
+            "number": hex(self.head_number + 1),
+        }
+        block_hash = blake2_256(json.dumps(header, sort_keys=True).encode())
+        included, self.pool = self.pool, []
+        self.headers.append(header)
+        self.hashes.append(block_hash)
+        self.extrinsics[block_hash] = [extrinsic for extrinsic, _ in included]
+        events = [outcome.get("events") for _, outcome in included if outcome.get("events")]
+        if events:
+            self.events[block_hash] = events[-1]
+        return header, block_hash, included
+
+    def index_of(self, block_hash: Optional[str]) -> Optional[int]:
+        if block_hash is None:
+            return len(self.headers) - 1
+        try:
+            return self.hashes.index(block_hash)
+        except ValueError:
+            return None
+
+
+class StandInNode:
+    """
+    Replays a recording as a websocket JSON-RPC node, optionally producing new
+    heads every `block_time` seconds and including submitted extrinsics.
+    """
+
+    def __init__(self, recording: Recording, block_time: float = 0.0, outcomes: Optional[dict] = None):
+        """
+        Initialize the StandInNode.
+
+        Args:
+            recording: Traffic to answer requests from
+            block_time: Seconds between simulated blocks, 0 to only produce them on `produce_block`
+            outcomes: Scripted results of submitted extrinsics, see the module docstring
+        """
+        self.recording = recording
+        self.block_time = block_time
+        outcomes = outcomes or {}
+        self.outcomes: List[dict] = list(outcomes.get("outcomes", []))
+        self.default_outcome: dict = outcomes.get("default", {"status": "in_block"})
+        self._served: Dict[str, int] = {}
+        self._subscriptions: Dict[str, tuple] = {}
+        self._next_subscription = 0
+        self.chain = SimulatedChain(self._recorded_head())
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.port: Optional[int] = None
+
+    def _recorded_head(self) -> dict:
+        answers = self.recording.calls.get(request_key("chain_getHeader", []))
+        if answers and "result" in answers[-1]:
+            return answers[-1]["result"]
+        return {"parentHash": "0x" + "00" * 32, "number": "0x0", "stateRoot": "0x" + "00" * 32,
+                "extrinsicsRoot": "0x" + "00" * 32, "digest": {"logs": []}}
+
+    def _recorded(self, method: str, params) -> dict:
+        for key in (request_key(method, params), generic_key(method, params)):
+            answers = self.recording.calls.get(key)
+            if answers:
+                served = self._served.get(key, 0)
+                self._served[key] = served + 1
+                return answers[min(served, len(answers) - 1)]
+        return {"error": {"code": -32601, "message": f"No recorded answer for {method} {params}"}}
+
+    def _simulated(self, method: str, params) -> Optional[dict]:
+        """Answers about the simulated chain, None for requests it does not cover."""
+        chain = self.chain
+        if method == "chain_getHeader":
+            index = chain.index_of(params[0] if params else None)
+            return None if index is None else {"result": chain.headers[index]}
+        if method == "chain_getBlockHash":
+            number = params[0] if params else None
+            if number is None:
+                return {"result": chain.hashes[-1]}
+            number = int(number, 16) if isinstance(number, str) else number
+            index = number - int(chain.headers[0]["number"], 16)
+            return {"result": chain.hashes[index] if 0 <= index < len(chain.hashes) else None}
+        if method in ("chain_getFinalizedHead", "chain_getFinalisedHead"):
+            return {"result": chain.hashes[chain.finalized_index]}
+        if method == "chain_getBlock":
+            index = chain.index_of(params[0] if params else None)
+            if index is None or index == 0:
+                return None
+            block_hash = chain.hashes[index]
+            return {"result": {"block": {"header": chain.headers[index], "extrinsics": chain.extrinsics[block_hash]},
+                               "justifications": None}}
+        if method in ("state_getStorage", "state_getStorageAt") and params and params[0] == SYSTEM_EVENTS_KEY:
+            block_hash = params[1] if len(params) > 1 else chain.hashes[-1]
+            if block_hash in chain.events:
+                return {"result": chain.events[block_hash]}
+        return None
+
+    def _outcome(self) -> dict:
+        return self.outcomes.pop(0) if self.outcomes else self.default_outcome
+
+    async def _notify(self, subscription: str, method: str, result) -> None:
+        client = self._subscriptions.get(subscription, (None,))[0]
+        if client is None:
+            return
+        message = {"jsonrpc": "2.0", "method": method, "params": {"subscription": subscription, "result": result}}
+        try:
+            await client.send(json.dumps(message))
+        except Exception:
+            self._subscriptions.pop(subscription, None)
+
+    def _subscribe(self, client, method: str, params) -> str:
+        self._next_subscription += 1
+        subscription = f"stand-in-{self._next_subscription}"
+        self._subscriptions[subscription] = (client, method, params)
+        return subscription
+
+    async def _submit(self, client, message_id, method: str, params) -> dict:
+        extrinsic = params[0]
+        outcome = self._outcome()
+        if outcome.get("status") == "invalid":
+            return {"error": outcome.get("error", {"code": 1010, "message": "Invalid Transaction"})}
+        tx_hash = blake2_256(bytes.fromhex(extrinsic[2:]))
+        if method == "author_submitExtrinsic":
+            if outcome.get("status") != "dropped":
+                self.chain.pool.append((extrinsic, outcome))
+            return {"result": tx_hash}
+        subscription = self._subscribe(client, method, params)
+        if outcome.get("status") != "dropped":
+            self.chain.pool.append((extrinsic, {**outcome, "subscription": subscription}))
+        await client.send(json.dumps({"jsonrpc": "2.0", "id": message_id, "result": subscription}))
+        await self._notify(subscription, SUBSCRIBE_METHODS[method], "ready")
+        return {}
+
+    async def answer(self, client, message: dict) -> Optional[dict]:
+        method, params = message["method"], message.get("params", [])
+        if method in ("author_submitExtrinsic", "author_submitAndWatchExtrinsic"):
+            return await self._submit(client, message["id"], method, params)
+        if method in SUBSCRIBE_METHODS:
+            subscription = self._subscribe(client, method, params)
+            await client.send(json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": subscription}))
+            if self.block_time <= 0:
+                # Without simulated heads, play back what the node sent during recording
+                for result in self.recording.notifications.get(request_key(method, params), []):
+                    await self._notify(subscription, SUBSCRIBE_METHODS[method], result)
+            return {}
+        if method.startswith(("chain_unsubscribe", "state_unsubscribe", "author_unwatch")):
+            self._subscriptions.pop(str(params[0]) if params else None, None)
+            return {"result": True}
+        return self._simulated(method, params) or self._recorded(method, params)
+
+    async def produce_block(self) -> str:
+        """Add a block, include pooled extrinsics and notify subscribers; returns its hash."""
+        header, block_hash, included = self.chain.produce_block()
+        finalized_hash = self.chain.hashes[self.chain.finalized_index]
+        for subscription, (_, method, _) in list(self._subscriptions.items()):
+            if method in ("chain_subscribeNewHeads", "chain_subscribeNewHead"):
+                await self._notify(subscription, "chain_newHead", header)
+            elif method in ("chain_subscribeFinalizedHeads", "chain_subscribeFinalisedHeads"):
+                await self._notify(subscription, "chain_finalizedHead", self.chain.headers[self.chain.finalized_index])
+        for _, outcome in included:
+            if "subscription" in outcome:
+                await self._notify(outcome["subscription"], "author_extrinsicUpdate", {"inBlock": block_hash})
+        # Watched extrinsics whose block just became final
+        finalized_index = self.chain.finalized_index
+        for subscription, (_, method, params) in list(self._subscriptions.items()):
+            if method != "author_submitAndWatchExtrinsic":
+                continue
+            for index in range(finalized_index + 1):
+                if params[0] in self.chain.extrinsics.get(self.chain.hashes[index], []):
+                    await self._notify(subscription, "author_extrinsicUpdate", {"finalized": finalized_hash})
+                    self._subscriptions.pop(subscription, None)
+                    break
+        return block_hash
+
+    async def _serve_client(self, client) -> None:
+        try:
+            async for raw in client:
+                message = json.loads(raw)
+                answer = await self.answer(client, message)
+                if answer:
+                    await client.send(json.dumps({"jsonrpc": "2.0", "id": message["id"], **answer}))
+        except ConnectionClosed:
+            pass
+        finally:
+            for subscription, (subscriber, _, _) in list(self._subscriptions.items()):
+                if subscriber is client:
+                    self._subscriptions.pop(subscription, None)
+
+    async def _produce_blocks(self) -> None:
+        while True:
+            await asyncio.sleep(self.block_time)
+            await self.produce_block()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, started: Optional[threading.Event] = None) -> None:
+        self.loop = asyncio.get_running_loop()
+        async with serve(self._serve_client, host, port, max_size=None) as server:
+            # The actual port when asked for any free one with port 0
+            self.port = server.sockets[0].getsockname()[1]
+            logger.info(f"Stand-in node listening on ws://{host}:{self.port}")
+            if started is not None:
+                started.set()
+            if self.block_time > 0:
+                await self._produce_blocks()
+            else:
+                await asyncio.Future()
+
+    def serve_in_thread(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> str:
+        """Serve on a background daemon thread; returns the node's URL once the socket listens."""
+        started = threading.Event()
+        threading.Thread(target=asyncio.run, args=(self.serve(host, port, started),), daemon=True).start()
+        if not started.wait(timeout=10):
+            raise RuntimeError(f"Stand-in node did not start on port {port}")
+        return f"ws://{host}:{self.port}"
+
+    def produce_block_sync(self) -> str:
+        """`produce_block` from another thread, for tests driving a node served by `serve_in_thread`."""
+        return asyncio.run_coroutine_threadsafe(self.produce_block(), self.loop).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay websocket JSON-RPC traffic of a substrate node")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Proxy to a live node and record the traffic")
+    record.add_argument("--upstream", default="wss://entrypoint-finney.opentensor.ai:443")
+    record.add_argument("--out", required=True)
+    replay = commands.add_parser("replay", help="Serve a recording as a stand-in node")
+    replay.add_argument("--recording", required=True)
+    replay.add_argument("--block-time", type=float, default=0.0, help="Seconds between simulated blocks (0 = none)")
+    replay.add_argument("--outcomes", help="JSON file with scripted outcomes of submitted extrinsics")
+    for command in (record, replay):
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "record":
+            asyncio.run(Recorder(args.upstream, args.out).serve(args.host, args.port))
+        else:
+            outcomes = None
+            if args.outcomes:
+                with open(args.outcomes) as f:
+                    outcomes = json.load(f)
+            node = StandInNode(Recording.load(args.recording), block_time=args.block_time, outcomes=outcomes)
+            asyncio.run(node.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
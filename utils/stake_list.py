@@ -3,21 +3,29 @@ import bittensor as bt
 from rich.console import Console
 from rich.table import Table
 from io import StringIO
+from utils.pool_math import get_amount
 
 
-def get_amount(tao_in, alpha_in, alpha_unstake_amount):
-    p = tao_in * alpha_in
-    alpha_in_after = alpha_in + alpha_unstake_amount
-    tao_in_after = p / alpha_in_after
-    return tao_in - tao_in_after
+def get_stake_values(stake_infos, subnet_infos):
+    """
+    Value each stake position at the TAO it would fetch if unstaked now.
 
+    Args:
+        stake_infos: StakeInfo objects of one coldkey
+        subnet_infos: DynamicInfo objects indexed by netuid
+
+    Returns:
+        list: (stake_info, subnet_info, value) per position
+    """
+    positions = []
+    for info in stake_infos:
+        subnet_info = subnet_infos[info.netuid]
+        value = get_amount(subnet_info.tao_in.tao, subnet_info.alpha_in.tao, info.stake.tao)
+        positions.append((info, subnet_info, value))
+    return positions
 
-def get_stake_list(subtensor, wallet_ss58):
-    stake_infos = subtensor.get_stake_for_coldkey(
-        coldkey_ss58=wallet_ss58
-    )
-    subnet_infos = subtensor.all_subnets()
 
+def render_stake_list(positions, wallet_ss58, balance):
     # Create a Rich Table to display the stake_infos in a readable format
 
     table = Table(title="Stake Infos", show_lines=True)
@@ -28,11 +36,8 @@ def get_stake_list(subtensor, wallet_ss58):
     table.add_column("Price")
     table.add_column("Hotkey SS58")
 
-    # stake_infos is a list of StakeInfo objects
     total_value = 0
-    for info in stake_infos:
-        subnet_info = subnet_infos[info.netuid]
-        value = get_amount(subnet_info.tao_in.tao, subnet_info.alpha_in.tao, info.stake.tao)
+    for info, subnet_info, value in positions:
         table.add_row(
             str(info.netuid),
             subnet_info.subnet_name,
@@ -43,10 +48,6 @@ def get_stake_list(subtensor, wallet_ss58):
         )
         total_value += value
 
-
-
-    balance = subtensor.get_balance(wallet_ss58)
-    
     console = Console(file=StringIO(), force_terminal=False)
     console.print(table)
     console.print("\n")
@@ -59,6 +60,18 @@ def get_stake_list(subtensor, wallet_ss58):
 
     table_str = console.file.getvalue()
     return table_str
+
+
+def get_stake_list(subtensor, wallet_ss58, block=None):
+    # All three reads at the same block, so values and balance add up
+    stake_infos = subtensor.get_stake_for_coldkey(
+        coldkey_ss58=wallet_ss58,
+        block=block,
+    )
+    subnet_infos = subtensor.all_subnets(block=block)
+    positions = get_stake_values(stake_infos, subnet_infos)
+    balance = subtensor.get_balance(wallet_ss58, block=block)
+    return render_stake_list(positions, wallet_ss58, balance)
     
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from bittensor.utils.balance import Balance, fixed_to_float
+
+
+# (pallet, storage function) for every storage item this project reads directly.
+STORAGE_ITEMS: Dict[str, Tuple[str, str]] = {
+    "LastAdjustmentBlock": ("SubtensorModule", "LastAdjustmentBlock"),
+    "Burn": ("SubtensorModule", "Burn"),
+    "SubnetTAO": ("SubtensorModule", "SubnetTAO"),
+    "SubnetAlphaIn": ("SubtensorModule", "SubnetAlphaIn"),
+    "SubnetOwner": ("SubtensorModule", "SubnetOwner"),
+    "Alpha": ("SubtensorModule", "Alpha"),
+    "Account": ("System", "Account"),
+    "Now": ("Timestamp", "Now"),
+}
+
+
+def _plain(value: Any) -> Any:
+    """Unwrap a ScaleType returned by substrate-interface into its python value."""
+    return getattr(value, "value", value)
+
+
+def pool_price(netuid: int, tao_in: Balance, alpha_in: Balance) -> float:
+    """Spot alpha price in TAO implied by a pool's reserves (root is always 1)."""
+    if netuid == 0 or alpha_in.rao == 0:
+        return 1.0
+    return tao_in.rao / alpha_in.rao
+
+
+class StorageReader:
+    """
+    Reads subtensor storage items by exact storage key at a pinned block.
+
+    All reads issued through one reader see the same block, so values fetched
+    in separate calls are consistent with each other. Every public helper goes
+    through `query`, which batches its keys into a single `state_queryStorageAt`
+    request via `query_multi`.
+    """
+
+    def __init__(self, substrate, block_hash: Optional[str] = None):
+        """
+        Initialize the StorageReader.
+
+        Args:
+            substrate: SubstrateInterface (e.g. `subtensor.substrate`)
+            block_hash: Block hash to pin reads to (defaults to the current head)
+        """
+        self.substrate = substrate
+        self.block_hash = block_hash or substrate.get_chain_head()
+
+    def key(self, item: str, params: Sequence[Any] = ()):
+        """Build the exact storage key for `item` with the given map keys."""
+        if item not in STORAGE_ITEMS:
+            raise ValueError(f"Unknown storage item: {item}")
+        pallet, storage_function = STORAGE_ITEMS[item]
+        return self.substrate.create_storage_key(pallet, storage_function, list(params))
+
+    def query(self, requests: Iterable[Tuple[str, Sequence[Any]]]) -> List[Any]:
+        """
+        Fetch several storage items in one round trip.
+
+        Args:
+            requests: (item, params) pairs
+
+        Returns:
+            list: Decoded values in request order (None for missing entries)
+        """
+        keys = [self.key(item, params) for item, params in requests]
+        if not keys:
+            return []
+        results = self.substrate.query_multi(keys, block_hash=self.block_hash)
+        # The node does not promise to answer in request order
+        values = {storage_key.to_hex(): _plain(value) for storage_key, value in results}
+        return [values.get(key.to_hex()) for key in keys]
+
+    def last_adjustment_block(self, netuid: int) -> int:
+        (value,) = self.query([("LastAdjustmentBlock", [netuid])])
+        return int(value or 0)
+
+    def burn(self, netuid: int) -> Balance:
+        (value,) = self.query([("Burn", [netuid])])
+        return Balance.from_rao(int(value or 0))
+
+    def subnet_tao(self, netuid: int) -> Balance:
+        (value,) = self.query([("SubnetTAO", [netuid])])
+        return Balance.from_rao(int(value or 0))
+
+    def subnet_alpha_in(self, netuid: int) -> Balance:
+        (value,) = self.query([("SubnetAlphaIn", [netuid])])
+        return Balance.from_rao(int(value or 0), netuid)
+
+    def subnet_owner(self, netuid: int) -> Optional[str]:
+        (value,) = self.query([("SubnetOwner", [netuid])])
+        return value
+
+    def alpha_shares(self, hotkey: str, coldkey: str, netuid: int) -> float:
+        """
+        Raw `Alpha` share entry for a (hotkey, coldkey, netuid) position.
+
+        Note these are pool shares (U64F64), not the alpha amount itself.
+        """
+        (value,) = self.query([("Alpha", [hotkey, coldkey, netuid])])
+        if value is None:
+            return 0.0
+        return fixed_to_float(value)
+
+    def free_balance(self, address: str) -> Balance:
+        (value,) = self.query([("Account", [address])])
+        if value is None:
+            return Balance.from_rao(0)
+        return Balance.from_rao(int(value["data"]["free"]))
+
+    def timestamp(self) -> float:
+        """Timestamp of the pinned block in seconds."""
+        (value,) = self.query([("Now", [])])
+        return int(value or 0) / 1000
+
+    def subnet_owners(self, netuids: Sequence[int]) -> Dict[int, Optional[str]]:
+        values = self.query([("SubnetOwner", [netuid]) for netuid in netuids])
+        return dict(zip(netuids, values))
+
+    def pools(self, netuids: Sequence[int]) -> Dict[int, Tuple[Balance, Balance]]:
+        """
+        Fetch (tao_in, alpha_in) reserves for several subnets in one request.
+        """
+        requests = []
+        for netuid in netuids:
+            requests.append(("SubnetTAO", [netuid]))
+            requests.append(("SubnetAlphaIn", [netuid]))
+        values = self.query(requests)
+
+        pools = {}
+        for i, netuid in enumerate(netuids):
+            tao_in, alpha_in = values[2 * i], values[2 * i + 1]
+            pools[netuid] = (
+                Balance.from_rao(int(tao_in or 0)),
+                Balance.from_rao(int(alpha_in or 0), netuid),
+            )
+        return pools
+
+    def prices(self, netuids: Sequence[int]) -> Dict[int, float]:
+        """
+        Spot alpha price in TAO for each subnet (root is always 1).
+        """
+        return {
+            netuid: pool_price(netuid, tao_in, alpha_in)
+            for netuid, (tao_in, alpha_in) in self.pools(netuids).items()
+        }
@@ -0,0 +1,212 @@
+from typing import List, Optional, Tuple
+
+from utils.pool_math import get_amount, stake_limit_price, unstake_limit_price
+
+
+# subtensor's DefaultStakingFee, taken in TAO from every pool trade
+STAKING_FEE = 0.00005
+# Transaction fee of one proxied staking extrinsic, when no estimate is given
+TX_FEE = 0.0002
+
+SWAP = "swap_stake_limit"
+UNSTAKE_STAKE = "unstake_stake"
+ROUTES = (SWAP, UNSTAKE_STAKE)
+
+# Added to a route's minimum tolerance, so that a price tick before inclusion does not fail it
+MIN_TOLERANCE_MARGIN = 0.001
+# Re-plans tried before giving up on finding a tolerance a route accepts
+MAX_TOLERANCE_ROUNDS = 10
+
+
+class Pool:
+    """Reserves of one subnet's pool. Root and other non-dynamic subnets trade 1:1."""
+
+    def __init__(self, netuid: int, tao_in: float, alpha_in: float, dynamic: bool = True):
+        self.netuid = netuid
+        self.tao_in = tao_in
+        self.alpha_in = alpha_in
+        self.dynamic = dynamic and alpha_in > 0
+
+    @classmethod
+    def from_subnet(cls, subnet_info) -> "Pool":
+        return cls(subnet_info.netuid, subnet_info.tao_in.tao, subnet_info.alpha_in.tao, subnet_info.is_dynamic)
+
+    @property
+    def price(self) -> float:
+        return self.tao_in / self.alpha_in if self.dynamic else 1.0
+
+    def unstake(self, alpha: float) -> float:
+        """TAO out for `alpha` in."""
+        return get_amount(self.tao_in, self.alpha_in, alpha) if self.dynamic else alpha
+
+    def stake(self, tao: float) -> float:
+        """Alpha out for `tao` in."""
+        if not self.dynamic:
+            return tao
+        return self.alpha_in - self.tao_in * self.alpha_in / (self.tao_in + tao)
+
+    def price_after_unstake(self, alpha: float) -> float:
+        if not self.dynamic:
+            return 1.0
+        return self.tao_in * self.alpha_in / (self.alpha_in + alpha) ** 2
+
+    def price_after_stake(self, tao: float) -> float:
+        if not self.dynamic:
+            return 1.0
+        return (self.tao_in + tao) ** 2 / (self.tao_in * self.alpha_in)
+
+
+class SwapRoute:
+    """One way of moving alpha from the origin to the destination subnet, simulated."""
+
+    def __init__(self, name: str, alpha_out: float, leftover_tao: float, fees: float, value: float,
+                 min_tolerance: float, limit_prices: dict, stake_tao: float = 0.0):
+        """
+        Args:
+            name: SWAP or UNSTAKE_STAKE
+            alpha_out: Destination alpha received
+            leftover_tao: TAO left free (the unstake-then-stake route keeps a margin unstaked)
+            fees: Staking and transaction fees in TAO
+            value: alpha_out plus what the leftover TAO would buy, net of transaction fees, in destination alpha
+            min_tolerance: Smallest tolerance with which the route executes in full
+            limit_prices: Limit prices in rao to submit, by call
+            stake_tao: TAO the add_stake_limit leg stakes, for the unstake-then-stake route
+        """
+        self.name = name
+        self.alpha_out = alpha_out
+        self.leftover_tao = leftover_tao
+        self.fees = fees
+        self.value = value
+        self.min_tolerance = min_tolerance
+        self.limit_prices = limit_prices
+        self.stake_tao = stake_tao
+
+    def feasible(self, tolerance: float) -> bool:
+        return self.min_tolerance <= tolerance
+
+    def to_dict(self, tolerance: float) -> dict:
+        return {
+            "route": self.name,
+            "alpha_out": self.alpha_out,
+            "leftover_tao": self.leftover_tao,
+            "fees": self.fees,
+            "value": self.value,
+            "min_tolerance": self.min_tolerance,
+            "feasible": self.feasible(tolerance),
+            "limit_prices": self.limit_prices,
+            "stake_tao": self.stake_tao,
+        }
+
+
+def swap_limit_price(origin_price: float, destination_price: float, tolerance: float) -> float:
+    """
+    Limit price of swap_stake_limit, in rao: the lowest origin/destination
+    price ratio accepted. The move lowers the origin price and raises the
+    destination price, so the ratio only falls.
+    """
+    return origin_price / destination_price * 1e9 * (1 - tolerance)
+
+
+def simulate_swap(origin: Pool, destination: Pool, alpha: float, tolerance: float, tx_fee: float) -> SwapRoute:
+    tao = max(origin.unstake(alpha) - STAKING_FEE, 0.0)
+    alpha_out = destination.stake(tao)
+    ratio = origin.price / destination.price
+    ratio_after = origin.price_after_unstake(alpha) / destination.price_after_stake(tao)
+    return SwapRoute(
+        name=SWAP,
+        alpha_out=alpha_out,
+        leftover_tao=0.0,
+        fees=STAKING_FEE + tx_fee,
+        value=alpha_out - tx_fee / destination.price,
+        min_tolerance=max(1 - ratio_after / ratio, 0.0),
+        limit_prices={SWAP: swap_limit_price(origin.price, destination.price, tolerance)},
+    )
+
+
+def simulate_unstake_stake(origin: Pool, destination: Pool, alpha: float, tolerance: float, tx_fee: float) -> SwapRoute:
+    """
+    remove_stake_limit then add_stake_limit in one batch. The stake leg's
+    amount is fixed when the batch is signed, so it stakes the unstake's
+    quote less the tolerance; had it asked for more TAO than the unstake
+    returned, the whole batch would fail.
+    """
+    tao = max(origin.unstake(alpha) - STAKING_FEE, 0.0)
+    stake_tao = tao * (1 - tolerance)
+    staked = max(stake_tao - STAKING_FEE, 0.0)
+    alpha_out = destination.stake(staked)
+    leftover = tao - stake_tao
+    # Leftover TAO counts as what staking it afterwards, into the pool this
+    # leg leaves behind, would buy
+    if destination.dynamic:
+        after = Pool(destination.netuid, destination.tao_in + staked, destination.alpha_in - alpha_out)
+    else:
+        after = destination
+    leftover_alpha = after.stake(max(leftover - STAKING_FEE, 0.0))
+    unstake_move = 1 - origin.price_after_unstake(alpha) / origin.price
+    stake_move = destination.price_after_stake(stake_tao) / destination.price - 1
+    return SwapRoute(
+        name=UNSTAKE_STAKE,
+        alpha_out=alpha_out,
+        leftover_tao=leftover,
+        fees=2 * STAKING_FEE + tx_fee,
+        value=alpha_out + leftover_alpha - tx_fee / destination.price,
+        min_tolerance=max(unstake_move, stake_move, 0.0),
+        limit_prices={
+            "remove_stake_limit": unstake_limit_price(origin.price * 1e9, tolerance),
+            "add_stake_limit": stake_limit_price(destination.price * 1e9, tolerance),
+        },
+        stake_tao=stake_tao,
+    )
+
+
+def plan_swap(origin: Pool, destination: Pool, alpha: float, tolerance: float, tx_fee: float = TX_FEE) -> List[SwapRoute]:
+    """
+    Simulate both routes for moving `alpha` from `origin` to `destination`.
+
+    Returns:
+        list: Routes best first; routes that execute in full at `tolerance`
+        come before those that would be rejected, then by value
+    """
+    if origin.netuid == destination.netuid:
+        raise ValueError("Origin and destination subnet are the same")
+    routes = [
+        simulate_swap(origin, destination, alpha, tolerance, tx_fee),
+        simulate_unstake_stake(origin, destination, alpha, tolerance, tx_fee),
+    ]
+    return sorted(routes, key=lambda route: (not route.feasible(tolerance), -route.value))
+
+
+SIMULATIONS = {SWAP: simulate_swap, UNSTAKE_STAKE: simulate_unstake_stake}
+
+
+def plan_min_tolerance(origin: Pool, destination: Pool, alpha: float, tolerance: float, route: Optional[str] = None,
+                       margin: float = MIN_TOLERANCE_MARGIN, tx_fee: float = TX_FEE) -> Tuple[SwapRoute, float]:
+    """
+    Plan a route at the smallest tolerance it executes with, plus `margin`.
+
+    A route's minimum tolerance can depend on the tolerance it is planned at:
+    the unstake-then-stake route stakes less the higher the tolerance, so at
+    a lower one it stakes more and moves the destination price further. The
+    route is re-planned at its own minimum until it is feasible there.
+
+    Args:
+        origin: Pool the alpha leaves
+        destination: Pool the alpha moves to
+        alpha: Origin alpha to move
+        tolerance: Tolerance to rank the routes at when `route` is not given
+        route: Route to plan, the best at `tolerance` if None
+        margin: Added to the minimum tolerance
+        tx_fee: Transaction fee of one extrinsic in TAO
+
+    Returns:
+        tuple: The route planned at the returned tolerance; it is still not
+        feasible there if no tolerance was found within MAX_TOLERANCE_ROUNDS
+    """
+    routes = plan_swap(origin, destination, alpha, tolerance, tx_fee)
+    planned = next((candidate for candidate in routes if candidate.name == route), routes[0])
+    for _ in range(MAX_TOLERANCE_ROUNDS):
+        tolerance = planned.min_tolerance + margin
+        planned = SIMULATIONS[planned.name](origin, destination, alpha, tolerance, tx_fee)
+        if planned.feasible(tolerance):
+            break
+    return planned, tolerance
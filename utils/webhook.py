@@ -0,0 +1,330 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from utils.logger import logger
+
+
+DISCORD_MAX_LENGTH = 2000
+MAX_BACKOFF = 300.0
+DELIVERED_KEY_RETENTION = 7 * 24 * 3600
+
+
+def split_content(content: str, limit: int = DISCORD_MAX_LENGTH) -> List[str]:
+    """Split a message that is longer than Discord's limit, preferring line breaks."""
+    chunks = []
+    while len(content) > limit:
+        cut = content.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(content[:cut])
+        content = content[cut:].lstrip("\n")
+    if content:
+        chunks.append(content)
+    return chunks
+
+
+def coalesce(
+    messages: List[Tuple[int, str]],
+    limit: int = DISCORD_MAX_LENGTH,
+    sent: Optional[Dict[int, int]] = None,
+) -> List[Tuple[List[int], str, Optional[int]]]:
+    """
+    Pack queued messages, in order, into as few posts as possible.
+
+    Args:
+        messages: (spool id, content) pairs for one webhook
+        limit: Maximum characters per post
+        sent: Chunks of split messages Discord already accepted, by spool id
+
+    Returns:
+        list: (spool ids, content, chunks sent) for each post. A message longer
+        than the limit is split across several posts, each carrying its id;
+        chunks sent is how many of its chunks are delivered once that post is
+        accepted, or None when the post completes its messages.
+    """
+    sent = sent or {}
+    posts = []
+    ids, parts, length = [], [], 0
+    for message_id, content in messages:
+        if len(content) > limit:
+            if parts:
+                posts.append((ids, "\n".join(parts), None))
+                ids, parts, length = [], [], 0
+            chunks = split_content(content, limit)
+            # Resume after the last accepted chunk, so none is posted twice
+            for index in range(sent.get(message_id, 0), len(chunks)):
+                done = index + 1
+                posts.append(([message_id], chunks[index], done if done < len(chunks) else None))
+            continue
+        extra = len(content) + (1 if parts else 0)
+        if parts and length + extra > limit:
+            posts.append((ids, "\n".join(parts), None))
+            ids, parts, length = [], [], 0
+            extra = len(content)
+        ids.append(message_id)
+        parts.append(content)
+        length += extra
+    if parts:
+        posts.append((ids, "\n".join(parts), None))
+    return posts
+
+
+class WebhookDelivery:
+    """
+    Durable, rate-limit aware delivery queue for Discord webhooks.
+
+    Messages are written to an SQLite spool before `enqueue` returns and are
+    removed only after Discord accepted them, so nothing is lost on restart.
+    A single asyncio worker with one keep-alive HTTP session drains the spool:
+    it coalesces due messages per webhook into posts under the 2000 character
+    limit, honors 429 `retry_after` and the rate limit headers per webhook, and
+    handles delayed messages by their `not_before` time instead of timers.
+    """
+
+    def __init__(
+        self,
+        spool_path: str,
+        username: Optional[str] = None,
+        avatar_url: Optional[str] = None,
+        max_attempts: int = 10,
+    ):
+        """
+        Initialize the WebhookDelivery.
+
+        Args:
+            spool_path: SQLite file used as the on-disk spool
+            username: Webhook username override
+            avatar_url: Webhook avatar override
+            max_attempts: Attempts before a failing message is dropped
+        """
+        self.username = username
+        self.avatar_url = avatar_url
+        self.max_attempts = max_attempts
+        self.blocked_until: Dict[str, float] = {}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(spool_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                content TEXT NOT NULL,
+                not_before REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                key TEXT UNIQUE,
+                chunks_sent INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(messages)")]
+        if "chunks_sent" not in columns:
+            # Spools written before split messages kept their progress
+            self._db.execute("ALTER TABLE messages ADD COLUMN chunks_sent INTEGER NOT NULL DEFAULT 0")
+        self._db.execute("CREATE TABLE IF NOT EXISTS delivered (key TEXT PRIMARY KEY, at REAL NOT NULL)")
+        self._db.execute("DELETE FROM delivered WHERE at < ?", (time.time() - DELIVERED_KEY_RETENTION,))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def enqueue(self, url: str, content: str, delay: float = 0.0, key: Optional[str] = None) -> bool:
+        """
+        Durably queue a message.
+
+        Args:
+            url: Webhook URL
+            content: Message content
+            delay: Seconds to wait before the message may be sent
+            key: Optional idempotency key; a message whose key is already queued or
+                was delivered recently is ignored
+
+        Returns:
+            bool: True if the message was queued, False if `key` was a duplicate
+        """
+        with self._lock:
+            if key is not None and self._db.execute(
+                "SELECT 1 FROM delivered WHERE key = ?", (key,)
+            ).fetchone():
+                return False
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO messages (url, content, not_before, key) VALUES (?, ?, ?, ?)",
+                (url, content, time.time() + delay, key),
+            )
+        self._wake()
+        return cursor.rowcount == 1
+
+    def pending(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM messages").fetchone()
+        return count
+
+    def start(self) -> None:
+        """Run the delivery worker on a background daemon thread."""
+        if self._thread is not None:
+            return
+        ready = threading.Event()
+
+        def _run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._wakeup = asyncio.Event()
+            ready.set()
+            self._loop.run_until_complete(self.run())
+
+        self._thread = threading.Thread(target=_run, name="webhook-delivery", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._running = False
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def run(self) -> None:
+        """Deliver messages until `stop` is called."""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._running = True
+        async with aiohttp.ClientSession() as session:
+            while self._running:
+                self._wakeup.clear()
+                try:
+                    await self.flush(session)
+                except Exception as e:
+                    logger.error(f"Error delivering webhook messages: {e}")
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._next_wakeup())
+                except asyncio.TimeoutError:
+                    pass
+
+    def _next_wakeup(self) -> float:
+        """Seconds until the next queued message becomes deliverable."""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute("SELECT url, MIN(not_before) FROM messages GROUP BY url").fetchall()
+        due = [max(not_before, self.blocked_until.get(url, 0)) for url, not_before in rows]
+        if not due:
+            return 60.0
+        return min(max(min(due) - now, 0.05), 60.0)
+
+    async def flush(self, session: aiohttp.ClientSession) -> None:
+        """Send every message that is currently due, one coalesced batch per webhook."""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, url, content, chunks_sent FROM messages WHERE not_before <= ? ORDER BY id",
+                (now,),
+            ).fetchall()
+
+        by_url: Dict[str, List[Tuple[int, str]]] = {}
+        sent: Dict[int, int] = {}
+        for message_id, url, content, chunks_sent in rows:
+            by_url.setdefault(url, []).append((message_id, content))
+            if chunks_sent:
+                sent[message_id] = chunks_sent
+
+        await asyncio.gather(*(
+            self._deliver(session, url, messages, sent)
+            for url, messages in by_url.items()
+            if self.blocked_until.get(url, 0) <= now
+        ))
+
+    async def _deliver(
+        self, session: aiohttp.ClientSession, url: str, messages: List[Tuple[int, str]], sent: Dict[int, int]
+    ) -> None:
+        for ids, content, chunks_sent in coalesce(messages, sent=sent):
+            status = await self._post(session, url, content)
+            if status is None:
+                # Rate limited: keep the rest for when the bucket resets
+                return
+            if 200 <= status < 300 and chunks_sent is not None:
+                self._chunk_sent(ids[0], chunks_sent)
+            elif 200 <= status < 300:
+                self._delete(ids)
+            elif 400 <= status < 500:
+                logger.error(f"Dropping {len(ids)} webhook message(s): HTTP {status}")
+                self._delete(ids)
+            else:
+                self._retry_later(ids)
+                return
+
+    async def _post(self, session: aiohttp.ClientSession, url: str, content: str) -> Optional[int]:
+        """
+        POST one message.
+
+        Returns:
+            int: HTTP status, 599 on network errors, or None when rate limited
+        """
+        data = {"content": content}
+        if self.username:
+            data["username"] = self.username
+        if self.avatar_url:
+            data["avatar_url"] = self.avatar_url
+        try:
+            async with session.post(url, json=data) as response:
+                if response.status == 429:
+                    retry_after = response.headers.get("Retry-After")
+                    try:
+                        body = await response.json(content_type=None)
+                        retry_after = body.get("retry_after", retry_after)
+                    except (json.JSONDecodeError, aiohttp.ContentTypeError, AttributeError):
+                        pass
+                    self.blocked_until[url] = time.time() + float(retry_after or 1.0)
+                    logger.warning(f"Webhook rate limited, retrying in {float(retry_after or 1.0):.2f}s")
+                    return None
+
+                if response.headers.get("X-RateLimit-Remaining") == "0":
+                    reset_after = float(response.headers.get("X-RateLimit-Reset-After", 0))
+                    self.blocked_until[url] = time.time() + reset_after
+
+                if response.status >= 400:
+                    logger.error(f"Failed to send message: {response.status}, {await response.text()}")
+                return response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Failed to send message: {e}")
+            return 599
+
+    def _delete(self, ids: List[int]) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO delivered (key, at) "
+                "SELECT key, ? FROM messages WHERE id = ? AND key IS NOT NULL",
+                [(time.time(), i) for i in ids],
+            )
+            self._db.executemany("DELETE FROM messages WHERE id = ?", [(i,) for i in ids])
+            self._db.execute("COMMIT")
+
+    def _chunk_sent(self, message_id: int, chunks_sent: int) -> None:
+        with self._lock:
+            self._db.execute("UPDATE messages SET chunks_sent = ? WHERE id = ?", (chunks_sent, message_id))
+
+    def _retry_later(self, ids: List[int]) -> None:
+        with self._lock:
+            for message_id in ids:
+                row = self._db.execute("SELECT attempts FROM messages WHERE id = ?", (message_id,)).fetchone()
+                if row is None:
+                    continue
+                attempts = row[0] + 1
+                if attempts >= self.max_attempts:
+                    logger.error(f"Dropping webhook message {message_id} after {attempts} attempts")
+                    self._db.execute("DELETE FROM messages WHERE id = ?", (message_id,))
+                    continue
+                self._db.execute(
+                    "UPDATE messages SET attempts = ?, not_before = ? WHERE id = ?",
+                    (attempts, time.time() + min(2 ** attempts, MAX_BACKOFF), message_id),
+                )